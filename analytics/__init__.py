@@ -1,7 +1,9 @@
 from analytics.badge_manager import BadgeManager
+from analytics.badge_catalogue import BadgeCatalogue
 from analytics.behavior_tracker import BehaviorTracker
 
 __all__ = [
     'BadgeManager',
+    'BadgeCatalogue',
     'BehaviorTracker'
 ]
\ No newline at end of file
@@ -0,0 +1,423 @@
+"""
+Badge Catalogue for Java Peer Review Training System.
+
+This module keeps the badge definitions in an in-process registry with their
+criteria JSON compiled once into evaluator objects, and provides the per-review
+user snapshot that every evaluator reads from. Evaluating all badges for a
+review therefore costs a single snapshot query instead of one query per badge.
+"""
+
+import os
+import json
+import time
+import logging
+import datetime
+import threading
+from typing import Dict, Any, List, Optional, Type
+
+from data.mysql_connection import MySQLConnection
+
+logger = logging.getLogger(__name__)
+
+# Registry of criteria type name -> evaluator class
+CRITERIA_TYPES: Dict[str, Type["BadgeCriteria"]] = {}
+
+
+def register_criteria(type_name: str):
+    """Class decorator registering an evaluator for a criteria ``type``."""
+    def decorator(cls):
+        cls.type_name = type_name
+        CRITERIA_TYPES[type_name] = cls
+        return cls
+    return decorator
+
+
+def _is_perfect(review_data: Dict[str, Any]) -> bool:
+    """Check whether a review found every problem."""
+    identified = review_data.get('identified_count', 0)
+    total = review_data.get('total_problems', 1)
+    return identified == total and total > 0
+
+
+class UserSnapshot:
+    """
+    Read-only view of a user's statistics taken once per review.
+
+    Holds the users row, current streaks, category statistics and the number
+    of perfect review sessions, all loaded with a single query.
+    """
+
+    def __init__(self, user_id: str, stats: Optional[Dict[str, Any]] = None,
+                 streaks: Optional[Dict[str, int]] = None,
+                 category_stats: Optional[Dict[str, Dict[str, Any]]] = None,
+                 perfect_review_count: int = 0):
+        self.user_id = user_id
+        self.stats = stats or {}
+        self.streaks = streaks or {}
+        self.category_stats = category_stats or {}
+        self.perfect_review_count = perfect_review_count
+
+    @property
+    def total_points(self) -> int:
+        return self.stats.get('total_points', 0) or 0
+
+    @property
+    def created_at(self) -> Optional[datetime.datetime]:
+        return self.stats.get('created_at')
+
+    def streak(self, streak_type: str) -> int:
+        """Get the current streak count for a streak type."""
+        return self.streaks.get(streak_type, 0)
+
+    @classmethod
+    def load(cls, db: MySQLConnection, user_id: str) -> Optional["UserSnapshot"]:
+        """
+        Load a snapshot for a user in one round trip.
+
+        Args:
+            db: Database connection
+            user_id: The user's ID
+
+        Returns:
+            UserSnapshot, or None if the user does not exist
+        """
+        query = """
+            SELECT u.uid, u.reviews_completed, u.score, u.total_points, u.perfect_reviews_count,
+                   u.average_accuracy, u.total_session_time, u.created_at, u.last_activity,
+                   (SELECT JSON_OBJECTAGG(s.streak_type, s.current_streak)
+                    FROM user_streaks s WHERE s.user_id = u.uid) AS streaks,
+                   (SELECT JSON_ARRAYAGG(JSON_OBJECT(
+                        'category_name', c.category_name,
+                        'encountered', c.encountered,
+                        'identified', c.identified,
+                        'mastery_level', c.mastery_level))
+                    FROM error_category_stats c WHERE c.user_id = u.uid) AS category_stats,
+                   (SELECT COUNT(*) FROM review_sessions r
+                    WHERE r.user_id = u.uid AND r.accuracy_percentage = 100.0) AS perfect_review_count
+            FROM users u
+            WHERE u.uid = %s
+        """
+        row = db.execute_query(query, (user_id,), fetch_one=True)
+        if not row:
+            return None
+
+        streaks = _parse_json(row.pop('streaks', None)) or {}
+        category_rows = _parse_json(row.pop('category_stats', None)) or []
+        perfect_review_count = row.pop('perfect_review_count', 0) or 0
+
+        category_stats = {}
+        for category in category_rows:
+            category_stats[category['category_name']] = {
+                'encountered': category['encountered'],
+                'identified': category['identified'],
+                'mastery_level': float(category['mastery_level'])
+            }
+
+        return cls(user_id, row, {k: int(v or 0) for k, v in streaks.items()},
+                   category_stats, int(perfect_review_count))
+
+
+def _parse_json(value: Any) -> Any:
+    """Parse a JSON column that the connector may return as str or bytes."""
+    if value is None:
+        return None
+    if isinstance(value, (bytes, bytearray)):
+        value = value.decode('utf-8')
+    if isinstance(value, str):
+        try:
+            return json.loads(value)
+        except json.JSONDecodeError:
+            logger.warning("Invalid JSON in badge snapshot column")
+            return None
+    return value
+
+
+class BadgeCriteria:
+    """
+    Compiled badge criteria.
+
+    Subclasses read their parameters from the criteria JSON once, in
+    ``__init__``, and implement ``evaluate`` against a UserSnapshot.
+    Unknown criteria types compile to this base class, which never
+    adds progress.
+    """
+
+    type_name = ""
+
+    def __init__(self, criteria: Dict[str, Any]):
+        self.raw = criteria
+        self.threshold = criteria.get('threshold', 1)
+
+    def evaluate(self, review_data: Dict[str, Any], snapshot: UserSnapshot) -> Dict[str, int]:
+        """
+        Calculate how much progress a review adds to this badge.
+
+        Returns:
+            Dict with 'increment' and 'target'
+        """
+        return {'increment': 0, 'target': self.threshold}
+
+
+@register_criteria('review_count')
+class ReviewCountCriteria(BadgeCriteria):
+    """Each completed review adds one step."""
+
+    def evaluate(self, review_data, snapshot):
+        return {'increment': 1, 'target': self.threshold}
+
+
+@register_criteria('perfect_reviews')
+class PerfectReviewsCriteria(BadgeCriteria):
+    """Each review that finds every problem adds one step."""
+
+    def __init__(self, criteria):
+        super().__init__(criteria)
+        self.threshold = criteria.get('threshold', 5)
+
+    def evaluate(self, review_data, snapshot):
+        return {'increment': 1 if _is_perfect(review_data) else 0, 'target': self.threshold}
+
+
+@register_criteria('consecutive_perfect')
+class ConsecutivePerfectCriteria(PerfectReviewsCriteria):
+    """Perfect reviews in a row; streak resets are handled by user_streaks."""
+
+    def __init__(self, criteria):
+        super().__init__(criteria)
+        self.threshold = criteria.get('threshold', 3)
+
+
+@register_criteria('speed_accuracy')
+class SpeedAccuracyCriteria(BadgeCriteria):
+    """One-time achievement for a fast and accurate review."""
+
+    def __init__(self, criteria):
+        super().__init__(criteria)
+        self.time_limit = criteria.get('time_limit', 120)
+        self.accuracy_threshold = criteria.get('accuracy_threshold', 80)
+
+    def evaluate(self, review_data, snapshot):
+        time_spent = review_data.get('time_spent_seconds', 999)
+        accuracy = review_data.get('accuracy_percentage', 0)
+        met = time_spent <= self.time_limit and accuracy >= self.accuracy_threshold
+        return {'increment': 1 if met else 0, 'target': 1}
+
+
+@register_criteria('category_mastery')
+class CategoryMasteryCriteria(BadgeCriteria):
+    """Mastery of a single error category."""
+
+    def __init__(self, criteria):
+        super().__init__(criteria)
+        self.category = criteria.get('category', '')
+        self.required_accuracy = criteria.get('accuracy', 85)
+        self.min_encounters = criteria.get('min_encounters', 10)
+
+    def evaluate(self, review_data, snapshot):
+        category_data = snapshot.category_stats.get(self.category, {})
+        if (category_data
+                and category_data.get('encountered', 0) >= self.min_encounters
+                and category_data.get('mastery_level', 0) >= self.required_accuracy):
+            return {'increment': 1, 'target': 1}
+        return {'increment': 0, 'target': self.threshold}
+
+
+@register_criteria('total_points')
+class TotalPointsCriteria(BadgeCriteria):
+    """Reaching a total points threshold."""
+
+    def __init__(self, criteria):
+        super().__init__(criteria)
+        self.points_threshold = criteria.get('threshold', 1000)
+
+    def evaluate(self, review_data, snapshot):
+        if snapshot.total_points >= self.points_threshold:
+            return {'increment': 1, 'target': 1}
+        return {'increment': 0, 'target': self.threshold}
+
+
+@register_criteria('points_timeframe')
+class PointsTimeframeCriteria(BadgeCriteria):
+    """Earning enough points within the first days after registration."""
+
+    def __init__(self, criteria):
+        super().__init__(criteria)
+        self.points_required = criteria.get('points', 500)
+        self.timeframe_days = criteria.get('days', 7)
+
+    def evaluate(self, review_data, snapshot):
+        created_at = snapshot.created_at
+        if created_at:
+            days_since_creation = (datetime.datetime.now() - created_at).days
+            if days_since_creation <= self.timeframe_days and snapshot.total_points >= self.points_required:
+                return {'increment': 1, 'target': 1}
+        return {'increment': 0, 'target': self.threshold}
+
+
+@register_criteria('consecutive_days')
+class ConsecutiveDaysCriteria(BadgeCriteria):
+    """A daily practice streak of a given length."""
+
+    def __init__(self, criteria):
+        super().__init__(criteria)
+        self.threshold = criteria.get('threshold', 5)
+
+    def evaluate(self, review_data, snapshot):
+        if snapshot.streak('daily_practice') >= self.threshold:
+            return {'increment': 1, 'target': 1}
+        return {'increment': 0, 'target': self.threshold}
+
+
+@register_criteria('practice_sessions')
+class PracticeSessionsCriteria(BadgeCriteria):
+    """Each practice-mode session adds one step."""
+
+    def __init__(self, criteria):
+        super().__init__(criteria)
+        self.threshold = criteria.get('threshold', 10)
+
+    def evaluate(self, review_data, snapshot):
+        increment = 1 if review_data.get('session_type') == 'practice' else 0
+        return {'increment': increment, 'target': self.threshold}
+
+
+@register_criteria('feature_usage')
+class FeatureUsageCriteria(BadgeCriteria):
+    """Use of a specific feature, currently the error explorer."""
+
+    def __init__(self, criteria):
+        super().__init__(criteria)
+        self.feature = criteria.get('feature', '')
+        self.threshold = criteria.get('threshold', 10)
+
+    def evaluate(self, review_data, snapshot):
+        met = self.feature == 'error_explorer' and review_data.get('session_type') == 'practice'
+        return {'increment': 1 if met else 0, 'target': self.threshold}
+
+
+def compile_criteria(criteria: Any) -> Optional[BadgeCriteria]:
+    """
+    Compile a badge's criteria JSON into an evaluator.
+
+    Args:
+        criteria: Criteria as a JSON string or already-parsed dict
+
+    Returns:
+        BadgeCriteria instance, or None if the criteria are empty or invalid
+    """
+    try:
+        criteria = _parse_json(criteria)
+        if not criteria or not isinstance(criteria, dict):
+            return None
+        criteria_class = CRITERIA_TYPES.get(criteria.get('type', ''), BadgeCriteria)
+        return criteria_class(criteria)
+    except Exception as e:
+        logger.error(f"Error compiling badge criteria: {str(e)}")
+        return None
+
+
+class BadgeDefinition:
+    """A badge row from the catalogue with its compiled criteria."""
+
+    def __init__(self, row: Dict[str, Any]):
+        self.badge_id = row['badge_id']
+        self.name_en = row.get('name_en')
+        self.name_zh = row.get('name_zh')
+        self.description_en = row.get('description_en')
+        self.description_zh = row.get('description_zh')
+        self.icon = row.get('icon')
+        self.category = row.get('category')
+        self.difficulty = row.get('difficulty')
+        self.points = row.get('points', 10)
+        self.rarity = row.get('rarity')
+        self.is_active = bool(row.get('is_active', True))
+        self.criteria = compile_criteria(row.get('criteria'))
+
+    def localized(self, language: str) -> Dict[str, Any]:
+        """Get the badge as the dict shape used by award_badge."""
+        if language == 'zh':
+            name, description = self.name_zh, self.description_zh
+        else:
+            name, description = self.name_en, self.description_en
+        return {
+            'badge_id': self.badge_id,
+            'name': name,
+            'description': description,
+            'points': self.points
+        }
+
+
+class BadgeCatalogue:
+    """
+    Process-wide registry of badge definitions.
+
+    The badges table is read once and kept in memory until the TTL expires or
+    invalidate() is called, e.g. after an administrator edits the badges.
+    """
+
+    _instance = None
+
+    def __new__(cls):
+        """Ensure singleton instance."""
+        if cls._instance is None:
+            cls._instance = super(BadgeCatalogue, cls).__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        """Initialize the catalogue without loading it."""
+        if self._initialized:
+            return
+
+        self.db = MySQLConnection()
+        self.ttl_seconds = float(os.getenv("BADGE_CATALOGUE_TTL", "600"))
+        self._lock = threading.Lock()
+        self._badges: Dict[str, BadgeDefinition] = {}
+        self._loaded_at: Optional[float] = None
+        self._initialized = True
+
+    def invalidate(self) -> None:
+        """Drop the cached catalogue so the next access reloads it."""
+        with self._lock:
+            self._loaded_at = None
+
+    def _ensure_loaded(self) -> Dict[str, BadgeDefinition]:
+        """Load the catalogue if it is missing or older than the TTL."""
+        loaded_at = self._loaded_at
+        if loaded_at is not None and time.monotonic() - loaded_at < self.ttl_seconds:
+            return self._badges
+
+        with self._lock:
+            # Another thread may have reloaded while we waited for the lock
+            if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl_seconds:
+                return self._badges
+
+            query = """
+                SELECT badge_id, name_en, name_zh, description_en, description_zh,
+                       icon, category, difficulty, points, rarity, criteria, is_active
+                FROM badges
+            """
+            rows = self.db.execute_query(query)
+            if rows is None:
+                # Keep serving the previous catalogue if the reload failed
+                logger.warning("Could not load badge catalogue")
+                return self._badges
+
+            badges = {}
+            for row in rows:
+                badge = BadgeDefinition(row)
+                badges[badge.badge_id] = badge
+
+            self._badges = badges
+            self._loaded_at = time.monotonic()
+            logger.debug(f"Loaded badge catalogue: {len(badges)} badges")
+            return self._badges
+
+    def get(self, badge_id: str) -> Optional[BadgeDefinition]:
+        """Get a badge definition by ID."""
+        return self._ensure_loaded().get(badge_id)
+
+    def get_active_badges(self) -> List[BadgeDefinition]:
+        """Get all active badges with compiled criteria."""
+        return [badge for badge in self._ensure_loaded().values()
+                if badge.is_active and badge.criteria is not None]
@@ -10,6 +10,10 @@ import datetime
 import json
 from typing import Dict, Any, List, Optional, Tuple
 from data.mysql_connection import MySQLConnection
+from data.statement_registry import register_statement, READ, WRITE
+from data.partition_manager import PartitionManager
+from analytics.badge_catalogue import BadgeCatalogue, BadgeDefinition, UserSnapshot
+from analytics.leaderboard_ranking import LeaderboardRanking
 from utils.language_utils import get_current_language, t
 
 # Configure logging
@@ -34,6 +38,9 @@ class BadgeManager:
             return
             
         self.db = MySQLConnection()
+        self.partitions = PartitionManager()
+        self.catalogue = BadgeCatalogue()
+        self.ranking = LeaderboardRanking()
         self._initialized = True
         self.current_language = get_current_language()
         
@@ -49,6 +56,75 @@ class BadgeManager:
             'rising_star_days': 7
         }
     
+    # Update or create a badge progress record
+    _BADGE_PROGRESS_UPSERT = """
+    INSERT INTO badge_progress 
+    (user_id, badge_id, current_progress, target_progress, progress_data)
+    VALUES (%s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        current_progress = LEAST(target_progress, current_progress + VALUES(current_progress)),
+        progress_data = VALUES(progress_data),
+        last_updated = CURRENT_TIMESTAMP
+    """
+    
+    # Hot per-user statements, prepared once per pooled connection
+    _USER_BADGES = {
+        lang: register_statement(f"badges.user_badges_{lang}", f"""
+            SELECT b.badge_id, b.name_{lang} as name, b.description_{lang} as description, 
+                   b.icon, b.category, b.difficulty, b.points, ub.awarded_at
+            FROM badges b
+            JOIN user_badges ub ON b.badge_id = ub.badge_id
+            WHERE ub.user_id = %s
+            ORDER BY ub.awarded_at DESC
+        """, READ)
+        for lang in ("en", "zh")
+    }
+    _USER_TOTAL_POINTS = register_statement(
+        "badges.user_total_points", "SELECT total_points FROM users WHERE uid = %s", READ
+    )
+    _HAS_BADGE = register_statement("badges.has_badge", """
+        SELECT 1 AS awarded FROM user_badges 
+        WHERE user_id = %s AND badge_id = %s
+    """, READ)
+    _AWARD_BADGE = register_statement("badges.award_badge", """
+        INSERT INTO user_badges 
+        (user_id, badge_id) 
+        VALUES (%s, %s)
+    """, WRITE)
+    _MARK_PROGRESS_COMPLETED = register_statement("badges.mark_progress_completed", """
+        UPDATE badge_progress 
+        SET current_progress = target_progress,
+            last_updated = CURRENT_TIMESTAMP
+        WHERE user_id = %s AND badge_id = %s
+    """, WRITE)
+    _ADD_POINTS = register_statement("badges.add_points", """
+        UPDATE users 
+        SET total_points = total_points + %s 
+        WHERE uid = %s
+    """, WRITE)
+    _LOG_ACTIVITY = register_statement("badges.log_activity", """
+        INSERT INTO activity_log 
+        (user_id, activity_type, points, details_en, details_zh) 
+        VALUES (%s, %s, %s, %s, %s)
+    """, WRITE)
+    _TOUCH_BADGE_CHECK = register_statement(
+        "badges.touch_badge_check", "UPDATE users SET last_badge_check = NOW() WHERE uid = %s", WRITE
+    )
+    # activity_log is partitioned by month and expires, so all-time counts
+    # come from the users row and activity reads stay in the newest partitions
+    _PERFECT_REVIEW_COUNT = register_statement("badges.perfect_review_count", """
+        SELECT perfect_reviews_count AS perfect_count
+        FROM users
+        WHERE uid = %s
+    """, READ)
+    _RECENT_ACTIVITY_TYPES = register_statement("badges.recent_activity_types", """
+        SELECT activity_type
+        FROM activity_log
+        WHERE user_id = %s AND created_at >= %s
+        ORDER BY created_at DESC
+        LIMIT 3
+    """, READ)
+    
     def get_user_badges(self, user_id: str) -> List[Dict[str, Any]]:
         """
         Get all badges earned by a user.
@@ -66,20 +142,9 @@ class BadgeManager:
         self.current_language = get_current_language()
         
         try:
-            # Use language-specific field based on current language
-            name_field = f"name_{self.current_language}" if self.current_language == "en" or self.current_language == "zh" else "name_en"
-            desc_field = f"description_{self.current_language}" if self.current_language == "en" or self.current_language == "zh" else "description_en"
-            
-            query = f"""
-                SELECT b.badge_id, b.{name_field} as name, b.{desc_field} as description, 
-                       b.icon, b.category, b.difficulty, b.points, ub.awarded_at
-                FROM badges b
-                JOIN user_badges ub ON b.badge_id = ub.badge_id
-                WHERE ub.user_id = %s
-                ORDER BY ub.awarded_at DESC
-            """
-            
-            badges = self.db.execute_query(query, (user_id,))
+            # Use language-specific statement based on current language
+            statement = self._USER_BADGES.get(self.current_language, self._USER_BADGES["en"])
+            badges = self.db.execute_query(statement, (user_id,))
             return badges or []
                 
         except Exception as e:
@@ -100,15 +165,25 @@ class BadgeManager:
             return {"rank": 0, "total_users": 0}
         
         try:
+            # Served from the in-process ranking index without a query
+            rank_info = self.ranking.get_rank(user_id)
+            if rank_info is not None:
+                return rank_info
+            
             # Get the user's points
-            points_query = "SELECT total_points FROM users WHERE uid = %s"
-            result = self.db.execute_query(points_query, (user_id,), fetch_one=True)
+            result = self.db.execute_query(self._USER_TOTAL_POINTS, (user_id,), fetch_one=True)
             
             if not result:
                 return {"rank": 0, "total_users": 0}
             
             points = result.get("total_points", 0)
             
+            # Add users registered since the index was loaded
+            self.ranking.update(user_id, points)
+            rank_info = self.ranking.get_rank(user_id)
+            if rank_info is not None:
+                return rank_info
+            
             # Get the user's rank
             rank_query = """
                 SELECT COUNT(*) AS rank_pos
@@ -149,45 +224,69 @@ class BadgeManager:
             display_name_field = f"display_name_{self.current_language}" if self.current_language in ["en", "zh"] else "display_name_en"
             level_field = f"level_name_{self.current_language}" if self.current_language in ["en", "zh"] else "level_name_en"
             
-            # Build query with appropriate fields
+            badge_name_field = f"name_{self.current_language}" if self.current_language in ["en", "zh"] else "name_en"
+            
+            # One query: the top users plus each one's three best badges,
+            # ranked with ROW_NUMBER instead of a query per leader
             query = f"""
-                SELECT uid, {display_name_field} as display_name, total_points, {level_field} as level,
-                    (SELECT COUNT(*) FROM user_badges WHERE user_id = uid) AS badge_count
-                FROM users
-                WHERE total_points > 0
-                ORDER BY total_points DESC
-                LIMIT %s
+                WITH leaders AS (
+                    SELECT uid, {display_name_field} AS display_name, total_points, {level_field} AS level
+                    FROM users
+                    WHERE total_points > 0
+                    ORDER BY total_points DESC, uid
+                    LIMIT %s
+                ),
+                ranked_badges AS (
+                    SELECT ub.user_id, b.icon, b.{badge_name_field} AS name, b.category, b.difficulty,
+                        ROW_NUMBER() OVER (
+                            PARTITION BY ub.user_id
+                            ORDER BY 
+                                CASE b.difficulty 
+                                    WHEN 'hard' THEN 3 
+                                    WHEN 'medium' THEN 2 
+                                    WHEN 'easy' THEN 1 
+                                    ELSE 0 
+                                END DESC,
+                                ub.awarded_at DESC
+                        ) AS badge_rank,
+                        COUNT(*) OVER (PARTITION BY ub.user_id) AS badge_count
+                    FROM user_badges ub
+                    JOIN badges b ON b.badge_id = ub.badge_id
+                    WHERE ub.user_id IN (SELECT uid FROM leaders)
+                )
+                SELECT l.uid, l.display_name, l.total_points, l.level,
+                    COALESCE(rb.badge_count, 0) AS badge_count,
+                    rb.icon, rb.name AS badge_name, rb.category, rb.difficulty
+                FROM leaders l
+                LEFT JOIN ranked_badges rb ON rb.user_id = l.uid AND rb.badge_rank <= 3
+                ORDER BY l.total_points DESC, l.uid, rb.badge_rank
             """
             
-            leaders = self.db.execute_query(query, (limit,))
+            rows = self.db.execute_query(query, (limit,))
             
-            if not leaders:
+            if not rows:
                 return []
             
-            # Add rank and get top badges for each user
-            for i, leader in enumerate(leaders, 1):
-                leader["rank"] = i
-                
-                # Get top 3 badges for this user
-                badge_query = f"""
-                    SELECT b.icon, b.{f"name_{self.current_language}" if self.current_language in ["en", "zh"] else "name_en"} as name,
-                        b.category, b.difficulty
-                    FROM badges b
-                    JOIN user_badges ub ON b.badge_id = ub.badge_id
-                    WHERE ub.user_id = %s
-                    ORDER BY 
-                        CASE b.difficulty 
-                            WHEN 'hard' THEN 3 
-                            WHEN 'medium' THEN 2 
-                            WHEN 'easy' THEN 1 
-                            ELSE 0 
-                        END DESC,
-                        ub.awarded_at DESC
-                    LIMIT 3
-                """
-                
-                badges = self.db.execute_query(badge_query, (leader["uid"],))
-                leader["top_badges"] = badges or []
+            # Fold the badge rows back into one entry per leader
+            leaders = []
+            for row in rows:
+                if not leaders or leaders[-1]["uid"] != row["uid"]:
+                    leaders.append({
+                        "uid": row["uid"],
+                        "display_name": row["display_name"],
+                        "total_points": row["total_points"],
+                        "level": row["level"],
+                        "badge_count": row["badge_count"],
+                        "rank": len(leaders) + 1,
+                        "top_badges": []
+                    })
+                if row.get("badge_name") is not None:
+                    leaders[-1]["top_badges"].append({
+                        "icon": row["icon"],
+                        "name": row["badge_name"],
+                        "category": row["category"],
+                        "difficulty": row["difficulty"]
+                    })
                     
             return leaders
                 
@@ -218,29 +317,38 @@ class BadgeManager:
         try:
             logger.info(f"Processing review completion for user {user_id}")
             
-            # 1. Store review session data
-            session_id = self._store_review_session(user_id, review_data)
-            
-            # 2. Update user statistics
-            self._update_user_statistics(user_id, review_data)
-            
-            # 3. Update category statistics
-            self._update_category_statistics(user_id, review_data)
-            
-            # 4. Update streaks
-            self._update_user_streaks(user_id, review_data)
-            
-            # 5. Award points for the review
-            points_awarded = self._calculate_and_award_points(user_id, review_data)
-            
-            # 6. Update badge progress for all relevant badges
-            self._update_all_badge_progress(user_id, review_data)
+            # All writes below run as one unit of work: they share a single
+            # connection and are committed together, or not at all
+            with self.db.transaction() as transaction:
+                # 1. Store review session data
+                session_id = self._store_review_session(user_id, review_data)
+                
+                # 2. Update user statistics
+                self._update_user_statistics(user_id, review_data)
+                
+                # 3. Update category statistics
+                self._update_category_statistics(user_id, review_data)
+                
+                # 4. Update streaks
+                self._update_user_streaks(user_id, review_data)
+                
+                # 5. Award points for the review
+                points_awarded = self._calculate_and_award_points(user_id, review_data)
+                
+                # Read the updated user statistics once for all badge evaluations
+                snapshot = UserSnapshot.load(self.db, user_id)
+                
+                # 6. Update badge progress for all relevant badges
+                self._update_all_badge_progress(user_id, review_data, snapshot)
 
-            # 7. Check and award badges
-            awarded_badges = self._check_and_award_all_badges(user_id, review_data)
+                # 7. Check and award badges
+                awarded_badges = self._check_and_award_all_badges(user_id, review_data, snapshot)
+                
+                # 8. Update badge check timestamp
+                self._update_badge_check_timestamp(user_id)
             
-            # 8. Update badge check timestamp
-            self._update_badge_check_timestamp(user_id)
+            if not transaction.committed:
+                raise RuntimeError(f"Review completion rolled back: {transaction.error}")
             
             result = {
                 'success': True,
@@ -296,183 +404,63 @@ class BadgeManager:
             logger.error(f"Error storing review session: {str(e)}")
             return ""
     
-    def _update_all_badge_progress(self, user_id: str, review_data: Dict[str, Any]) -> None:
+    def _update_all_badge_progress(self, user_id: str, review_data: Dict[str, Any],
+                                   snapshot: Optional[UserSnapshot] = None) -> None:
         """Update badge progress for all applicable badges based on review completion."""
         try:
-            # Get all badges that could potentially be progressed
-            badges_query = """
-            SELECT badge_id, criteria, name_en, name_zh
-            FROM badges 
-            WHERE is_active = TRUE
-            """
-            
-            badges = self.db.execute_query(badges_query) or []
-            
-            for badge in badges:
-                self._update_badge_progress(user_id, badge['badge_id'], badge['criteria'], review_data)
+            if snapshot is None:
+                snapshot = UserSnapshot.load(self.db, user_id) or UserSnapshot(user_id)
+            
+            progress_rows = []
+            for badge in self.catalogue.get_active_badges():
+                row = self._build_badge_progress_row(user_id, badge, review_data, snapshot)
+                if row:
+                    progress_rows.append(row)
+            
+            # Send every progress upsert as one multi-row statement
+            if progress_rows:
+                self.db.execute_many(self._BADGE_PROGRESS_UPSERT, progress_rows)
+                logger.debug(f"Updated badge progress for {len(progress_rows)} badges")
                 
         except Exception as e:
             logger.error(f"Error updating all badge progress: {str(e)}")
 
-    def _update_badge_progress(self, user_id: str, badge_id: str, criteria_json: str, review_data: Dict[str, Any]) -> None:
-        """Update progress for a specific badge based on review completion."""
+    def _build_badge_progress_row(self, user_id: str, badge: BadgeDefinition, 
+                                  review_data: Dict[str, Any], snapshot: UserSnapshot) -> Optional[Tuple]:
+        """
+        Build the badge_progress upsert parameters for a specific badge.
+        
+        Returns:
+            Parameter tuple for _BADGE_PROGRESS_UPSERT, or None if the review
+            adds no progress to this badge
+        """
         try:
-            # Parse badge criteria
-            criteria = json.loads(criteria_json) if isinstance(criteria_json, str) else criteria_json
+            # Calculate progress with the badge's compiled criteria
+            progress_update = badge.criteria.evaluate(review_data, snapshot)
             
-            if not criteria:
-                return
+            if progress_update['increment'] <= 0:
+                return None
             
-            # Calculate progress based on badge type
-            progress_update = self._calculate_badge_progress_update(criteria, review_data, user_id)
+            progress_data = json.dumps({
+                'last_review_date': datetime.datetime.now().isoformat(),
+                'last_increment': progress_update['increment'],
+                'review_type': review_data.get('session_type', 'regular'),
+                'accuracy': review_data.get('accuracy_percentage', 0)
+            })
             
-            if progress_update['increment'] > 0:
-                # Update or create badge progress record
-                upsert_query = """
-                INSERT INTO badge_progress 
-                (user_id, badge_id, current_progress, target_progress, progress_data)
-                VALUES (%s, %s, %s, %s, %s)
-                ON DUPLICATE KEY UPDATE
-                    current_progress = LEAST(target_progress, current_progress + VALUES(current_progress)),
-                    progress_data = VALUES(progress_data),
-                    last_updated = CURRENT_TIMESTAMP
-                """
-                
-                progress_data = json.dumps({
-                    'last_review_date': datetime.datetime.now().isoformat(),
-                    'last_increment': progress_update['increment'],
-                    'review_type': review_data.get('session_type', 'regular'),
-                    'accuracy': review_data.get('accuracy_percentage', 0)
-                })
-                
-                params = (
-                    user_id,
-                    badge_id,
-                    progress_update['increment'],
-                    progress_update['target'],
-                    progress_data
-                )
-                
-                self.db.execute_query(upsert_query, params)
-                
-                logger.debug(f"Updated badge progress for {badge_id}: +{progress_update['increment']} (target: {progress_update['target']})")
-                
-        except Exception as e:
-            logger.error(f"Error updating badge progress for {badge_id}: {str(e)}")
-
-    def _calculate_badge_progress_update(self, criteria: Dict[str, Any], review_data: Dict[str, Any], user_id: str) -> Dict[str, int]:
-        """Calculate how much progress should be added for a badge based on review completion."""
-        try:
-            badge_type = criteria.get('type', '')
-            increment = 0
-            target = criteria.get('threshold', 1)
-            
-            # Review count based badges
-            if badge_type == 'review_count':
-                increment = 1  # Each review adds 1 to progress
-                target = criteria.get('threshold', 1)
-                
-            # Perfect review badges
-            elif badge_type == 'perfect_reviews':
-                identified = review_data.get('identified_count', 0)
-                total = review_data.get('total_problems', 1)
-                if identified == total and total > 0:
-                    increment = 1
-                target = criteria.get('threshold', 5)
-                
-            # Consecutive perfect reviews
-            elif badge_type == 'consecutive_perfect':
-                identified = review_data.get('identified_count', 0)
-                total = review_data.get('total_problems', 1)
-                if identified == total and total > 0:
-                    # Check if this continues a streak
-                    current_streak = self._get_consecutive_perfect_count(user_id)
-                    increment = 1 if current_streak > 0 else 1  # Always increment, streak logic handled elsewhere
-                target = criteria.get('threshold', 3)
-                
-            # Speed and accuracy badges
-            elif badge_type == 'speed_accuracy':
-                time_spent = review_data.get('time_spent_seconds', 999)
-                accuracy = review_data.get('accuracy_percentage', 0)
-                time_limit = criteria.get('time_limit', 120)
-                accuracy_threshold = criteria.get('accuracy_threshold', 80)
-                
-                if time_spent <= time_limit and accuracy >= accuracy_threshold:
-                    increment = 1
-                target = 1  # Usually one-time achievement
-                
-            # Category mastery badges
-            elif badge_type == 'category_mastery':
-                category = criteria.get('category', '')
-                required_accuracy = criteria.get('accuracy', 85)
-                min_encounters = criteria.get('min_encounters', 10)
-                
-                # Check current category performance
-                category_stats = self._get_category_statistics(user_id)
-                category_data = category_stats.get(category, {})
-                
-                if category_data:
-                    mastery_level = category_data.get('mastery_level', 0)
-                    encounters = category_data.get('encountered', 0)
-                    
-                    if encounters >= min_encounters and mastery_level >= required_accuracy:
-                        increment = 1
-                        target = 1
-                
-            # Points-based badges
-            elif badge_type == 'total_points':
-                points_threshold = criteria.get('threshold', 1000)
-                # Get current total points
-                current_points = self._get_user_total_points(user_id)
-                points_awarded = review_data.get('points_awarded', 0)
-                
-                if current_points >= points_threshold:
-                    increment = 1
-                    target = 1
-                
-            # Time-based point achievements (rising star)
-            elif badge_type == 'points_timeframe':
-                points_required = criteria.get('points', 500)
-                timeframe_days = criteria.get('days', 7)
-                
-                # Check if user is within timeframe and has enough points
-                user_stats = self._get_user_stats(user_id)
-                if user_stats:
-                    created_at = user_stats.get('created_at')
-                    total_points = user_stats.get('total_points', 0)
-                    
-                    if created_at:
-                        days_since_creation = (datetime.datetime.now() - created_at).days
-                        if days_since_creation <= timeframe_days and total_points >= points_required:
-                            increment = 1
-                            target = 1
-                
-            # Daily practice streaks
-            elif badge_type == 'consecutive_days':
-                target = criteria.get('threshold', 5)
-                current_streak = self._get_streak_count(user_id, 'daily_practice')
-                if current_streak >= target:
-                    increment = 1
-                    target = 1
-                
-            # Practice session badges
-            elif badge_type == 'practice_sessions':
-                if review_data.get('session_type') == 'practice':
-                    increment = 1
-                target = criteria.get('threshold', 10)
-                
-            # Feature usage badges
-            elif badge_type == 'feature_usage':
-                feature = criteria.get('feature', '')
-                if feature == 'error_explorer' and review_data.get('session_type') == 'practice':
-                    increment = 1
-                target = criteria.get('threshold', 10)
-            
-            return {'increment': increment, 'target': target}
+            logger.debug(f"Badge progress for {badge.badge_id}: +{progress_update['increment']} (target: {progress_update['target']})")
             
+            return (
+                user_id,
+                badge.badge_id,
+                progress_update['increment'],
+                progress_update['target'],
+                progress_data
+            )
+                
         except Exception as e:
-            logger.error(f"Error calculating badge progress: {str(e)}")
-            return {'increment': 0, 'target': 1}
+            logger.error(f"Error calculating badge progress for {badge.badge_id}: {str(e)}")
+            return None
 
     def get_user_badge_progress(self, user_id: str) -> List[Dict[str, Any]]:
         """Get all badge progress for a user."""
@@ -602,28 +590,31 @@ class BadgeManager:
             identified_count = review_data.get('identified_count', 0)
             total_problems = review_data.get('total_problems', 1)
             
+            # Insert or update category stats
+            upsert_query = """
+                INSERT INTO error_category_stats 
+                (user_id, category_name, encountered, identified)
+                VALUES (%s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE
+                    encountered = encountered + VALUES(encountered),
+                    identified = identified + VALUES(identified),
+                    mastery_level = CASE 
+                        WHEN (encountered + VALUES(encountered)) > 0 
+                        THEN ((identified + VALUES(identified)) * 100.0) / (encountered + VALUES(encountered))
+                        ELSE 0 
+                    END
+            """
+            
+            rows = []
             for category in categories:
                 # Calculate category performance (simplified - assume equal distribution)
                 category_encountered = 1
                 category_identified = 1 if identified_count >= len(categories) else 0
-                
-                # Insert or update category stats
-                upsert_query = """
-                    INSERT INTO error_category_stats 
-                    (user_id, category_name, encountered, identified)
-                    VALUES (%s, %s, %s, %s)
-                    ON DUPLICATE KEY UPDATE
-                        encountered = encountered + VALUES(encountered),
-                        identified = identified + VALUES(identified),
-                        mastery_level = CASE 
-                            WHEN (encountered + VALUES(encountered)) > 0 
-                            THEN ((identified + VALUES(identified)) * 100.0) / (encountered + VALUES(encountered))
-                            ELSE 0 
-                        END
-                """
-                
-                params = (user_id, category, category_encountered, category_identified)
-                self.db.execute_query(upsert_query, params)
+                rows.append((user_id, category, category_encountered, category_identified))
+            
+            # One multi-row upsert for all categories
+            if rows:
+                self.db.execute_many(upsert_query, rows)
             
             logger.debug(f"Updated category statistics for {len(categories)} categories")
             
@@ -737,21 +728,24 @@ class BadgeManager:
             logger.error(f"Error calculating points: {str(e)}")
             return 0
     
-    def _check_and_award_all_badges(self, user_id: str, review_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def _check_and_award_all_badges(self, user_id: str, review_data: Dict[str, Any],
+                                    snapshot: Optional[UserSnapshot] = None) -> List[Dict[str, Any]]:
         """Check all badge criteria and award appropriate badges."""
         awarded_badges = []
         
         try:
             # Get user stats
-            user_stats = self._get_user_stats(user_id)
-            if not user_stats:
+            if snapshot is None:
+                snapshot = UserSnapshot.load(self.db, user_id)
+            if not snapshot:
                 return awarded_badges
+            user_stats = snapshot.stats
             
             # Check each badge category
             awarded_badges.extend(self._check_completion_badges(user_id, user_stats, review_data))
-            awarded_badges.extend(self._check_skill_badges(user_id, user_stats, review_data))
-            awarded_badges.extend(self._check_consistency_badges(user_id, user_stats, review_data))
-            awarded_badges.extend(self._check_mastery_badges(user_id, user_stats, review_data))
+            awarded_badges.extend(self._check_skill_badges(user_id, snapshot, review_data))
+            awarded_badges.extend(self._check_consistency_badges(user_id, snapshot, review_data))
+            awarded_badges.extend(self._check_mastery_badges(user_id, snapshot, review_data))
             awarded_badges.extend(self._check_special_badges(user_id, user_stats, review_data))
             
             return awarded_badges
@@ -781,7 +775,7 @@ class BadgeManager:
         
         return badges
     
-    def _check_skill_badges(self, user_id: str, user_stats: Dict, review_data: Dict) -> List[Dict[str, Any]]:
+    def _check_skill_badges(self, user_id: str, snapshot: UserSnapshot, review_data: Dict) -> List[Dict[str, Any]]:
         """Check skill-based badges."""
         badges = []
         
@@ -795,7 +789,7 @@ class BadgeManager:
         
         if is_perfect:
             # Update perfect review progress
-            perfect_count = self._get_perfect_review_count(user_id)
+            perfect_count = snapshot.perfect_review_count
             
             # Bug Hunter badge - 5 perfect reviews
             if perfect_count >= self.BADGE_CRITERIA['perfect_review_threshold']:
@@ -804,7 +798,7 @@ class BadgeManager:
                     badges.append(badge.get('badge', {}))
             
             # Check consecutive perfect reviews
-            consecutive_perfect = self._get_consecutive_perfect_count(user_id)
+            consecutive_perfect = snapshot.streak('perfect_reviews')
             if consecutive_perfect >= self.BADGE_CRITERIA['consecutive_perfect_threshold']:
                 badge = self.award_badge(user_id, 'perfectionist')
                 if badge.get('success'):
@@ -819,12 +813,12 @@ class BadgeManager:
         
         return badges
     
-    def _check_consistency_badges(self, user_id: str, user_stats: Dict, review_data: Dict) -> List[Dict[str, Any]]:
+    def _check_consistency_badges(self, user_id: str, snapshot: UserSnapshot, review_data: Dict) -> List[Dict[str, Any]]:
         """Check consistency-based badges."""
         badges = []
         
         # Get streak data
-        daily_streak = self._get_streak_count(user_id, 'daily_practice')
+        daily_streak = snapshot.streak('daily_practice')
         
         consistency_thresholds = [
             (5, 'consistency-champ'),
@@ -840,12 +834,12 @@ class BadgeManager:
         
         return badges
     
-    def _check_mastery_badges(self, user_id: str, user_stats: Dict, review_data: Dict) -> List[Dict[str, Any]]:
+    def _check_mastery_badges(self, user_id: str, snapshot: UserSnapshot, review_data: Dict) -> List[Dict[str, Any]]:
         """Check category mastery badges."""
         badges = []
         
         # Get category statistics
-        category_stats = self._get_category_statistics(user_id)
+        category_stats = snapshot.category_stats
         
         mastery_badges = {
             'Logical Errors': 'logic-guru',
@@ -901,106 +895,14 @@ class BadgeManager:
         
         return badges
     
-    
-    
-    def _get_perfect_review_count(self, user_id: str) -> int:
-        """Get count of perfect reviews."""
-        try:
-            query = """
-                SELECT COUNT(*) as count 
-                FROM review_sessions 
-                WHERE user_id = %s AND accuracy_percentage = 100.0
-            """
-            result = self.db.execute_query(query, (user_id,), fetch_one=True)
-            return result.get('count', 0) if result else 0
-        except Exception as e:
-            logger.error(f"Error getting perfect review count: {str(e)}")
-            return 0
-    
     def _update_badge_check_timestamp(self, user_id: str) -> None:
         """Update the timestamp of last badge check."""
         try:
-            query = "UPDATE users SET last_badge_check = NOW() WHERE uid = %s"
-            self.db.execute_query(query, (user_id,))
+            # Nothing reads this back during review processing, so it can be batched
+            self.db.defer_write(self._TOUCH_BADGE_CHECK, (user_id,))
         except Exception as e:
             logger.error(f"Error updating badge check timestamp: {str(e)}")
     
-    
-    def _check_point_badges(self, user_id: str, total_points: int) -> None:
-        """
-        Check if a user qualifies for any point-based badges.
-        
-        Args:
-            user_id: The user's ID
-            total_points: The user's total points
-        """
-        # Rising Star badge - 500 points in first week
-        if total_points >= 500:
-            # Check when the user joined
-            query = "SELECT created_at FROM users WHERE uid = %s"
-            result = self.db.execute_query(query, (user_id,), fetch_one=True)
-            
-            if result:
-                created_at = result.get("created_at")
-                now = datetime.datetime.now()
-                
-                if created_at and (now - created_at).days <= 7:
-                    self.award_badge(user_id, "rising-star")
-
-    def _check_category_mastery(self, user_id: str, category: str, stats: Dict[str, Any]) -> None:
-        """
-        Check if a user qualifies for category mastery badges.
-        
-        Args:
-            user_id: The user's ID
-            category: The error category
-            stats: Category statistics
-        """
-        # Required mastery level and minimum encounters to earn the badge
-        MASTERY_THRESHOLD = 0.85
-        MIN_ENCOUNTERS = 10
-        
-        if stats and stats.get("mastery_level", 0) >= MASTERY_THRESHOLD and stats.get("encountered", 0) >= MIN_ENCOUNTERS:
-            # Update current language before mapping categories
-            self.current_language = get_current_language()
-            
-            # Map categories to badge IDs - support both English and Chinese categories
-            # Categories are not translated with t() because they need to match exactly what's in the database
-            category_badges = {
-                t("logical"): "logic-guru",
-                "Logical": "logic-guru",
-                "邏輯錯誤": "logic-guru",  # Chinese equivalent
-                t("syntax"): "syntax-specialist",
-                "Syntax": "syntax-specialist",
-                "語法錯誤": "syntax-specialist",  # Chinese equivalent
-                t("code_quality"): "quality-inspector",
-                "Code Quality": "quality-inspector",
-                "程式碼品質": "quality-inspector",  # Chinese equivalent
-                t("standard_violation"): "standards-expert",
-                "Standard Violation": "standards-expert",
-                "標準違規": "standards-expert",  # Chinese equivalent
-                t("java_specific"): "java-maven",
-                "Java Specific": "java-maven",
-                "Java 特定錯誤": "java-maven"  # Chinese equivalent
-            }
-            
-            # Award the appropriate badge if available
-            badge_id = category_badges.get(category)
-            if badge_id:
-                self.award_badge(user_id, badge_id)
-            
-        # Check for "Full Spectrum" badge - at least one error in each category
-        query = """
-            SELECT COUNT(DISTINCT category) AS category_count
-            FROM error_category_stats
-            WHERE user_id = %s AND identified > 0
-        """
-        
-        result = self.db.execute_query(query, (user_id,), fetch_one=True)
-        
-        if result and result.get("category_count", 0) >= 5:  # Assuming 5 main categories
-            self.award_badge(user_id, "full-spectrum")
-    
     def check_review_completion_badges(self, user_id: str, reviews_completed: int, 
                                     all_errors_found: bool) -> None:
         """
@@ -1023,16 +925,11 @@ class BadgeManager:
         
         # Bug Hunter badge - find all errors in at least 5 reviews
         if all_errors_found:
-            # Count how many perfect reviews the user has
-            query = """
-                SELECT COUNT(*) AS perfect_count
-                FROM activity_log
-                WHERE user_id = %s AND activity_type = 'perfect_review'
-            """
+            # Runs before process_review_completion() counts this review in
+            # perfect_reviews_count, so the current review is added here
+            result = self.db.execute_query(self._PERFECT_REVIEW_COUNT, (user_id,), fetch_one=True)
             
-            result = self.db.execute_query(query, (user_id,), fetch_one=True)
-            
-            if result and result.get("perfect_count", 0) >= 5:
+            if result and (result.get("perfect_count") or 0) + 1 >= 5:
                 self.award_badge(user_id, "bug-hunter")            
           
                 self.db.execute_query(
@@ -1042,15 +939,8 @@ class BadgeManager:
           
             
             # Perfectionist badge - 3 consecutive perfect reviews
-            query = """
-                SELECT activity_type
-                FROM activity_log
-                WHERE user_id = %s
-                ORDER BY created_at DESC
-                LIMIT 3
-            """
-            
-            result = self.db.execute_query(query, (user_id,))
+            result = self.db.execute_query(self._RECENT_ACTIVITY_TYPES,
+                                           (user_id, self.partitions.hot_window_start()))
             
             if result and len(result) >= 3:
                 all_perfect = all(r.get("activity_type") == "perfect_review" for r in result)
@@ -1126,82 +1016,6 @@ class BadgeManager:
             logger.error(f"{t('error_updating_consecutive_days')}: {str(e)}")
             return {"success": False, "error": str(e)}
         
-    def _get_user_total_points(self, user_id: str) -> int:
-        """Get user's total points."""
-        try:
-            query = "SELECT total_points FROM users WHERE uid = %s"
-            result = self.db.execute_query(query, (user_id,), fetch_one=True)
-            return result.get('total_points', 0) if result else 0
-        except Exception as e:
-            logger.error(f"Error getting user total points: {str(e)}")
-            return 0
-    
-    def _get_consecutive_perfect_count(self, user_id: str) -> int:
-        """Get current consecutive perfect review count."""
-        try:
-            query = """
-                SELECT current_streak 
-                FROM user_streaks 
-                WHERE user_id = %s AND streak_type = 'perfect_reviews'
-            """
-            result = self.db.execute_query(query, (user_id,), fetch_one=True)
-            return result.get('current_streak', 0) if result else 0
-        except Exception as e:
-            logger.error(f"Error getting consecutive perfect count: {str(e)}")
-            return 0
-    
-    def _get_streak_count(self, user_id: str, streak_type: str) -> int:
-        """Get current streak count for a specific type."""
-        try:
-            query = """
-                SELECT current_streak 
-                FROM user_streaks 
-                WHERE user_id = %s AND streak_type = %s
-            """
-            result = self.db.execute_query(query, (user_id, streak_type), fetch_one=True)
-            return result.get('current_streak', 0) if result else 0
-        except Exception as e:
-            logger.error(f"Error getting streak count: {str(e)}")
-            return 0
-    
-    def _get_category_statistics(self, user_id: str) -> Dict[str, Dict[str, Any]]:
-        """Get category-specific statistics."""
-        try:
-            query = """
-                SELECT category_name, encountered, identified, mastery_level
-                FROM error_category_stats 
-                WHERE user_id = %s
-            """
-            results = self.db.execute_query(query, (user_id,))
-            
-            stats = {}
-            for result in results or []:
-                stats[result['category_name']] = {
-                    'encountered': result['encountered'],
-                    'identified': result['identified'],
-                    'mastery_level': float(result['mastery_level'])
-                }
-            
-            return stats
-        except Exception as e:
-            logger.error(f"Error getting category statistics: {str(e)}")
-            return {}
-    
-    def _get_user_stats(self, user_id: str) -> Optional[Dict[str, Any]]:
-        """Get comprehensive user statistics."""
-        try:
-            query = """
-                SELECT uid, reviews_completed, score, total_points, perfect_reviews_count,
-                       average_accuracy, total_session_time, created_at, last_activity
-                FROM users 
-                WHERE uid = %s
-            """
-            return self.db.execute_query(query, (user_id,), fetch_one=True)
-        except Exception as e:
-            logger.error(f"Error getting user stats: {str(e)}")
-            return None
-    
-   
     def get_user_badges(self, user_id: str) -> List[Dict[str, Any]]:
         """Get all badges earned by a user."""
         if not user_id:
@@ -1210,19 +1024,9 @@ class BadgeManager:
         self.current_language = get_current_language()
         
         try:
-            name_field = f"name_{self.current_language}" if self.current_language == "en" or self.current_language == "zh" else "name_en"
-            desc_field = f"description_{self.current_language}" if self.current_language == "en" or self.current_language == "zh" else "description_en"
-            
-            query = f"""
-                SELECT b.badge_id, b.{name_field} as name, b.{desc_field} as description, 
-                       b.icon, b.category, b.difficulty, b.points, ub.awarded_at
-                FROM badges b
-                JOIN user_badges ub ON b.badge_id = ub.badge_id
-                WHERE ub.user_id = %s
-                ORDER BY ub.awarded_at DESC
-            """
-            
-            badges = self.db.execute_query(query, (user_id,))
+            # Use language-specific statement based on current language
+            statement = self._USER_BADGES.get(self.current_language, self._USER_BADGES["en"])
+            badges = self.db.execute_query(statement, (user_id,))
             return badges or []
                 
         except Exception as e:
@@ -1238,29 +1042,24 @@ class BadgeManager:
             name_field = f"name_{self.current_language}" if self.current_language in ["en", "zh"] else "name_en"
             desc_field = f"description_{self.current_language}" if self.current_language in ["en", "zh"] else "description_en"
             
-            badge_query = f"SELECT badge_id, {name_field} as name, {desc_field} as description, points FROM badges WHERE badge_id = %s"
-            badge = self.db.execute_query(badge_query, (badge_id,), fetch_one=True)
+            definition = self.catalogue.get(badge_id)
+            if definition:
+                badge = definition.localized(self.current_language)
+            else:
+                badge_query = f"SELECT badge_id, {name_field} as name, {desc_field} as description, points FROM badges WHERE badge_id = %s"
+                badge = self.db.execute_query(badge_query, (badge_id,), fetch_one=True)
             
             if not badge:
                 return {"success": False, "error": "Badge not found"}
             
             # Check if the user already has this badge
-            has_badge_query = """
-                SELECT * FROM user_badges 
-                WHERE user_id = %s AND badge_id = %s
-            """
-            existing = self.db.execute_query(has_badge_query, (user_id, badge_id), fetch_one=True)
+            existing = self.db.execute_query(self._HAS_BADGE, (user_id, badge_id), fetch_one=True)
             
             if existing:
                 return {"success": True, "badge": badge, "message": "Badge already awarded"}
             
             # Award the badge
-            award_query = """
-                INSERT INTO user_badges 
-                (user_id, badge_id) 
-                VALUES (%s, %s)
-            """
-            self.db.execute_query(award_query, (user_id, badge_id))
+            self.db.execute_query(self._AWARD_BADGE, (user_id, badge_id))
             
             # Award points for earning the badge
             badge_points = badge.get("points", 10)
@@ -1287,13 +1086,7 @@ class BadgeManager:
     def _mark_badge_progress_completed(self, user_id: str, badge_id: str) -> None:
         """Mark a badge as completed in the progress table."""
         try:
-            update_query = """
-            UPDATE badge_progress 
-            SET current_progress = target_progress,
-                last_updated = CURRENT_TIMESTAMP
-            WHERE user_id = %s AND badge_id = %s
-            """
-            self.db.execute_query(update_query, (user_id, badge_id))
+            self.db.execute_query(self._MARK_PROGRESS_COMPLETED, (user_id, badge_id))
         except Exception as e:
             logger.error(f"Error marking badge progress as completed: {str(e)}")
 
@@ -1304,27 +1097,18 @@ class BadgeManager:
         
         try:
             # Update the user's total points
-            update_query = """
-                UPDATE users 
-                SET total_points = total_points + %s 
-                WHERE uid = %s
-            """
-            self.db.execute_query(update_query, (points, user_id))
+            self.db.execute_query(self._ADD_POINTS, (points, user_id))
            
-            # Log the activity
-            log_query = """
-                INSERT INTO activity_log 
-                (user_id, activity_type, points, details_en, details_zh) 
-                VALUES (%s, %s, %s, %s, %s)
-            """
-            self.db.execute_query(log_query, (user_id, activity_type, points, details, details))
+            # Log the activity (batched into one multi-row INSERT inside a transaction)
+            self.db.defer_write(self._LOG_ACTIVITY, (user_id, activity_type, points, details, details))
             
             # Get the updated total points
-            points_query = "SELECT total_points FROM users WHERE uid = %s"
-            result = self.db.execute_query(points_query, (user_id,), fetch_one=True)
+            result = self.db.execute_query(self._USER_TOTAL_POINTS, (user_id,), fetch_one=True)
             
             if result:
                 total_points = result.get("total_points", 0)
+                # Keep the rank index in step without reloading it, once the points are committed
+                self.db.on_commit(lambda: self.ranking.update(user_id, total_points))
                 return {"success": True, "total_points": total_points}
             else:
                 return {"success": False, "error": "User not found"}
@@ -13,6 +13,7 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional, Union
 import streamlit as st
 from data.mysql_connection import MySQLConnection
+from analytics.interaction_sink import InteractionSink
 from utils.language_utils import get_current_language
 
 logger = logging.getLogger(__name__)
@@ -25,6 +26,7 @@ class BehaviorTracker:
     def __init__(self):
         """Initialize the behavior tracker with database connection."""
         self.db = MySQLConnection()
+        self.sink = InteractionSink(self.db)
         self.current_language = get_current_language()
     
     def log_interaction(self, 
@@ -51,18 +53,6 @@ class BehaviorTracker:
                 logger.error(f"Missing required parameters: user_id={user_id}, interaction_type={interaction_type}, interaction_category={interaction_category}")
                 return
             
-            # Check database connection
-            if not self.db:
-                logger.error("Database connection not initialized")
-                return
-            
-            # Test database connection
-            try:
-                self.db.execute_query("SELECT 1", ())
-            except Exception as db_test_error:
-                logger.error(f"Database connection test failed: {str(db_test_error)}")
-                return
-            
             # Increment interaction counter (optional - only if session state is available)
             if hasattr(st, 'session_state'):
                 st.session_state.interaction_count = st.session_state.get("interaction_count", 0) + 1
@@ -70,16 +60,6 @@ class BehaviorTracker:
             # Prepare data with validation
             details_json = json.dumps(details) if details else None
             time_spent_seconds = 0
-            # Log the data being inserted for debugging
-            logger.debug(f"Attempting to log interaction - User: {user_id}, Type: {interaction_type}, Category: {interaction_category}")
-            
-            # Insert interaction record with proper error handling
-            query = """
-            INSERT INTO user_interactions 
-            (user_id, interaction_type, interaction_category, 
-             details, time_spent_seconds, success)
-            VALUES (%s, %s, %s, %s, %s, %s)
-            """
             
             params = (               
                 user_id,
@@ -90,17 +70,9 @@ class BehaviorTracker:
                 success              
             )
             
-            # Log parameters for debugging
-            logger.debug(f"Query parameters: {params}")
-            
-            # Execute with better error handling
-            result = self.db.execute_query(query, params)
-            
-            # Verify insertion was successful
-            if result is not None:
-                logger.debug(f"Successfully logged interaction: {interaction_category}.for user {user_id}")
-            else:
-                logger.warning(f"Query executed but no result returned for interaction: {interaction_category}")
+            # Hand the row to the background sink; the render path never waits on the database
+            if self.sink.submit(params):
+                logger.debug(f"Queued interaction: {interaction_category}.{interaction_type} for user {user_id}")
             
         except Exception as e:
             logger.error(f"Error logging interaction: {str(e)}")
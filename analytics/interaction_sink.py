@@ -0,0 +1,197 @@
+"""
+Interaction Sink for Java Peer Review Training System.
+
+This module provides a background writer for user interaction telemetry.
+Interactions are queued in memory on the Streamlit render thread and written
+by a worker thread in multi-row INSERT batches, so logging a click never waits
+on the database.
+"""
+
+import os
+import time
+import queue
+import atexit
+import logging
+import threading
+from typing import Dict, Any, List, Optional
+
+from data.mysql_connection import MySQLConnection
+
+logger = logging.getLogger(__name__)
+
+# Sentinel that tells the worker to flush and exit
+_STOP = object()
+
+
+class InteractionSink:
+    """
+    Bounded, asynchronous writer for the user_interactions table.
+
+    Rows are flushed when a batch reaches ``batch_size`` rows or when
+    ``flush_interval`` seconds have passed since the last flush. When the
+    queue is full, the ``block`` policy waits up to ``put_timeout`` seconds
+    for space (backpressure) before dropping the row, and the ``drop``
+    policy drops the row immediately. Pending rows are flushed at interpreter
+    shutdown.
+    """
+
+    INSERT_QUERY = """
+        INSERT INTO user_interactions
+        (user_id, interaction_type, interaction_category,
+         details, time_spent_seconds, success)
+        VALUES (%s, %s, %s, %s, %s, %s)
+    """
+
+    POLICIES = ("block", "drop")
+
+    def __init__(self, db: Optional[MySQLConnection] = None):
+        """Initialize the sink; the worker thread starts on first use."""
+        self.db = db or MySQLConnection()
+        self.batch_size = max(1, int(os.getenv("INTERACTION_BATCH_SIZE", "200")))
+        self.flush_interval = float(os.getenv("INTERACTION_FLUSH_INTERVAL", "2.0"))
+        self.put_timeout = float(os.getenv("INTERACTION_PUT_TIMEOUT", "0.05"))
+        self.policy = os.getenv("INTERACTION_QUEUE_POLICY", "block")
+        if self.policy not in self.POLICIES:
+            logger.warning(f"Unknown interaction queue policy '{self.policy}', using 'block'")
+            self.policy = "block"
+
+        self._queue = queue.Queue(maxsize=int(os.getenv("INTERACTION_QUEUE_SIZE", "10000")))
+        self._worker: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._closed = False
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "enqueued": 0,
+            "dropped": 0,
+            "written": 0,
+            "failed": 0,
+            "batches": 0,
+            "row_retries": 0
+        }
+
+    def submit(self, row: tuple) -> bool:
+        """
+        Queue one interaction row for writing.
+
+        Args:
+            row: Parameters for INSERT_QUERY
+
+        Returns:
+            True if the row was queued, False if it was dropped
+        """
+        if self._closed:
+            self._count("dropped")
+            return False
+
+        self._ensure_started()
+        try:
+            if self.policy == "block":
+                self._queue.put(row, timeout=self.put_timeout)
+            else:
+                self._queue.put_nowait(row)
+        except queue.Full:
+            self._count("dropped")
+            logger.warning("Interaction queue full, dropping interaction")
+            return False
+
+        self._count("enqueued")
+        return True
+
+    def _ensure_started(self) -> None:
+        """Start the worker thread once."""
+        if self._worker is not None:
+            return
+        with self._start_lock:
+            if self._worker is not None:
+                return
+            self._worker = threading.Thread(target=self._run, name="interaction-sink", daemon=True)
+            self._worker.start()
+            atexit.register(self.close)
+
+    def _run(self) -> None:
+        """Worker loop: collect rows and write them in batches."""
+        batch: List[tuple] = []
+        deadline = time.monotonic() + self.flush_interval
+
+        while True:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                self._write(batch)
+                return
+
+            if item is not None:
+                batch.append(item)
+
+            if len(batch) >= self.batch_size or time.monotonic() >= deadline:
+                self._write(batch)
+                batch = []
+                deadline = time.monotonic() + self.flush_interval
+
+    def _write(self, batch: List[tuple]) -> None:
+        """
+        Write a batch as one multi-row INSERT.
+
+        The multi-row INSERT is all or nothing, so when it fails the rows are
+        written one by one and only the rows that fail themselves are lost.
+        """
+        if not batch:
+            return
+        try:
+            result = self.db.execute_many(self.INSERT_QUERY, batch)
+        except Exception as e:
+            logger.error(f"Error writing interaction batch: {str(e)}")
+            result = None
+
+        if result is not None:
+            self._count("written", len(batch))
+            self._count("batches")
+            logger.debug(f"Wrote {len(batch)} interactions")
+            return
+
+        if len(batch) > 1:
+            logger.warning(f"Interaction batch of {len(batch)} failed, writing its rows one by one")
+        failed = 0
+        for row in batch:
+            try:
+                row_result = self.db.execute_query(self.INSERT_QUERY, row)
+            except Exception as e:
+                logger.error(f"Error writing interaction: {str(e)}")
+                row_result = None
+            if row_result is None:
+                failed += 1
+        self._count("written", len(batch) - failed)
+        self._count("row_retries", len(batch))
+        if failed:
+            self._count("failed", failed)
+            logger.warning(f"Failed to write {failed} of {len(batch)} interactions")
+
+    def _count(self, key: str, amount: int = 1) -> None:
+        with self._stats_lock:
+            self._stats[key] += amount
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue depth and write counters."""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["queued"] = self._queue.qsize()
+        stats["policy"] = self.policy
+        return stats
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Flush pending rows and stop the worker."""
+        if self._closed:
+            return
+        self._closed = True
+        worker = self._worker
+        if worker is None or not worker.is_alive():
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            logger.warning("Interaction queue still full at shutdown, some interactions were not written")
+            return
+        worker.join(timeout)
@@ -0,0 +1,121 @@
+"""
+Leaderboard Ranking cache for Java Peer Review Training System.
+
+This module keeps every user's total points in a sorted in-process index so
+rank lookups take O(log n) time without querying the database. The index is
+loaded once, updated incrementally whenever awarded points are committed, and
+reloaded after a TTL to pick up changes made outside this process. An update
+shifts the sorted list (bisect.insort is O(n)), which is cheap at the user
+counts of a course.
+"""
+
+import os
+import time
+import logging
+import threading
+from bisect import bisect_left, insort
+from typing import Dict, Any, List, Optional
+
+from data.mysql_connection import MySQLConnection
+
+logger = logging.getLogger(__name__)
+
+
+class LeaderboardRanking:
+    """Process-wide sorted index of user points for rank lookups."""
+
+    _instance = None
+
+    def __new__(cls):
+        """Ensure singleton instance."""
+        if cls._instance is None:
+            cls._instance = super(LeaderboardRanking, cls).__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        """Initialize the ranking without loading it."""
+        if self._initialized:
+            return
+
+        self.db = MySQLConnection()
+        self.ttl_seconds = float(os.getenv("LEADERBOARD_RANKING_TTL", "300"))
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._points: Dict[str, int] = {}
+        # Negated points in ascending order, i.e. highest score first
+        self._sorted: List[int] = []
+        self._loaded_at: Optional[float] = None
+        self._initialized = True
+
+    def invalidate(self) -> None:
+        """Drop the index so the next lookup reloads it from the database."""
+        with self._lock:
+            self._loaded_at = None
+
+    def _ensure_loaded(self) -> bool:
+        """Load the index if it is missing or older than the TTL."""
+        loaded_at = self._loaded_at
+        if loaded_at is not None and time.monotonic() - loaded_at < self.ttl_seconds:
+            return True
+
+        with self._load_lock:
+            # Another thread may have reloaded while we waited for the lock
+            loaded_at = self._loaded_at
+            if loaded_at is not None and time.monotonic() - loaded_at < self.ttl_seconds:
+                return True
+
+            rows = self.db.execute_query("SELECT uid, total_points FROM users")
+            if rows is None:
+                logger.warning("Could not load leaderboard ranking")
+                return self._loaded_at is not None
+
+            points = {row['uid']: int(row.get('total_points') or 0) for row in rows}
+            with self._lock:
+                self._points = points
+                self._sorted = sorted(-value for value in points.values())
+                self._loaded_at = time.monotonic()
+            logger.debug(f"Loaded leaderboard ranking for {len(points)} users")
+            return True
+
+    def update(self, user_id: str, total_points: int) -> None:
+        """
+        Record a user's new total points.
+
+        Args:
+            user_id: The user's ID
+            total_points: The user's total points after the change
+        """
+        with self._lock:
+            if self._loaded_at is None:
+                return
+            old = self._points.get(user_id)
+            if old is not None:
+                index = bisect_left(self._sorted, -old)
+                if index < len(self._sorted) and self._sorted[index] == -old:
+                    del self._sorted[index]
+            self._points[user_id] = int(total_points or 0)
+            insort(self._sorted, -self._points[user_id])
+
+    def get_rank(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a user's rank from the index.
+
+        Args:
+            user_id: The user's ID
+
+        Returns:
+            Dict with 'rank' and 'total_users', or None if the user is not indexed
+        """
+        if not self._ensure_loaded():
+            return None
+
+        with self._lock:
+            points = self._points.get(user_id)
+            if points is None:
+                return None
+            # Rank is one plus the number of users with strictly more points
+            return {
+                "rank": bisect_left(self._sorted, -points) + 1,
+                "total_users": len(self._sorted)
+            }
@@ -0,0 +1,311 @@
+# analytics/rollups.py
+"""
+Daily Rollups module for Java Peer Review Training System.
+
+Instructor dashboards and research queries need per-day totals, not the raw
+``user_interactions`` and ``review_sessions`` rows. This module folds new
+source rows into small daily aggregate tables (created by migration 6 in
+data/migrations.py): interactions per user, day, interaction type and
+category, and review sessions per user, day, difficulty and session type.
+
+Each source has a watermark, the highest row id already folded, stored in
+``rollup_watermarks``. A run folds only the rows above it and moves it
+forward in the same transaction, so the aggregates never count a row twice.
+The aggregates are not partitioned and outlive the archived raw rows.
+"""
+
+import os
+import logging
+import datetime
+import threading
+from typing import Dict, Any, List, Optional
+
+from data.mysql_connection import MySQLConnection
+
+logger = logging.getLogger(__name__)
+
+
+class Rollup:
+    """A source table folded into a daily aggregate table."""
+
+    def __init__(self, name: str, source: str, time_column: str, target: str, fold_sql: str):
+        """
+        Args:
+            name: Watermark key
+            source: Source table, with an auto-increment ``id``
+            time_column: Source column the day is taken from
+            target: Aggregate table
+            fold_sql: INSERT ... SELECT folding the source ids in (%s, %s] into target
+        """
+        self.name = name
+        self.source = source
+        self.time_column = time_column
+        self.target = target
+        self.fold_sql = fold_sql
+
+
+ROLLUPS = [
+    Rollup("user_interactions", "user_interactions", "timestamp", "daily_user_interactions", """
+        INSERT INTO daily_user_interactions
+            (day, user_id, interaction_type, interaction_category,
+             interactions, successes, time_spent_seconds)
+        SELECT DATE(`timestamp`), user_id, interaction_type, interaction_category,
+               COUNT(*), SUM(CASE WHEN success THEN 1 ELSE 0 END), SUM(time_spent_seconds)
+        FROM user_interactions
+        WHERE id > %s AND id <= %s
+        GROUP BY DATE(`timestamp`), user_id, interaction_type, interaction_category
+        ON DUPLICATE KEY UPDATE interactions = interactions + VALUES(interactions),
+                                successes = successes + VALUES(successes),
+                                time_spent_seconds = time_spent_seconds + VALUES(time_spent_seconds)
+    """),
+    Rollup("review_sessions", "review_sessions", "created_at", "daily_review_sessions", """
+        INSERT INTO daily_review_sessions
+            (day, user_id, code_difficulty, session_type, sessions, perfect_sessions,
+             total_errors, identified_errors, accuracy_sum, time_spent_seconds)
+        SELECT DATE(created_at), user_id, code_difficulty, session_type, COUNT(*),
+               SUM(CASE WHEN total_errors > 0 AND identified_errors >= total_errors THEN 1 ELSE 0 END),
+               SUM(total_errors), SUM(identified_errors), SUM(accuracy_percentage), SUM(time_spent_seconds)
+        FROM review_sessions
+        WHERE id > %s AND id <= %s
+        GROUP BY DATE(created_at), user_id, code_difficulty, session_type
+        ON DUPLICATE KEY UPDATE sessions = sessions + VALUES(sessions),
+                                perfect_sessions = perfect_sessions + VALUES(perfect_sessions),
+                                total_errors = total_errors + VALUES(total_errors),
+                                identified_errors = identified_errors + VALUES(identified_errors),
+                                accuracy_sum = accuracy_sum + VALUES(accuracy_sum),
+                                time_spent_seconds = time_spent_seconds + VALUES(time_spent_seconds)
+    """),
+]
+
+
+class RollupPipeline:
+    """
+    Incrementally folds new source rows into the daily aggregate tables.
+
+    Rows younger than ``ROLLUP_SETTLE_SECONDS`` are left for the next run, so
+    a row whose insert commits after a higher id is not skipped. A run folds
+    at most ``ROLLUP_BATCH_SIZE`` ids per transaction. start() runs the
+    pipeline every ``ROLLUP_INTERVAL`` seconds on a background thread.
+    """
+
+    _instance = None
+
+    def __new__(cls):
+        """Ensure singleton instance."""
+        if cls._instance is None:
+            cls._instance = super(RollupPipeline, cls).__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        """Initialize the pipeline settings."""
+        if self._initialized:
+            return
+
+        self.db = MySQLConnection()
+        self.interval = float(os.getenv("ROLLUP_INTERVAL", "300"))
+        self.settle_seconds = max(0, int(os.getenv("ROLLUP_SETTLE_SECONDS", "60")))
+        self.batch_size = max(1, int(os.getenv("ROLLUP_BATCH_SIZE", "50000")))
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+        self._stats = {"runs": 0, "failures": 0, "rows_folded": 0, "last_run": None}
+        self._initialized = True
+
+    # =================================================================
+    # Folding
+    # =================================================================
+
+    def run(self) -> Dict[str, int]:
+        """
+        Fold every source's new rows into its aggregate table.
+
+        Returns:
+            Dict of rollup name -> source rows folded, -1 if the rollup failed
+        """
+        folded = {}
+        with self._lock:
+            for rollup in ROLLUPS:
+                try:
+                    folded[rollup.name] = self._run_rollup(rollup)
+                except Exception as e:
+                    logger.error(f"Rollup of {rollup.source} failed: {str(e)}")
+                    folded[rollup.name] = -1
+            self._stats["runs"] += 1
+            self._stats["failures"] += sum(1 for count in folded.values() if count < 0)
+            self._stats["rows_folded"] += sum(count for count in folded.values() if count > 0)
+            self._stats["last_run"] = datetime.datetime.now().isoformat(timespec="seconds")
+        return folded
+
+    def _run_rollup(self, rollup: Rollup) -> int:
+        """Fold a source in batches until it is caught up to its settled rows."""
+        self.db.execute_query(
+            "INSERT IGNORE INTO rollup_watermarks (source, last_id) VALUES (%s, 0)", (rollup.name,)
+        )
+        total = 0
+        while True:
+            folded = self._fold_batch(rollup)
+            total += folded
+            if folded < self.batch_size:
+                break
+        if total:
+            logger.debug(f"Folded {total} {rollup.source} row(s) into {rollup.target}")
+        return total
+
+    def _fold_batch(self, rollup: Rollup) -> int:
+        """
+        Fold the next batch of settled rows and advance the watermark, in one transaction.
+
+        Returns:
+            Number of source rows folded
+        """
+        with self.db.transaction() as transaction:
+            # The row lock keeps concurrent runs from folding the same rows
+            row = self.db.execute_query(
+                "SELECT last_id FROM rollup_watermarks WHERE source = %s FOR UPDATE",
+                (rollup.name,), fetch_one=True
+            )
+            last_id = int(row["last_id"]) if row else 0
+
+            bounds = self.db.execute_query(f"""
+                SELECT MAX(id) AS upper_id, COUNT(*) AS row_count FROM (
+                    SELECT id FROM {rollup.source}
+                    WHERE id > %s AND `{rollup.time_column}` < DATE_SUB(NOW(), INTERVAL %s SECOND)
+                    ORDER BY id
+                    LIMIT %s
+                ) batch
+            """, (last_id, self.settle_seconds, self.batch_size), fetch_one=True)
+            if not bounds or bounds.get("upper_id") is None:
+                return 0
+            upper_id = int(bounds["upper_id"])
+
+            self.db.execute_query(rollup.fold_sql, (last_id, upper_id))
+            self.db.execute_query(
+                "UPDATE rollup_watermarks SET last_id = %s, updated_at = CURRENT_TIMESTAMP WHERE source = %s",
+                (upper_id, rollup.name)
+            )
+
+        if not transaction.committed:
+            raise RuntimeError(f"could not fold {rollup.source} rows after id {last_id}: {transaction.error}")
+        return int(bounds["row_count"])
+
+    def rebuild(self) -> Dict[str, int]:
+        """
+        Fold the source rows still in the database again.
+
+        Only the days from the first remaining source row on are cleared and
+        refolded; the days whose raw rows were archived keep their aggregates.
+        """
+        with self._lock:
+            with self.db.transaction() as transaction:
+                for rollup in ROLLUPS:
+                    row = self.db.execute_query(
+                        f"SELECT DATE(MIN(`{rollup.time_column}`)) AS first_day FROM {rollup.source}",
+                        fetch_one=True
+                    )
+                    if not row or row.get("first_day") is None:
+                        # Nothing left to refold, keep the aggregates as they are
+                        continue
+                    self.db.execute_query(f"DELETE FROM {rollup.target} WHERE day >= %s", (row["first_day"],))
+                    self.db.execute_query("DELETE FROM rollup_watermarks WHERE source = %s", (rollup.name,))
+                    logger.info(f"Refolding {rollup.target} from {row['first_day']}")
+            if not transaction.committed:
+                logger.error(f"Could not reset rollups: {transaction.error}")
+                return {}
+        return self.run()
+
+    # =================================================================
+    # Aggregate queries
+    # =================================================================
+
+    def get_daily_activity(self, start: datetime.date, end: datetime.date,
+                           user_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Get interactions per day, type and category between two days (inclusive).
+
+        Args:
+            start: First day
+            end: Last day
+            user_id: Only this user's interactions (default: every user)
+        """
+        try:
+            query = """
+                SELECT day, interaction_type, interaction_category,
+                       SUM(interactions) AS interactions, SUM(successes) AS successes,
+                       SUM(time_spent_seconds) AS time_spent_seconds,
+                       COUNT(DISTINCT user_id) AS active_users
+                FROM daily_user_interactions
+                WHERE day BETWEEN %s AND %s
+            """
+            params = [start, end]
+            if user_id:
+                query += " AND user_id = %s"
+                params.append(user_id)
+            query += " GROUP BY day, interaction_type, interaction_category ORDER BY day, interaction_type"
+            return self.db.execute_query(query, tuple(params)) or []
+        except Exception as e:
+            logger.error(f"Error getting daily activity: {str(e)}")
+            return []
+
+    def get_review_performance(self, start: datetime.date, end: datetime.date,
+                               user_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Get review sessions and accuracy per day and difficulty between two days (inclusive).
+
+        Args:
+            start: First day
+            end: Last day
+            user_id: Only this user's sessions (default: every user)
+        """
+        try:
+            query = """
+                SELECT day, code_difficulty,
+                       SUM(sessions) AS sessions, SUM(perfect_sessions) AS perfect_sessions,
+                       SUM(identified_errors) AS identified_errors, SUM(total_errors) AS total_errors,
+                       SUM(accuracy_sum) / SUM(sessions) AS average_accuracy,
+                       SUM(time_spent_seconds) AS time_spent_seconds,
+                       COUNT(DISTINCT user_id) AS active_users
+                FROM daily_review_sessions
+                WHERE day BETWEEN %s AND %s
+            """
+            params = [start, end]
+            if user_id:
+                query += " AND user_id = %s"
+                params.append(user_id)
+            query += " GROUP BY day, code_difficulty ORDER BY day, code_difficulty"
+            return self.db.execute_query(query, tuple(params)) or []
+        except Exception as e:
+            logger.error(f"Error getting review performance: {str(e)}")
+            return []
+
+    # =================================================================
+    # Background job
+    # =================================================================
+
+    def start(self) -> None:
+        """Run the pipeline now and then periodically on a background thread."""
+        if self.interval <= 0:
+            return
+        with self._lock:
+            if self._worker is not None and self._worker.is_alive():
+                return
+            self._stop.clear()
+            self._worker = threading.Thread(target=self._run, name="rollups", daemon=True)
+            self._worker.start()
+
+    def stop(self) -> None:
+        """Stop the background job."""
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.run()
+            self._stop.wait(self.interval)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get run counters and the current watermarks."""
+        stats = dict(self._stats)
+        rows = self.db.execute_query("SELECT source, last_id, updated_at FROM rollup_watermarks") or []
+        stats["watermarks"] = {row["source"]: row["last_id"] for row in rows}
+        return stats
@@ -0,0 +1,242 @@
+# analytics/token_usage.py
+"""
+Token Usage module for Java Peer Review Training System.
+
+Counts the prompt and completion tokens of every LLM call, per user, model
+role and day. Counts come from the usage Groq reports with each response;
+when a response carries none, both sides are estimated with the local
+tokenizer estimate of utils/token_budget.py and the call is counted as
+estimated.
+
+Calls only add to in-memory totals. A background job upserts them into
+``daily_llm_token_usage`` (created by migration 7 in data/migrations.py)
+every ``TOKEN_USAGE_FLUSH_INTERVAL`` seconds, so no call waits for the
+database.
+"""
+
+import os
+import atexit
+import logging
+import datetime
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+from data.mysql_connection import MySQLConnection
+
+logger = logging.getLogger(__name__)
+
+# User the calls made outside a user's request are counted under (e.g. challenge pool refills)
+SYSTEM_USER = "system"
+
+_user: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("llm_user", default=None)
+
+UPSERT_USAGE = """
+    INSERT INTO daily_llm_token_usage
+        (day, user_id, role, calls, estimated_calls, prompt_tokens, completion_tokens)
+    VALUES (%s, %s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE calls = calls + VALUES(calls),
+                            estimated_calls = estimated_calls + VALUES(estimated_calls),
+                            prompt_tokens = prompt_tokens + VALUES(prompt_tokens),
+                            completion_tokens = completion_tokens + VALUES(completion_tokens)
+"""
+
+
+@contextmanager
+def llm_user(user_id: Optional[str]):
+    """Count the tokens of the LLM calls made inside the block for a user."""
+    token = _user.set(user_id or SYSTEM_USER)
+    try:
+        yield
+    finally:
+        _user.reset(token)
+
+
+def current_user() -> str:
+    """Get the user set by the enclosing llm_user(), else the logged-in user of the Streamlit session."""
+    user_id = _user.get()
+    if user_id:
+        return user_id
+    try:
+        import streamlit as st
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        if get_script_run_ctx(suppress_warning=True) is not None and "auth" in st.session_state:
+            user_id = st.session_state.auth.get("user_id")
+    except Exception:
+        user_id = None
+    return user_id or SYSTEM_USER
+
+
+class TokenUsageTracker:
+    """
+    Per user, role and day token totals of the LLM calls.
+
+    start() flushes the totals to the database every
+    ``TOKEN_USAGE_FLUSH_INTERVAL`` seconds on a background thread. Totals
+    that could not be written are kept for the next flush.
+    """
+
+    _instance = None
+
+    def __new__(cls):
+        """Ensure singleton instance."""
+        if cls._instance is None:
+            cls._instance = super(TokenUsageTracker, cls).__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        """Initialize the tracker settings."""
+        if self._initialized:
+            return
+
+        self.db = MySQLConnection()
+        self.flush_interval = float(os.getenv("TOKEN_USAGE_FLUSH_INTERVAL", "60"))
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending: Dict[Tuple[datetime.date, str, str], Dict[str, int]] = {}
+        self._totals: Dict[str, Dict[str, int]] = {}
+        self._stats = {"flushes": 0, "failures": 0, "rows_written": 0}
+        self._stop = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+        self._initialized = True
+
+    # =================================================================
+    # Recording
+    # =================================================================
+
+    def record(self, role: Optional[str], prompt_tokens: int, completion_tokens: int,
+               estimated: bool = False, user_id: Optional[str] = None) -> None:
+        """
+        Add one LLM call to the totals.
+
+        Args:
+            role: Model role, e.g. 'REVIEW'
+            prompt_tokens: Tokens sent
+            completion_tokens: Tokens generated
+            estimated: Whether the counts are local estimates instead of reported usage
+            user_id: User to count the call for (default: current_user())
+        """
+        role = (role or "DEFAULT").upper()
+        key = (datetime.date.today(), user_id or current_user(), role)
+        usage = {"calls": 1, "estimated_calls": int(estimated),
+                 "prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens}
+        with self._lock:
+            self._add(self._pending.setdefault(key, {}), usage)
+            self._add(self._totals.setdefault(role, {}), usage)
+
+    @staticmethod
+    def _add(target: Dict[str, int], usage: Dict[str, int]) -> None:
+        for name, value in usage.items():
+            target[name] = target.get(name, 0) + value
+
+    def flush(self) -> int:
+        """
+        Write the pending totals to daily_llm_token_usage.
+
+        Returns:
+            Number of rows written, -1 if the write failed
+        """
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return 0
+
+            rows = [(day, user_id, role, usage["calls"], usage["estimated_calls"],
+                     usage["prompt_tokens"], usage["completion_tokens"])
+                    for (day, user_id, role), usage in pending.items()]
+            written = self.db.execute_many(UPSERT_USAGE, rows)
+
+            with self._lock:
+                self._stats["flushes"] += 1
+                if written is None:
+                    # Keep the totals for the next flush
+                    self._stats["failures"] += 1
+                    for key, usage in pending.items():
+                        self._add(self._pending.setdefault(key, {}), usage)
+                else:
+                    self._stats["rows_written"] += len(rows)
+        if written is None:
+            logger.error(f"Could not write {len(rows)} token usage row(s), keeping them for the next flush")
+            return -1
+        return len(rows)
+
+    # =================================================================
+    # Queries
+    # =================================================================
+
+    def get_daily_usage(self, start: datetime.date, end: datetime.date,
+                        user_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Get token usage per day and role between two days (inclusive).
+
+        Args:
+            start: First day
+            end: Last day
+            user_id: Only this user's calls (default: every user)
+        """
+        try:
+            query = """
+                SELECT day, role, SUM(calls) AS calls, SUM(estimated_calls) AS estimated_calls,
+                       SUM(prompt_tokens) AS prompt_tokens, SUM(completion_tokens) AS completion_tokens,
+                       COUNT(DISTINCT user_id) AS active_users
+                FROM daily_llm_token_usage
+                WHERE day BETWEEN %s AND %s
+            """
+            params = [start, end]
+            if user_id:
+                query += " AND user_id = %s"
+                params.append(user_id)
+            query += " GROUP BY day, role ORDER BY day, role"
+            return self.db.execute_query(query, tuple(params)) or []
+        except Exception as e:
+            logger.error(f"Error getting token usage: {str(e)}")
+            return []
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Get token totals per role since the process started.
+
+        Returns:
+            Dict with ``roles`` (calls, estimated calls, prompt and completion
+            tokens and average tokens per call) and flush counters
+        """
+        with self._lock:
+            roles = {role: dict(totals) for role, totals in self._totals.items()}
+            metrics = dict(self._stats)
+            metrics["pending_rows"] = len(self._pending)
+        for totals in roles.values():
+            calls = totals["calls"]
+            totals["average_prompt_tokens"] = totals["prompt_tokens"] / calls if calls else 0.0
+            totals["average_completion_tokens"] = totals["completion_tokens"] / calls if calls else 0.0
+        metrics["roles"] = roles
+        return metrics
+
+    # =================================================================
+    # Background job
+    # =================================================================
+
+    def start(self) -> None:
+        """Flush the totals periodically on a background thread, and once more at exit."""
+        if self.flush_interval <= 0:
+            return
+        with self._lock:
+            if self._worker is not None and self._worker.is_alive():
+                return
+            if self._worker is None:
+                atexit.register(self.stop)
+            self._stop.clear()
+            self._worker = threading.Thread(target=self._run, name="token-usage", daemon=True)
+            self._worker.start()
+
+    def stop(self) -> None:
+        """Stop the background job and write what is pending."""
+        self._stop.set()
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
@@ -25,11 +25,8 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Import LLM Manager
-from llm_manager import LLMManager
-
-# Import LangGraph components
-from langgraph_workflow import JavaCodeReviewGraph
+# Import the shared LangGraph workflow engine
+from langgraph_workflow import get_shared_llm_manager, get_shared_workflow
 
 # Import modularized UI functions
 from ui.utils.main_ui import (
@@ -45,6 +42,9 @@ from ui.components.auth_ui import AuthUI
 from ui.components.tutorial import TutorialUI
 
 from analytics.behavior_tracker import behavior_tracker
+from data.schema_version import SchemaVerifier
+from analytics.rollups import RollupPipeline
+from analytics.token_usage import TokenUsageTracker
 import atexit
 
 # Set page config
@@ -62,6 +62,13 @@ try:
 except Exception as e:
     logger.warning(f"CSS loading failed: {str(e)}")
 
+# The background jobs write to tables created by migrations, so they only run on a current schema
+if SchemaVerifier().verify():
+    # Fold new interactions and review sessions into the daily rollup tables
+    RollupPipeline().start()
+    # Write the per user, role and day LLM token totals in the background
+    TokenUsageTracker().start()
+
 # FIXED: Safe tab creation with proper error handling
 def create_smart_tabs_safe(tab_labels):
     """
@@ -313,8 +320,8 @@ def main():
     # Initialize session state with enhanced management
     init_session_state_enhanced()
     
-    # Initialize LLM manager
-    llm_manager = LLMManager()
+    # Shared LLM manager (loads .env once per process)
+    get_shared_llm_manager()
     
     if "provider_selection" not in st.session_state:
         st.session_state.provider_selection = "groq"    
@@ -328,14 +335,9 @@ def main():
         st.info("3. Add GROQ_API_KEY=your_key_here to your .env file")
         st.stop()
 
-    # Configure provider
+    # Get the process-wide workflow engine; it is only built on the first run
     try:
-        success = llm_manager.set_provider("groq", api_key)
-        if not success:
-            st.error("❌ Failed to configure Groq provider. Please check your configuration.")
-            st.stop()
-        else:
-            logger.debug("✅ Groq provider configured successfully")
+        workflow = get_shared_workflow(api_key)
     except Exception as e:
         st.error(f"❌ Error configuring LLM provider: {str(e)}")
         st.stop()
@@ -346,9 +348,6 @@ def main():
     # Render user profile
     auth_ui.render_combined_profile_leaderboard()
 
-    # Initialize workflow after provider is setup
-    workflow = JavaCodeReviewGraph(llm_manager)
-
     # Initialize UI components with enhanced state management
     code_display_ui = CodeDisplayUI()
     code_generator_ui = CodeGeneratorUIEnhanced(workflow, code_display_ui)       
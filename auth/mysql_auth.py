@@ -7,8 +7,9 @@ import logging
 import datetime
 import hashlib
 import uuid
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Iterator
 from data.mysql_connection import MySQLConnection
+from data.statement_registry import register_statement, READ, WRITE
 from analytics.badge_manager import BadgeManager
 from utils.language_utils import set_language, get_current_language, t
 
@@ -26,6 +27,46 @@ class MySQLAuthManager:
     
     _instance = None
     
+    # Hot per-user statements, prepared once per pooled connection
+    _EMAIL_EXISTS = register_statement("auth.email_exists", "SELECT email FROM users WHERE email = %s", READ)
+    _USER_BY_EMAIL = register_statement("auth.user_by_email", """
+        SELECT uid, email, password, display_name_en, display_name_zh, 
+            level_name_en, level_name_zh,
+            reviews_completed, score
+        FROM users 
+        WHERE email = %s
+    """, READ)
+    _USER_PROFILE = register_statement("auth.user_profile", """
+        SELECT uid, email, display_name_en, display_name_zh, 
+            level_name_en, level_name_zh,
+            reviews_completed, score,
+            created_at, last_activity, consecutive_days, total_points
+        FROM users 
+        WHERE uid = %s
+    """, READ)
+    _REVIEW_STATS = register_statement("auth.review_stats", """
+        SELECT reviews_completed, score, level_name_en, level_name_zh 
+        FROM users 
+        WHERE uid = %s
+    """, READ)
+    _UPDATE_REVIEW_STATS_AND_LEVEL = register_statement("auth.update_review_stats_and_level", """
+        UPDATE users 
+        SET reviews_completed = %s, score = %s, 
+        level_name_en = %s, level_name_zh = %s 
+        WHERE uid = %s
+    """, WRITE)
+    _ALL_USERS = register_statement("auth.all_users", """
+        SELECT uid, email, display_name_en, display_name_zh,
+        level_name_en, level_name_zh,
+        created_at, reviews_completed, total_points
+        FROM users
+    """, READ)
+    _UPDATE_REVIEW_STATS = register_statement("auth.update_review_stats", """
+        UPDATE users 
+        SET reviews_completed = %s, score = %s 
+        WHERE uid = %s
+    """, WRITE)
+    
     def __new__(cls):
         """Ensure singleton instance."""
         if cls._instance is None:
@@ -57,8 +98,7 @@ class MySQLAuthManager:
                  level_name_zh: str = None) -> Dict[str, Any]:
         """Register a new user with multilingual support."""
         # Check if email is already in use
-        check_query = "SELECT email FROM users WHERE email = %s"
-        result = self.db.execute_query(check_query, (email,), fetch_one=True)
+        result = self.db.execute_query(self._EMAIL_EXISTS, (email,), fetch_one=True)
         
         if result:
             return {"success": False, "error": "Email already in use"}
@@ -136,15 +176,7 @@ class MySQLAuthManager:
         """
         try:
             # Get user by email including password hash
-            query = """
-            SELECT uid, email, password, display_name_en, display_name_zh, 
-                level_name_en, level_name_zh,
-                reviews_completed, score
-            FROM users 
-            WHERE email = %s
-            """
-            
-            user_data = self.db.execute_query(query, (email,), fetch_one=True)
+            user_data = self.db.execute_query(self._USER_BY_EMAIL, (email,), fetch_one=True)
             
             if not user_data:
                 logger.warning(f"Authentication failed: User not found for email {email}")
@@ -197,16 +229,7 @@ class MySQLAuthManager:
         """
         try:
             # Get user profile with tutorial completion status
-            query = """
-            SELECT uid, email, display_name_en, display_name_zh, 
-                level_name_en, level_name_zh,
-                reviews_completed, score,
-                created_at, last_activity, consecutive_days, total_points
-            FROM users 
-            WHERE uid = %s
-            """
-            
-            user_data = self.db.execute_query(query, (user_id,), fetch_one=True)
+            user_data = self.db.execute_query(self._USER_PROFILE, (user_id,), fetch_one=True)
             
             if user_data:
                 return {
@@ -291,14 +314,8 @@ class MySQLAuthManager:
             return {"success": False, "error": "Database connection not initialized"}
         
         # Get current stats
-        query = """
-            SELECT reviews_completed, score, level_name_en, level_name_zh 
-            FROM users 
-            WHERE uid = %s
-        """
-        
         logger.debug(f"Executing query to get current stats for user {user_id}")
-        result = self.db.execute_query(query, (user_id,), fetch_one=True)
+        result = self.db.execute_query(self._REVIEW_STATS, (user_id,), fetch_one=True)
         
         if not result:
             logger.error(f"User {user_id} not found in database")
@@ -332,26 +349,13 @@ class MySQLAuthManager:
         
         # Update the database
         if level_changed:
-            update_query = """
-                UPDATE users 
-                SET reviews_completed = %s, score = %s, 
-                level_name_en = %s, level_name_zh = %s 
-                WHERE uid = %s
-            """
-            
             affected_rows = self.db.execute_query(
-                update_query, 
+                self._UPDATE_REVIEW_STATS_AND_LEVEL, 
                 (new_reviews, new_score, new_level_en, new_level_zh, user_id)
             )
         else:
-            update_query = """
-                UPDATE users 
-                SET reviews_completed = %s, score = %s 
-                WHERE uid = %s
-            """
-            
             affected_rows = self.db.execute_query(
-                update_query, 
+                self._UPDATE_REVIEW_STATS, 
                 (new_reviews, new_score, user_id)
             )
         
@@ -395,34 +399,34 @@ class MySQLAuthManager:
             logger.error("Database update failed or returned None")
             return {"success": False, "error": "Error updating review stats"}
     
-    def get_all_users(self) -> List[Dict[str, Any]]:
-        """Get a list of all users with proper language support."""
-        # Get current language for field selection
-        current_lang = get_current_language()
-        
-        query = """
-            SELECT uid, email, display_name_en, display_name_zh,
-            level_name_en, level_name_zh,
-            created_at, reviews_completed, total_points
-            FROM users
+    def iter_users(self, fetch_size: Optional[int] = None) -> Iterator[Dict[str, Any]]:
         """
+        Stream all users with language-appropriate fields, in constant memory.
         
-        users = self.db.execute_query(query)
-        
-        if users is None:
-            return []
-        
-        # Process each user to select language-appropriate fields
-        for user in users:
-            # Choose display name based on current language
-            display_name = user.get(f"display_name_{current_lang}") if current_lang in ["en", "zh"] else user.get("display_name_en", "")
-            user["display_name"] = display_name
+        Args:
+            fetch_size: Rows per network fetch (default DB_FETCH_SIZE)
             
-            # Choose level based on current language
-            level_name = user.get(f"level_name_{current_lang}") if current_lang in ["en", "zh"] else user.get("level_name_en", "Basic")
-            user["level"] = level_name
+        Yields:
+            One user dictionary at a time
+        """
+        # Get current language for field selection
+        current_lang = get_current_language()
+        if current_lang not in ["en", "zh"]:
+            current_lang = "en"
+        
+        for user in self.db.iter_query(self._ALL_USERS, fetch_size=fetch_size):
+            # Choose display name and level based on current language
+            user["display_name"] = user.get(f"display_name_{current_lang}")
+            user["level"] = user.get(f"level_name_{current_lang}")
             
             # Rename uid to user_id for consistency with the rest of the app
             user["user_id"] = user.pop("uid")
-        
-        return users
\ No newline at end of file
+            yield user
+    
+    def get_all_users(self) -> List[Dict[str, Any]]:
+        """Get a list of all users with proper language support."""
+        try:
+            return list(self.iter_users())
+        except Exception as e:
+            logger.error(f"Error getting all users: {str(e)}")
+            return []
\ No newline at end of file
@@ -15,6 +15,9 @@ from langchain_core.language_models import BaseLanguageModel
 from utils.llm_logger import LLMInteractionLogger
 from utils.code_utils import create_evaluation_prompt, create_regeneration_prompt, process_llm_response
 from utils.language_utils import t
+from utils.structured_output import invoke_structured
+from utils.model_cascade import ModelCascade
+from core.output_schemas import CodeEvaluation
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -29,16 +32,18 @@ class CodeEvaluationAgent:
     code generator. Can use an LLM for more accurate evaluation.
     """
     
-    def __init__(self, llm: BaseLanguageModel = None, llm_logger = None):
+    def __init__(self, llm: BaseLanguageModel = None, llm_logger = None, cascade: Optional[ModelCascade] = None):
         """
         Initialize the CodeEvaluationAgent.
         
         Args:
             llm: Language model for evaluation
             llm_logger: Logger for tracking LLM interactions
+            cascade: Models to try smallest first instead of llm alone
         """
         self.llm = llm
         self.llm_logger = llm_logger
+        self.cascade = cascade
     
     def evaluate_code(self, code: str, requested_errors: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
@@ -62,7 +67,12 @@ class CodeEvaluationAgent:
         try:
             # Generate the evaluation using the LLM
             logger.debug(t("sending_code_to_llm_for_evaluation"))
-            response = self.llm.invoke(prompt)
+            if self.cascade:
+                parsed, response = self.cascade.invoke_structured(
+                    prompt, CodeEvaluation, "code_evaluation", self._evaluation_check(requested_errors)
+                )
+            else:
+                parsed, response = invoke_structured(self.llm, prompt, CodeEvaluation, "code_evaluation")
             # Process response to ensure it's properly formatted
             processed_response = process_llm_response(response)
             
@@ -74,8 +84,11 @@ class CodeEvaluationAgent:
                 }
                 self.llm_logger.log_code_evaluation(prompt, processed_response, metadata)
             
-            # Extract JSON from the response
-            evaluation_result = self._extract_json_from_response(processed_response)
+            # Use the schema-validated result; extract JSON from the text only if there is none
+            if parsed is not None:
+                evaluation_result = parsed.to_result()
+            else:
+                evaluation_result = self._extract_json_from_response(processed_response)
             
             # Process the evaluation result
             processed_result = self._process_evaluation_result(evaluation_result, requested_errors)
@@ -86,6 +99,25 @@ class CodeEvaluationAgent:
             logger.error(f"{t('error_evaluating_code')}: {str(e)}")
             return ""
     
+    @staticmethod
+    def _evaluation_check(requested_errors: List[Dict[str, Any]]):
+        """
+        Confidence check for a small model's evaluation.
+        
+        Returns:
+            Function returning None for a trustworthy evaluation, otherwise the reason to escalate
+        """
+        def check(evaluation: CodeEvaluation) -> Optional[str]:
+            found, missing = evaluation.found_errors, evaluation.missing_errors
+            if len(found) + len(missing) != len(requested_errors):
+                return "errors_not_accounted_for"
+            if evaluation.valid != (not missing):
+                return "inconsistent_valid_flag"
+            if any(error.line_number in (None, "") for error in found):
+                return "unlocated_error"
+            return None
+        return check
+    
     def generate_improved_prompt(self, code: str, requested_errors: List[Dict[str, Any]], 
                           evaluation: Dict[str, Any]) -> str:
         """
@@ -190,6 +222,7 @@ class CodeEvaluationAgent:
     def _extract_json_from_response(self, response: str) -> Optional[Dict[str, Any]]:
         """
         Extract JSON data from LLM response with improved handling for Groq responses.
+        Only used when the response did not come back as schema-valid JSON.
         
         Args:
             response: LLM response text
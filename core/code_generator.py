@@ -11,6 +11,7 @@ import logging
 from langchain_core.language_models import BaseLanguageModel
 from utils.code_utils import create_code_generation_prompt
 from utils.llm_logger import LLMInteractionLogger
+from utils.llm_streaming import stream_llm, CODE_GENERATION
 from utils.language_utils import t
 from data.database_error_repository import DatabaseErrorRepository
 
@@ -279,8 +280,8 @@ class CodeGenerator:
                     domain=domain
                 ))
             
-            # Generate the code using the LLM
-            response = self.llm.invoke(prompt)
+            # Generate the code using the LLM, streamed to the UI when it is listening
+            response = stream_llm(self.llm, prompt, CODE_GENERATION)
             
             # Log the response type
             logger.debug(t("llm_response_type").format(type=type(response).__name__))
@@ -0,0 +1,195 @@
+"""
+LLM Output Schemas for Java Code Review Training System.
+
+This module defines the Pydantic schemas of the JSON objects the evaluation,
+review analysis and comparison report prompts ask for. The prompt templates
+use localized keys ("Identified Problems" / "已識別的問題"), so each field
+accepts the keys of every prompt language. ``to_result`` converts a parsed
+object to the dictionary format the rest of the system reads, keyed with t().
+"""
+
+__all__ = ['CodeEvaluation', 'ReviewAnalysis', 'ComparisonReport']
+
+from typing import List, Dict, Any, Optional, Union
+from pydantic import BaseModel, ConfigDict, Field, AliasChoices
+
+from utils.language_utils import t
+
+
+def _keys(*names: str) -> AliasChoices:
+    """Accept a field under any of the given JSON keys."""
+    return AliasChoices(*names)
+
+
+class _LLMOutput(BaseModel):
+    """Base schema: ignore keys the prompt did not ask for."""
+    model_config = ConfigDict(extra="ignore", populate_by_name=True)
+
+
+def _present(values: Dict[str, Any]) -> Dict[str, Any]:
+    """Drop the optional fields the model left out."""
+    return {key: value for key, value in values.items() if value is not None}
+
+
+# --- Code Evaluation (evaluation_template) ---
+class EvaluatedError(_LLMOutput):
+    """An error the evaluation found in, or missed from, the generated code"""
+    error_type: str = Field(validation_alias=_keys("Error Type", "錯誤類型", "error_type"),
+                            description="Error category, e.g. Logical")
+    error_name: str = Field(validation_alias=_keys("Error Name", "錯誤名稱", "error_name"),
+                            description="Name of the requested error")
+    line_number: Optional[Union[int, str]] = Field(None, validation_alias=_keys("Line Number", "行號", "line_number"),
+                                                   description="Line(s) where the error appears")
+    code_segment: Optional[str] = Field(None, validation_alias=_keys("Code Segment", "程式碼片段", "code_segment"),
+                                        description="Code showing the error")
+    explanation: Optional[str] = Field(None, validation_alias=_keys("Explanation", "Expanation", "說明", "解釋", "explanation"),
+                                       description="Why the code does or does not match the error")
+
+    def to_result(self) -> Dict[str, Any]:
+        return _present({
+            t("error_type"): self.error_type,
+            t("error_name"): self.error_name,
+            t("line_number"): self.line_number,
+            t("code_segment"): self.code_segment,
+            t("explanation"): self.explanation
+        })
+
+
+class CodeEvaluation(_LLMOutput):
+    """Evaluation of whether generated code contains the requested errors"""
+    found_errors: List[EvaluatedError] = Field(
+        validation_alias=_keys("Identified Problems", "已識別的問題", "Found Errors", "已找到錯誤", "found_errors"),
+        description="Requested errors implemented in the code")
+    missing_errors: List[EvaluatedError] = Field(
+        validation_alias=_keys("Missed Problems", "遺漏的問題", "Missing Errors", "遺漏錯誤", "missing_errors"),
+        description="Requested errors not implemented in the code")
+    valid: bool = Field(False, validation_alias=_keys("Valid", "有效", "valid"),
+                        description="Whether exactly the requested errors are implemented")
+    feedback: str = Field("", validation_alias=_keys("Feedback", "反饋", "feedback"),
+                          description="Overall assessment")
+
+    def to_result(self) -> Dict[str, Any]:
+        return {
+            t("found_errors"): [error.to_result() for error in self.found_errors],
+            t("missing_errors"): [error.to_result() for error in self.missing_errors],
+            t("valid"): self.valid,
+            t("feedback"): self.feedback
+        }
+
+
+# --- Review Analysis (review_analysis_template) ---
+class ReviewedProblem(_LLMOutput):
+    """A known problem and how the student's review addressed it"""
+    problem: str = Field(validation_alias=_keys("Problem", "問題", "problem"),
+                         description="Known problem text")
+    student_comment: Optional[str] = Field(None, validation_alias=_keys("Student Comment", "學生評論", "student_comment"),
+                                           description="The student's comment on the problem")
+    accuracy: Optional[float] = Field(None, validation_alias=_keys("Accuracy", "準確率", "準確度", "accuracy"),
+                                      description="How correctly the problem was identified (0.0-1.0)")
+    meaningfulness: Optional[float] = Field(None, validation_alias=_keys("Meaningfulness", "有意義性", "meaningfulness"),
+                                            description="How well the comment explains the problem (0.0-1.0)")
+    feedback: Optional[str] = Field(None, validation_alias=_keys("Feedback", "反饋", "feedback"),
+                                    description="Feedback on the identification")
+    hint: Optional[str] = Field(None, validation_alias=_keys("hint", "Hint", "提示"),
+                                description="Hint for finding a missed problem")
+
+    def to_result(self) -> Dict[str, Any]:
+        return _present({
+            t("problem"): self.problem,
+            t("student_comment"): self.student_comment,
+            t("accuracy"): self.accuracy,
+            t("meaningfulness"): self.meaningfulness,
+            t("feedback"): self.feedback,
+            t("hint"): self.hint
+        })
+
+
+class ReviewAnalysis(_LLMOutput):
+    """Analysis of a student review against the known problems"""
+    identified_problems: List[ReviewedProblem] = Field(
+        validation_alias=_keys("Identified Problems", "已識別的問題", "identified_problems"),
+        description="Problems identified with sufficient scores")
+    missed_problems: List[ReviewedProblem] = Field(
+        validation_alias=_keys("Missed Problems", "遺漏的問題", "missed_problems"),
+        description="Problems missed or addressed with insufficient scores")
+    identified_count: int = Field(0, validation_alias=_keys("Identified Count", "已識別數量", "identified_count"),
+                                  description="Number of identified problems")
+    total_problems: Optional[int] = Field(None, validation_alias=_keys("Total Problems", "總問題數", "total_problems"),
+                                          description="Number of known problems")
+    identified_percentage: float = Field(0.0, validation_alias=_keys("Identified Percentage", "識別百分比", "identified_percentage"),
+                                         description="Percentage of problems identified")
+    review_sufficient: bool = Field(False, validation_alias=_keys("Review Sufficient", "審查足夠", "review_sufficient"),
+                                    description="Whether the review is sufficient")
+    feedback: str = Field("", validation_alias=_keys("Feedback", "反饋", "feedback"),
+                          description="Overall assessment")
+
+    def to_result(self) -> Dict[str, Any]:
+        result = {
+            t("identified_problems"): [problem.to_result() for problem in self.identified_problems],
+            t("missed_problems"): [problem.to_result() for problem in self.missed_problems],
+            t("identified_count"): self.identified_count,
+            t("identified_percentage"): self.identified_percentage,
+            t("review_sufficient"): self.review_sufficient,
+            t("feedback"): self.feedback
+        }
+        if self.total_problems is not None:
+            result[t("total_problems")] = self.total_problems
+        return result
+
+
+# --- Comparison Report (comparison_report_template) ---
+class PerformanceSummary(_LLMOutput):
+    total_issues: int = 0
+    identified_count: int = 0
+    accuracy_percentage: float = 0.0
+    missed_count: int = 0
+    overall_assessment: str = ""
+    completion_status: str = ""
+
+
+class IdentifiedIssue(_LLMOutput):
+    issue_description: str = ""
+    praise_comment: str = ""
+
+
+class MissedIssue(_LLMOutput):
+    issue_description: str = ""
+    why_important: str = ""
+    how_to_find: str = ""
+
+
+class ImprovementTip(_LLMOutput):
+    category: str = ""
+    tip: str = ""
+    example: str = ""
+
+
+class JavaGuidance(_LLMOutput):
+    topic: str = ""
+    guidance: str = ""
+
+
+class NextSteps(_LLMOutput):
+    positive_feedback: str = ""
+    next_focus_areas: str = ""
+    learning_objectives: str = ""
+
+
+class DetailedFeedback(_LLMOutput):
+    strengths_identified: List[str] = Field(default_factory=list)
+    improvement_patterns: List[str] = Field(default_factory=list)
+    review_approach_feedback: str = ""
+
+
+class ComparisonReport(_LLMOutput):
+    """Educational report on the student's review performance"""
+    performance_summary: PerformanceSummary = Field(description="Performance metrics and overall assessment")
+    correctly_identified_issues: List[IdentifiedIssue] = Field(description="Issues the student found")
+    missed_issues: List[MissedIssue] = Field(description="Issues the student missed")
+    tips_for_improvement: List[ImprovementTip] = Field(default_factory=list, description="Actionable review tips")
+    java_specific_guidance: List[JavaGuidance] = Field(default_factory=list, description="Java-specific advice")
+    encouragement_and_next_steps: NextSteps = Field(default_factory=NextSteps, description="Encouragement and next goals")
+    detailed_feedback: DetailedFeedback = Field(default_factory=DetailedFeedback, description="Strengths and patterns")
+
+    def to_result(self) -> Dict[str, Any]:
+        return self.model_dump()
@@ -8,6 +8,11 @@ from langchain_core.language_models import BaseLanguageModel
 from utils.code_utils import create_review_analysis_prompt, create_feedback_prompt, create_comparison_report_prompt, process_llm_response
 from utils.llm_logger import LLMInteractionLogger
 from utils.language_utils import t
+from utils.async_utils import get_llm_call_timeout
+from utils.llm_streaming import stream_llm, astream_llm, TARGETED_GUIDANCE, COMPARISON_REPORT
+from utils.structured_output import invoke_structured, ainvoke_structured, stream_structured, astream_structured
+from utils.model_cascade import ModelCascade
+from core.output_schemas import ReviewAnalysis, ComparisonReport
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -23,16 +28,22 @@ class StudentResponseEvaluator:
     issues in a code snippet, providing detailed feedback and metrics.
     """    
     def __init__(self, llm: BaseLanguageModel = None,                 
-                 llm_logger: LLMInteractionLogger = None):
+                 llm_logger: LLMInteractionLogger = None,
+                 cascade: Optional[ModelCascade] = None):
         """
         Initialize the StudentResponseEvaluator.
         
         Args:
             llm: Language model to use for evaluation           
             llm_logger: Logger for tracking LLM interactions
+            cascade: Models to try smallest first for review analysis instead of llm alone
         """
         self.llm = llm
         self.llm_logger = llm_logger or LLMInteractionLogger()
+        self.llm_call_timeout = get_llm_call_timeout()
+        self.cascade = cascade
+        # Scores this close to a threshold are double-checked by the larger model
+        self.cascade_confidence_margin = float(os.getenv("CASCADE_CONFIDENCE_MARGIN", "0.05"))
 
         # Load meaningful score threshold from environment variable with default fallback to 0.6
         try:
@@ -64,55 +75,136 @@ class StudentResponseEvaluator:
             return "// Error: No LLM available for code generation"
 
         try:
-            logger.debug("Evaluating student review with code_utils prompt")
-            
-            if not self.llm:
-                logger.warning(t("no_llm_provided_for_evaluation"))
-                return ""
-            
-            # Create a review analysis prompt using the utility function
-            prompt = create_review_analysis_prompt(
-                code=code_snippet,
-                known_problems=known_problems,
-                student_review=student_review
-            )
+            prompt, metadata = self._prepare_review_evaluation(code_snippet, known_problems, student_review)
+        except Exception as e:
+            logger.error(f"{t('exception_in_evaluate_review')}: {str(e)}")
+            return ""
+        
+        try:
+            # Get the evaluation from the LLM
+            logger.debug("Sending student review to LLM for evaluation")
+            if self.cascade:
+                parsed, response = self.cascade.invoke_structured(
+                    prompt, ReviewAnalysis, "review_analysis", self._analysis_check(known_problems)
+                )
+            else:
+                parsed, response = invoke_structured(self.llm, prompt, ReviewAnalysis, "review_analysis")
+            return self._complete_review_evaluation(prompt, metadata, response, known_problems, parsed)
+        except Exception as e:
+            return self._review_evaluation_failed(prompt, metadata, e)
+    
+    async def aevaluate_review(self, code_snippet: str, known_problems: List[str], student_review: str) -> Dict[str, Any]:
+        """
+        Async version of evaluate_review with the per-call timeout.
+        
+        Args:
+            code_snippet: The original code snippet with injected errors
+            known_problems: List of known problems in the code
+            student_review: The student's review comments
             
-            try:
-                # Metadata for logging
-                metadata = {
-                    t("code_length"): len(code_snippet.splitlines()),
-                    t("known_problems_count"): len(known_problems),
-                    t("student_review_length"): len(student_review.splitlines())
-                }
-                # Get the evaluation from the LLM
-                logger.debug("Sending student review to LLM for evaluation")
-                response = self.llm.invoke(prompt)
-                processed_response = process_llm_response(response)
+        Returns:
+            Dictionary with detailed analysis results
+        """
+        if not self.llm:
+            logger.warning("No LLM available for review evaluation, using fallback evaluation")
+            return "// Error: No LLM available for code generation"
 
-                # Log the interaction
-                self.llm_logger.log_review_analysis(prompt, processed_response, metadata)
-                
-                # Make sure we have a response
-                if not response:
-                    logger.error(t("empty_response_from_llm"))
-                    return ""
-                
-                # Extract JSON data from the response
-                analysis_data = self._extract_json_from_text(processed_response)   
-                # Process the analysis data
-                enhanced_analysis = self._process_enhanced_analysis(analysis_data, known_problems)               
-                return enhanced_analysis
-                
-            except Exception as e:
-                logger.error(f"{t('error')} {t('evaluating_review_with_llm')}: {str(e)}")                
-                # Log the error
-                error_metadata = {**metadata, "error": str(e)}
-                self.llm_logger.log_review_analysis(prompt, f"{t('error')}: {str(e)}", error_metadata)                
-                return ""
-            
+        try:
+            prompt, metadata = self._prepare_review_evaluation(code_snippet, known_problems, student_review)
         except Exception as e:
             logger.error(f"{t('exception_in_evaluate_review')}: {str(e)}")
             return ""
+        
+        try:
+            logger.debug("Sending student review to LLM for evaluation (async)")
+            if self.cascade:
+                parsed, response = await self.cascade.ainvoke_structured(
+                    prompt, ReviewAnalysis, "review_analysis", self.llm_call_timeout, "Review evaluation",
+                    self._analysis_check(known_problems)
+                )
+            else:
+                parsed, response = await ainvoke_structured(self.llm, prompt, ReviewAnalysis, "review_analysis",
+                                                            self.llm_call_timeout, "Review evaluation")
+            return self._complete_review_evaluation(prompt, metadata, response, known_problems, parsed)
+        except Exception as e:
+            return self._review_evaluation_failed(prompt, metadata, e)
+    
+    def _analysis_check(self, known_problems: List[str]):
+        """
+        Confidence check for a small model's review analysis.
+        
+        Returns:
+            Function returning None for a trustworthy analysis, otherwise the reason to escalate
+        """
+        def check(analysis: ReviewAnalysis) -> Optional[str]:
+            identified, missed = analysis.identified_problems, analysis.missed_problems
+            if len(identified) + len(missed) != len(known_problems):
+                return "problems_not_accounted_for"
+            if analysis.identified_count != len(identified):
+                return "inconsistent_count"
+            for problem in identified:
+                if problem.accuracy is None or problem.meaningfulness is None:
+                    return "unscored_identification"
+                if (problem.accuracy < self.accuracy_score_threshold
+                        or problem.meaningfulness < self.meaningful_score_threshold):
+                    return "identified_below_threshold"
+            for problem in identified + missed:
+                if problem.accuracy is None or problem.meaningfulness is None:
+                    continue
+                if (abs(problem.accuracy - self.accuracy_score_threshold) < self.cascade_confidence_margin
+                        or abs(problem.meaningfulness - self.meaningful_score_threshold) < self.cascade_confidence_margin):
+                    return "borderline_score"
+            return None
+        return check
+    
+    def _prepare_review_evaluation(self, code_snippet: str, known_problems: List[str], student_review: str) -> Tuple[str, Dict[str, Any]]:
+        """Build the review analysis prompt and its logging metadata."""
+        logger.debug("Evaluating student review with code_utils prompt")
+        
+        # Create a review analysis prompt using the utility function
+        prompt = create_review_analysis_prompt(
+            code=code_snippet,
+            known_problems=known_problems,
+            student_review=student_review
+        )
+        
+        # Metadata for logging
+        metadata = {
+            t("code_length"): len(code_snippet.splitlines()),
+            t("known_problems_count"): len(known_problems),
+            t("student_review_length"): len(student_review.splitlines())
+        }
+        return prompt, metadata
+    
+    def _complete_review_evaluation(self, prompt: str, metadata: Dict[str, Any], response: Any, known_problems: List[str],
+                                    parsed: Optional[ReviewAnalysis] = None) -> Dict[str, Any]:
+        """Log the LLM response and turn it into the enhanced analysis."""
+        processed_response = process_llm_response(response)
+
+        # Log the interaction
+        self.llm_logger.log_review_analysis(prompt, processed_response, metadata)
+        
+        # Make sure we have a response
+        if not response:
+            logger.error(t("empty_response_from_llm"))
+            return ""
+        
+        # Use the schema-validated analysis; extract JSON from the text only if there is none
+        if parsed is not None:
+            analysis_data = parsed.to_result()
+        else:
+            analysis_data = self._extract_json_from_text(processed_response)
+        # Process the analysis data
+        enhanced_analysis = self._process_enhanced_analysis(analysis_data, known_problems)               
+        return enhanced_analysis
+    
+    def _review_evaluation_failed(self, prompt: str, metadata: Dict[str, Any], error: Exception) -> str:
+        """Log a failed review evaluation."""
+        logger.error(f"{t('error')} {t('evaluating_review_with_llm')}: {str(error)}")                
+        # Log the error
+        error_metadata = {**metadata, "error": str(error)}
+        self.llm_logger.log_review_analysis(prompt, f"{t('error')}: {str(error)}", error_metadata)                
+        return ""
             
     def _process_enhanced_analysis(self, analysis_data: Dict[str, Any], known_problems: List[str]) -> Dict[str, Any]:
         """
@@ -168,6 +260,7 @@ class StudentResponseEvaluator:
     def _extract_json_from_text(self, text: str) -> Dict[str, Any]:
         """
         Extract JSON data from LLM response text with improved robustness for malformed responses.
+        Only used when the response did not come back as schema-valid JSON.
         
         Args:
             text: Text containing JSON data
@@ -367,75 +460,105 @@ class StudentResponseEvaluator:
             logger.warning(t("no_llm_provided_for_guidance"))
             return ""
         
+        prompt = None
         try:
-            # Get iteration information to add to review_analysis for context
-            review_context = review_analysis.copy()
-            review_context.update({
-                t("iteration_count"): iteration_count,
-                t("max_iterations"): max_iterations,
-                t("remaining_attempts"): max_iterations - iteration_count
-            })
-
-            identified_count = review_context.get(t("identified_count"), 0)
-
-            # Use the utility function to create the prompt
-            prompt = create_feedback_prompt(
-                code=code_snippet,
-                known_problems=known_problems,
-                review_analysis=review_context
-            )
+            prompt, metadata = self._prepare_guidance(code_snippet, known_problems, review_analysis, iteration_count, max_iterations)
+            response = stream_llm(self.llm, prompt, TARGETED_GUIDANCE)
+            return self._complete_guidance(prompt, metadata, response)
+        except Exception as e:
+            return self._guidance_failed(prompt, review_analysis, iteration_count, max_iterations, e)
+    
+    async def agenerate_targeted_guidance(self, code_snippet: str, known_problems: List[str], student_review: str, review_analysis: Dict[str, Any], iteration_count: int, max_iterations: int) -> str:
+        """
+        Async version of generate_targeted_guidance with the per-call timeout, streamed when the UI is listening.
+        
+        Returns:
+            Targeted guidance text
+        """
+        if not self.llm:
+            logger.warning(t("no_llm_provided_for_guidance"))
+            return ""
+        
+        prompt = None
+        try:
+            prompt, metadata = self._prepare_guidance(code_snippet, known_problems, review_analysis, iteration_count, max_iterations)
+            response = await astream_llm(self.llm, prompt, TARGETED_GUIDANCE, self.llm_call_timeout, "Targeted guidance")
+            return self._complete_guidance(prompt, metadata, response)
+        except Exception as e:
+            return self._guidance_failed(prompt, review_analysis, iteration_count, max_iterations, e)
+    
+    def _prepare_guidance(self, code_snippet: str, known_problems: List[str], review_analysis: Dict[str, Any], iteration_count: int, max_iterations: int) -> Tuple[str, Dict[str, Any]]:
+        """Build the targeted guidance prompt and its logging metadata."""
+        # Get iteration information to add to review_analysis for context
+        review_context = review_analysis.copy()
+        review_context.update({
+            t("iteration_count"): iteration_count,
+            t("max_iterations"): max_iterations,
+            t("remaining_attempts"): max_iterations - iteration_count
+        })
 
-            #prompt += "\n\nIMPORTANT: Focus on helping the student make more meaningful comments. A good comment should clearly explain WHAT the issue is and WHY it's a problem, not just identify where it is. For example, instead of just 'Line 11: null issue', guide them to write 'Line 11: Object is accessed before null check, which could cause NullPointerException'."
+        # Use the utility function to create the prompt
+        prompt = create_feedback_prompt(
+            code=code_snippet,
+            known_problems=known_problems,
+            review_analysis=review_context
+        )
 
-            metadata = {
-                t("iteration"): iteration_count,
-                t("max_iterations"): max_iterations,
-                t("identified_count"):  review_analysis[t('identified_count')],
-                t("total_problems"): review_analysis[t('total_problems')],
-                t("accuracy_percentage"): review_analysis[t('accuracy_percentage')]
-            }
+        metadata = {
+            t("iteration"): iteration_count,
+            t("max_iterations"): max_iterations,
+            t("identified_count"):  review_analysis[t('identified_count')],
+            t("total_problems"): review_analysis[t('total_problems')],
+            t("accuracy_percentage"): review_analysis[t('accuracy_percentage')]
+        }
 
-            logger.debug(t("generating_concise_targeted_guidance").format(iteration_count=iteration_count))
-            response = self.llm.invoke(prompt)
-            guidance = process_llm_response(response)
-            
-            
-            # Ensure response is concise - trim if needed
-            if len(guidance.split()) > 100:
-                # Split into sentences and take the first 3-4
-                sentences = re.split(r'(?<=[.!?])\s+', guidance)
-                guidance = ' '.join(sentences[:4])
-                logger.debug(t("trimmed_guidance_words").format(
-                    before=len(guidance.split()), 
-                    after=len(guidance.split())
-                ))
-            
-            # Log the interaction
-            self.llm_logger.log_summary_generation(prompt, guidance, metadata)            
-            return guidance
-            
-        except Exception as e:
-            logger.error(f"{t('error_generating_guidance')}: {str(e)}")            
-            
+        logger.debug(t("generating_concise_targeted_guidance").format(iteration_count=iteration_count))
+        return prompt, metadata
+    
+    def _complete_guidance(self, prompt: str, metadata: Dict[str, Any], response: Any) -> str:
+        """Trim and log the guidance returned by the LLM."""
+        guidance = process_llm_response(response)
+        
+        # Ensure response is concise - trim if needed
+        if len(guidance.split()) > 100:
+            # Split into sentences and take the first 3-4
+            sentences = re.split(r'(?<=[.!?])\s+', guidance)
+            guidance = ' '.join(sentences[:4])
+            logger.debug(t("trimmed_guidance_words").format(
+                before=len(guidance.split()), 
+                after=len(guidance.split())
+            ))
+        
+        # Log the interaction
+        self.llm_logger.log_summary_generation(prompt, guidance, metadata)            
+        return guidance
+    
+    def _guidance_failed(self, prompt: Optional[str], review_analysis: Dict[str, Any], iteration_count: int, max_iterations: int, error: Exception) -> str:
+        """Log a failed guidance generation."""
+        logger.error(f"{t('error_generating_guidance')}: {str(error)}")            
+        
+        try:
             # Create error metadata with translated keys
             error_metadata = {
                 t("iteration"): iteration_count,
                 t("max_iterations"): max_iterations,
                 t("identified_count"): review_analysis[t('identified_count')],
                 t("total_problems"): review_analysis[t('total_problems')],
-                t("error"): str(e)
+                t("error"): str(error)
             }
             
             # Log the error
             self.llm_logger.log_interaction(
                 t('targeted_guidance'), 
                 prompt,
-                f"{t('error')}: {str(e)}", 
+                f"{t('error')}: {str(error)}", 
                 error_metadata
             )
-                
-            # Fallback to concise guidance
-            return ""
+        except Exception as log_error:
+            logger.warning(f"Could not log guidance error: {str(log_error)}")
+            
+        # Fallback to concise guidance
+        return ""
         
     def validate_review_format(self, student_review: str) -> Tuple[bool, str]:
         """
@@ -490,37 +613,8 @@ class StudentResponseEvaluator:
             prompt = create_comparison_report_prompt(evaluation_errors, review_analysis, review_history)
             
             # Generate the report with the LLM
-            response = self.llm.invoke(prompt)
-            
-            # Process the response
-            if hasattr(response, 'content'):
-                report = response.content
-            elif isinstance(response, dict) and 'content' in response:
-                report = response['content']
-            else:
-                report = str(response)
-            
-            # Clean up the report
-            report = report.replace('\\n', '\n')
-            
-           
-            try:
-                # First try to parse as direct JSON
-                formatted_report = self._extract_and_format_comparison_data(report, review_analysis, evaluation_errors)
-                
-                # Log the report generation
-                self.llm_logger.log_interaction("comparison_report", prompt, formatted_report, {
-                    t("evaluation_errors_count"): len(evaluation_errors),
-                    t("review_analysis"): review_analysis,
-                    t("review_history_count"): len(review_history) if review_history else 0
-                })               
-                
-                return formatted_report
-                
-            except Exception as extraction_error:
-                logger.warning(f"Error extracting and formatting comparison data: {extraction_error}")
-                # Fall back to original processing logic
-                return self._process_original_report_format(report, review_analysis, evaluation_errors)
+            parsed, response = stream_structured(self.llm, prompt, ComparisonReport, "comparison_report", COMPARISON_REPORT)
+            return self._complete_comparison_report(prompt, response, evaluation_errors, review_analysis, review_history, parsed)
             
         except Exception as e:
             # Log the error
@@ -528,6 +622,64 @@ class StudentResponseEvaluator:
             # Return a fallback report
             return self._generate_fallback_comparison_report(review_analysis, review_history)
     
+    async def agenerate_comparison_report(self, evaluation_errors: List[str], review_analysis: Dict[str, Any], 
+                                          review_history: List[Dict[str, Any]] = None) -> str:
+        """
+        Async version of generate_comparison_report with the per-call timeout, streamed when the UI is listening.
+        
+        Returns:
+            Formatted comparison report
+        """
+        try:
+            if not self.llm:
+                logger.error(f"{t('error')} generating comparison report: No LLM available")
+                return ""
+                
+            prompt = create_comparison_report_prompt(evaluation_errors, review_analysis, review_history)
+            parsed, response = await astream_structured(self.llm, prompt, ComparisonReport, "comparison_report",
+                                                        COMPARISON_REPORT, self.llm_call_timeout, "Comparison report")
+            return self._complete_comparison_report(prompt, response, evaluation_errors, review_analysis, review_history, parsed)
+            
+        except Exception as e:
+            logger.error(f"Error generating comparison report with LLM: {str(e)}")
+            return self._generate_fallback_comparison_report(review_analysis, review_history)
+    
+    def _complete_comparison_report(self, prompt: str, response: Any, evaluation_errors: List[str],
+                                    review_analysis: Dict[str, Any], review_history: List[Dict[str, Any]] = None,
+                                    parsed: Optional[ComparisonReport] = None) -> str:
+        """Format and log the comparison report returned by the LLM."""
+        # Process the response
+        if hasattr(response, 'content'):
+            report = response.content
+        elif isinstance(response, dict) and 'content' in response:
+            report = response['content']
+        else:
+            report = str(response)
+        
+        # Clean up the report
+        report = report.replace('\\n', '\n')
+        
+        try:
+            # Use the schema-validated report; extract it from the text only if there is none
+            if parsed is not None:
+                formatted_report = json.dumps(parsed.to_result(), indent=2, ensure_ascii=False)
+            else:
+                formatted_report = self._extract_and_format_comparison_data(report, review_analysis, evaluation_errors)
+            
+            # Log the report generation
+            self.llm_logger.log_interaction("comparison_report", prompt, formatted_report, {
+                t("evaluation_errors_count"): len(evaluation_errors),
+                t("review_analysis"): review_analysis,
+                t("review_history_count"): len(review_history) if review_history else 0
+            })               
+            
+            return formatted_report
+            
+        except Exception as extraction_error:
+            logger.warning(f"Error extracting and formatting comparison data: {extraction_error}")
+            # Fall back to original processing logic
+            return self._process_original_report_format(report, review_analysis, evaluation_errors)
+    
     def _extract_and_format_comparison_data(self, raw_content: str, review_analysis: Dict[str, Any], 
                                        evaluation_errors: List[str]) -> str:
         """
@@ -21,6 +21,11 @@ DROP TABLE IF EXISTS error_category_stats;
 DROP TABLE IF EXISTS review_sessions;
 DROP TABLE IF EXISTS badge_progress;
 DROP TABLE IF EXISTS user_streaks;  
+DROP TABLE IF EXISTS schema_version;
+DROP TABLE IF EXISTS rollup_watermarks;
+DROP TABLE IF EXISTS daily_user_interactions;
+DROP TABLE IF EXISTS daily_review_sessions;
+DROP TABLE IF EXISTS daily_llm_token_usage;
 SET FOREIGN_KEY_CHECKS = 1;
 
 
@@ -183,6 +188,15 @@ CREATE TABLE IF NOT EXISTS user_streaks (
     INDEX idx_streak_tracking (user_id, streak_type, current_streak DESC)
 ) DEFAULT CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci;
 
+-- Schema version table, written by setup_database.py after the seed data is verified
+CREATE TABLE IF NOT EXISTS schema_version (
+    version INT PRIMARY KEY,
+    description VARCHAR(255),
+    category_count INT DEFAULT 0,
+    error_count INT DEFAULT 0,
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+) DEFAULT CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci;
+
 -- Error categories table
 CREATE TABLE error_categories (
     id INT AUTO_INCREMENT PRIMARY KEY,    
@@ -8,6 +8,7 @@ The database repository is now the primary method for accessing error data.
 
 # Import the main repositories
 from data.database_error_repository import DatabaseErrorRepository
+from data.error_catalogue import ErrorCatalogue
 # Default to database repository for new code
 ErrorRepository = DatabaseErrorRepository
 
@@ -31,6 +32,7 @@ def get_default_repository():
 
 __all__ = [
     'DatabaseErrorRepository',
+    'ErrorCatalogue',
     'JsonErrorRepository', 
     'ErrorRepository',
     'create_error_repository',
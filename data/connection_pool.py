@@ -0,0 +1,352 @@
+# data/connection_pool.py
+"""
+Connection Pool module for Java Peer Review Training System.
+
+This module provides a thread-safe pool of database connections shared by
+every Streamlit session thread. Each thread checks out its own connection,
+so queries from concurrent students no longer serialize on a single socket.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no connection becomes available within the pool timeout."""
+
+
+class _PoolEntry:
+    """Bookkeeping for a single pooled connection."""
+
+    __slots__ = ("connection", "created_at", "last_used_at", "invalid")
+
+    def __init__(self, connection: Any):
+        now = time.monotonic()
+        self.connection = connection
+        self.created_at = now
+        self.last_used_at = now
+        self.invalid = False
+
+
+class ConnectionPool:
+    """
+    Thread-safe connection pool with overflow limits and health checks.
+
+    Up to ``pool_size`` connections are kept open between uses. When all of
+    them are checked out, up to ``max_overflow`` extra connections are opened
+    and closed again once they are returned and nobody is waiting. Callers
+    beyond that limit wait up to ``timeout`` seconds for a connection to be
+    returned.
+
+    Checkout is re-entrant per thread: nested checkouts on the same thread
+    share the connection that thread already holds.
+    """
+
+    def __init__(self,
+                 creator: Callable[[], Any],
+                 pool_size: int = 10,
+                 max_overflow: int = 20,
+                 timeout: float = 10.0,
+                 recycle_seconds: float = 3600.0,
+                 ping_interval: float = 30.0,
+                 validator: Callable[[Any], bool] = None,
+                 is_disconnect: Callable[[Exception], bool] = None):
+        """
+        Initialize the pool.
+
+        Args:
+            creator: Callable that opens a new raw connection
+            pool_size: Number of connections kept open when idle
+            max_overflow: Extra connections allowed under peak load
+            timeout: Seconds to wait for a free connection before failing
+            recycle_seconds: Maximum age of a connection before it is reopened
+            ping_interval: Idle seconds after which a connection is health-checked
+            validator: Callable returning True if a connection is still usable
+            is_disconnect: Callable deciding whether an error invalidates the connection
+        """
+        self._creator = creator
+        self.pool_size = max(1, pool_size)
+        self.max_overflow = max(0, max_overflow)
+        self.timeout = timeout
+        self.recycle_seconds = recycle_seconds
+        self.ping_interval = ping_interval
+        self._validator = validator or (lambda connection: connection.is_connected())
+        self._is_disconnect = is_disconnect or (lambda error: False)
+
+        self._idle = deque()
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._local = threading.local()
+        self._total = 0
+        self._in_use = 0
+        self._waiting = 0
+        self._closed = False
+
+        self._stats = {
+            "checkouts": 0,
+            "waits": 0,
+            "timeouts": 0,
+            "total_wait_seconds": 0.0,
+            "max_wait_seconds": 0.0,
+            "connections_created": 0,
+            "connections_discarded": 0,
+            "health_check_failures": 0,
+            "peak_in_use": 0
+        }
+
+    @contextmanager
+    def connection(self):
+        """
+        Check out a connection for the duration of a ``with`` block.
+
+        The connection is discarded instead of returned if the block raises
+        an error that ``is_disconnect`` classifies as a lost connection.
+        """
+        conn = self.acquire()
+        discard = False
+        try:
+            yield conn
+        except Exception as e:
+            discard = self._is_disconnect(e)
+            raise
+        finally:
+            self.release(discard=discard)
+
+    @contextmanager
+    def dedicated(self):
+        """
+        Check out a connection of its own for the duration of a ``with`` block.
+
+        Unlike connection(), this does not join the connection the thread
+        already holds, and other checkouts on the thread do not join it. Use it
+        for a connection that stays busy across generator yields, such as a
+        streamed result. The connection is closed instead of returned if the
+        block raises or is abandoned (GeneratorExit), since it may still have
+        unread rows.
+        """
+        entry = self._checkout()
+        try:
+            yield entry.connection
+        except BaseException:
+            entry.invalid = True
+            raise
+        finally:
+            self._checkin(entry)
+
+    def acquire(self) -> Any:
+        """
+        Check out a connection for the current thread.
+
+        Returns:
+            A raw database connection
+
+        Raises:
+            PoolTimeoutError: If no connection is available within the timeout
+        """
+        local = self._local
+        entry = getattr(local, "entry", None)
+        if entry is not None:
+            local.depth += 1
+            return entry.connection
+
+        entry = self._checkout()
+        local.entry = entry
+        local.depth = 1
+        return entry.connection
+
+    def release(self, discard: bool = False) -> None:
+        """
+        Return the current thread's connection to the pool.
+
+        Args:
+            discard: Close the connection instead of keeping it for reuse
+        """
+        local = self._local
+        entry = getattr(local, "entry", None)
+        if entry is None:
+            return
+
+        if discard:
+            entry.invalid = True
+
+        local.depth -= 1
+        if local.depth > 0:
+            return
+
+        local.entry = None
+        self._checkin(entry)
+
+    def invalidate(self) -> None:
+        """Mark the current thread's connection to be closed when it is released."""
+        entry = getattr(self._local, "entry", None)
+        if entry is not None:
+            entry.invalid = True
+
+    def has_connection(self) -> bool:
+        """Check whether the current thread already holds a connection."""
+        return getattr(self._local, "entry", None) is not None
+
+    def _checkout(self) -> _PoolEntry:
+        """Take an idle connection or open a new one, waiting if necessary."""
+        start = time.monotonic()
+        deadline = start + self.timeout
+        entry = None
+        waited = False
+
+        with self._available:
+            while True:
+                if self._closed:
+                    raise PoolTimeoutError("Connection pool is closed")
+                if self._idle:
+                    # LIFO keeps the most recently used connections warm
+                    entry = self._idle.pop()
+                    break
+                if self._total < self.pool_size + self.max_overflow:
+                    self._total += 1
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    raise PoolTimeoutError(
+                        f"No connection available within {self.timeout:.1f}s "
+                        f"(pool_size={self.pool_size}, max_overflow={self.max_overflow})"
+                    )
+                if not waited:
+                    self._stats["waits"] += 1
+                    waited = True
+                self._waiting += 1
+                try:
+                    self._available.wait(remaining)
+                finally:
+                    self._waiting -= 1
+
+            wait_seconds = time.monotonic() - start
+            self._stats["checkouts"] += 1
+            self._stats["total_wait_seconds"] += wait_seconds
+            self._stats["max_wait_seconds"] = max(self._stats["max_wait_seconds"], wait_seconds)
+            self._in_use += 1
+            self._stats["peak_in_use"] = max(self._stats["peak_in_use"], self._in_use)
+
+        try:
+            if entry is None:
+                return self._open_entry()
+            return self._validate_entry(entry)
+        except Exception:
+            with self._available:
+                self._total -= 1
+                self._in_use -= 1
+                self._available.notify()
+            raise
+
+    def _checkin(self, entry: _PoolEntry) -> None:
+        """Put a connection back into the idle queue or close it."""
+        with self._available:
+            self._in_use -= 1
+            # Overflow connections are only kept while other threads are waiting
+            keep = (not entry.invalid
+                    and not self._closed
+                    and (self._total <= self.pool_size or self._waiting > 0))
+            if keep:
+                entry.last_used_at = time.monotonic()
+                self._idle.append(entry)
+            else:
+                self._total -= 1
+                self._stats["connections_discarded"] += 1
+            self._available.notify()
+
+        if not keep:
+            self._close_quietly(entry.connection)
+
+    def _open_entry(self) -> _PoolEntry:
+        """Open a brand-new connection."""
+        connection = self._creator()
+        with self._lock:
+            self._stats["connections_created"] += 1
+        return _PoolEntry(connection)
+
+    def _validate_entry(self, entry: _PoolEntry) -> _PoolEntry:
+        """Replace a connection that is too old or fails its health check."""
+        now = time.monotonic()
+
+        if self.recycle_seconds and now - entry.created_at > self.recycle_seconds:
+            logger.debug("Recycling pooled connection past its maximum age")
+            self._discard(entry)
+            return self._open_entry()
+
+        if now - entry.last_used_at > self.ping_interval:
+            try:
+                healthy = self._validator(entry.connection)
+            except Exception:
+                healthy = False
+            if not healthy:
+                logger.debug("Pooled connection failed health check, reopening")
+                with self._lock:
+                    self._stats["health_check_failures"] += 1
+                self._discard(entry)
+                return self._open_entry()
+
+        return entry
+
+    def _discard(self, entry: _PoolEntry) -> None:
+        """Close a connection that is being replaced in place."""
+        with self._lock:
+            self._stats["connections_discarded"] += 1
+        self._close_quietly(entry.connection)
+
+    @staticmethod
+    def _close_quietly(connection: Any) -> None:
+        """Close a connection, ignoring errors from already-dead sockets."""
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Get pool usage and wait metrics.
+
+        Returns:
+            Dictionary with pool configuration, current usage and counters
+        """
+        with self._lock:
+            metrics = dict(self._stats)
+            metrics.update({
+                "pool_size": self.pool_size,
+                "max_overflow": self.max_overflow,
+                "open_connections": self._total,
+                "idle_connections": len(self._idle),
+                "in_use": self._in_use
+            })
+        checkouts = metrics["checkouts"]
+        metrics["avg_wait_seconds"] = metrics["total_wait_seconds"] / checkouts if checkouts else 0.0
+        return metrics
+
+    def close(self) -> None:
+        """Close all idle connections and refuse further checkouts."""
+        with self._available:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._total -= len(idle)
+            self._available.notify_all()
+
+        for entry in idle:
+            self._close_quietly(entry.connection)
+
+    def dispose(self) -> None:
+        """Close all idle connections but keep the pool usable."""
+        with self._available:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._total -= len(idle)
+            self._stats["connections_discarded"] += len(idle)
+
+        for entry in idle:
+            self._close_quietly(entry.connection)
@@ -11,6 +11,8 @@ import random
 import json
 from typing import Dict, List, Any, Optional, Set, Union, Tuple
 from data.mysql_connection import MySQLConnection
+from data.error_catalogue import ErrorCatalogue, CatalogueSnapshot
+from data.schema_version import SchemaVerifier
 from utils.language_utils import get_current_language, t
 
 # Configure logging
@@ -25,75 +27,43 @@ class DatabaseErrorRepository:
     Repository for accessing Java error data from the database.
     
     This class handles loading, categorizing, and providing access to
-    error data stored in the database tables.
+    error data stored in the database tables. It is a process-wide singleton
+    shared by every session, so the language is read per call rather than
+    stored on the instance.
     """
     
+    _instance = None
+    
+    def __new__(cls):
+        """Ensure singleton instance."""
+        if cls._instance is None:
+            cls._instance = super(DatabaseErrorRepository, cls).__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+    
     def __init__(self):
         """Initialize the Database Error Repository."""
-        self.db = MySQLConnection()
-        self.current_language = get_current_language()
+        if self._initialized:
+            return
         
-        # Cache for frequently accessed data
-        self._categories_cache = None
-        self._cache_timestamp = None
+        self.db = MySQLConnection()
         
-        # Verify database connection and tables
-        self._verify_database_setup()
+        # Shared in-memory catalogue of categories and errors
+        self.catalogue = ErrorCatalogue()
+        self._initialized = True
     
-    def _verify_database_setup(self):
-        """Verify that the required database tables exist and have data."""
-        try:
-            # Test basic connection first
-            if not self.db.test_connection_only():
-                logger.debug("Database connection not available. Please run setup first.")
-                return
-            
-            # Check if error_categories table exists and has data
-            check_query = """
-            SELECT COUNT(*) as count 
-            FROM information_schema.tables 
-            WHERE table_schema = DATABASE() 
-            AND table_name = 'error_categories'
-            """
-            result = self.db.execute_query(check_query, fetch_one=True)
-            
-            if not result or result.get('count', 0) == 0:
-                logger.debug("Error categories table not found. Please run database setup first.")
-                return
-            
-            # Check if categories have data
-            data_query = "SELECT COUNT(*) as count FROM error_categories"
-            data_result = self.db.execute_query(data_query, fetch_one=True)
-            
-            if not data_result or data_result.get('count', 0) == 0:
-                logger.debug("No categories found. Please import data using the SQL file.")
-                return
-            
-            # Check if java_errors table exists and has data  
-            check_query = """
-            SELECT COUNT(*) as count 
-            FROM information_schema.tables 
-            WHERE table_schema = DATABASE() 
-            AND table_name = 'java_errors'
-            """
-            result = self.db.execute_query(check_query, fetch_one=True)
-            
-            if not result or result.get('count', 0) == 0:
-                logger.debug("Java errors table not found. Please run database setup first.")
-                return
-            
-            # Check if errors have data
-            data_query = "SELECT COUNT(*) as count FROM java_errors"
-            data_result = self.db.execute_query(data_query, fetch_one=True)
-            
-            if not data_result or data_result.get('count', 0) == 0:
-                logger.debug("No error data found. Please import data using the SQL file.")
-                return
-                
-            logger.debug(f"Database verified: {data_result['count']} errors available")
-            
-        except Exception as e:
-            logger.debug(f"Database not ready: {str(e)}. Please run setup and import data first.")
+    @property
+    def current_language(self) -> str:
+        """Language of the calling session."""
+        return get_current_language()
+    
+    def verify_database_setup(self) -> bool:
+        """
+        Verify that the required tables exist and have data.
+        
+        The check runs once per process and is cached; see SchemaVerifier.
+        """
+        return SchemaVerifier().verify()
     
     def _get_language_fields(self, base_field: str) -> str:
         """Get the appropriate language field name."""
@@ -103,9 +73,27 @@ class DatabaseErrorRepository:
             return f"{base_field}_en"
     
     def _invalidate_cache(self):
-        """Invalidate the categories cache."""
-        self._categories_cache = None
-        self._cache_timestamp = None
+        """Invalidate the shared error catalogue."""
+        self.catalogue.invalidate()
+    
+    def _get_catalogue(self) -> Optional[CatalogueSnapshot]:
+        """Get the loaded catalogue."""
+        return self.catalogue.snapshot()
+    
+    def _get_language(self) -> str:
+        """Get the catalogue language code for the current language."""
+        return 'zh' if self.current_language == 'zh' else 'en'
+    
+    def _resolve_category_ids(self, catalogue: CatalogueSnapshot, category_names: List[str], lang: str) -> List[int]:
+        """Map localized category names to catalogue category IDs, skipping unknown names."""
+        category_ids = []
+        for name in category_names:
+            category = catalogue.category(name, lang)
+            if category is None:
+                logger.warning(f"Category not found: {name}")
+            elif category.id not in category_ids:
+                category_ids.append(category.id)
+        return category_ids
     
     def get_all_categories(self) -> Dict[str, List[str]]:
         """
@@ -115,22 +103,13 @@ class DatabaseErrorRepository:
             Dictionary with 'java_errors' categories
         """
         try:
-            self.current_language = get_current_language()
-            name_field = self._get_language_fields('name')
-            description_field = self._get_language_fields('description')
-            
-            query = f"""
-            SELECT {name_field} as name, {description_field} as description
-            FROM error_categories            
-            ORDER BY sort_order
-            """
+            catalogue = self._get_catalogue()
             
-            categories = self.db.execute_query(query)
-            
-            if categories:
-                category_names = [cat['name'] for cat in categories]
-                categories_descriptions = [cat['description'] for cat in categories]
-                logger.debug(f"Found {len(category_names)} categories in database")
+            if catalogue and catalogue.categories:
+                lang = self._get_language()
+                category_names = [cat.name[lang] for cat in catalogue.categories]
+                categories_descriptions = [cat.description[lang] for cat in catalogue.categories]
+                logger.debug(f"Found {len(category_names)} categories in catalogue")
                 return {"java_errors": category_names, "descriptions": categories_descriptions}
             else:
                 logger.warning("No categories found in database")
@@ -142,51 +121,26 @@ class DatabaseErrorRepository:
 
     def get_category_errors(self, category_name: str) -> List[Dict[str, str]]:
         try:
-            self.current_language = get_current_language()
-            
-            # Get field names based on language
-            name_field = self._get_language_fields('error_name')
-            desc_field = self._get_language_fields('description')
-            guide_field = self._get_language_fields('implementation_guide')
-            
-            # First, find the category by name in current language
-            cat_name_field = self._get_language_fields('name')
-            category_query = f"""
-            SELECT id,name_en, name_zh 
-            FROM error_categories 
-            WHERE {cat_name_field} = %s
-            """
+            catalogue = self._get_catalogue()
+            lang = self._get_language()
             
-            category = self.db.execute_query(category_query, (category_name,), fetch_one=True)
+            # Find the category by name in current language
+            category = catalogue.category(category_name, lang) if catalogue else None
             
             if not category:
                 logger.warning(f"Category not found: {category_name}")
                 return []
             
-            # Get errors for this category
-            errors_query = f"""
-            SELECT 
-                {name_field} as error_name,
-                {desc_field} as description,
-                {guide_field} as implementation_guide,
-                difficulty_level,
-                error_code
-            FROM java_errors 
-            WHERE category_id = %s
-            ORDER BY error_name_en
-            """
-            
-            errors = self.db.execute_query(errors_query, (category['id'],))
-            
             # Format the results to match the expected JSON structure
             formatted_errors = []
-            for error in errors or []:
+            for error in category.errors:
+                fields = error.localized(lang)
                 formatted_errors.append({
-                    t("error_name_variable"): error['error_name'],
-                    t("description"): error['description'],
-                    t("implementation_guide"): error.get('implementation_guide', ''),
-                    "difficulty_level": error.get('difficulty_level', 'medium'),
-                    "error_code": error.get('error_code', '')
+                    t("error_name_variable"): fields['error_name'],
+                    t("description"): fields['description'],
+                    t("implementation_guide"): fields['implementation_guide'],
+                    "difficulty_level": fields['difficulty_level'],
+                    "error_code": fields['error_code']
                 })
             
             return formatted_errors
@@ -230,32 +184,19 @@ class DatabaseErrorRepository:
             return None
         
         try:
-            self.current_language = get_current_language()
-            
-            name_field = self._get_language_fields('error_name')
-            desc_field = self._get_language_fields('description')
-            guide_field = self._get_language_fields('implementation_guide')
-            
-            query = f"""
-            SELECT 
-                {name_field} as error_name,
-                {desc_field} as description,
-                {guide_field} as implementation_guide,
-                difficulty_level,
-                error_code
-            FROM java_errors 
-            WHERE {name_field} = %s
-            """
+            catalogue = self._get_catalogue()
+            lang = self._get_language()
             
-            error = self.db.execute_query(query, (error_name,), fetch_one=True)
+            error = catalogue.error(error_name, lang) if catalogue else None
             
             if error:
+                fields = error.localized(lang)
                 return {
-                    t("error_name_variable"): error['error_name'],
-                    t("description"): error['description'],
-                    t("implementation_guide"): error.get('implementation_guide', ''),
-                    "difficulty_level": error.get('difficulty_level', 'medium'),
-                    "error_code": error.get('error_code', '')
+                    t("error_name_variable"): fields['error_name'],
+                    t("description"): fields['description'],
+                    t("implementation_guide"): fields['implementation_guide'],
+                    "difficulty_level": fields['difficulty_level'],
+                    "error_code": fields['error_code']
                 }
             
             return None
@@ -265,7 +206,7 @@ class DatabaseErrorRepository:
             return None
     
     def get_random_errors_by_categories(self, selected_categories: Dict[str, List[str]], 
-                                      count: int = 4) -> List[Dict[str, Any]]:
+                                      count: int = 4, seed: Optional[int] = None) -> List[Dict[str, Any]]:
         """
         Get random errors from selected categories.
         
@@ -273,55 +214,37 @@ class DatabaseErrorRepository:
             selected_categories: Dictionary with 'java_errors' key
                             containing a list of selected categories
             count: Number of errors to select
+            seed: Optional seed for a reproducible selection
             
         Returns:
             List of selected errors with type and category information
         """
         try:
-            self.current_language = get_current_language()
-            
             java_error_categories = selected_categories.get("java_errors", [])
             if not java_error_categories:
                 return []
             
-            # Get field names based on language
-            name_field = self._get_language_fields('error_name')
-            desc_field = self._get_language_fields('description')
-            guide_field = self._get_language_fields('implementation_guide')
-            cat_name_field = self._get_language_fields('name')
-            
-            # Build query to get random errors from selected categories
-            placeholders = ','.join(['%s'] * len(java_error_categories))
-            
-            query = f"""
-            SELECT 
-                je.{name_field} as error_name,
-                je.{desc_field} as description,
-                je.{guide_field} as implementation_guide,
-                je.difficulty_level,
-                je.error_code,
-                ec.{cat_name_field} as category_name
-            FROM java_errors je
-            JOIN error_categories ec ON je.category_id = ec.id
-            WHERE ec.{cat_name_field} IN ({placeholders})            
-            ORDER BY RAND()
-            LIMIT %s
-            """
+            catalogue = self._get_catalogue()
+            if not catalogue:
+                return []
+            lang = self._get_language()
             
-            params = tuple(java_error_categories) + (count,)
-            errors = self.db.execute_query(query, params)
+            # Weighted selection from the in-memory catalogue
+            category_ids = self._resolve_category_ids(catalogue, java_error_categories, lang)
+            errors = catalogue.sampler.sample(category_ids, count, seed=seed)
             
             # Format results
             formatted_errors = []
-            for error in errors or []:
+            for error in errors:
+                fields = error.localized(lang)
                 formatted_errors.append({
                     "type": "java_error",
-                    "category": error['category_name'],
-                    "name": error['error_name'],
-                    "description": error['description'],
-                    "implementation_guide": error.get('implementation_guide', ''),
-                    "difficulty_level": error.get('difficulty_level', 'medium'),
-                    "error_code": error.get('error_code', '')
+                    "category": fields['category_name'],
+                    "name": fields['error_name'],
+                    "description": fields['description'],
+                    "implementation_guide": fields['implementation_guide'],
+                    "difficulty_level": fields['difficulty_level'],
+                    "error_code": fields['error_code']
                 })
             
             return formatted_errors
@@ -334,11 +257,14 @@ class DatabaseErrorRepository:
                           selected_categories: Dict[str, List[str]] = None, 
                           specific_errors: List[Dict[str, Any]] = None,
                           count: int = 4, 
-                          difficulty: str = "medium") -> Tuple[List[Dict[str, Any]], List[str]]:
+                          difficulty: str = "medium",
+                          seed: Optional[int] = None) -> Tuple[List[Dict[str, Any]], List[str]]:
         """
         Get errors suitable for sending to the LLM for code generation.
         Can use either category-based selection or specific errors.
         Tries to always return errors if possible.
+        Category-based selection is weighted by frequency_weight and can be
+        made reproducible with ``seed``.
         """
         # Map difficulty levels properly
         difficulty_map = {
@@ -369,53 +295,38 @@ class DatabaseErrorRepository:
         
         elif selected_categories:
             try:
-                self.current_language = get_current_language()
                 java_error_categories = selected_categories.get("java_errors", [])
                 if not java_error_categories:
                     logger.warning("No categories specified, using defaults")
                     default_cats = self.get_all_categories()
                     java_error_categories = default_cats.get("java_errors", [])[:3]
-                name_field = self._get_language_fields('error_name')
-                desc_field = self._get_language_fields('description')
-                guide_field = self._get_language_fields('implementation_guide')
-                cat_name_field = self._get_language_fields('name')
-                placeholders = ','.join(['%s'] * len(java_error_categories))
-                # 1. Try with difficulty
-                query = f"""
-                SELECT 
-                    je.{name_field} as error_name,
-                    je.{desc_field} as description,
-                    je.{guide_field} as implementation_guide,
-                    je.difficulty_level,
-                    je.error_code,
-                    ec.{cat_name_field} as category_name
-                FROM java_errors je
-                JOIN error_categories ec ON je.category_id = ec.id
-                WHERE ec.{cat_name_field} IN ({placeholders})               
-                AND je.difficulty_level = %s
-                ORDER BY RAND()
-                LIMIT %s
-                """
-                params = tuple(java_error_categories) + (mapped_difficulty, adjusted_count)
-                errors = self.db.execute_query(query, params)
-                if errors and len(errors) >= adjusted_count:
-                    logger.debug(f"Selected {len(errors)} errors for LLM (with difficulty)")
+                catalogue = self._get_catalogue()
+                if not catalogue:
+                    return [], []
+                lang = self._get_language()
+                # Weighted selection at the requested difficulty, widened to
+                # neighbouring difficulties if that level has too few errors
+                category_ids = self._resolve_category_ids(catalogue, java_error_categories, lang)
+                errors = catalogue.sampler.sample(
+                    category_ids, adjusted_count, difficulty=mapped_difficulty, seed=seed
+                )
                 
                 # Format results
                 selected_errors = []
                 problem_descriptions = []
-                for error in errors or []:
+                for error in errors:
+                    fields = error.localized(lang)
                     error_data = {
-                        t("category"): error['category_name'],
-                        t("error_name_variable"): error['error_name'],
-                        t("description"): error['description'],
-                        t("implementation_guide"): error.get('implementation_guide', ''),
-                        "difficulty_level": error.get('difficulty_level', 'medium'),
-                        "error_code": error.get('error_code', '')
+                        t("category"): fields['category_name'],
+                        t("error_name_variable"): fields['error_name'],
+                        t("description"): fields['description'],
+                        t("implementation_guide"): fields['implementation_guide'],
+                        "difficulty_level": fields['difficulty_level'],
+                        "error_code": fields['error_code']
                     }
                     selected_errors.append(error_data)
                     problem_descriptions.append(
-                        f"{error['category_name']}: {error['error_name']} - {error['description']}"
+                        f"{fields['category_name']}: {fields['error_name']} - {fields['description']}"
                     )
                 logger.debug(f"Selected {len(selected_errors)} errors for LLM (final)")
                 return selected_errors, problem_descriptions
@@ -437,23 +348,13 @@ class DatabaseErrorRepository:
             Implementation guide string or None if not found
         """
         try:
-            self.current_language = get_current_language()
-            
-            name_field = self._get_language_fields('error_name')
-            guide_field = self._get_language_fields('implementation_guide')
-            cat_name_field = self._get_language_fields('name')
-            
-            query = f"""
-            SELECT je.{guide_field} as implementation_guide
-            FROM java_errors je
-            JOIN error_categories ec ON je.category_id = ec.id
-            WHERE je.{name_field} = %s AND ec.{cat_name_field} = %s           
-            """
+            catalogue = self._get_catalogue()
+            lang = self._get_language()
             
-            result = self.db.execute_query(query, (error_name, category), fetch_one=True)
+            error = catalogue.error(error_name, lang) if catalogue else None
             
-            if result:
-                return result.get('implementation_guide')
+            if error and catalogue.category(category, lang) is error.category:
+                return error.implementation_guide[lang]
             
             return None
             
@@ -476,29 +377,16 @@ class DatabaseErrorRepository:
             return None
         
         try:
-            self.current_language = get_current_language()
-            
-            name_field = self._get_language_fields('error_name')
-            desc_field = self._get_language_fields('description')
-            cat_name_field = self._get_language_fields('name')
-            
-            query = f"""
-            SELECT 
-                je.{name_field} as error_name,
-                je.{desc_field} as description,
-                ec.{cat_name_field} as category_name
-            FROM java_errors je
-            JOIN error_categories ec ON je.category_id = ec.id
-            WHERE je.{name_field} = %s             
-            """
+            catalogue = self._get_catalogue()
+            lang = self._get_language()
             
-            result = self.db.execute_query(query, (error_name,), fetch_one=True)
+            error = catalogue.error(error_name, lang) if catalogue else None
             
-            if result:
+            if error:
                 return {
-                    t("category"): result['category_name'],
-                    t("error_name_variable"): result['error_name'],
-                    t("description"): result['description']
+                    t("category"): error.category.name[lang],
+                    t("error_name_variable"): error.name[lang],
+                    t("description"): error.description[lang]
                 }
             
             return None
@@ -563,41 +451,29 @@ class DatabaseErrorRepository:
             Dictionary containing example codes and solutions
         """
         try:
-            self.current_language = get_current_language()
-            name_field = self._get_language_fields('error_name')
+            catalogue = self._get_catalogue()
+            error = catalogue.error(error_name, self._get_language()) if catalogue else None
             
-            query = f"""
-            SELECT examples, tags
-            FROM java_errors 
-            WHERE {name_field} = %s
-            """
-            
-            result = self.db.execute_query(query, (error_name,), fetch_one=True)
-            
-            if result and result.get('examples'):
-                try:
-                    examples_data = json.loads(result['examples']) if isinstance(result['examples'], str) else result['examples']
-                    
-                    # Extract wrong and correct examples
-                    examples = {
-                        "wrong_examples": [],
-                        "correct_examples": [],
-                        "explanation": ""
-                    }
-                    
-                    if isinstance(examples_data, list):
-                        for example in examples_data:
-                            if 'wrong' in example:
-                                examples["wrong_examples"].append(example['wrong'])
-                            if 'correct' in example:
-                                examples["correct_examples"].append(example['correct'])
-                            if 'advice' in example:
-                                examples["explanation"] = example['advice']
-                    
-                    return examples
-                    
-                except json.JSONDecodeError:
-                    logger.warning(f"Invalid JSON in examples for error: {error_name}")
+            if error and error.examples is not None:
+                examples_data = error.examples
+                
+                # Extract wrong and correct examples
+                examples = {
+                    "wrong_examples": [],
+                    "correct_examples": [],
+                    "explanation": ""
+                }
+                
+                if isinstance(examples_data, list):
+                    for example in examples_data:
+                        if 'wrong' in example:
+                            examples["wrong_examples"].append(example['wrong'])
+                        if 'correct' in example:
+                            examples["correct_examples"].append(example['correct'])
+                        if 'advice' in example:
+                            examples["explanation"] = example['advice']
+                
+                return examples
                     
             return self._get_default_examples(error_name)
             
@@ -621,39 +497,22 @@ class DatabaseErrorRepository:
             Dictionary of errors with their pattern data
         """
         try:
-            self.current_language = get_current_language()
-            name_field = self._get_language_fields('error_name')
-            desc_field = self._get_language_fields('description')
-            
-            query = f"""
-            SELECT 
-                ec.name_en,
-                je.{name_field} as error_name,
-                je.{desc_field} as description,
-                je.examples,
-                je.tags
-            FROM java_errors je
-            JOIN error_categories ec ON je.category_id = ec.id           
-            ORDER BY ec.sort_order, je.{name_field}
-            """
-            
-            errors = self.db.execute_query(query)
+            catalogue = self._get_catalogue()
+            lang = self._get_language()
             pattern_database = {}
             
-            for error in errors or []:
-                error_key = error['error_name'].lower().replace(" ", "_")
-                
-                # Parse examples from JSON
-                examples_data = {}
-                if error.get('examples'):
-                    try:
-                        examples_json = json.loads(error['examples']) if isinstance(error['examples'], str) else error['examples']
-                        
+            for category in (catalogue.categories if catalogue else []):
+                for error in sorted(category.errors, key=lambda e: (e.name[lang] or "").casefold()):
+                    error_name = error.name[lang]
+                    error_key = error_name.lower().replace(" ", "_")
+                    
+                    # Build pattern examples from the parsed examples JSON
+                    if error.examples is not None:
                         correct_patterns = []
                         incorrect_patterns = []
                         
-                        if isinstance(examples_json, list):
-                            for example in examples_json:
+                        if isinstance(error.examples, list):
+                            for example in error.examples:
                                 if 'wrong' in example:
                                     correct_patterns.append(example['wrong'])  # Wrong examples become "correct" patterns to identify
                                 if 'correct' in example:
@@ -663,20 +522,17 @@ class DatabaseErrorRepository:
                             "correct_patterns": correct_patterns,
                             "incorrect_patterns": incorrect_patterns
                         }
-                        
-                    except json.JSONDecodeError:
-                        examples_data = self._get_default_pattern_examples(error['error_name'])
-                else:
-                    examples_data = self._get_default_pattern_examples(error['error_name'])
-                
-                pattern_database[error_key] = {
-                    "name": error['error_name'],
-                    "description": error['description'],
-                    "correct_patterns": examples_data.get("correct_patterns", []),
-                    "incorrect_patterns": examples_data.get("incorrect_patterns", []),
-                    "explanation": f"Learn to identify {error['error_name']} patterns",
-                    "warning_signs": self._extract_warning_signs(error.get('tags'))
-                }
+                    else:
+                        examples_data = self._get_default_pattern_examples(error_name)
+                    
+                    pattern_database[error_key] = {
+                        "name": error_name,
+                        "description": error.description[lang],
+                        "correct_patterns": examples_data.get("correct_patterns", []),
+                        "incorrect_patterns": examples_data.get("incorrect_patterns", []),
+                        "explanation": f"Learn to identify {error_name} patterns",
+                        "warning_signs": self._extract_warning_signs(error.tags)
+                    }
             
             return pattern_database
             
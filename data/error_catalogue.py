@@ -0,0 +1,255 @@
+# data/error_catalogue.py
+"""
+Error Catalogue module for Java Peer Review Training System.
+
+This module keeps the error categories and Java errors in a process-wide,
+bilingual in-memory catalogue. The catalogue is loaded with a single query
+and indexed by category, error code, localized name and difficulty, so
+repository reads do not touch the database. A cheap version stamp query
+detects edits to the underlying tables and triggers a reload.
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from typing import Dict, List, Any, Optional, Tuple
+
+from data.mysql_connection import MySQLConnection
+from data.statement_registry import register_statement, READ
+from data.error_sampler import ErrorSampler
+
+logger = logging.getLogger(__name__)
+
+LANGUAGES = ("en", "zh")
+
+_VERSION_STAMP = register_statement("catalogue.version_stamp", """
+    SELECT (SELECT COUNT(*) FROM error_categories) AS category_count,
+           (SELECT MAX(updated_at) FROM error_categories) AS categories_updated_at,
+           (SELECT COUNT(*) FROM java_errors) AS error_count,
+           (SELECT MAX(updated_at) FROM java_errors) AS errors_updated_at
+""", READ)
+
+_LOAD_CATALOGUE = register_statement("catalogue.load", """
+    SELECT ec.id AS category_id,
+           ec.name_en AS category_name_en, ec.name_zh AS category_name_zh,
+           ec.description_en AS category_description_en,
+           ec.description_zh AS category_description_zh,
+           ec.icon AS category_icon, ec.sort_order,
+           je.id AS error_id, je.error_code,
+           je.error_name_en, je.error_name_zh,
+           je.description_en, je.description_zh,
+           je.implementation_guide_en, je.implementation_guide_zh,
+           je.difficulty_level, je.frequency_weight, je.tags, je.examples
+    FROM error_categories ec
+    LEFT JOIN java_errors je ON je.category_id = ec.id
+    ORDER BY ec.sort_order, ec.id, je.error_name_en
+""", READ)
+
+
+def _name_key(name: Any) -> str:
+    """Normalize a name the way the case-insensitive MySQL collation compares it."""
+    return str(name or "").strip().casefold()
+
+
+def _parse_json(value: Any) -> Any:
+    """Parse a JSON column that the connector may return as str or bytes."""
+    if value is None:
+        return None
+    if isinstance(value, (bytes, bytearray)):
+        value = value.decode('utf-8')
+    if isinstance(value, str):
+        try:
+            return json.loads(value)
+        except json.JSONDecodeError:
+            return None
+    return value
+
+
+class ErrorCategory:
+    """An error category with its errors in catalogue order."""
+
+    def __init__(self, row: Dict[str, Any]):
+        self.id = row['category_id']
+        self.name = {"en": row.get('category_name_en'), "zh": row.get('category_name_zh')}
+        self.description = {"en": row.get('category_description_en'), "zh": row.get('category_description_zh')}
+        self.icon = row.get('category_icon')
+        self.sort_order = row.get('sort_order') or 0
+        self.errors: List["JavaError"] = []
+
+
+class JavaError:
+    """A Java error definition with both languages and parsed JSON columns."""
+
+    def __init__(self, row: Dict[str, Any], category: ErrorCategory):
+        self.id = row['error_id']
+        self.error_code = row.get('error_code') or ''
+        self.category = category
+        self.name = {"en": row.get('error_name_en'), "zh": row.get('error_name_zh')}
+        self.description = {"en": row.get('description_en'), "zh": row.get('description_zh')}
+        self.implementation_guide = {
+            "en": row.get('implementation_guide_en'),
+            "zh": row.get('implementation_guide_zh')
+        }
+        self.difficulty_level = row.get('difficulty_level') or 'medium'
+        self.frequency_weight = max(0, int(row.get('frequency_weight') or 0))
+        self.tags = _parse_json(row.get('tags'))
+        self.examples = _parse_json(row.get('examples'))
+
+    def localized(self, language: str) -> Dict[str, Any]:
+        """Get the error's fields in one language."""
+        language = language if language in LANGUAGES else "en"
+        return {
+            "error_name": self.name[language],
+            "description": self.description[language],
+            "implementation_guide": self.implementation_guide[language] or '',
+            "difficulty_level": self.difficulty_level,
+            "error_code": self.error_code,
+            "category_name": self.category.name[language]
+        }
+
+
+class CatalogueSnapshot:
+    """
+    Immutable, fully indexed view of the catalogue.
+
+    A reload builds a new snapshot and swaps it in, so readers always see a
+    consistent catalogue without taking a lock.
+    """
+
+    def __init__(self, rows: List[Dict[str, Any]], version: Optional[Tuple] = None):
+        self.version = version
+        self._sampler: Optional[ErrorSampler] = None
+        self.categories: List[ErrorCategory] = []
+        self.errors: List[JavaError] = []
+        self.by_code: Dict[str, JavaError] = {}
+        self.by_difficulty: Dict[str, List[JavaError]] = {}
+        self._categories_by_name: Dict[str, Dict[str, ErrorCategory]] = {lang: {} for lang in LANGUAGES}
+        self._errors_by_name: Dict[str, Dict[str, JavaError]] = {lang: {} for lang in LANGUAGES}
+
+        categories: Dict[int, ErrorCategory] = {}
+        for row in rows:
+            category = categories.get(row['category_id'])
+            if category is None:
+                category = ErrorCategory(row)
+                categories[category.id] = category
+                self.categories.append(category)
+                for lang in LANGUAGES:
+                    self._categories_by_name[lang].setdefault(_name_key(category.name[lang]), category)
+
+            # Categories without errors come back from the LEFT JOIN with a NULL error
+            if row.get('error_id') is None:
+                continue
+
+            error = JavaError(row, category)
+            category.errors.append(error)
+            self.errors.append(error)
+            self.by_code.setdefault(error.error_code, error)
+            self.by_difficulty.setdefault(error.difficulty_level, []).append(error)
+            for lang in LANGUAGES:
+                self._errors_by_name[lang].setdefault(_name_key(error.name[lang]), error)
+
+    @property
+    def sampler(self) -> ErrorSampler:
+        """Weighted error sampler over this snapshot, built on first use."""
+        if self._sampler is None:
+            self._sampler = ErrorSampler(self)
+        return self._sampler
+
+    def category(self, name: str, language: str) -> Optional[ErrorCategory]:
+        """Find a category by its localized name."""
+        return self._categories_by_name.get(language, {}).get(_name_key(name))
+
+    def error(self, name: str, language: str) -> Optional[JavaError]:
+        """Find an error by its localized name."""
+        return self._errors_by_name.get(language, {}).get(_name_key(name))
+
+
+class ErrorCatalogue:
+    """
+    Process-wide cache of the error categories and Java errors.
+
+    Reads are served from memory. At most once per ``check_interval`` seconds
+    a version stamp (row counts and latest ``updated_at`` of both tables) is
+    compared with the loaded one, and the catalogue is reloaded when it
+    changed. invalidate() forces a reload on the next access.
+    """
+
+    _instance = None
+
+    def __new__(cls):
+        """Ensure singleton instance."""
+        if cls._instance is None:
+            cls._instance = super(ErrorCatalogue, cls).__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        """Initialize the catalogue without loading it."""
+        if self._initialized:
+            return
+
+        self.db = MySQLConnection()
+        self.check_interval = float(os.getenv("ERROR_CATALOGUE_CHECK_INTERVAL", "300"))
+        self._lock = threading.Lock()
+        self._snapshot: Optional[CatalogueSnapshot] = None
+        self._checked_at: Optional[float] = None
+        self._initialized = True
+
+    def invalidate(self) -> None:
+        """Drop the cached catalogue so the next access reloads it."""
+        with self._lock:
+            self._snapshot = None
+            self._checked_at = None
+
+    def snapshot(self) -> Optional[CatalogueSnapshot]:
+        """
+        Get the current catalogue, loading or refreshing it if needed.
+
+        Returns:
+            CatalogueSnapshot, or None if the catalogue has never loaded
+        """
+        snapshot = self._snapshot
+        checked_at = self._checked_at
+        if snapshot is not None and checked_at is not None \
+                and time.monotonic() - checked_at < self.check_interval:
+            return snapshot
+
+        with self._lock:
+            # Another thread may have refreshed while we waited for the lock
+            if self._snapshot is not None and self._checked_at is not None \
+                    and time.monotonic() - self._checked_at < self.check_interval:
+                return self._snapshot
+
+            version = self._read_version()
+            if self._snapshot is not None and (version is None or version == self._snapshot.version):
+                # Unchanged, or the stamp could not be read: keep serving the loaded catalogue
+                self._checked_at = time.monotonic()
+                return self._snapshot
+
+            loaded = self._load(version)
+            if loaded is not None:
+                self._snapshot = loaded
+                self._checked_at = time.monotonic()
+            return self._snapshot
+
+    def _read_version(self) -> Optional[Tuple]:
+        """Read the version stamp of the catalogue tables."""
+        row = self.db.execute_query(_VERSION_STAMP, fetch_one=True)
+        if not row:
+            return None
+        return (row.get('category_count'), row.get('categories_updated_at'),
+                row.get('error_count'), row.get('errors_updated_at'))
+
+    def _load(self, version: Optional[Tuple]) -> Optional[CatalogueSnapshot]:
+        """Load every category and error in one query."""
+        rows = self.db.execute_query(_LOAD_CATALOGUE)
+        if rows is None:
+            logger.warning("Could not load error catalogue")
+            return None
+
+        snapshot = CatalogueSnapshot(rows, version)
+        logger.debug(f"Loaded error catalogue: {len(snapshot.categories)} categories, "
+                     f"{len(snapshot.errors)} errors")
+        return snapshot
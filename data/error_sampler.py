@@ -0,0 +1,117 @@
+# data/error_sampler.py
+"""
+Error Sampler module for Java Peer Review Training System.
+
+This module selects random errors for code generation from the in-memory
+error catalogue instead of sorting the joined tables with ORDER BY RAND().
+Errors are drawn without replacement with probability proportional to
+their ``frequency_weight``.
+"""
+
+import heapq
+import random
+import logging
+from typing import Dict, List, Optional, Tuple, Iterable, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from data.error_catalogue import CatalogueSnapshot, JavaError
+
+logger = logging.getLogger(__name__)
+
+# Difficulty levels in order, used to widen a selection to neighbouring levels
+DIFFICULTY_LEVELS = ("easy", "medium", "hard")
+
+
+def weighted_sample(errors: List["JavaError"], count: int,
+                    rng: random.Random) -> List["JavaError"]:
+    """
+    Draw ``count`` errors without replacement, weighted by frequency_weight.
+
+    Uses the Efraimidis-Spirakis method: each error gets the key
+    ``u ** (1 / weight)`` for a uniform ``u`` and the largest keys win, which
+    is equivalent to drawing one error at a time and removing it. Errors with
+    a weight of zero are only picked once every weighted error is used up.
+    """
+    if count <= 0 or not errors:
+        return []
+
+    keyed = []
+    for error in errors:
+        u = rng.random()
+        weight = error.frequency_weight
+        key = u ** (1.0 / weight) if weight > 0 else u - 1.0
+        keyed.append((key, error))
+
+    if count >= len(keyed):
+        keyed.sort(key=lambda item: item[0], reverse=True)
+        return [error for _, error in keyed]
+
+    return [error for _, error in heapq.nlargest(count, keyed, key=lambda item: item[0])]
+
+
+class ErrorSampler:
+    """
+    Weighted random error selection over one catalogue snapshot.
+
+    Errors are bucketed by (category id, difficulty) once, when the sampler is
+    built; each selection then only walks the buckets of the requested
+    categories.
+    """
+
+    def __init__(self, snapshot: "CatalogueSnapshot"):
+        self._buckets: Dict[Tuple[int, str], List["JavaError"]] = {}
+        for error in snapshot.errors:
+            self._buckets.setdefault((error.category.id, error.difficulty_level), []).append(error)
+
+    def _pool(self, category_ids: Iterable[int], difficulties: Iterable[str]) -> List["JavaError"]:
+        """Collect the errors of the given categories and difficulties."""
+        pool = []
+        for category_id in category_ids:
+            for difficulty in difficulties:
+                pool.extend(self._buckets.get((category_id, difficulty), ()))
+        return pool
+
+    def sample(self,
+               category_ids: List[int],
+               count: int,
+               difficulty: Optional[str] = None,
+               seed: Optional[int] = None,
+               widen: bool = True) -> List["JavaError"]:
+        """
+        Select errors from the given categories.
+
+        Args:
+            category_ids: IDs of the categories to draw from
+            count: Number of errors to select
+            difficulty: Preferred difficulty level, or None for any level
+            seed: Seed for a reproducible selection
+            widen: Fill up from neighbouring difficulty levels, then from any
+                   level, when the preferred level has too few errors
+
+        Returns:
+            Up to ``count`` distinct errors
+        """
+        rng = random.Random(seed)
+
+        if difficulty is None or difficulty not in DIFFICULTY_LEVELS:
+            return weighted_sample(self._pool(category_ids, DIFFICULTY_LEVELS), count, rng)
+
+        selected = weighted_sample(self._pool(category_ids, (difficulty,)), count, rng)
+        if not widen or len(selected) >= count:
+            return selected
+
+        # Widen outwards by distance from the preferred level: medium -> easy, hard
+        position = DIFFICULTY_LEVELS.index(difficulty)
+        for distance in range(1, len(DIFFICULTY_LEVELS)):
+            levels = [DIFFICULTY_LEVELS[i] for i in (position - distance, position + distance)
+                      if 0 <= i < len(DIFFICULTY_LEVELS)]
+            if not levels:
+                continue
+            more = weighted_sample(self._pool(category_ids, levels), count - len(selected), rng)
+            if more:
+                logger.debug(f"Widened error selection from '{difficulty}' to {levels}: {len(more)} more")
+            selected.extend(more)
+            if len(selected) >= count:
+                break
+
+        return selected
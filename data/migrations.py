@@ -0,0 +1,477 @@
+# data/migrations.py
+"""
+Migrations module for Java Peer Review Training System.
+
+Create_db.sql installs schema version 1. Later schema changes are listed
+here as numbered migrations; each one is applied once, in order, and
+recorded in the ``schema_version`` table. Every operation checks the
+current schema before changing it, so a migration interrupted halfway can
+simply be run again.
+
+The module also checks the query plans of the registered READ statements
+against the installed schema and reports every statement that scans a
+whole table.
+"""
+
+import re
+import logging
+import datetime
+import importlib
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from data.schema_version import SCHEMA_VERSION, CREATE_SCHEMA_VERSION_TABLE
+from data.statement_registry import StatementRegistry, Statement
+from data.partition_manager import month_start, add_months, partition_clause
+
+logger = logging.getLogger(__name__)
+
+MYSQL_BACKEND = "mysql"
+SQLITE_BACKEND = "sqlite"
+
+# Modules that register statements at import time
+STATEMENT_MODULES = (
+    "auth.mysql_auth",
+    "analytics.badge_manager",
+    "data.error_catalogue",
+    "ui.components.user_practice_tracker",
+)
+
+# Statements that read whole tables on purpose
+ALLOWED_FULL_SCANS = frozenset({
+    "auth.all_users",
+    "catalogue.load",
+})
+
+
+class AddIndex:
+    """Create an index unless it already exists."""
+
+    def __init__(self, table: str, name: str, columns: Sequence[str]):
+        self.table = table
+        self.name = name
+        self.columns = list(columns)
+
+    def __repr__(self) -> str:
+        return f"AddIndex({self.table}.{self.name} ({', '.join(self.columns)}))"
+
+    def apply(self, cursor, backend: str) -> bool:
+        """Create the index. Returns False if it was already there."""
+        columns = ", ".join(self.columns)
+        if backend == SQLITE_BACKEND:
+            # SQLite index names are global, so the table name is part of them
+            name = f"{self.table}_{self.name}"
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = %s", (name,))
+            if cursor.fetchall():
+                return False
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {self.table} ({columns})")
+            return True
+
+        cursor.execute("""
+            SELECT 1 FROM information_schema.statistics
+            WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+            LIMIT 1
+        """, (self.table, self.name))
+        if cursor.fetchall():
+            return False
+        cursor.execute(f"CREATE INDEX {self.name} ON {self.table} ({columns})")
+        return True
+
+
+class ModifyColumn:
+    """
+    Change a column definition unless the column already has the target type.
+
+    SQLite does not enforce declared column lengths, so the change is only
+    made on MySQL.
+    """
+
+    def __init__(self, table: str, column: str, definition: str, column_type: str):
+        """
+        Args:
+            table: Table name
+            column: Column name
+            definition: Full column definition, e.g. "VARCHAR(36) NOT NULL"
+            column_type: Type as reported by information_schema, e.g. "varchar(36)"
+        """
+        self.table = table
+        self.column = column
+        self.definition = definition
+        self.column_type = column_type.lower()
+
+    def __repr__(self) -> str:
+        return f"ModifyColumn({self.table}.{self.column} {self.definition})"
+
+    def apply(self, cursor, backend: str) -> bool:
+        """Modify the column. Returns False if there was nothing to change."""
+        if backend == SQLITE_BACKEND:
+            return False
+
+        cursor.execute("""
+            SELECT COLUMN_TYPE FROM information_schema.columns
+            WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s
+        """, (self.table, self.column))
+        row = cursor.fetchone()
+        cursor.fetchall()
+        if row is None:
+            raise ValueError(f"Column {self.table}.{self.column} does not exist")
+        current = row[0].decode() if isinstance(row[0], (bytes, bytearray)) else row[0]
+        if current.lower() == self.column_type:
+            return False
+
+        # The column may take part in a foreign key
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+        try:
+            cursor.execute(f"ALTER TABLE {self.table} MODIFY COLUMN {self.column} {self.definition}")
+        finally:
+            cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+        return True
+
+
+class CreateTable:
+    """Create a table from a MySQL definition unless it exists."""
+
+    def __init__(self, name: str, definition: str):
+        self.name = name
+        self.definition = definition
+
+    def __repr__(self) -> str:
+        return f"CreateTable({self.name})"
+
+    def apply(self, cursor, backend: str) -> bool:
+        """Create the table. Returns False if it was already there."""
+        if backend == SQLITE_BACKEND:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", (self.name,))
+        else:
+            cursor.execute("""
+                SELECT 1 FROM information_schema.tables
+                WHERE table_schema = DATABASE() AND table_name = %s
+            """, (self.name,))
+        if cursor.fetchall():
+            return False
+        cursor.execute(self.definition)
+        return True
+
+
+class PartitionByMonth:
+    """
+    Range-partition a table by month of a timestamp column.
+
+    MySQL requires the partitioning column in every unique key and does not
+    allow foreign keys on partitioned tables, so the primary key becomes
+    (id, column) and the table's foreign keys are dropped. Partitions cover
+    the months from the oldest row to ``months_ahead`` months from now; the
+    PartitionManager adds later ones. SQLite has no partitioning.
+    """
+
+    def __init__(self, table: str, column: str, months_ahead: int = 3):
+        self.table = table
+        self.column = column
+        self.months_ahead = months_ahead
+
+    def __repr__(self) -> str:
+        return f"PartitionByMonth({self.table}.{self.column})"
+
+    def apply(self, cursor, backend: str) -> bool:
+        """Partition the table. Returns False if it is already partitioned."""
+        if backend == SQLITE_BACKEND:
+            return False
+
+        cursor.execute("""
+            SELECT COUNT(*) FROM information_schema.partitions
+            WHERE table_schema = DATABASE() AND table_name = %s AND partition_name IS NOT NULL
+        """, (self.table,))
+        partitioned = cursor.fetchone()[0]
+        cursor.fetchall()
+        if partitioned:
+            return False
+
+        cursor.execute("""
+            SELECT constraint_name FROM information_schema.referential_constraints
+            WHERE constraint_schema = DATABASE() AND table_name = %s
+        """, (self.table,))
+        foreign_keys = [row[0] for row in cursor.fetchall()]
+        for name in foreign_keys:
+            cursor.execute(f"ALTER TABLE {self.table} DROP FOREIGN KEY `{name}`")
+
+        cursor.execute(f"SELECT MIN(`{self.column}`) FROM {self.table}")
+        oldest = cursor.fetchone()[0]
+        cursor.fetchall()
+        current = month_start(datetime.date.today())
+        first = month_start(oldest) if oldest is not None else current
+
+        cursor.execute(f"""
+            ALTER TABLE {self.table}
+                MODIFY COLUMN `{self.column}` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                DROP PRIMARY KEY,
+                ADD PRIMARY KEY (id, `{self.column}`)
+        """)
+        cursor.execute(f"ALTER TABLE {self.table} "
+                       f"{partition_clause(self.column, first, add_months(current, self.months_ahead))}")
+        return True
+
+
+CREATE_ROLLUP_WATERMARKS = """
+    CREATE TABLE IF NOT EXISTS rollup_watermarks (
+        source VARCHAR(64) PRIMARY KEY,
+        last_id BIGINT NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    ) DEFAULT CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci
+"""
+
+CREATE_DAILY_USER_INTERACTIONS = """
+    CREATE TABLE IF NOT EXISTS daily_user_interactions (
+        day DATE NOT NULL,
+        user_id VARCHAR(36) NOT NULL,
+        interaction_type VARCHAR(64) NOT NULL,
+        interaction_category VARCHAR(50) NOT NULL,
+        interactions INT NOT NULL DEFAULT 0,
+        successes INT NOT NULL DEFAULT 0,
+        time_spent_seconds BIGINT NOT NULL DEFAULT 0,
+        PRIMARY KEY (day, user_id, interaction_type, interaction_category),
+        INDEX idx_user_day (user_id, day),
+        INDEX idx_type_day (interaction_type, day)
+    ) DEFAULT CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci
+"""
+
+CREATE_DAILY_REVIEW_SESSIONS = """
+    CREATE TABLE IF NOT EXISTS daily_review_sessions (
+        day DATE NOT NULL,
+        user_id VARCHAR(36) NOT NULL,
+        code_difficulty VARCHAR(20) NOT NULL,
+        session_type VARCHAR(20) NOT NULL,
+        sessions INT NOT NULL DEFAULT 0,
+        perfect_sessions INT NOT NULL DEFAULT 0,
+        total_errors INT NOT NULL DEFAULT 0,
+        identified_errors INT NOT NULL DEFAULT 0,
+        accuracy_sum DECIMAL(12,2) NOT NULL DEFAULT 0.00,
+        time_spent_seconds BIGINT NOT NULL DEFAULT 0,
+        PRIMARY KEY (day, user_id, code_difficulty, session_type),
+        INDEX idx_user_day (user_id, day),
+        INDEX idx_difficulty_day (code_difficulty, day)
+    ) DEFAULT CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci
+"""
+
+CREATE_DAILY_LLM_TOKEN_USAGE = """
+    CREATE TABLE IF NOT EXISTS daily_llm_token_usage (
+        day DATE NOT NULL,
+        user_id VARCHAR(36) NOT NULL,
+        role VARCHAR(32) NOT NULL,
+        calls INT NOT NULL DEFAULT 0,
+        estimated_calls INT NOT NULL DEFAULT 0,
+        prompt_tokens BIGINT NOT NULL DEFAULT 0,
+        completion_tokens BIGINT NOT NULL DEFAULT 0,
+        PRIMARY KEY (day, user_id, role),
+        INDEX idx_user_day (user_id, day),
+        INDEX idx_role_day (role, day)
+    ) DEFAULT CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci
+"""
+
+
+class Migration:
+    """A numbered schema change made of idempotent operations."""
+
+    def __init__(self, version: int, description: str, operations: List[Any]):
+        self.version = version
+        self.description = description
+        self.operations = operations
+
+    def __repr__(self) -> str:
+        return f"Migration({self.version}, {self.description!r})"
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(2, "Index error and category names used by lookups and the catalogue version stamp", [
+        AddIndex("java_errors", "idx_error_name_en", ["error_name_en"]),
+        AddIndex("java_errors", "idx_error_name_zh", ["error_name_zh"]),
+        AddIndex("java_errors", "idx_updated_at", ["updated_at"]),
+        AddIndex("error_categories", "idx_name_zh", ["name_zh"]),
+        AddIndex("error_categories", "idx_updated_at", ["updated_at"]),
+    ]),
+    Migration(3, "Index activity_log by user and activity type", [
+        AddIndex("activity_log", "idx_user_activity_type", ["user_id", "activity_type"]),
+    ]),
+    Migration(4, "Shrink review_sessions.user_id to the size of users.uid", [
+        ModifyColumn("review_sessions", "user_id", "VARCHAR(36) NOT NULL", "varchar(36)"),
+    ]),
+    Migration(5, "Partition activity_log and user_interactions by month", [
+        PartitionByMonth("activity_log", "created_at"),
+        PartitionByMonth("user_interactions", "timestamp"),
+    ]),
+    Migration(6, "Daily rollup tables for interactions and review sessions", [
+        CreateTable("rollup_watermarks", CREATE_ROLLUP_WATERMARKS),
+        CreateTable("daily_user_interactions", CREATE_DAILY_USER_INTERACTIONS),
+        CreateTable("daily_review_sessions", CREATE_DAILY_REVIEW_SESSIONS),
+    ]),
+    Migration(7, "Daily LLM token usage per user and model role", [
+        CreateTable("daily_llm_token_usage", CREATE_DAILY_LLM_TOKEN_USAGE),
+    ]),
+]
+
+LATEST_SCHEMA_VERSION = max([SCHEMA_VERSION] + [migration.version for migration in MIGRATIONS])
+
+
+def load_statement_modules(modules: Iterable[str] = STATEMENT_MODULES) -> None:
+    """Import the modules that register statements, so the registry is complete."""
+    for module in modules:
+        try:
+            importlib.import_module(module)
+        except Exception as e:
+            logger.warning(f"Could not import {module} to load its statements: {str(e)}")
+
+
+class MigrationRunner:
+    """
+    Applies pending migrations and checks query plans on one connection.
+
+    Works on a raw mysql.connector connection or a SQLiteConnection, such as
+    the one returned by MySQLConnection.get_admin_connection().
+    """
+
+    def __init__(self, connection, backend: str = MYSQL_BACKEND):
+        self.connection = connection
+        self.backend = backend
+
+    # =================================================================
+    # Migrations
+    # =================================================================
+
+    def current_version(self) -> int:
+        """Get the highest recorded schema version, 0 for an empty table."""
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(CREATE_SCHEMA_VERSION_TABLE)
+            cursor.execute("SELECT MAX(version) FROM schema_version")
+            row = cursor.fetchone()
+            cursor.fetchall()
+        finally:
+            cursor.close()
+        return int(row[0]) if row and row[0] is not None else 0
+
+    def pending(self) -> List[Migration]:
+        """Get the migrations newer than the recorded schema version."""
+        current = self.current_version()
+        return [migration for migration in MIGRATIONS if migration.version > current]
+
+    def migrate(self, target: Optional[int] = None) -> int:
+        """
+        Apply the pending migrations up to ``target`` (default: all).
+
+        Returns:
+            int: Schema version after migrating
+        """
+        version = self.current_version()
+        for migration in sorted(self.pending(), key=lambda m: m.version):
+            if target is not None and migration.version > target:
+                break
+            self.apply(migration)
+            version = migration.version
+        return version
+
+    def apply(self, migration: Migration) -> None:
+        """Run a migration's operations and record its version."""
+        logger.info(f"Applying migration {migration.version}: {migration.description}")
+        cursor = self.connection.cursor()
+        try:
+            for operation in migration.operations:
+                if operation.apply(cursor, self.backend):
+                    logger.debug(f"  {operation!r} applied")
+                else:
+                    logger.debug(f"  {operation!r} already in place")
+
+            cursor.execute("""
+                INSERT INTO schema_version (version, description, category_count, error_count)
+                VALUES (%s, %s, (SELECT COUNT(*) FROM error_categories), (SELECT COUNT(*) FROM java_errors))
+                ON DUPLICATE KEY UPDATE description = VALUES(description),
+                                        category_count = VALUES(category_count),
+                                        error_count = VALUES(error_count),
+                                        applied_at = CURRENT_TIMESTAMP
+            """, (migration.version, migration.description))
+            self.connection.commit()
+        finally:
+            cursor.close()
+
+    # =================================================================
+    # Query plan check
+    # =================================================================
+
+    def check_query_plans(self, statements: Optional[Iterable[Statement]] = None,
+                          allowed: Iterable[str] = ALLOWED_FULL_SCANS) -> List[Dict[str, Any]]:
+        """
+        EXPLAIN every registered READ statement and find full table scans.
+
+        Args:
+            statements: Statements to check (default: every registered READ statement)
+            allowed: Names of statements that may scan whole tables
+
+        Returns:
+            List of violations with the statement name, table and plan detail
+        """
+        if statements is None:
+            registry = StatementRegistry()
+            statements = [registry.get(name) for name in registry.names()]
+        allowed = set(allowed)
+
+        violations = []
+        for statement in statements:
+            if not statement.is_read or statement.name in allowed:
+                continue
+            try:
+                plan = self._explain(statement.sql)
+            except Exception as e:
+                logger.warning(f"Could not EXPLAIN {statement.name}: {str(e)}")
+                continue
+            for table, detail in self._full_scans(statement.sql, plan):
+                violations.append({"statement": statement.name, "table": table, "detail": detail})
+        return violations
+
+    def _explain(self, sql: str) -> List[Dict[str, Any]]:
+        keyword = "EXPLAIN QUERY PLAN" if self.backend == SQLITE_BACKEND else "EXPLAIN"
+        cursor = self.connection.cursor(dictionary=True)
+        try:
+            cursor.execute(f"{keyword} {sql}", _sample_params(sql))
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+
+    def _full_scans(self, sql: str, plan: List[Dict[str, Any]]) -> List[tuple]:
+        """Get (table, detail) for each step of a plan that reads a whole table."""
+        tables = _table_aliases(sql)
+        scans = []
+        for step in plan:
+            if self.backend == SQLITE_BACKEND:
+                detail = step.get("detail") or ""
+                match = re.match(r"SCAN (\w+)$", detail.strip())
+                if match and match.group(1).lower() in tables:
+                    scans.append((tables[match.group(1).lower()], detail))
+            elif step.get("type") == "ALL":
+                table = (step.get("table") or "").lower()
+                if table in tables:
+                    scans.append((tables[table], f"type=ALL rows={step.get('rows')}"))
+        return scans
+
+
+def _sample_params(sql: str) -> tuple:
+    """Placeholder values for EXPLAIN: 1 for LIMIT/OFFSET, '1' elsewhere."""
+    params = []
+    for match in re.finditer(r"(\w+)?\s*%s", sql):
+        keyword = (match.group(1) or "").upper()
+        params.append(1 if keyword in ("LIMIT", "OFFSET") else "1")
+    return tuple(params)
+
+
+_TABLE_REFERENCE = re.compile(r"\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?", re.IGNORECASE)
+_NOT_ALIASES = {"where", "on", "join", "left", "right", "inner", "outer", "cross", "group", "order",
+                "limit", "union", "using", "set", "having", "for"}
+
+
+def _table_aliases(sql: str) -> Dict[str, str]:
+    """Map each table name and alias in a query to its table."""
+    tables = {}
+    for table, alias in _TABLE_REFERENCE.findall(sql):
+        table = table.lower()
+        if table == "information_schema":
+            continue
+        tables[table] = table
+        if alias and alias.lower() not in _NOT_ALIASES:
+            tables[alias.lower()] = table
+    return tables
@@ -1,11 +1,25 @@
 # db/mysql_connection.py
-import mysql.connector
 import logging
+import sqlite3
 import time
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Dict, Any, List, Optional, Tuple, Union, Iterator, Callable
 import os
 from dotenv import load_dotenv
 import traceback
+import threading
+from collections import namedtuple
+from contextlib import contextmanager
+from functools import lru_cache, partial
+from data.connection_pool import ConnectionPool, PoolTimeoutError
+from data.replica_router import ReplicaEndpoint, ReplicaRouter
+from data.sqlite_backend import SQLiteDatabase
+from data.query_stats import QueryStats
+
+try:
+    import mysql.connector
+except ImportError:  # The embedded SQLite backend works without the MySQL driver
+    mysql = None
+from data.statement_registry import Statement, READ, classify_query
 
 # Load environment variables
 load_dotenv()
@@ -17,9 +31,78 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# MySQL client error codes that mean the connection is gone:
+# 2003 can't connect, 2006 server has gone away, 2013 lost connection during query,
+# 2055 lost connection to server at address
+_CONNECTION_ERROR_CODES = (2003, 2006, 2013, 2055)
+
+# Database backends selected with DB_BACKEND
+MYSQL_BACKEND = "mysql"
+SQLITE_BACKEND = "sqlite"
+
+# Errors raised by the database drivers
+DB_ERRORS = (sqlite3.Error,) + ((mysql.connector.Error,) if mysql is not None else ())
+
+# Row formats yielded by MySQLConnection.iter_query()
+ROW_FORMATS = ("dict", "tuple", "row")
+
+@lru_cache(maxsize=256)
+def _row_type(column_names: Tuple[str, ...]):
+    """Get a namedtuple row type for a result's columns, built once per column set."""
+    return namedtuple("Row", column_names, rename=True)
+
+class Transaction:
+    """
+    State of an explicit transaction opened with MySQLConnection.transaction().
+    """
+    
+    def __init__(self, connection):
+        """Initialize the transaction on an already checked-out connection."""
+        self.connection = connection
+        self.failed = False
+        self.error = None
+        self.committed = False
+        self.statement_count = 0
+        self._deferred = {}
+        self._on_commit: List[Callable[[], None]] = []
+    
+    def defer(self, query: str, params: tuple = None) -> None:
+        """Queue a write to be sent in a batch before commit."""
+        self._deferred.setdefault(query, []).append(params or ())
+    
+    def pop_deferred(self) -> List[Tuple[str, List[tuple]]]:
+        """Take all queued writes, grouped by statement in first-queued order."""
+        deferred = list(self._deferred.items())
+        self._deferred = {}
+        return deferred
+    
+    def on_commit(self, callback: Callable[[], None]) -> None:
+        """Queue a callback to run once the transaction has committed."""
+        self._on_commit.append(callback)
+    
+    def run_on_commit(self) -> None:
+        """Run the queued callbacks; one that raises does not stop the others."""
+        callbacks, self._on_commit = self._on_commit, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Error in on-commit callback: {str(e)}")
+    
+    def mark_failed(self, error: Exception) -> None:
+        """Record the first error so the transaction is rolled back."""
+        if not self.failed:
+            self.failed = True
+            self.error = error
+
 class MySQLConnection:
     """
     MySQL database connection manager for the Java Peer Review Training System.
+    
+    A process-wide singleton that hands each calling thread its own connection
+    from a shared ConnectionPool. With DB_BACKEND=sqlite the connections go
+    to an embedded SQLite database instead of a MySQL server (see
+    data/sqlite_backend.py); queries are written for MySQL either way.
     """
     
     _instance = None
@@ -32,64 +115,191 @@ class MySQLConnection:
         return cls._instance
     
     def __init__(self):
-        """Initialize the database connection."""
+        """Initialize the database connection pool."""
         if self._initialized:
             return
             
         # Get database configuration from environment variables
+        self.backend = os.getenv("DB_BACKEND", MYSQL_BACKEND).lower()
         self.db_host = os.getenv("DB_HOST", "localhost")
         self.db_user = os.getenv("DB_USER", "java_review_user")
         self.db_password = os.getenv("DB_PASSWORD", "Thomas123!")
         self.db_name = os.getenv("DB_NAME", "java_review_db")
         self.db_port = int(os.getenv("DB_PORT", "3306"))
         
-        # Initialize connection to None
-        self.connection = None
+        # Connection pool configuration
+        self.pool_size = int(os.getenv("DB_POOL_SIZE", "10"))
+        self.pool_max_overflow = int(os.getenv("DB_POOL_MAX_OVERFLOW", "20"))
+        self.pool_timeout = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+        self.pool_recycle = float(os.getenv("DB_POOL_RECYCLE", "3600"))
+        self.pool_ping_interval = float(os.getenv("DB_POOL_PING_INTERVAL", "30"))
+        self.retry_backoff = float(os.getenv("DB_RETRY_BACKOFF", "0.05"))
+        
+        # Driver configuration: the C extension is used when it is installed,
+        # and registered statements run as server-side prepared statements
+        self.use_pure = os.getenv("DB_USE_PURE", "false").lower() in ("1", "true", "yes")
+        self.use_prepared = os.getenv("DB_PREPARED_STATEMENTS", "true").lower() in ("1", "true", "yes")
+        self.fetch_size = max(1, int(os.getenv("DB_FETCH_SIZE", "500")))
+        
+        self.sqlite = None
+        if self.backend == SQLITE_BACKEND:
+            self.sqlite = SQLiteDatabase(
+                os.getenv("DB_SQLITE_PATH", f"{self.db_name}.sqlite"),
+                busy_timeout=float(os.getenv("DB_SQLITE_BUSY_TIMEOUT", "5"))
+            )
+        elif self.backend != MYSQL_BACKEND:
+            logger.warning(f"Unknown DB_BACKEND '{self.backend}', using {MYSQL_BACKEND}")
+            self.backend = MYSQL_BACKEND
+        
+        self.pool = ConnectionPool(
+            self.sqlite.connect if self.sqlite is not None else self._create_connection,
+            pool_size=self.pool_size,
+            max_overflow=self.pool_max_overflow,
+            timeout=self.pool_timeout,
+            recycle_seconds=self.pool_recycle,
+            ping_interval=self.pool_ping_interval,
+            validator=self._ping_connection,
+            is_disconnect=self._is_connection_error
+        )
+        # Reads go to replicas listed in DB_REPLICA_HOSTS when there are any
+        self.replica_router = self._build_replica_router()
+        # Per-statement latency histograms and the slow-query log
+        self.query_stats = QueryStats()
+        # Per-thread state such as the currently open transaction
+        self._local = threading.local()
         self._initialized = True
         
         # Try to initialize database safely
         self._safe_initialize_database()
     
-    def _get_connection(self):
-        """Get a database connection with improved error handling."""
-        try:
-            if self.connection is None or not self.connection.is_connected():
-                # Log connection attempt
-                logger.debug(f"Connecting to MySQL: {self.db_user}@{self.db_host}:{self.db_port}/{self.db_name}")
-                
-                # Add authentication_plugin parameter for compatibility
-                self.connection = mysql.connector.connect(
-                    host=self.db_host,
-                    user=self.db_user,
-                    password=self.db_password,
-                    database=self.db_name,
-                    port=self.db_port,
-                    auth_plugin='mysql_native_password',  # Try alternative auth method
-                    use_pure=True,  # Use pure Python implementation for better compatibility
-                    charset='utf8mb4',
-                    collation='utf8mb4_unicode_ci'
-                )
-                logger.debug("Connected to MySQL successfully")
-            return self.connection
-        except mysql.connector.Error as e:
-            logger.error(f"Error connecting to MySQL: {str(e)}")
-            logger.error(traceback.format_exc())
+    def _create_connection(self, host: str = None, port: int = None,
+                           user: str = None, password: str = None):
+        """Open a new MySQL connection for a pool, to the primary unless a host is given."""
+        if mysql is None:
+            raise RuntimeError("mysql-connector-python is not installed; install it or set DB_BACKEND=sqlite")
+        
+        host = host or self.db_host
+        port = port or self.db_port
+        user = user or self.db_user
+        logger.debug(f"Connecting to MySQL: {user}@{host}:{port}/{self.db_name}")
+        
+        # Add authentication_plugin parameter for compatibility
+        connection = mysql.connector.connect(
+            host=host,
+            user=user,
+            password=self.db_password if password is None else password,
+            database=self.db_name,
+            port=port,
+            auth_plugin='mysql_native_password',  # Try alternative auth method
+            use_pure=self.use_pure,  # Falls back to pure Python without the C extension
+            charset='utf8mb4',
+            collation='utf8mb4_unicode_ci',
+            # Pooled connections are reused across requests, so reads must not
+            # keep an old REPEATABLE READ snapshot open between queries
+            autocommit=True
+        )
+        logger.debug("Connected to MySQL successfully")
+        return connection
+    
+    def _build_replica_router(self) -> Optional[ReplicaRouter]:
+        """
+        Create a pool per read replica listed in DB_REPLICA_HOSTS.
+        
+        DB_REPLICA_HOSTS is a comma-separated list of ``host`` or ``host:port``
+        entries; replicas share the primary's database name and, unless
+        DB_REPLICA_USER/DB_REPLICA_PASSWORD are set, its credentials.
+        
+        Returns:
+            ReplicaRouter, or None when no replicas are configured
+        """
+        hosts = [host.strip() for host in os.getenv("DB_REPLICA_HOSTS", "").split(",") if host.strip()]
+        if not hosts:
+            return None
+        if self.backend != MYSQL_BACKEND:
+            logger.warning(f"DB_REPLICA_HOSTS is ignored with the {self.backend} backend")
             return None
+        
+        user = os.getenv("DB_REPLICA_USER", self.db_user)
+        password = os.getenv("DB_REPLICA_PASSWORD", self.db_password)
+        pool_size = int(os.getenv("DB_REPLICA_POOL_SIZE", str(self.pool_size)))
+        # A busy replica should hand the read back to the primary quickly
+        pool_timeout = float(os.getenv("DB_REPLICA_POOL_TIMEOUT", "2"))
+        
+        endpoints = []
+        for spec in hosts:
+            host, _, port = spec.partition(":")
+            port = int(port) if port else self.db_port
+            pool = ConnectionPool(
+                partial(self._create_connection, host=host, port=port, user=user, password=password),
+                pool_size=pool_size,
+                max_overflow=self.pool_max_overflow,
+                timeout=pool_timeout,
+                recycle_seconds=self.pool_recycle,
+                ping_interval=self.pool_ping_interval,
+                validator=self._ping_connection,
+                is_disconnect=self._is_connection_error
+            )
+            endpoints.append(ReplicaEndpoint(f"{host}:{port}", pool))
+        
+        logger.info(f"Routing reads to {len(endpoints)} replica(s): {', '.join(e.name for e in endpoints)}")
+        return ReplicaRouter(
+            endpoints,
+            max_lag=float(os.getenv("DB_REPLICA_MAX_LAG", "5")),
+            sticky_window=float(os.getenv("DB_READ_YOUR_WRITES_WINDOW", "5")),
+            check_interval=float(os.getenv("DB_REPLICA_LAG_CHECK_INTERVAL", "10"))
+        )
+    
+    @staticmethod
+    def _ping_connection(connection) -> bool:
+        """Health check used by the pool for idle connections."""
+        try:
+            connection.ping(reconnect=False)
+            return True
+        except DB_ERRORS:
+            return False
+    
+    @staticmethod
+    def _is_connection_error(error: Exception) -> bool:
+        """Check whether an error means the connection is no longer usable."""
+        if mysql is None or not isinstance(error, mysql.connector.Error):
+            return False
+        # Only the client error code counts: the message can quote any number, e.g. an id in the SQL
+        return getattr(error, "errno", None) in _CONNECTION_ERROR_CODES
     
     def _safe_initialize_database(self):
         """Safely initialize database without failing if tables don't exist."""
         try:
-            # Check if we can connect to the database
-            connection = self._get_connection()
-            if connection and connection.is_connected():
+            # Open the first pooled connection to verify we can reach the database
+            with self.pool.connection():
                 logger.debug("Database connection verified successfully")
-            else:
-                logger.warning("Database connection could not be established")
         except Exception as e:
             logger.warning(f"Database initialization skipped: {str(e)}")
+    
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """
+        Get connection pool usage and wait metrics.
+        
+        Returns:
+            Dictionary with pool configuration, usage and wait statistics,
+            plus replica routing statistics under "replicas" when configured
+        """
+        stats = self.pool.get_metrics()
+        stats["backend"] = self.backend
+        stats["queries"] = self.query_stats.get_summary()
+        if self.replica_router is not None:
+            stats["replicas"] = self.replica_router.get_stats()
+        return stats
+    
+    def close_pool(self) -> None:
+        """Close all pooled connections."""
+        self.pool.close()
+        if self.replica_router is not None:
+            self.replica_router.close()
 
     def test_admin_connection(self):
         """Test connection with admin credentials for setup."""
+        if self.backend == SQLITE_BACKEND:
+            return self.test_connection_only()
         try:
             admin_user = os.getenv("ADMIN_DB_USER", "root")
             admin_password = os.getenv("ADMIN_DB_PASSWORD", self.db_password)
@@ -111,72 +321,462 @@ class MySQLConnection:
         except mysql.connector.Error:
             return False
     
-    def execute_query(self, query: str, params: tuple = None, fetch_one: bool = False):
+    def execute_query(self, query: Union[str, Statement], params: tuple = None, fetch_one: bool = False):
         """
-        Execute a query and return the results.
+        Execute a query on a pooled connection and return the results.
+        
+        ``query`` is either SQL text or a registered Statement. Registered
+        statements run as prepared statements, prepared once per pooled
+        connection, and return rows according to their declared kind.
+        
+        Inside a transaction() block the query runs on the transaction's
+        connection and is committed or rolled back with the rest of the block.
+        Otherwise reads may be served by a read replica (see ReplicaRouter),
+        except right after the calling session wrote.
         """
-        max_retries = 3
-        retry_count = 0
-        
-        while retry_count < max_retries:
-            connection = self._get_connection()
-            if not connection:
-                logger.error("Failed to get database connection")
-                time.sleep(1)  # Wait before retry
-                retry_count += 1
-                continue
-                
+        transaction = self._current_transaction()
+        if transaction is not None:
+            return self._execute_in_transaction(transaction, query, params, fetch_one=fetch_one)
+        
+        return self._execute_with_retry(query, params, fetch_one=fetch_one)
+    
+    def iter_query(self, query: Union[str, Statement], params: tuple = None,
+                   fetch_size: Optional[int] = None, row_format: str = "dict") -> Iterator[Any]:
+        """
+        Stream the rows of a read query without loading the whole result.
+        
+        Rows are read from an unbuffered (server-side) cursor ``fetch_size``
+        rows at a time, so memory use stays flat however large the table is.
+        The query runs on a pooled connection of its own, outside any open
+        transaction and possibly on a read replica, and other queries may be
+        run while iterating. Breaking
+        out of the loop early closes that connection rather than reading the
+        rest of the result.
+        
+        Args:
+            query: SQL text or a registered Statement
+            params: Query parameters
+            fetch_size: Rows per network fetch (default DB_FETCH_SIZE)
+            row_format: "dict", "tuple", or "row" for lightweight namedtuples
+            
+        Yields:
+            One row per result row, in the requested format
+            
+        Raises:
+            ValueError: If row_format is unknown
+            mysql.connector.Error, sqlite3.Error: If the query fails; a partial
+                                   stream is never passed off as a complete one
+        """
+        if row_format not in ROW_FORMATS:
+            raise ValueError(f"row_format must be one of {ROW_FORMATS}, got '{row_format}'")
+        
+        sql = query.sql if isinstance(query, Statement) else query
+        fetch_size = fetch_size or self.fetch_size
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Streaming query: {sql} with params: {params} (fetch size {fetch_size})")
+        
+        endpoint = None
+        if self.replica_router is not None and self._is_read(query):
+            endpoint = self.replica_router.choose()
+        pool = endpoint.pool if endpoint is not None else self.pool
+        
+        requested = time.perf_counter()
+        with pool.dedicated() as connection:
+            wait = time.perf_counter() - requested
+            started = time.perf_counter()
+            streamed = 0
+            failed = False
+            cursor = connection.cursor(buffered=False, dictionary=(row_format == "dict"))
             try:
-                cursor = connection.cursor(dictionary=True)
-                
-                # Log query with parameters
-                if params:
-                    param_str = str(params)
-                    logger.debug(f"Executing query: {query} with params: {param_str}")
-                else:
-                    logger.debug(f"Executing query: {query}")
-                
-                cursor.execute(query, params or ())
+                cursor.execute(sql, params or ())
+                make_row = _row_type(tuple(cursor.column_names)) if row_format == "row" else None
                 
-                if query.strip().upper().startswith(("SELECT", "SHOW")):
-                    if fetch_one:
-                        result = cursor.fetchone()
+                while True:
+                    rows = cursor.fetchmany(fetch_size)
+                    if not rows:
+                        break
+                    streamed += len(rows)
+                    if make_row is None:
+                        yield from rows
                     else:
-                        result = cursor.fetchall()
-                    cursor.close()
+                        for row in rows:
+                            yield make_row(*row)
+            except DB_ERRORS as e:
+                logger.error(f"Error streaming query: {str(e)}")
+                logger.error(f"Query: {sql}")
+                if endpoint is not None and self._is_connection_error(e):
+                    self.replica_router.mark_failed(endpoint, e)
+                failed = True
+                raise
+            else:
+                cursor.close()
+            finally:
+                # Covers the whole stream, including time spent by the consumer between rows
+                self.query_stats.record(sql, time.perf_counter() - started, rows=streamed,
+                                        name=getattr(query, "name", None), wait=wait, error=failed)
+    
+    def execute_many(self, query: Union[str, Statement], params_list: List[tuple]) -> Optional[int]:
+        """
+        Execute one statement for many parameter sets in a single round trip.
+        
+        INSERT statements (including INSERT ... ON DUPLICATE KEY UPDATE) are
+        sent as one multi-row INSERT by the connector.
+        
+        Args:
+            query: SQL statement with placeholders
+            params_list: One parameter tuple per row
+            
+        Returns:
+            Number of affected rows, or None on error
+        """
+        if not params_list:
+            return 0
+        
+        transaction = self._current_transaction()
+        if transaction is not None:
+            return self._execute_in_transaction(transaction, query, params_list, many=True)
+        
+        return self._execute_with_retry(query, params_list, many=True)
+    
+    def defer_write(self, query: Union[str, Statement], params: tuple = None) -> None:
+        """
+        Queue a write on the current transaction, or run it now without one.
+        
+        Deferred writes are grouped by statement and sent with executemany()
+        just before the transaction commits, so they must not be read back
+        inside the same transaction.
+        """
+        transaction = self._current_transaction()
+        if transaction is not None:
+            transaction.defer(query, params)
+        else:
+            self.execute_query(query, params)
+    
+    def on_commit(self, callback: Callable[[], None]) -> None:
+        """
+        Run a callback once the current transaction commits, or now without one.
+        
+        Use it to update in-process caches from data written in the
+        transaction, so a rollback never leaves them ahead of the database.
+        """
+        transaction = self._current_transaction()
+        if transaction is not None:
+            transaction.on_commit(callback)
+        else:
+            callback()
+    
+    @contextmanager
+    def transaction(self):
+        """
+        Run the queries of a ``with`` block as one all-or-nothing unit of work.
+        
+        All execute_query(), execute_many() and defer_write() calls made on
+        this thread inside the block share one pooled connection. The block is
+        committed when it finishes, or rolled back if it raises or any query in
+        it failed. Nested transaction() blocks join the outer transaction.
+        
+        Yields:
+            Transaction: Check ``committed`` after the block to see the outcome
+        """
+        existing = self._current_transaction()
+        if existing is not None:
+            try:
+                yield existing
+            except Exception as e:
+                existing.mark_failed(e)
+                raise
+            return
+        
+        with self.pool.connection() as connection:
+            connection.start_transaction()
+            transaction = Transaction(connection)
+            self._local.transaction = transaction
+            try:
+                yield transaction
+                if not transaction.failed:
+                    self._flush_deferred(transaction)
+            except Exception as e:
+                transaction.mark_failed(e)
+                raise
+            finally:
+                self._local.transaction = None
+                self._finish_transaction(transaction)
+        if transaction.committed:
+            transaction.run_on_commit()
+    
+    def _current_transaction(self) -> Optional["Transaction"]:
+        """Get the transaction open on the current thread, if any."""
+        return getattr(self._local, "transaction", None)
+    
+    def _flush_deferred(self, transaction: "Transaction") -> None:
+        """Send the transaction's deferred writes, one executemany per statement."""
+        for query, params_list in transaction.pop_deferred():
+            self._execute_in_transaction(transaction, query, params_list, many=True)
+            if transaction.failed:
+                return
+    
+    def _finish_transaction(self, transaction: "Transaction") -> None:
+        """Commit or roll back a transaction that has left its block."""
+        connection = transaction.connection
+        if not transaction.failed:
+            try:
+                connection.commit()
+                transaction.committed = True
+                if self.replica_router is not None:
+                    self.replica_router.record_write()
+                logger.debug(f"Transaction committed ({transaction.statement_count} statements)")
+                return
+            except DB_ERRORS as e:
+                logger.error(f"Error committing transaction: {str(e)}")
+                transaction.mark_failed(e)
+                if self._is_connection_error(e):
+                    self.pool.invalidate()
+                    return
+        
+        logger.warning(f"Rolling back transaction: {str(transaction.error)}")
+        try:
+            connection.rollback()
+        except DB_ERRORS as e:
+            logger.error(f"Error rolling back transaction: {str(e)}")
+            self.pool.invalidate()
+    
+    def _execute_in_transaction(self, transaction: "Transaction", query: str, params, 
+                                fetch_one: bool = False, many: bool = False):
+        """Run a statement on the transaction's connection without committing."""
+        if transaction.failed:
+            logger.debug("Skipping query in failed transaction")
+            return None
+        
+        try:
+            transaction.statement_count += 1
+            return self._run_timed(transaction.connection, query, params, fetch_one=fetch_one, many=many)
+        except Exception as e:
+            logger.error(f"Error executing query in transaction: {str(e)}")
+            logger.error(f"Query: {query}")
+            transaction.mark_failed(e)
+            if self._is_connection_error(e):
+                self.pool.invalidate()
+            return None
+    
+    def _execute_with_retry(self, query: str, params, fetch_one: bool = False, many: bool = False):
+        """Run a statement on a pooled connection, retrying lost connections."""
+        is_read = not many and self._is_read(query)
+        
+        if is_read and self.replica_router is not None:
+            endpoint = self.replica_router.choose()
+            if endpoint is not None:
+                served, result = self._execute_on_replica(endpoint, query, params, fetch_one)
+                if served:
                     return result
-                else:
-                    connection.commit()
-                    affected_rows = cursor.rowcount
-                    cursor.close()
-                    logger.debug(f"Query executed successfully. Affected rows: {affected_rows}")
-                    return affected_rows
-            except mysql.connector.Error as e:
+        
+        max_retries = 3
+        
+        for attempt in range(max_retries):
+            try:
+                requested = time.perf_counter()
+                with self.pool.connection() as connection:
+                    result = self._run_timed(connection, query, params, fetch_one=fetch_one, many=many,
+                                             wait=time.perf_counter() - requested, retries=attempt)
+                if not is_read and self.replica_router is not None:
+                    self.replica_router.record_write()
+                return result
+            except PoolTimeoutError as e:
+                logger.error(f"Failed to get database connection: {str(e)}")
+                return None
+            except DB_ERRORS as e:
+                # Retry connection-related errors on a fresh connection
+                if self._is_connection_error(e) and attempt < max_retries - 1:
+                    logger.debug(f"Connection lost ({str(e)}), retrying on a new connection...")
+                    time.sleep(self.retry_backoff * (2 ** attempt))
+                    continue
+                
                 logger.error(f"Error executing query: {str(e)}")
                 logger.error(f"Query: {query}")
                 logger.error(f"Params: {params}")
                 logger.error(traceback.format_exc())
-                
-                # Check for connection-related errors to retry
-                should_retry = False
-                if "2006" in str(e) or "2013" in str(e):  # Common MySQL connection lost error codes
-                    logger.debug("Connection lost, attempting to reconnect...")
-                    self.connection = None  # Force reconnection
-                    should_retry = True
-                
-                if should_retry and retry_count < max_retries - 1:
-                    retry_count += 1
-                    time.sleep(1)  # Wait before retry
-                    continue
-                else:
-                    return None
+                return None
             except Exception as e:
                 logger.error(f"Unexpected error executing query: {str(e)}")
                 #logger.error(traceback.format_exc())
                 return None
+        
+        return None
+    
+    def _execute_on_replica(self, endpoint: ReplicaEndpoint, query: Union[str, Statement],
+                            params, fetch_one: bool) -> Tuple[bool, Any]:
+        """
+        Run a read on a replica.
+        
+        Returns:
+            (served, result): served is False if the replica could not be
+            reached and the read should be sent to the primary instead
+        """
+        try:
+            requested = time.perf_counter()
+            with endpoint.pool.connection() as connection:
+                return True, self._run_timed(connection, query, params, fetch_one=fetch_one,
+                                             wait=time.perf_counter() - requested)
+        except PoolTimeoutError as e:
+            self.replica_router.mark_failed(endpoint, e)
+            return False, None
+        except DB_ERRORS as e:
+            if self._is_connection_error(e):
+                self.replica_router.mark_failed(endpoint, e)
+                return False, None
+            
+            logger.error(f"Error executing query on replica {endpoint.name}: {str(e)}")
+            logger.error(f"Query: {query}")
+            logger.error(f"Params: {params}")
+            return True, None
+        except Exception as e:
+            logger.error(f"Unexpected error executing query on replica {endpoint.name}: {str(e)}")
+            return True, None
+    
+    @staticmethod
+    def _is_read(query: Union[str, Statement]) -> bool:
+        """Check whether a statement returns rows."""
+        if isinstance(query, Statement):
+            return query.is_read
+        return classify_query(query) == READ
+    
+    def _run_timed(self, connection, query: Union[str, Statement], params,
+                   fetch_one: bool = False, many: bool = False, wait: float = 0.0, retries: int = 0):
+        """Run a statement and record its latency, row count and connection wait in QueryStats."""
+        stats = self.query_stats
+        if not stats.enabled:
+            return self._run_statement(connection, query, params, fetch_one=fetch_one, many=many)
+        
+        sql, name = (query.sql, query.name) if isinstance(query, Statement) else (query, None)
+        started = time.perf_counter()
+        try:
+            result = self._run_statement(connection, query, params, fetch_one=fetch_one, many=many)
+        except Exception:
+            stats.record(sql, time.perf_counter() - started, name=name, wait=wait, retries=retries, error=True)
+            raise
+        elapsed = time.perf_counter() - started
+        
+        if isinstance(result, list):
+            rows = len(result)
+        elif isinstance(result, int):
+            rows = max(result, 0)
+        else:
+            rows = 1 if result else 0
+        
+        slow_entry = stats.record(sql, elapsed, rows=rows, name=name, wait=wait, retries=retries)
+        if slow_entry is not None and stats.explain_slow_queries and not many and self._is_read(query):
+            self._explain(connection, sql, params, slow_entry)
+        return result
+    
+    def _explain(self, connection, sql: str, params, slow_entry: Dict[str, Any]) -> None:
+        """Attach the query plan of a slow read to its slow-query log entry."""
+        keyword = "EXPLAIN QUERY PLAN" if self.backend == SQLITE_BACKEND else "EXPLAIN"
+        try:
+            cursor = connection.cursor(dictionary=True)
+            try:
+                cursor.execute(f"{keyword} {sql}", params or ())
+                plan = cursor.fetchall()
+            finally:
+                cursor.close()
+            self.query_stats.attach_explain(slow_entry, plan)
+        except Exception as e:
+            logger.debug(f"Could not EXPLAIN slow query: {str(e)}")
+    
+    def _run_statement(self, connection, query: Union[str, Statement], params,
+                       fetch_one: bool = False, many: bool = False):
+        """Execute a single statement and fetch its results."""
+        sql = query.sql if isinstance(query, Statement) else query
+        is_read = self._is_read(query)
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            if params:
+                logger.debug(f"Executing query: {sql} with params: {params}")
+            else:
+                logger.debug(f"Executing query: {sql}")
+        
+        # executemany() on a plain cursor is rewritten into one multi-row INSERT,
+        # which beats executing a prepared statement once per row
+        if isinstance(query, Statement) and self.use_prepared and not many:
+            return self._run_prepared(connection, query, params, fetch_one)
+        
+        cursor = connection.cursor(dictionary=True)
+        try:
+            if many:
+                cursor.executemany(sql, params)
+            else:
+                cursor.execute(sql, params or ())
+            
+            if is_read:
+                if fetch_one:
+                    result = cursor.fetchone()
+                    # Drain any remaining rows so the connection can be reused
+                    cursor.fetchall()
+                else:
+                    result = cursor.fetchall()
+                return result
+            else:
+                # Connections run in autocommit mode outside transaction()
+                affected_rows = cursor.rowcount
+                logger.debug("Query executed successfully. Affected rows: %s", affected_rows)
+                return affected_rows
+        finally:
+            cursor.close()
+    
+    def _run_prepared(self, connection, statement: Statement, params, fetch_one: bool):
+        """
+        Execute a registered statement as a server-side prepared statement.
+        
+        Each pooled connection keeps one prepared cursor per statement name, so
+        the statement is parsed by the server only the first time the
+        connection runs it. The cursors go away with the connection.
+        """
+        cursors = getattr(connection, "_prepared_cursors", None)
+        if cursors is None:
+            cursors = {}
+            connection._prepared_cursors = cursors
+        
+        cursor = cursors.get(statement.name)
+        if cursor is None:
+            try:
+                cursor = connection.cursor(prepared=True, dictionary=True)
+            except ValueError:
+                # Older connectors have no dictionary prepared cursor; rows are mapped below
+                cursor = connection.cursor(prepared=True)
+            cursors[statement.name] = cursor
+        
+        try:
+            # The cursor skips re-preparing while it is given the same SQL object
+            cursor.execute(statement.sql, params or ())
+            
+            if statement.is_read:
+                rows = cursor.fetchall()
+                if rows and not isinstance(rows[0], dict):
+                    rows = [dict(zip(cursor.column_names, row)) for row in rows]
+                if fetch_one:
+                    return rows[0] if rows else None
+                return rows
+            
+            affected_rows = cursor.rowcount
+            logger.debug("Prepared statement %s executed. Affected rows: %s", statement.name, affected_rows)
+            return affected_rows
+        except Exception:
+            # Drop the cursor so the statement is prepared again next time
+            cursors.pop(statement.name, None)
+            try:
+                cursor.close()
+            except Exception:
+                pass
+            raise
     
     def test_connection_only(self):
         """Test database connection without creating tables."""
+        if self.backend == SQLITE_BACKEND:
+            try:
+                with self.pool.connection() as connection:
+                    connection.ping()
+                return True
+            except DB_ERRORS:
+                return False
         try:
             connection = mysql.connector.connect(
                 host=self.db_host,
@@ -198,6 +798,8 @@ class MySQLConnection:
     
     def get_admin_connection(self):
         """Get connection using admin credentials for setup purposes."""
+        if self.backend == SQLITE_BACKEND:
+            return self.sqlite.connect()
         try:
             admin_user = os.getenv("ADMIN_DB_USER", "root")
             admin_password = os.getenv("ADMIN_DB_PASSWORD", self.db_password)
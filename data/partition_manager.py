@@ -0,0 +1,311 @@
+# data/partition_manager.py
+"""
+Partition Manager module for Java Peer Review Training System.
+
+``activity_log`` and ``user_interactions`` only grow, so on MySQL they are
+range-partitioned by month (migration 5 in data/migrations.py). This module
+keeps those tables in shape: it adds the partitions for the coming months
+ahead of time and, once a month falls out of the retention period, writes
+its rows to a gzip-compressed JSON-lines archive file and drops the
+partition. The embedded SQLite backend has no partitions; there the same
+retention policy archives and deletes the rows of each expired month.
+
+Nothing is archived unless ``DB_RETENTION_MONTHS`` is set, and the archive
+files go to the absolute directory ``DB_ARCHIVE_DIR``. The maintenance is
+not run by the app; run ``setup_database.py --maintain-partitions`` from
+cron, e.g. daily, or call start() in a single dedicated process.
+"""
+
+import os
+import json
+import gzip
+import logging
+import datetime
+import threading
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+from data.mysql_connection import MySQLConnection, SQLITE_BACKEND
+
+logger = logging.getLogger(__name__)
+
+# Partitioned table -> the timestamp column it is partitioned by
+PARTITIONED_TABLES = {
+    "activity_log": "created_at",
+    "user_interactions": "timestamp",
+}
+
+# Catch-all partition for rows beyond the last monthly partition
+FUTURE_PARTITION = "pmax"
+
+
+def month_start(day: datetime.date) -> datetime.date:
+    """Get the first day of the month of a date."""
+    return datetime.date(day.year, day.month, 1)
+
+
+def add_months(month: datetime.date, months: int) -> datetime.date:
+    """Get the first day of the month ``months`` after (or before) a month."""
+    index = month.year * 12 + month.month - 1 + months
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: datetime.date) -> str:
+    """Name of the partition holding a month's rows, e.g. p202610."""
+    return f"p{month:%Y%m}"
+
+
+def partition_month(name: str) -> Optional[datetime.date]:
+    """Month held by a partition, or None for the catch-all partition."""
+    try:
+        return datetime.datetime.strptime(name, "p%Y%m").date()
+    except (TypeError, ValueError):
+        return None
+
+
+def partition_definition(month: datetime.date) -> str:
+    """Partition definition for one month of a table partitioned by UNIX_TIMESTAMP."""
+    return (f"PARTITION {partition_name(month)} VALUES LESS THAN "
+            f"(UNIX_TIMESTAMP('{add_months(month, 1):%Y-%m-%d} 00:00:00'))")
+
+
+def partition_clause(column: str, first_month: datetime.date, last_month: datetime.date) -> str:
+    """PARTITION BY clause with one partition per month from first_month to last_month."""
+    months = []
+    month = first_month
+    while month <= last_month:
+        months.append(partition_definition(month))
+        month = add_months(month, 1)
+    months.append(f"PARTITION {FUTURE_PARTITION} VALUES LESS THAN MAXVALUE")
+    return f"PARTITION BY RANGE (UNIX_TIMESTAMP(`{column}`)) ({', '.join(months)})"
+
+
+class PartitionManager:
+    """
+    Adds future monthly partitions and archives expired ones.
+
+    ``DB_PARTITION_MONTHS_AHEAD`` monthly partitions are kept beyond the
+    current month. Months older than ``DB_RETENTION_MONTHS`` are archived to
+    ``DB_ARCHIVE_DIR`` and removed (0, the default, keeps everything). Queries on the hot
+    path only look at the last ``DB_HOT_MONTHS`` months, see
+    hot_window_start(), so they touch the newest partitions only. start()
+    runs the maintenance every ``DB_PARTITION_MAINTENANCE_INTERVAL`` seconds
+    on a background thread.
+    """
+
+    _instance = None
+
+    def __new__(cls):
+        """Ensure singleton instance."""
+        if cls._instance is None:
+            cls._instance = super(PartitionManager, cls).__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        """Initialize the retention settings."""
+        if self._initialized:
+            return
+
+        self.db = MySQLConnection()
+        self.months_ahead = max(1, int(os.getenv("DB_PARTITION_MONTHS_AHEAD", "3")))
+        self.retention_months = max(0, int(os.getenv("DB_RETENTION_MONTHS", "0")))
+        self.hot_months = max(1, int(os.getenv("DB_HOT_MONTHS", "2")))
+        archive_dir = os.getenv("DB_ARCHIVE_DIR", "")
+        self.archive_dir = Path(archive_dir) if archive_dir else None
+        self.interval = float(os.getenv("DB_PARTITION_MAINTENANCE_INTERVAL", "86400"))
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+        self._last_run: Dict[str, Any] = {}
+        self._initialized = True
+
+    def hot_window_start(self, today: Optional[datetime.date] = None) -> datetime.date:
+        """First day of the oldest month a hot-path query needs to read."""
+        return add_months(month_start(today or datetime.date.today()), 1 - self.hot_months)
+
+    def retention_cutoff(self, today: Optional[datetime.date] = None) -> Optional[datetime.date]:
+        """First day of the oldest month that is kept, or None to keep everything."""
+        if self.retention_months <= 0:
+            return None
+        return add_months(month_start(today or datetime.date.today()), -self.retention_months)
+
+    # =================================================================
+    # Maintenance
+    # =================================================================
+
+    def run_maintenance(self, today: Optional[datetime.date] = None) -> Dict[str, Any]:
+        """
+        Add the coming partitions and archive expired months of every partitioned table.
+
+        Returns:
+            Dict of table -> partitions added and months archived
+        """
+        today = today or datetime.date.today()
+        summary = {}
+        with self._lock:
+            for table, column in PARTITIONED_TABLES.items():
+                try:
+                    summary[table] = {
+                        "added": self.add_future_partitions(table, today),
+                        "archived": self.archive_expired(table, column, today)
+                    }
+                except Exception as e:
+                    logger.error(f"Partition maintenance of {table} failed: {str(e)}")
+                    summary[table] = {"error": str(e)}
+            self._last_run = {"at": datetime.datetime.now().isoformat(timespec="seconds"), "tables": summary}
+        return summary
+
+    def get_partitions(self, table: str) -> List[str]:
+        """Get a table's partition names in order; empty if it is not partitioned."""
+        if self.db.backend == SQLITE_BACKEND:
+            return []
+        rows = self.db.execute_query("""
+            SELECT partition_name AS name FROM information_schema.partitions
+            WHERE table_schema = DATABASE() AND table_name = %s AND partition_name IS NOT NULL
+            ORDER BY partition_ordinal_position
+        """, (table,)) or []
+        return [row["name"] for row in rows]
+
+    def add_future_partitions(self, table: str, today: Optional[datetime.date] = None) -> List[str]:
+        """
+        Split the catch-all partition so every month up to months_ahead has its own partition.
+
+        Returns:
+            Names of the partitions added
+        """
+        partitions = self.get_partitions(table)
+        if FUTURE_PARTITION not in partitions:
+            return []
+
+        months = [month for month in map(partition_month, partitions) if month is not None]
+        current = month_start(today or datetime.date.today())
+        month = add_months(max(months), 1) if months else current
+        last = add_months(current, self.months_ahead)
+
+        new_months = []
+        while month <= last:
+            new_months.append(month)
+            month = add_months(month, 1)
+        if not new_months:
+            return []
+
+        definitions = [partition_definition(month) for month in new_months]
+        definitions.append(f"PARTITION {FUTURE_PARTITION} VALUES LESS THAN MAXVALUE")
+        result = self.db.execute_query(
+            f"ALTER TABLE {table} REORGANIZE PARTITION {FUTURE_PARTITION} INTO ({', '.join(definitions)})"
+        )
+        if result is None:
+            raise RuntimeError(f"Could not add partitions to {table}")
+
+        added = [partition_name(month) for month in new_months]
+        logger.info(f"Added partitions {', '.join(added)} to {table}")
+        return added
+
+    def archive_expired(self, table: str, column: str, today: Optional[datetime.date] = None) -> List[str]:
+        """
+        Archive and remove every month older than the retention period.
+
+        Returns:
+            Paths of the archive files written
+        """
+        cutoff = self.retention_cutoff(today)
+        if cutoff is None:
+            return []
+        # A relative directory would depend on where the process was started
+        if self.archive_dir is None or not self.archive_dir.is_absolute():
+            raise RuntimeError("DB_ARCHIVE_DIR must be an absolute directory when DB_RETENTION_MONTHS is set")
+
+        archived = []
+        if self.db.backend == SQLITE_BACKEND:
+            row = self.db.execute_query(f"SELECT MIN(`{column}`) AS oldest FROM {table}", fetch_one=True)
+            oldest = row.get("oldest") if row else None
+            if oldest is None:
+                return []
+            # Aggregates lose the column type, so MIN() may come back as text
+            month = month_start(datetime.date.fromisoformat(str(oldest)[:10]))
+            while month < cutoff:
+                bounds = (f"{month:%Y-%m-%d} 00:00:00", f"{add_months(month, 1):%Y-%m-%d} 00:00:00")
+                where = f"`{column}` >= %s AND `{column}` < %s"
+                path = self._write_archive(table, month, f"SELECT * FROM {table} WHERE {where}", bounds)
+                if path is not None:
+                    if self.db.execute_query(f"DELETE FROM {table} WHERE {where}", bounds) is None:
+                        raise RuntimeError(f"Could not delete archived rows of {table} for {month:%Y-%m}")
+                    archived.append(str(path))
+                month = add_months(month, 1)
+            return archived
+
+        for name in self.get_partitions(table):
+            month = partition_month(name)
+            if month is None or month >= cutoff:
+                continue
+            path = self._write_archive(table, month, f"SELECT * FROM {table} PARTITION ({name})")
+            if self.db.execute_query(f"ALTER TABLE {table} DROP PARTITION {name}") is None:
+                raise RuntimeError(f"Could not drop partition {name} of {table}")
+            logger.info(f"Dropped partition {name} of {table}")
+            if path is not None:
+                archived.append(str(path))
+        return archived
+
+    def _write_archive(self, table: str, month: datetime.date, query: str,
+                       params: tuple = None) -> Optional[Path]:
+        """
+        Stream a month's rows to a compressed JSON-lines file.
+
+        Returns:
+            Path of the archive, or None if the month had no rows
+        """
+        directory = self.archive_dir / table
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{table}_{month:%Y%m}.jsonl.gz"
+        partial = path.with_name(path.name + ".partial")
+
+        count = 0
+        with gzip.open(partial, "wt", encoding="utf-8") as archive:
+            for row in self.db.iter_query(query, params):
+                archive.write(json.dumps(row, default=str, ensure_ascii=False))
+                archive.write("\n")
+                count += 1
+
+        if count == 0:
+            partial.unlink()
+            return None
+        # An archive left by an earlier, interrupted run holds the same rows
+        os.replace(partial, path)
+        logger.info(f"Archived {count} row(s) of {table} for {month:%Y-%m} to {path}")
+        return path
+
+    # =================================================================
+    # Background job
+    # =================================================================
+
+    def start(self) -> None:
+        """Run the maintenance now and then periodically on a background thread."""
+        if self.interval <= 0:
+            return
+        with self._lock:
+            if self._worker is not None and self._worker.is_alive():
+                return
+            self._stop.clear()
+            self._worker = threading.Thread(target=self._run, name="partition-maintenance", daemon=True)
+            self._worker.start()
+
+    def stop(self) -> None:
+        """Stop the background job."""
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.run_maintenance()
+            self._stop.wait(self.interval)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get the settings and the result of the last maintenance run."""
+        return {
+            "months_ahead": self.months_ahead,
+            "retention_months": self.retention_months,
+            "hot_months": self.hot_months,
+            "archive_dir": str(self.archive_dir) if self.archive_dir else None,
+            "last_run": dict(self._last_run)
+        }
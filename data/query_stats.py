@@ -0,0 +1,340 @@
+# data/query_stats.py
+"""
+Query Statistics module for Java Peer Review Training System.
+
+MySQLConnection reports every statement it runs to the process-wide
+QueryStats collector. Statements are grouped by a normalized fingerprint
+(literals and placeholders replaced by ``?``), and for each fingerprint the
+collector keeps a latency histogram, row counts, retries, connection waits
+and the call sites that issued it. Statements slower than
+``DB_SLOW_QUERY_MS`` are written to the slow-query log, optionally with
+their EXPLAIN plan.
+"""
+
+import os
+import re
+import sys
+import json
+import atexit
+import time
+import logging
+import threading
+from collections import Counter, deque
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+slow_query_logger = logging.getLogger("data.slow_query")
+
+# Upper bounds of the latency histogram buckets, in milliseconds
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, float("inf"))
+
+# Frames from these files are skipped when looking for the calling code
+_INTERNAL_FILES = ("mysql_connection.py", "query_stats.py", "connection_pool.py", "contextlib.py")
+
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.|\"\")*\"")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(sql: str) -> str:
+    """
+    Normalize a statement so that executions differing only in values group together.
+
+    String and number literals and ``%s`` placeholders become ``?``, value
+    lists such as ``IN (%s, %s, %s)`` become ``(?+)``, and whitespace is
+    collapsed.
+    """
+    normalized = _STRING_LITERAL.sub("?", sql)
+    normalized = normalized.replace("%s", "?")
+    normalized = _NUMBER_LITERAL.sub("?", normalized)
+    normalized = _WHITESPACE.sub(" ", normalized).strip().rstrip(";")
+    return _PLACEHOLDER_LIST.sub("(?+)", normalized)
+
+
+def _call_site() -> str:
+    """Find the module and function outside the data layer that issued the query."""
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if not filename.endswith(_INTERNAL_FILES):
+            module = frame.f_globals.get("__name__", "?")
+            return f"{module}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return "unknown"
+
+
+class _FingerprintStats:
+    """Counters and latency histogram for one query fingerprint."""
+
+    __slots__ = ("fingerprint", "name", "count", "errors", "total_ms", "min_ms", "max_ms",
+                 "buckets", "rows", "retries", "wait_ms", "slow_count", "call_sites", "last_seen")
+
+    def __init__(self, query_fingerprint: str, name: Optional[str]):
+        self.fingerprint = query_fingerprint
+        self.name = name
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.min_ms = float("inf")
+        self.max_ms = 0.0
+        self.buckets = [0] * len(LATENCY_BUCKETS_MS)
+        self.rows = 0
+        self.retries = 0
+        self.wait_ms = 0.0
+        self.slow_count = 0
+        self.call_sites = Counter()
+        self.last_seen = 0.0
+
+    def percentile(self, fraction: float) -> float:
+        """Estimate a latency percentile as the upper bound of its histogram bucket."""
+        if not self.count:
+            return 0.0
+        target = fraction * self.count
+        seen = 0
+        for bound, bucket_count in zip(LATENCY_BUCKETS_MS, self.buckets):
+            seen += bucket_count
+            if seen >= target:
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "fingerprint": self.fingerprint,
+            "name": self.name,
+            "count": self.count,
+            "errors": self.errors,
+            "total_ms": round(self.total_ms, 3),
+            "avg_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "min_ms": round(self.min_ms, 3) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "p50_ms": round(self.percentile(0.50), 3),
+            "p95_ms": round(self.percentile(0.95), 3),
+            "p99_ms": round(self.percentile(0.99), 3),
+            "histogram": {
+                ("+inf" if bound == float("inf") else f"<={bound}ms"): bucket_count
+                for bound, bucket_count in zip(LATENCY_BUCKETS_MS, self.buckets)
+            },
+            "rows": self.rows,
+            "avg_rows": round(self.rows / self.count, 2) if self.count else 0.0,
+            "retries": self.retries,
+            "wait_ms": round(self.wait_ms, 3),
+            "slow_count": self.slow_count,
+            "call_sites": dict(self.call_sites.most_common()),
+            "last_seen": self.last_seen
+        }
+
+
+class QueryStats:
+    """
+    Process-wide per-query latency statistics and slow-query log.
+
+    Configuration:
+        DB_QUERY_STATS: Collect statistics (default true)
+        DB_SLOW_QUERY_MS: Threshold for the slow-query log in milliseconds (default 200)
+        DB_SLOW_QUERY_EXPLAIN: Attach the EXPLAIN plan of slow reads (default false)
+        DB_SLOW_QUERY_LOG_SIZE: Number of recent slow queries kept in memory (default 100)
+        DB_QUERY_STATS_DUMP: JSON file the statistics are written to at exit (default none)
+    """
+
+    _instance = None
+
+    # Keep memory bounded when ad-hoc SQL produces many distinct fingerprints
+    MAX_FINGERPRINTS = 2000
+    MAX_CALL_SITES = 20
+
+    def __new__(cls):
+        """Ensure singleton instance."""
+        if cls._instance is None:
+            cls._instance = super(QueryStats, cls).__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        """Initialize the collector from the environment."""
+        if self._initialized:
+            return
+
+        self.enabled = os.getenv("DB_QUERY_STATS", "true").lower() in ("1", "true", "yes")
+        self.slow_query_ms = float(os.getenv("DB_SLOW_QUERY_MS", "200"))
+        self.explain_slow_queries = os.getenv("DB_SLOW_QUERY_EXPLAIN", "false").lower() in ("1", "true", "yes")
+
+        self._lock = threading.Lock()
+        self._stats: Dict[str, _FingerprintStats] = {}
+        self._slow_queries = deque(maxlen=int(os.getenv("DB_SLOW_QUERY_LOG_SIZE", "100")))
+        self._started_at = time.time()
+
+        dump_path = os.getenv("DB_QUERY_STATS_DUMP", "")
+        if self.enabled and dump_path:
+            atexit.register(self.dump_json, dump_path)
+        self._initialized = True
+
+    def record(self, sql: str, elapsed: float, rows: int = 0, name: Optional[str] = None,
+               wait: float = 0.0, retries: int = 0, error: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Record one execution of a statement.
+
+        Args:
+            sql: Statement text
+            elapsed: Execution time in seconds, excluding the connection wait
+            rows: Rows returned or affected
+            name: Registered statement name, if any
+            wait: Seconds spent waiting for a pooled connection
+            retries: Attempts that failed before this one
+            error: Whether the statement failed
+
+        Returns:
+            The slow-query log entry if the statement exceeded the
+            threshold, for attach_explain(); otherwise None
+        """
+        if not self.enabled:
+            return None
+
+        elapsed_ms = elapsed * 1000.0
+        query_fingerprint = fingerprint(sql)
+        call_site = _call_site()
+        slow = elapsed_ms >= self.slow_query_ms
+
+        with self._lock:
+            stats = self._stats.get(query_fingerprint)
+            if stats is None:
+                if len(self._stats) >= self.MAX_FINGERPRINTS:
+                    self._evict_least_used()
+                stats = _FingerprintStats(query_fingerprint, name)
+                self._stats[query_fingerprint] = stats
+
+            stats.count += 1
+            stats.total_ms += elapsed_ms
+            stats.min_ms = min(stats.min_ms, elapsed_ms)
+            stats.max_ms = max(stats.max_ms, elapsed_ms)
+            stats.buckets[self._bucket(elapsed_ms)] += 1
+            stats.rows += rows or 0
+            stats.retries += retries
+            stats.wait_ms += wait * 1000.0
+            stats.last_seen = time.time()
+            if error:
+                stats.errors += 1
+            if call_site in stats.call_sites or len(stats.call_sites) < self.MAX_CALL_SITES:
+                stats.call_sites[call_site] += 1
+            if slow:
+                stats.slow_count += 1
+
+        if slow:
+            return self._log_slow(query_fingerprint, name, elapsed_ms, rows, call_site)
+        return None
+
+    def attach_explain(self, entry: Dict[str, Any], plan: List[Any]) -> None:
+        """
+        Attach an EXPLAIN plan to a slow query.
+
+        Args:
+            entry: Slow-query log entry returned by record()
+            plan: Rows of the statement's EXPLAIN
+        """
+        with self._lock:
+            entry["explain"] = plan
+        slow_query_logger.warning(f"EXPLAIN of {entry['name'] or entry['fingerprint']}: "
+                                  f"{json.dumps(plan, default=str)}")
+
+    def _log_slow(self, query_fingerprint: str, name: Optional[str], elapsed_ms: float,
+                  rows: int, call_site: str) -> Dict[str, Any]:
+        entry = {
+            "fingerprint": query_fingerprint,
+            "name": name,
+            "elapsed_ms": round(elapsed_ms, 3),
+            "rows": rows,
+            "call_site": call_site,
+            "at": time.time()
+        }
+        with self._lock:
+            self._slow_queries.append(entry)
+        slow_query_logger.warning(f"Slow query ({elapsed_ms:.1f}ms, {rows} rows) from {call_site}: "
+                                  f"{name or query_fingerprint}")
+        return entry
+
+    @staticmethod
+    def _bucket(elapsed_ms: float) -> int:
+        for index, bound in enumerate(LATENCY_BUCKETS_MS):
+            if elapsed_ms <= bound:
+                return index
+        return len(LATENCY_BUCKETS_MS) - 1
+
+    def _evict_least_used(self) -> None:
+        """Drop the fingerprint with the least total time. Caller holds the lock."""
+        victim = min(self._stats.values(), key=lambda stats: stats.total_ms)
+        del self._stats[victim.fingerprint]
+
+    def get_report(self, sort_by: str = "total_ms", limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Get per-fingerprint statistics.
+
+        Args:
+            sort_by: Field to sort by, descending (e.g. total_ms, count, p95_ms, rows)
+            limit: Maximum number of fingerprints to return
+
+        Returns:
+            List of statistics dictionaries, heaviest first
+        """
+        with self._lock:
+            report = [stats.to_dict() for stats in self._stats.values()]
+        report.sort(key=lambda entry: entry.get(sort_by) or 0, reverse=True)
+        return report[:limit] if limit else report
+
+    def get_slow_queries(self) -> List[Dict[str, Any]]:
+        """Get the most recent slow queries, newest first."""
+        with self._lock:
+            return list(reversed(self._slow_queries))
+
+    def get_summary(self) -> Dict[str, Any]:
+        """Get totals across all fingerprints."""
+        with self._lock:
+            stats = list(self._stats.values())
+            slow_logged = len(self._slow_queries)
+        return {
+            "since": self._started_at,
+            "fingerprints": len(stats),
+            "queries": sum(s.count for s in stats),
+            "errors": sum(s.errors for s in stats),
+            "total_ms": round(sum(s.total_ms for s in stats), 3),
+            "wait_ms": round(sum(s.wait_ms for s in stats), 3),
+            "retries": sum(s.retries for s in stats),
+            "slow_queries": sum(s.slow_count for s in stats),
+            "slow_queries_logged": slow_logged,
+            "slow_query_ms": self.slow_query_ms
+        }
+
+    def to_json(self, indent: Optional[int] = 2) -> str:
+        """Serialize the summary, per-fingerprint statistics and slow-query log."""
+        return json.dumps({
+            "summary": self.get_summary(),
+            "queries": self.get_report(),
+            "slow_queries": self.get_slow_queries()
+        }, indent=indent, default=str)
+
+    def dump_json(self, path: str) -> bool:
+        """
+        Write the statistics to a JSON file.
+
+        Returns:
+            bool: True if the file was written
+        """
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(self.to_json())
+            logger.debug(f"Query statistics written to {path}")
+            return True
+        except Exception as e:
+            logger.error(f"Error writing query statistics: {str(e)}")
+            return False
+
+    def reset(self) -> None:
+        """Clear all statistics and the slow-query log."""
+        with self._lock:
+            self._stats.clear()
+            self._slow_queries.clear()
+            self._started_at = time.time()
@@ -0,0 +1,225 @@
+# data/replica_router.py
+"""
+Replica Router module for Java Peer Review Training System.
+
+This module decides where MySQLConnection sends a read: to one of the
+configured read replicas, or to the primary. Replicas whose replication lag
+exceeds a limit, or that recently failed, are skipped, and a session that
+has just written keeps reading from the primary for a short window so it
+always sees its own writes.
+"""
+
+import time
+import logging
+import threading
+from typing import Dict, Any, List, Optional
+
+from data.connection_pool import ConnectionPool
+
+logger = logging.getLogger(__name__)
+
+try:
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+except ImportError:  # Outside Streamlit every thread is its own session
+    get_script_run_ctx = None
+
+
+def _session_key() -> Any:
+    """Identify the calling session: the Streamlit session, else the thread."""
+    if get_script_run_ctx is not None:
+        ctx = get_script_run_ctx(suppress_warning=True)
+        if ctx is not None:
+            return ctx.session_id
+    return threading.get_ident()
+
+
+class ReplicaEndpoint:
+    """A read replica with its own connection pool and health state."""
+
+    __slots__ = ("name", "pool", "lag_seconds", "healthy", "checked_at", "reads", "failures")
+
+    def __init__(self, name: str, pool: ConnectionPool):
+        self.name = name
+        self.pool = pool
+        self.lag_seconds: Optional[float] = None
+        self.healthy = True
+        self.checked_at: Optional[float] = None
+        self.reads = 0
+        self.failures = 0
+
+
+class ReplicaRouter:
+    """
+    Chooses a replica for each read.
+
+    Replicas are used round-robin. Each replica's lag is read with
+    ``SHOW REPLICA STATUS`` at most every ``check_interval`` seconds; a
+    replica more than ``max_lag`` seconds behind, with replication stopped,
+    or that failed a query, is skipped until its next check. A server that
+    reports no replication status at all (a stand-in copy) counts as up to
+    date.
+    """
+
+    def __init__(self,
+                 endpoints: List[ReplicaEndpoint],
+                 max_lag: float = 5.0,
+                 sticky_window: float = 5.0,
+                 check_interval: float = 10.0):
+        """
+        Initialize the router.
+
+        Args:
+            endpoints: Replicas to route reads to
+            max_lag: Maximum replication lag in seconds for a replica to serve reads
+            sticky_window: Seconds after a write during which a session reads from the primary
+            check_interval: Seconds between lag checks of a replica
+        """
+        self.endpoints = endpoints
+        self.max_lag = max_lag
+        self.sticky_window = sticky_window
+        self.check_interval = check_interval
+
+        self._lock = threading.Lock()
+        self._next = 0
+        self._last_writes: Dict[Any, float] = {}
+        self._stats = {"replica_reads": 0, "primary_reads": 0, "sticky_reads": 0, "fallbacks": 0}
+
+    # =================================================================
+    # Read-your-writes
+    # =================================================================
+
+    def record_write(self) -> None:
+        """Remember that the calling session just wrote to the primary."""
+        if self.sticky_window <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._last_writes[_session_key()] = now
+            if len(self._last_writes) > 1000:
+                cutoff = now - self.sticky_window
+                self._last_writes = {key: at for key, at in self._last_writes.items() if at > cutoff}
+
+    def is_sticky(self) -> bool:
+        """Check whether the calling session wrote within the sticky window."""
+        written_at = self._last_writes.get(_session_key())
+        return written_at is not None and time.monotonic() - written_at < self.sticky_window
+
+    # =================================================================
+    # Replica selection
+    # =================================================================
+
+    def choose(self) -> Optional[ReplicaEndpoint]:
+        """
+        Pick the replica for a read.
+
+        Returns:
+            ReplicaEndpoint, or None if the read should go to the primary
+        """
+        if self.is_sticky():
+            self._count("sticky_reads")
+            return None
+
+        for _ in range(len(self.endpoints)):
+            with self._lock:
+                endpoint = self.endpoints[self._next % len(self.endpoints)]
+                self._next += 1
+
+            if self._is_usable(endpoint):
+                with self._lock:
+                    endpoint.reads += 1
+                    self._stats["replica_reads"] += 1
+                return endpoint
+
+        self._count("primary_reads")
+        return None
+
+    def mark_failed(self, endpoint: ReplicaEndpoint, error: Exception) -> None:
+        """Take a replica out of rotation until its next check."""
+        logger.warning(f"Read replica {endpoint.name} failed, using the primary: {str(error)}")
+        with self._lock:
+            endpoint.healthy = False
+            endpoint.failures += 1
+            endpoint.checked_at = time.monotonic()
+            self._stats["fallbacks"] += 1
+
+    def _is_usable(self, endpoint: ReplicaEndpoint) -> bool:
+        """Check a replica's health, refreshing its lag when the last check is stale."""
+        checked_at = endpoint.checked_at
+        if checked_at is None or time.monotonic() - checked_at >= self.check_interval:
+            self._check_lag(endpoint)
+        return endpoint.healthy
+
+    def _check_lag(self, endpoint: ReplicaEndpoint) -> None:
+        """Read a replica's replication lag and update its health."""
+        # Claim the check so concurrent reads do not all run it
+        with self._lock:
+            if endpoint.checked_at is not None and time.monotonic() - endpoint.checked_at < self.check_interval:
+                return
+            endpoint.checked_at = time.monotonic()
+
+        try:
+            lag = self._read_lag(endpoint)
+        except Exception as e:
+            logger.warning(f"Could not read lag of replica {endpoint.name}: {str(e)}")
+            endpoint.healthy = False
+            return
+
+        endpoint.lag_seconds = lag
+        endpoint.healthy = lag is not None and lag <= self.max_lag
+        if not endpoint.healthy:
+            logger.warning(f"Read replica {endpoint.name} skipped: lag "
+                           f"{'unknown (replication stopped)' if lag is None else f'{lag}s'}")
+
+    @staticmethod
+    def _read_lag(endpoint: ReplicaEndpoint) -> Optional[float]:
+        """
+        Query a replica's replication lag in seconds.
+
+        Returns:
+            Lag in seconds, 0 for a server without replication status, or
+            None if replication is stopped
+        """
+        with endpoint.pool.connection() as connection:
+            cursor = connection.cursor(dictionary=True)
+            try:
+                try:
+                    cursor.execute("SHOW REPLICA STATUS")
+                except Exception:
+                    # MySQL before 8.0.22
+                    cursor.execute("SHOW SLAVE STATUS")
+                status = cursor.fetchone()
+                cursor.fetchall()
+            finally:
+                cursor.close()
+
+        if not status:
+            return 0.0
+        lag = status.get("Seconds_Behind_Source", status.get("Seconds_Behind_Master"))
+        return float(lag) if lag is not None else None
+
+    # =================================================================
+    # Metrics
+    # =================================================================
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self._stats[key] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get routing counters and the state of each replica."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["replicas"] = [{
+                "name": endpoint.name,
+                "healthy": endpoint.healthy,
+                "lag_seconds": endpoint.lag_seconds,
+                "reads": endpoint.reads,
+                "failures": endpoint.failures,
+                "pool": endpoint.pool.get_metrics()
+            } for endpoint in self.endpoints]
+        return stats
+
+    def close(self) -> None:
+        """Close every replica pool."""
+        for endpoint in self.endpoints:
+            endpoint.pool.close()
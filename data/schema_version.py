@@ -0,0 +1,194 @@
+# data/schema_version.py
+"""
+Schema Version module for Java Peer Review Training System.
+
+setup_database.py records the schema version it installed, together with
+the number of seeded categories and errors, in the ``schema_version`` table.
+The application then verifies the database once per process with a single
+primary-key lookup instead of probing information_schema and counting rows.
+A database is only ready once every migration in data/migrations.py has been
+applied, because the background jobs need the tables they create.
+"""
+
+import os
+import time
+import logging
+import threading
+from typing import Dict, Any, Optional
+
+from data.mysql_connection import MySQLConnection
+
+logger = logging.getLogger(__name__)
+
+# Schema version installed by this release of setup_database.py
+SCHEMA_VERSION = 1
+
+CREATE_SCHEMA_VERSION_TABLE = """
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INT PRIMARY KEY,
+        description VARCHAR(255),
+        category_count INT DEFAULT 0,
+        error_count INT DEFAULT 0,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    ) DEFAULT CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci
+"""
+
+
+def count_seed_data(db: MySQLConnection) -> Optional[Dict[str, int]]:
+    """
+    Count the seeded categories and errors.
+
+    Returns:
+        Dict with category_count and error_count, or None if the tables are missing
+    """
+    row = db.execute_query("""
+        SELECT (SELECT COUNT(*) FROM error_categories) AS category_count,
+               (SELECT COUNT(*) FROM java_errors) AS error_count
+    """, fetch_one=True)
+    if not row:
+        return None
+    return {
+        "category_count": int(row.get('category_count') or 0),
+        "error_count": int(row.get('error_count') or 0)
+    }
+
+
+def record_schema_version(db: MySQLConnection, version: int = SCHEMA_VERSION,
+                          description: str = "") -> bool:
+    """
+    Record an installed schema version with the current seed counts.
+
+    Returns:
+        bool: True if the version was recorded
+    """
+    try:
+        counts = count_seed_data(db) or {"category_count": 0, "error_count": 0}
+        db.execute_query(CREATE_SCHEMA_VERSION_TABLE)
+        result = db.execute_query("""
+            INSERT INTO schema_version (version, description, category_count, error_count)
+            VALUES (%s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE description = VALUES(description),
+                                    category_count = VALUES(category_count),
+                                    error_count = VALUES(error_count),
+                                    applied_at = CURRENT_TIMESTAMP
+        """, (version, description, counts["category_count"], counts["error_count"]))
+        if result is None:
+            return False
+        SchemaVerifier().reset()
+        logger.debug(f"Recorded schema version {version}: {counts['category_count']} categories, "
+                     f"{counts['error_count']} errors")
+        return True
+    except Exception as e:
+        logger.error(f"Error recording schema version: {str(e)}")
+        return False
+
+
+class SchemaVerifier:
+    """
+    Process-wide, cached check that the database schema and seed data are installed.
+
+    A successful check is cached for the life of the process. A failed check
+    is retried at most every ``SCHEMA_CHECK_RETRY_INTERVAL`` seconds, so running
+    setup while the app is up is picked up without a restart.
+    """
+
+    _instance = None
+
+    def __new__(cls):
+        """Ensure singleton instance."""
+        if cls._instance is None:
+            cls._instance = super(SchemaVerifier, cls).__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        """Initialize the verifier without touching the database."""
+        if self._initialized:
+            return
+
+        self.db = MySQLConnection()
+        self.retry_interval = float(os.getenv("SCHEMA_CHECK_RETRY_INTERVAL", "60"))
+        self._lock = threading.Lock()
+        self._result: Optional[bool] = None
+        self._checked_at: Optional[float] = None
+        self._details: Dict[str, Any] = {}
+        self._initialized = True
+
+    def reset(self) -> None:
+        """Forget the cached result so the next verify() checks again."""
+        with self._lock:
+            self._result = None
+            self._checked_at = None
+
+    def verify(self) -> bool:
+        """
+        Check that the schema and seed data are installed, using the cached result when possible.
+
+        Returns:
+            bool: True if the database is ready
+        """
+        if self._result:
+            return True
+        if self._result is not None and time.monotonic() - self._checked_at < self.retry_interval:
+            return False
+
+        with self._lock:
+            if self._result:
+                return True
+            if self._result is not None and time.monotonic() - self._checked_at < self.retry_interval:
+                return False
+
+            self._result = self._check()
+            self._checked_at = time.monotonic()
+            return self._result
+
+    def get_details(self) -> Dict[str, Any]:
+        """Get the details of the last check."""
+        return dict(self._details)
+
+    def _check(self) -> bool:
+        """Read the recorded schema version, falling back to counting the seed data."""
+        # Imported here: migrations imports this module
+        from data.migrations import LATEST_SCHEMA_VERSION
+
+        try:
+            row = self.db.execute_query(
+                "SELECT version, category_count, error_count FROM schema_version "
+                "ORDER BY version DESC LIMIT 1",
+                fetch_one=True
+            )
+            if row and row.get('version') is not None:
+                self._details = dict(row, source="schema_version")
+                if row['version'] < SCHEMA_VERSION:
+                    logger.warning(f"Database schema version {row['version']} is older than "
+                                   f"{SCHEMA_VERSION}. Please run setup_database.py.")
+                    return False
+                if row['version'] < LATEST_SCHEMA_VERSION:
+                    self._details["pending_migrations"] = LATEST_SCHEMA_VERSION - row['version']
+                    logger.warning(f"Database schema version {row['version']} is older than "
+                                   f"{LATEST_SCHEMA_VERSION}, migrations are pending. "
+                                   f"Please run setup_database.py --migrate.")
+                    return False
+                if not row.get('category_count') or not row.get('error_count'):
+                    logger.debug("No error data recorded. Please import data using the SQL file.")
+                    return False
+                logger.debug(f"Database verified: schema version {row['version']}, "
+                             f"{row['error_count']} errors available")
+                return True
+
+            # Databases set up before schema versions were recorded have none of the migrations
+            counts = count_seed_data(self.db)
+            if counts is None:
+                logger.debug("Error tables not found. Please run database setup first.")
+                return False
+            self._details = dict(counts, source="count")
+            if counts["category_count"] == 0 or counts["error_count"] == 0:
+                logger.debug("No error data found. Please import data using the SQL file.")
+                return False
+            logger.warning("No schema version recorded, migrations are pending. "
+                           "Please run setup_database.py --migrate.")
+            return False
+
+        except Exception as e:
+            logger.debug(f"Database not ready: {str(e)}. Please run setup and import data first.")
+            return False
@@ -0,0 +1,611 @@
+# data/sqlite_backend.py
+"""
+SQLite Backend module for Java Peer Review Training System.
+
+An embedded alternative to the MySQL server for single-node installs and
+hermetic benchmark runs, selected with ``DB_BACKEND=sqlite``. The schema and
+seed data are translated from data/Create_db.sql and data/Insert_data.sql
+the first time an empty database file is opened.
+
+SQLiteConnection and SQLiteCursor mimic the parts of the mysql.connector
+connection and cursor API that MySQLConnection uses, and translate the
+MySQL dialect of each statement (``%s`` placeholders, ``ON DUPLICATE KEY
+UPDATE``, ``INSERT IGNORE``, ``DATE_SUB(..., INTERVAL n DAY)``, JSON
+aggregates) before running it. MySQL functions without a SQLite equivalent,
+such as ``NOW()``, ``CURDATE()``, ``RAND()``, ``LEAST()`` and the date
+arithmetic behind ``DATE_SUB``, are registered on every connection as
+Python functions.
+
+Requires SQLite 3.35 or newer for ``ON CONFLICT DO UPDATE`` without a
+conflict target.
+"""
+
+import re
+import uuid
+import random
+import calendar
+import logging
+import sqlite3
+import datetime
+import tempfile
+import threading
+from decimal import Decimal
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = Path(__file__).parent
+SCHEMA_FILE = DATA_DIR / "Create_db.sql"
+SEED_FILE = DATA_DIR / "Insert_data.sql"
+
+# Python values sent as parameters
+sqlite3.register_adapter(Decimal, float)
+sqlite3.register_adapter(datetime.date, lambda value: value.isoformat())
+sqlite3.register_adapter(datetime.datetime, lambda value: value.isoformat(sep=" "))
+
+
+def _convert_date(value: bytes):
+    try:
+        return datetime.date.fromisoformat(value.decode()[:10])
+    except ValueError:
+        return value.decode()
+
+
+def _convert_datetime(value: bytes):
+    try:
+        return datetime.datetime.fromisoformat(value.decode())
+    except ValueError:
+        return value.decode()
+
+
+# Columns declared DATE/TIMESTAMP/DATETIME come back as date/datetime, as with MySQL
+sqlite3.register_converter("DATE", _convert_date)
+sqlite3.register_converter("TIMESTAMP", _convert_datetime)
+sqlite3.register_converter("DATETIME", _convert_datetime)
+
+
+# =================================================================
+# SQL translation
+# =================================================================
+
+_LITERAL = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.|\"\")*\"")
+_PLACEHOLDER = re.compile(r"\x00(\d+)\x00")
+_MYSQL_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "0": "\0", "b": "\b", "Z": "\x1a"}
+
+# DATE_SUB(expr, INTERVAL n UNIT); expr may contain one level of parentheses
+_DATE_ARITHMETIC = re.compile(
+    r"\bDATE_(SUB|ADD)\s*\(\s*((?:[^(),]|\([^()]*\))+?)\s*,\s*INTERVAL\s+(-?\d+|%s)\s+"
+    r"(SECOND|MINUTE|HOUR|DAY|WEEK|MONTH|YEAR)\s*\)",
+    re.IGNORECASE
+)
+
+_RENAMED_FUNCTIONS = [
+    (re.compile(r"\bJSON_OBJECTAGG\s*\(", re.IGNORECASE), "json_group_object("),
+    (re.compile(r"\bJSON_ARRAYAGG\s*\(", re.IGNORECASE), "json_group_array("),
+    (re.compile(r"\bJSON_OBJECT\s*\(", re.IGNORECASE), "json_object("),
+    (re.compile(r"\bJSON_ARRAY\s*\(", re.IGNORECASE), "json_array("),
+    (re.compile(r"\bIF\s*\(", re.IGNORECASE), "iif("),
+]
+
+_STATEMENT_REWRITES = [
+    (re.compile(r"\bINSERT\s+IGNORE\b", re.IGNORECASE), "INSERT OR IGNORE"),
+    (re.compile(r"\bCURRENT_TIMESTAMP\b(?!\s*\()", re.IGNORECASE), "NOW()"),
+    (re.compile(r"\bCURRENT_DATE\b(?!\s*\()", re.IGNORECASE), "CURDATE()"),
+    (re.compile(r"\s+SEPARATOR\s+", re.IGNORECASE), ", "),
+    (re.compile(r"\s+(FOR\s+UPDATE|LOCK\s+IN\s+SHARE\s+MODE)\s*$", re.IGNORECASE), ""),
+    (re.compile(r"^\s*TRUNCATE\s+(TABLE\s+)?", re.IGNORECASE), "DELETE FROM "),
+    (re.compile(r"^\s*SET\s+FOREIGN_KEY_CHECKS\s*=\s*0\s*$", re.IGNORECASE), "PRAGMA foreign_keys = OFF"),
+    (re.compile(r"^\s*SET\s+FOREIGN_KEY_CHECKS\s*=\s*1\s*$", re.IGNORECASE), "PRAGMA foreign_keys = ON"),
+]
+
+_ON_DUPLICATE_KEY = re.compile(r"\bON\s+DUPLICATE\s+KEY\s+UPDATE\b", re.IGNORECASE)
+_VALUES_REFERENCE = re.compile(r"\bVALUES\s*\(\s*`?(\w+)`?\s*\)", re.IGNORECASE)
+
+
+def _unescape_mysql_literal(literal: str) -> str:
+    """Rewrite a MySQL string literal, which may use backslash escapes or double quotes, as a standard one."""
+    quote, body = literal[0], literal[1:-1]
+    if quote == "'" and "\\" not in body:
+        return literal
+    text = body.replace(quote * 2, quote)
+    text = re.sub(r"\\(.)", lambda m: _MYSQL_ESCAPES.get(m.group(1), m.group(1)), text)
+    return "'" + text.replace("'", "''") + "'"
+
+
+def _protect_literals(sql: str) -> Tuple[str, List[str]]:
+    """Swap string literals for placeholders so rewrites only touch SQL code."""
+    literals: List[str] = []
+
+    def stash(match):
+        literals.append(_unescape_mysql_literal(match.group(0)))
+        return f"\x00{len(literals) - 1}\x00"
+
+    return _LITERAL.sub(stash, sql), literals
+
+
+def _restore_literals(sql: str, literals: List[str]) -> str:
+    return _PLACEHOLDER.sub(lambda m: literals[int(m.group(1))], sql)
+
+
+def _date_arithmetic(match) -> str:
+    """Rewrite DATE_SUB/DATE_ADD as a call to the registered DATE_ADD_INTERVAL function."""
+    operation, expression, amount, unit = match.groups()
+    sign = "-" if operation.upper() == "SUB" else ""
+    return f"DATE_ADD_INTERVAL({expression}, {sign}({amount}), '{unit.upper()}')"
+
+
+@lru_cache(maxsize=1024)
+def translate_sql(sql: str) -> str:
+    """
+    Translate one MySQL statement to SQLite, once per distinct statement.
+
+    Args:
+        sql: Statement using the MySQL dialect and ``%s`` placeholders
+
+    Returns:
+        Equivalent SQLite statement using ``?`` placeholders
+    """
+    code, literals = _protect_literals(sql.strip().rstrip(";"))
+    code = code.replace("`", '"')
+
+    code = _DATE_ARITHMETIC.sub(_date_arithmetic, code)
+    for pattern, replacement in _RENAMED_FUNCTIONS + _STATEMENT_REWRITES:
+        code = pattern.sub(replacement, code)
+
+    duplicate = _ON_DUPLICATE_KEY.search(code)
+    if duplicate:
+        update = _VALUES_REFERENCE.sub(r"excluded.\1", code[duplicate.end():])
+        code = code[:duplicate.start()] + "ON CONFLICT DO UPDATE SET" + update
+
+    code = code.replace("%%", "\x01").replace("%s", "?").replace("\x01", "%")
+    return _restore_literals(code, literals)
+
+
+# =================================================================
+# Schema translation
+# =================================================================
+
+_AUTO_INCREMENT_KEY = re.compile(
+    r"\b(?:TINY|SMALL|MEDIUM|BIG)?INT(?:EGER)?\b(?:\s*\(\d+\))?(?:\s+UNSIGNED)?(?:\s+NOT\s+NULL)?"
+    r"\s+AUTO_INCREMENT\s+PRIMARY\s+KEY",
+    re.IGNORECASE
+)
+_COLUMN_REWRITES = [
+    (re.compile(r"\bENUM\s*\([^)]*\)", re.IGNORECASE), "TEXT"),
+    (re.compile(r"\bJSON\b", re.IGNORECASE), "TEXT"),
+    (re.compile(r"\s+ON\s+UPDATE\s+CURRENT_TIMESTAMP\b", re.IGNORECASE), ""),
+    (re.compile(r"\bDEFAULT\s+CURRENT_TIMESTAMP\b", re.IGNORECASE), "DEFAULT (datetime('now', 'localtime'))"),
+    (re.compile(r"\s+COMMENT\s+\x00\d+\x00", re.IGNORECASE), ""),
+    (re.compile(r"\bUNSIGNED\b", re.IGNORECASE), ""),
+]
+_CREATE_TABLE = re.compile(r"^\s*CREATE\s+TABLE\s+(IF\s+NOT\s+EXISTS\s+)?[`\"]?(\w+)[`\"]?\s*\(", re.IGNORECASE)
+_INDEX_ITEM = re.compile(r"^(UNIQUE\s+)?(?:INDEX|KEY)\s+[`\"]?(\w+)[`\"]?\s*(\(.*\))$", re.IGNORECASE | re.DOTALL)
+_UNIQUE_KEY_ITEM = re.compile(r"^UNIQUE\s+(?:KEY|INDEX)\s+[`\"]?\w+[`\"]?\s*(\(.*\))$", re.IGNORECASE | re.DOTALL)
+_ON_UPDATE_COLUMN = re.compile(r"^[`\"]?(\w+)[`\"]?\s.*\bON\s+UPDATE\s+CURRENT_TIMESTAMP\b", re.IGNORECASE | re.DOTALL)
+
+
+def _split_top_level(body: str) -> List[str]:
+    """Split a table body on the commas that are not inside parentheses."""
+    items, depth, current = [], 0, []
+    for char in body:
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        if char == "," and depth == 0:
+            items.append("".join(current).strip())
+            current = []
+        else:
+            current.append(char)
+    if "".join(current).strip():
+        items.append("".join(current).strip())
+    return items
+
+
+def translate_create_table(sql: str) -> List[str]:
+    """
+    Translate a MySQL CREATE TABLE statement into SQLite statements.
+
+    Inline INDEX definitions become separate CREATE INDEX statements (named
+    ``<table>_<index>``, since SQLite index names are database-wide), and
+    ``ON UPDATE CURRENT_TIMESTAMP`` columns are kept current by a trigger.
+
+    Returns:
+        The CREATE TABLE statement followed by its index and trigger statements
+    """
+    code, literals = _protect_literals(sql.strip().rstrip(";"))
+    header = _CREATE_TABLE.match(code)
+    table = header.group(2)
+    body = code[header.end():code.rindex(")")]
+
+    columns, extra = [], []
+    for item in _split_top_level(body):
+        unique_key = _UNIQUE_KEY_ITEM.match(item)
+        index = _INDEX_ITEM.match(item)
+        if unique_key:
+            columns.append(f"UNIQUE {unique_key.group(1)}")
+            continue
+        if index:
+            unique = "UNIQUE " if index.group(1) else ""
+            extra.append(f"CREATE {unique}INDEX IF NOT EXISTS {table}_{index.group(2)} "
+                         f"ON {table} {index.group(3)}")
+            continue
+
+        on_update = _ON_UPDATE_COLUMN.match(item)
+        if on_update:
+            column = on_update.group(1)
+            extra.append(
+                f"CREATE TRIGGER IF NOT EXISTS {table}_{column}_on_update AFTER UPDATE ON {table} "
+                f"FOR EACH ROW WHEN NEW.{column} IS OLD.{column} BEGIN "
+                f"UPDATE {table} SET {column} = datetime('now', 'localtime') WHERE rowid = NEW.rowid; END"
+            )
+
+        item = _AUTO_INCREMENT_KEY.sub("INTEGER PRIMARY KEY AUTOINCREMENT", item)
+        for pattern, replacement in _COLUMN_REWRITES:
+            item = pattern.sub(replacement, item)
+        columns.append(item)
+
+    create = f"CREATE TABLE IF NOT EXISTS {table} (\n    " + ",\n    ".join(columns) + "\n)"
+    return [_restore_literals(statement.replace("`", '"'), literals) for statement in [create] + extra]
+
+
+def split_sql_script(script: str) -> List[str]:
+    """Split a SQL file into statements, skipping comments and respecting string literals."""
+    statements, current = [], []
+    i, length = 0, len(script)
+    while i < length:
+        char = script[i]
+        if char in ("'", '"'):
+            match = _LITERAL.match(script, i)
+            end = match.end() if match else length
+            current.append(script[i:end])
+            i = end
+            continue
+        if script.startswith("--", i) or char == "#":
+            newline = script.find("\n", i)
+            i = length if newline == -1 else newline
+            continue
+        if script.startswith("/*", i):
+            end = script.find("*/", i + 2)
+            i = length if end == -1 else end + 2
+            continue
+        if char == ";":
+            statement = "".join(current).strip()
+            if statement:
+                statements.append(statement)
+            current = []
+        else:
+            current.append(char)
+        i += 1
+
+    statement = "".join(current).strip()
+    if statement:
+        statements.append(statement)
+    return statements
+
+
+def translate_script(script: str) -> List[str]:
+    """
+    Translate a MySQL schema or data script into SQLite statements.
+
+    DROP statements, MySQL-only session settings and queries against
+    information_schema are skipped.
+    """
+    translated = []
+    for statement in split_sql_script(script):
+        upper = statement.upper()
+        if upper.startswith("DROP ") or "INFORMATION_SCHEMA" in upper or upper.startswith("SELECT "):
+            continue
+        if upper.startswith(("USE ", "SET NAMES", "SET CHARACTER", "CREATE DATABASE", "SET FOREIGN_KEY_CHECKS")):
+            continue
+        if _CREATE_TABLE.match(statement):
+            translated.extend(translate_create_table(statement))
+        else:
+            translated.append(translate_sql(statement))
+    return translated
+
+
+# =================================================================
+# MySQL functions
+# =================================================================
+
+def _least(*values):
+    return None if any(value is None for value in values) else min(values)
+
+
+def _greatest(*values):
+    return None if any(value is None for value in values) else max(values)
+
+
+def _datediff(end, start):
+    if end is None or start is None:
+        return None
+    return (datetime.date.fromisoformat(str(end)[:10]) - datetime.date.fromisoformat(str(start)[:10])).days
+
+
+def _date_add_interval(value, amount, unit):
+    """DATE_ADD for SQLite: dates stay dates and datetimes keep their time of day, as in MySQL."""
+    if value is None or amount is None:
+        return None
+    text = str(value)
+    is_date = len(text) <= 10
+    moment = datetime.datetime.fromisoformat(text[:10] if is_date else text)
+    amount = int(amount)
+
+    if unit in ("MONTH", "YEAR"):
+        months = moment.month - 1 + (amount * 12 if unit == "YEAR" else amount)
+        year, month = moment.year + months // 12, months % 12 + 1
+        # Clamp to the last day of the month, like MySQL
+        day = min(moment.day, calendar.monthrange(year, month)[1])
+        moment = moment.replace(year=year, month=month, day=day)
+    else:
+        seconds = {"SECOND": 1, "MINUTE": 60, "HOUR": 3600, "DAY": 86400, "WEEK": 604800}[unit]
+        moment += datetime.timedelta(seconds=amount * seconds)
+
+    if is_date and unit in ("DAY", "WEEK", "MONTH", "YEAR"):
+        return moment.date().isoformat()
+    return moment.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _concat(*values):
+    return None if any(value is None for value in values) else "".join(str(value) for value in values)
+
+
+def _register_functions(connection: sqlite3.Connection) -> None:
+    """Register the MySQL functions used by the application's queries."""
+    connection.create_function("NOW", 0, lambda: datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+    connection.create_function("CURDATE", 0, lambda: datetime.date.today().isoformat())
+    connection.create_function("UNIX_TIMESTAMP", 0, lambda: int(datetime.datetime.now().timestamp()))
+    connection.create_function("RAND", 0, random.random)
+    connection.create_function("UUID", 0, lambda: str(uuid.uuid4()))
+    connection.create_function("LEAST", -1, _least, deterministic=True)
+    connection.create_function("GREATEST", -1, _greatest, deterministic=True)
+    connection.create_function("DATEDIFF", 2, _datediff, deterministic=True)
+    connection.create_function("DATE_ADD_INTERVAL", 3, _date_add_interval, deterministic=True)
+    connection.create_function("CONCAT", -1, _concat, deterministic=True)
+
+
+# =================================================================
+# mysql.connector-compatible connection
+# =================================================================
+
+class SQLiteCursor:
+    """Cursor with the subset of the mysql.connector cursor API used by MySQLConnection."""
+
+    def __init__(self, connection: "SQLiteConnection", dictionary: bool = False):
+        self._connection = connection
+        self._cursor = connection.raw.cursor()
+        self._dictionary = dictionary
+
+    @property
+    def column_names(self) -> Tuple[str, ...]:
+        description = self._cursor.description or ()
+        return tuple(column[0] for column in description)
+
+    @property
+    def rowcount(self) -> int:
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self) -> Optional[int]:
+        return self._cursor.lastrowid
+
+    def execute(self, operation: str, params=()) -> None:
+        if _CREATE_TABLE.match(operation):
+            # A MySQL table definition becomes several SQLite statements
+            for statement in translate_create_table(operation):
+                self._cursor.execute(statement)
+            return
+        self._cursor.execute(translate_sql(operation), tuple(params or ()))
+
+    def executemany(self, operation: str, seq_params) -> None:
+        # MySQL sends the rows as one multi-row INSERT, which is all or nothing;
+        # in autocommit mode sqlite3 would keep the rows before a failing one
+        raw = self._connection.raw
+        raw.execute("SAVEPOINT executemany")
+        try:
+            self._cursor.executemany(translate_sql(operation), [tuple(params) for params in seq_params])
+        except Exception:
+            raw.execute("ROLLBACK TO SAVEPOINT executemany")
+            raw.execute("RELEASE SAVEPOINT executemany")
+            raise
+        raw.execute("RELEASE SAVEPOINT executemany")
+
+    def _row(self, row):
+        if row is None or not self._dictionary:
+            return row
+        return dict(zip(self.column_names, row))
+
+    def fetchone(self):
+        return self._row(self._cursor.fetchone())
+
+    def fetchmany(self, size: int = 1) -> List[Any]:
+        return [self._row(row) for row in self._cursor.fetchmany(size)]
+
+    def fetchall(self) -> List[Any]:
+        if self._cursor.description is None:
+            return []
+        return [self._row(row) for row in self._cursor.fetchall()]
+
+    def close(self) -> None:
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    """
+    SQLite connection with the subset of the mysql.connector connection API used by MySQLConnection.
+
+    Statements autocommit unless start_transaction() was called, matching
+    the ``autocommit=True`` MySQL connections.
+    """
+
+    def __init__(self, raw: sqlite3.Connection):
+        self.raw = raw
+        self._closed = False
+
+    def cursor(self, dictionary: bool = False, prepared: bool = False, buffered: bool = True) -> SQLiteCursor:
+        # sqlite3 already caches compiled statements per connection, so a
+        # prepared cursor needs nothing extra; cursors read rows lazily either way
+        return SQLiteCursor(self, dictionary=dictionary)
+
+    def start_transaction(self) -> None:
+        # Take the write lock up front so the transaction cannot fail to upgrade later
+        self.raw.execute("BEGIN IMMEDIATE")
+
+    def commit(self) -> None:
+        if self.raw.in_transaction:
+            self.raw.execute("COMMIT")
+
+    def rollback(self) -> None:
+        if self.raw.in_transaction:
+            self.raw.execute("ROLLBACK")
+
+    def ping(self, reconnect: bool = False) -> None:
+        self.raw.execute("SELECT 1").fetchone()
+
+    def is_connected(self) -> bool:
+        return not self._closed
+
+    def close(self) -> None:
+        self._closed = True
+        self.raw.close()
+
+
+class SQLiteDatabase:
+    """
+    Opens connections to one SQLite database and creates its schema on first use.
+
+    Each pooled connection runs in WAL mode, so readers on other threads are
+    not blocked by a writer, and waits up to ``busy_timeout`` seconds for the
+    write lock. ``path=":memory:"`` gives a private database for the
+    process, e.g. for benchmark runs. It is kept in a temporary file that is
+    removed when the database is garbage collected or the process exits: a
+    shared-cache in-memory database locks whole tables, and those locks fail
+    at once instead of waiting for ``busy_timeout``.
+    """
+
+    def __init__(self, path: str, busy_timeout: float = 5.0, seed: bool = True):
+        """
+        Initialize the database.
+
+        Args:
+            path: Database file, or ":memory:"
+            busy_timeout: Seconds to wait for a lock held by another connection
+            seed: Load Insert_data.sql when the schema is created
+        """
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self.seed = seed
+        self.in_memory = path == ":memory:"
+        self._temp_dir = None
+        if self.in_memory:
+            self._temp_dir = tempfile.TemporaryDirectory(prefix="java_review_")
+            path = str(Path(self._temp_dir.name) / "database.sqlite")
+        else:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._uri = Path(path).absolute().as_uri()
+
+        self._lock = threading.Lock()
+        self._bootstrapped = False
+
+    def connect(self) -> SQLiteConnection:
+        """Open a new connection for the pool, creating the schema if the database is empty."""
+        raw = self._open()
+        if not self._bootstrapped:
+            self._bootstrap(raw)
+        return SQLiteConnection(raw)
+
+    def _open(self) -> sqlite3.Connection:
+        raw = sqlite3.connect(
+            self._uri,
+            uri=True,
+            timeout=self.busy_timeout,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            isolation_level=None,
+            # The pool hands a connection to one thread at a time
+            check_same_thread=False
+        )
+        raw.execute("PRAGMA journal_mode = WAL")
+        # A temporary database is thrown away on a crash anyway
+        raw.execute("PRAGMA synchronous = OFF" if self.in_memory else "PRAGMA synchronous = NORMAL")
+        raw.execute("PRAGMA foreign_keys = ON")
+        _register_functions(raw)
+        return raw
+
+    def _bootstrap(self, raw: sqlite3.Connection) -> None:
+        """Create the schema from Create_db.sql and load the seed data into an empty database."""
+        with self._lock:
+            if self._bootstrapped:
+                return
+
+            exists = raw.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'users'"
+            ).fetchone()
+            if not exists:
+                self.create_schema(raw)
+            else:
+                self.migrate(raw)
+            self._bootstrapped = True
+
+    def create_schema(self, raw: sqlite3.Connection) -> None:
+        """Run the translated schema (and seed data) scripts in one transaction."""
+        # Imported here: schema_version imports MySQLConnection, which imports this module
+        from data.schema_version import SCHEMA_VERSION
+
+        logger.info(f"Creating SQLite schema in {self.path}")
+        statements = translate_script(SCHEMA_FILE.read_text(encoding="utf-8"))
+        if self.seed and SEED_FILE.exists():
+            statements += translate_script(SEED_FILE.read_text(encoding="utf-8"))
+
+        raw.execute("BEGIN IMMEDIATE")
+        try:
+            for statement in statements:
+                raw.execute(statement)
+            raw.execute(
+                "INSERT OR REPLACE INTO schema_version (version, description, category_count, error_count) "
+                "VALUES (?, ?, (SELECT COUNT(*) FROM error_categories), (SELECT COUNT(*) FROM java_errors))",
+                (SCHEMA_VERSION, "Base schema and seed data (SQLite)")
+            )
+            raw.execute("COMMIT")
+        except Exception:
+            raw.execute("ROLLBACK")
+            raise
+        logger.info(f"SQLite schema created ({len(statements)} statements)")
+        self.migrate(raw)
+
+    def migrate(self, raw: sqlite3.Connection) -> int:
+        """Apply the pending schema migrations."""
+        from data.migrations import MigrationRunner
+
+        runner = MigrationRunner(SQLiteConnection(raw), "sqlite")
+        if not runner.pending():
+            return runner.current_version()
+        version = runner.migrate()
+        logger.info(f"SQLite schema migrated to version {version}")
+        return version
+
+    def rebuild(self) -> None:
+        """Drop every table and view and create the schema and seed data again."""
+        raw = self._open()
+        try:
+            with self._lock:
+                objects = raw.execute(
+                    "SELECT type, name FROM sqlite_master "
+                    "WHERE type IN ('view', 'table') AND name NOT LIKE 'sqlite_%' "
+                    "ORDER BY type = 'table'"
+                ).fetchall()
+                raw.execute("PRAGMA foreign_keys = OFF")
+                for object_type, name in objects:
+                    raw.execute(f'DROP {object_type.upper()} IF EXISTS "{name}"')
+                raw.execute("PRAGMA foreign_keys = ON")
+
+                self.create_schema(raw)
+                self._bootstrapped = True
+        finally:
+            raw.close()
+
+    def get_info(self) -> Dict[str, Any]:
+        """Get the database location and SQLite version."""
+        return {"path": self.path, "in_memory": self.in_memory, "sqlite_version": sqlite3.sqlite_version}
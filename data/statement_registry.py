@@ -0,0 +1,102 @@
+# data/statement_registry.py
+"""
+Statement Registry module for Java Peer Review Training System.
+
+Frequently run queries are registered once, at import time, under a name
+and with an explicit read/write kind. MySQLConnection runs registered
+statements as server-side prepared statements that are prepared once per
+pooled connection, and uses the declared kind instead of inspecting the
+SQL text to decide whether to fetch rows.
+"""
+
+import logging
+import threading
+from functools import lru_cache
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+READ = "read"
+WRITE = "write"
+
+_READ_PREFIXES = ("SELECT", "SHOW", "WITH")
+
+
+class Statement:
+    """A named SQL statement with a declared read/write kind."""
+
+    __slots__ = ("name", "sql", "kind")
+
+    def __init__(self, name: str, sql: str, kind: str):
+        if kind not in (READ, WRITE):
+            raise ValueError(f"Statement kind must be '{READ}' or '{WRITE}', got '{kind}'")
+        self.name = name
+        self.sql = sql
+        self.kind = kind
+
+    @property
+    def is_read(self) -> bool:
+        """Whether the statement returns rows."""
+        return self.kind == READ
+
+    def __repr__(self) -> str:
+        return f"Statement({self.name!r}, {self.kind})"
+
+
+class StatementRegistry:
+    """Process-wide registry of named statements."""
+
+    _instance = None
+
+    def __new__(cls):
+        """Ensure singleton instance."""
+        if cls._instance is None:
+            cls._instance = super(StatementRegistry, cls).__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        if self._initialized:
+            return
+
+        self._statements: Dict[str, Statement] = {}
+        self._lock = threading.Lock()
+        self._initialized = True
+
+    def register(self, name: str, sql: str, kind: str) -> Statement:
+        """
+        Register a statement, or get the existing one with the same name and SQL.
+
+        Raises:
+            ValueError: If the name is already registered with different SQL or kind
+        """
+        sql = sql.strip()
+        with self._lock:
+            existing = self._statements.get(name)
+            if existing is not None:
+                if existing.sql != sql or existing.kind != kind:
+                    raise ValueError(f"Statement '{name}' is already registered with different SQL")
+                return existing
+            statement = Statement(name, sql, kind)
+            self._statements[name] = statement
+            return statement
+
+    def get(self, name: str) -> Optional[Statement]:
+        """Get a registered statement by name."""
+        return self._statements.get(name)
+
+    def names(self):
+        """Get the names of all registered statements."""
+        return sorted(self._statements)
+
+
+def register_statement(name: str, sql: str, kind: str) -> Statement:
+    """Register a statement in the process-wide registry."""
+    return StatementRegistry().register(name, sql, kind)
+
+
+@lru_cache(maxsize=1024)
+def classify_query(query: str) -> str:
+    """Classify an ad-hoc SQL string as a read or a write, once per distinct string."""
+    return READ if query.lstrip().upper().startswith(_READ_PREFIXES) else WRITE
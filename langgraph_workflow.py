@@ -6,10 +6,11 @@ with separate workflows for code generation and review processing.
 FIXED: Submit button now uses dedicated review workflow (no code regeneration).
 """
 
-__all__ = ['JavaCodeReviewGraph']
+__all__ = ['JavaCodeReviewGraph', 'get_shared_llm_manager', 'get_shared_workflow']
 
 import streamlit as st
 import logging
+import threading
 from typing import Dict, List, Any, Optional
 
 from state_schema import WorkflowState, ReviewAttempt
@@ -18,6 +19,7 @@ from state_schema import WorkflowState, ReviewAttempt
 from workflow.manager import WorkflowManager
 from workflow.conditions import WorkflowConditions
 from utils.language_utils import t
+from llm_manager import LLMManager
 
 # Configure logging
 logging.basicConfig(
@@ -286,4 +288,49 @@ class JavaCodeReviewGraph:
         except Exception as e:
             logger.error(f"Error resetting workflow state: {str(e)}")
             state.error = f"Failed to reset workflow state: {str(e)}"
-            return state
\ No newline at end of file
+            return state
+
+
+# Process-wide workflow engine shared by every session. The engine only holds
+# models, graphs and repositories; per-session data lives in WorkflowState.
+_shared_lock = threading.Lock()
+_shared_llm_manager: Optional[LLMManager] = None
+_shared_workflow: Optional[JavaCodeReviewGraph] = None
+_shared_api_key: Optional[str] = None
+
+
+def get_shared_llm_manager() -> LLMManager:
+    """Get the process-wide LLMManager, creating it on first use."""
+    global _shared_llm_manager
+    if _shared_llm_manager is None:
+        with _shared_lock:
+            if _shared_llm_manager is None:
+                _shared_llm_manager = LLMManager()
+    return _shared_llm_manager
+
+
+def get_shared_workflow(api_key: str) -> JavaCodeReviewGraph:
+    """
+    Get the process-wide JavaCodeReviewGraph for a Groq API key.
+
+    The graph, its models and its compiled workflows are built once and
+    reused by every session and rerun; they are only rebuilt when the API
+    key changes.
+
+    Raises:
+        RuntimeError: If the Groq provider cannot be configured
+    """
+    global _shared_workflow, _shared_api_key
+    workflow = _shared_workflow
+    if workflow is not None and _shared_api_key == api_key:
+        return workflow
+
+    llm_manager = get_shared_llm_manager()
+    with _shared_lock:
+        if _shared_workflow is None or _shared_api_key != api_key:
+            if not llm_manager.set_provider("groq", api_key):
+                raise RuntimeError("Failed to configure Groq provider")
+            _shared_workflow = JavaCodeReviewGraph(llm_manager)
+            _shared_api_key = api_key
+            logger.debug("Built shared workflow engine")
+        return _shared_workflow
@@ -12,12 +12,19 @@ from typing import Dict, Any, Optional, Tuple
 from dotenv import load_dotenv 
 
 # Groq integration
-from langchain_groq import ChatGroq 
 from langchain_core.messages import HumanMessage
 GROQ_AVAILABLE = True
 
 from langchain_core.language_models import BaseLanguageModel
 
+from utils.llm_cache import LLMResponseCache, ResponseCacheStore
+from utils.code_utils import extract_both_code_versions
+from utils.structured_output import get_structured_output_metrics
+from utils.llm_scheduler import LLMScheduler, ScheduledChatGroq, llm_priority, INTERACTIVE
+from utils.model_cascade import ModelCascade
+from utils.token_budget import completion_budget, get_prompt_budget_metrics
+from analytics.token_usage import TokenUsageTracker
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -25,6 +32,16 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+
+def _has_both_code_versions(text: str) -> bool:
+    """Whether annotated and clean code can be extracted from a code generation."""
+    annotated_code, clean_code = extract_both_code_versions(text)
+    return bool(annotated_code.strip() and clean_code.strip())
+
+
+# Responses a role's callers cannot use are not cached
+RESPONSE_VALIDATORS = {"GENERATIVE": _has_both_code_versions}
+
 class LLMManager:
     """
     LLM Manager for handling model initialization, configuration and management.
@@ -57,6 +74,22 @@ class LLMManager:
         # Connection caching to avoid repeated tests
         self._connection_cache = {}
         self._cache_duration = 300  # 5 minutes
+        
+        # Response caching: on by default, skipped for models above the temperature cap
+        self.response_cache_enabled = os.getenv("LLM_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+        self.response_cache_max_temperature = float(os.getenv("LLM_CACHE_MAX_TEMPERATURE", "0.7"))
+        # Code generation must give a new challenge on every request, so it is not cached by default
+        self.response_cache_excluded_roles = {
+            role.strip().upper() for role in os.getenv("LLM_CACHE_EXCLUDED_ROLES", "GENERATIVE").split(",")
+            if role.strip()
+        }
+        self.response_cache_default_ttl = float(os.getenv("LLM_CACHE_TTL", "86400"))
+        self._response_caches = {}
+        
+        # Model cascades: structured prompts try a small model before the role's model
+        self.cascade_enabled = os.getenv("LLM_CASCADE_ENABLED", "true").lower() in ("1", "true", "yes")
+        self.cascade_default_model = os.getenv("LLM_CASCADE_MODEL", "llama3-8b-8192")
+        self._cascades: Dict[str, ModelCascade] = {}
     
     def set_provider(self, provider: str, api_key: str = None) -> bool:
         """
@@ -167,13 +200,15 @@ class LLMManager:
             
         try:
             # Use a minimal API call to test the connection
-            chat = ChatGroq(
+            chat = ScheduledChatGroq(
                 api_key=self.groq_api_key,
-                model_name="llama3-8b-8192"  # Use the smallest model for testing
+                model_name="llama3-8b-8192",  # Use the smallest model for testing
+                max_retries=0
             )
             
-            # Make a minimal API call
-            response = chat.invoke([HumanMessage(content="test")])
+            # Make a minimal API call; the user is waiting on it
+            with llm_priority(INTERACTIVE):
+                response = chat.invoke([HumanMessage(content="test")])
             
             # If we get here, the connection is successful
             result = True, f"Connected to Groq API successfully"
@@ -191,7 +226,91 @@ class LLMManager:
         self._cache_connection_result(*result)
         return result
 
-    def initialize_model(self, model_name: str, model_params: Dict[str, Any] = None) -> Optional[BaseLanguageModel]:
+    def _get_response_cache(self, role: Optional[str], temperature: float) -> Optional[LLMResponseCache]:
+        """
+        Get the response cache for a model role.
+        
+        Args:
+            role: Model role (e.g. 'GENERATIVE', 'REVIEW'); None uses 'DEFAULT'
+            temperature: Sampling temperature of the model
+            
+        Returns:
+            LLMResponseCache, or None if caching is disabled for this model
+        """
+        if not self.response_cache_enabled:
+            return None
+        
+        # High-temperature models are meant to vary between calls
+        if temperature > self.response_cache_max_temperature:
+            logger.debug(f"Response cache skipped for temperature {temperature}")
+            return None
+        
+        role = (role or "DEFAULT").upper()
+        if role in self.response_cache_excluded_roles:
+            logger.debug(f"Response cache skipped for role {role}")
+            return None
+        
+        if role not in self._response_caches:
+            try:
+                ttl = float(os.getenv(f"LLM_CACHE_TTL_{role}", self.response_cache_default_ttl))
+            except (ValueError, TypeError):
+                logger.warning(f"Invalid LLM_CACHE_TTL_{role}, using default {self.response_cache_default_ttl}")
+                ttl = self.response_cache_default_ttl
+            if ttl <= 0:
+                return None
+            self._response_caches[role] = LLMResponseCache(role, ttl, validator=RESPONSE_VALIDATORS.get(role))
+        return self._response_caches[role]
+    
+    def get_response_cache_metrics(self) -> Dict[str, Any]:
+        """
+        Get response cache hit/miss metrics.
+        
+        Returns:
+            Dictionary with overall and per-role counters
+        """
+        return ResponseCacheStore().get_metrics()
+    
+    def get_structured_output_metrics(self) -> Dict[str, Any]:
+        """
+        Get how often JSON prompts fell back from structured output to text extraction.
+        
+        Returns:
+            Dictionary of prompt name -> counters and fallback rate
+        """
+        return get_structured_output_metrics()
+    
+    def get_scheduler_metrics(self) -> Dict[str, Any]:
+        """
+        Get LLM request scheduler metrics.
+        
+        Returns:
+            Dictionary of model name -> queue depth, wait time, rate limit and retry counters
+        """
+        return LLMScheduler().get_metrics()
+    
+    def get_token_usage_metrics(self) -> Dict[str, Any]:
+        """
+        Get LLM token usage and prompt budget metrics.
+        
+        Returns:
+            Dictionary with token totals per role since startup and, per prompt,
+            how often it was compacted to fit its budget
+        """
+        metrics = TokenUsageTracker().get_metrics()
+        metrics["prompt_budgets"] = get_prompt_budget_metrics()
+        return metrics
+    
+    def clear_response_cache(self, role: str = None) -> None:
+        """
+        Clear cached LLM responses.
+        
+        Args:
+            role: Only clear this role's responses; None clears everything
+        """
+        ResponseCacheStore().clear(role.upper() if role else None)
+    
+    def initialize_model(self, model_name: str, model_params: Dict[str, Any] = None,
+                         role: str = None) -> Optional[BaseLanguageModel]:
         """
         Initialize a Groq model with lazy connection testing.
         Connection is only tested when the model is actually used.
@@ -199,13 +318,15 @@ class LLMManager:
         Args:
             model_name (str): Name of the model to initialize
             model_params (Dict[str, Any], optional): Model parameters
+            role (str, optional): Model role, used to pick the response cache TTL
             
         Returns:
             Optional[BaseLanguageModel]: Initialized LLM or None if initialization fails
         """
-        return self._initialize_groq_model(model_name, model_params)
+        return self._initialize_groq_model(model_name, model_params, role)
     
-    def _initialize_groq_model(self, model_name: str, model_params: Dict[str, Any] = None) -> Optional[BaseLanguageModel]:
+    def _initialize_groq_model(self, model_name: str, model_params: Dict[str, Any] = None,
+                               role: str = None) -> Optional[BaseLanguageModel]:
         """
         Initialize a Groq model without immediate connection testing.
         Uses simple ChatGroq instance for maximum reliability.
@@ -213,6 +334,8 @@ class LLMManager:
         Args:
             model_name: Name of the model to initialize
             model_params: Model parameters
+            role: Model role, used to pick the response cache TTL, the scheduling priority
+                and the completion token budget
             
         Returns:
             Initialized ChatGroq instance or None if initialization fails
@@ -227,14 +350,21 @@ class LLMManager:
             
         # Apply default model parameters if none provided
         if model_params is None:
-            model_params = self._get_groq_default_params(model_name)
+            model_params = self._get_groq_default_params(model_name, role)
             
         try:
-            # Create ChatGroq directly for maximum reliability
-            llm = ChatGroq(
+            temperature = model_params.get("temperature", 0.7)
+            max_tokens = model_params.get("max_tokens", completion_budget(role))
+            
+            # Calls are admitted and retried by the LLMScheduler, not the Groq client
+            llm = ScheduledChatGroq(
                 api_key=self.groq_api_key,
                 model_name=model_name,
-                temperature=model_params.get("temperature", 0.7),
+                temperature=temperature,
+                cache=self._get_response_cache(role, temperature),
+                role=role,
+                max_tokens=max_tokens,
+                max_retries=0,
                 verbose=True
             )
             
@@ -263,10 +393,7 @@ class LLMManager:
         model_name = os.getenv(groq_model_key, self.groq_default_model)
         
         # Map environment variable names to Groq model names if needed
-        if model_name == "llama3:8b":
-            model_name = "llama3-8b-8192"
-        elif model_name == "llama3:70b":
-            model_name = "llama3-70b-8192"
+        model_name = self._groq_model_name(model_name)
         
         logger.debug(f"Using Groq model: {model_name}")
         
@@ -277,21 +404,80 @@ class LLMManager:
             logger.warning(f"Invalid temperature value for {temperature_key}, using default 0.7")
             temperature = 0.7
         
+        # Role name from the variable key, e.g. GENERATIVE_MODEL -> GENERATIVE
+        role = model_key[:-len("_MODEL")] if model_key.endswith("_MODEL") else model_key
+        
         # Set up model parameters
         model_params = {
-            "temperature": temperature
+            "temperature": temperature,
+            "max_tokens": completion_budget(role)
         }
         
         # Initialize the model
         logger.debug(f"Initializing model {model_name} with params: {model_params}")
-        return self.initialize_model(model_name, model_params)
+        return self.initialize_model(model_name, model_params, role)
+    
+    @staticmethod
+    def _groq_model_name(model_name: str) -> str:
+        """Map Ollama-style model names to Groq model names."""
+        if model_name == "llama3:8b":
+            return "llama3-8b-8192"
+        if model_name == "llama3:70b":
+            return "llama3-70b-8192"
+        return model_name
+    
+    def initialize_cascade_from_env(self, role: str, model: Optional[BaseLanguageModel]) -> Optional[ModelCascade]:
+        """
+        Initialize the model cascade of a role.
+        
+        The cascade tries ``GROQ_{role}_CASCADE_MODEL`` (default ``LLM_CASCADE_MODEL``)
+        first and escalates to the role's own model.
+        
+        Args:
+            role: Model role, e.g. 'REVIEW'
+            model: The role's model, initialized from GROQ_{role}_MODEL
+            
+        Returns:
+            ModelCascade, or None if cascading is off or the role's model is already the small one
+        """
+        if not self.cascade_enabled or model is None:
+            return None
+        
+        role = role.upper()
+        large_name = getattr(model, "model_name", None)
+        small_name = self._groq_model_name(os.getenv(f"GROQ_{role}_CASCADE_MODEL", self.cascade_default_model))
+        if not small_name or small_name == large_name:
+            return None
+        
+        small_model = self.initialize_model(small_name, {
+            "temperature": getattr(model, "temperature", 0.7),
+            "max_tokens": getattr(model, "max_tokens", None) or completion_budget(role)
+        }, role)
+        if small_model is None:
+            logger.warning(f"Could not initialize cascade model {small_name} for {role}, using {large_name} only")
+            return None
+        
+        cascade = ModelCascade(role, [(small_name, small_model), (large_name, model)])
+        self._cascades[role] = cascade
+        logger.debug(f"Initialized {role} cascade: {' -> '.join(cascade.model_names)}")
+        return cascade
+    
+    def get_routing_metrics(self) -> Dict[str, Any]:
+        """
+        Get model cascade routing metrics.
+        
+        Returns:
+            Dictionary of role -> models and per-prompt answers, escalations and escalation rate
+        """
+        return {role: cascade.get_metrics() for role, cascade in self._cascades.items()}
     
-    def _get_groq_default_params(self, model_name: str) -> Dict[str, Any]:
+    def _get_groq_default_params(self, model_name: str, role: str = None) -> Dict[str, Any]:
         """
         Get default parameters for a Groq model.
         
         Args:
             model_name: Name of the model
+            role: Model role, used to pick the completion token budget
             
         Returns:
             Default parameters for the model
@@ -299,7 +485,7 @@ class LLMManager:
         # Basic defaults for Groq
         params = {
             "temperature": 0.7,
-            "max_tokens": 1024
+            "max_tokens": completion_budget(role)
         }
         
         # Adjust based on model name and role
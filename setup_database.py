@@ -4,21 +4,36 @@ Main Database Setup Script for Java Peer Review Training System.
 This script orchestrates the complete database setup process:
 1. Creates database schema and tables
 2. Automatically imports data from SQL files
-3. Verifies the complete setup
+3. Verifies the complete setup and records the schema version
+4. Applies the schema migrations in data/migrations.py
 
 Run this script to set up the entire database automatically.
+Run it with --migrate to only apply pending migrations to an existing
+database, with --check-plans to list registered queries that scan whole
+tables (exits with status 1 if there are any), with --maintain-partitions
+to add upcoming monthly partitions and archive expired months, or with
+--rollup to fold new rows into the daily rollup tables.
 """
-import mysql.connector
 import sys
 import os
 import logging
 from pathlib import Path
 from dotenv import load_dotenv
+import argparse
 import traceback
 
+try:
+    import mysql.connector
+except ImportError:  # Only needed for the MySQL backend
+    mysql = None
+
 # Add project root to path
 sys.path.append(str(Path(__file__).parent))
 from data.mysql_connection import MySQLConnection
+from data.schema_version import SCHEMA_VERSION, SchemaVerifier, record_schema_version
+from data.migrations import MigrationRunner, load_statement_modules
+from data.partition_manager import PartitionManager
+from analytics.rollups import RollupPipeline
 
 # Configure logging
 logging.basicConfig(
@@ -33,6 +48,7 @@ class DatabaseSetup:
     def __init__(self):
         """Initialize database setup with configuration."""
         # Get database configuration from environment variables with defaults
+        self.db_backend = os.getenv("DB_BACKEND", "mysql").lower()
         self.db_host = os.getenv("DB_HOST", "localhost")
         self.db_user = os.getenv("DB_USER", "root")  # Default to root for setup
         self.db_password = os.getenv("DB_PASSWORD", "")
@@ -380,6 +396,9 @@ class DatabaseSetup:
             # Step 1: Initialize setup
             setup = DatabaseSetup()
             
+            if setup.db_backend == "sqlite":
+                return setup.sqlite_database_setup()
+            
             if not setup.test_connection():
                 logger.error("❌ Cannot connect to MySQL server")
                 return False
@@ -429,6 +448,16 @@ class DatabaseSetup:
                 logger.error("❌ Setup verification failed")
                 return False
             
+            # Record the installed schema version so the app can verify it cheaply
+            if not record_schema_version(db, SCHEMA_VERSION, "Base schema and seed data"):
+                logger.error("❌ Failed to record schema version")
+                return False
+            logger.debug(f"✅ Schema version {SCHEMA_VERSION} recorded")
+            
+            if not self.apply_migrations():
+                logger.error("❌ Schema migrations failed")
+                return False
+            
             # Step 6: Create/update .env file
             # if setup.create_env_file():
             #     logger.debug("✅ .env file updated")
@@ -439,6 +468,107 @@ class DatabaseSetup:
             logger.error(f"❌ Automated setup failed: {str(e)}")
             return False
 
+    def sqlite_database_setup(self):
+        """Rebuild the embedded SQLite database from the SQL files, then verify it."""
+        try:
+            db = MySQLConnection()
+            logger.debug(f"Rebuilding SQLite database: {db.sqlite.path}")
+            db.sqlite.rebuild()
+            
+            if not self.verify_complete_setup():
+                logger.error("❌ Setup verification failed")
+                return False
+            
+            if not record_schema_version(db, SCHEMA_VERSION, "Base schema and seed data"):
+                logger.error("❌ Failed to record schema version")
+                return False
+            logger.debug(f"✅ Schema version {SCHEMA_VERSION} recorded")
+            return True
+            
+        except Exception as e:
+            logger.error(f"❌ SQLite setup failed: {str(e)}")
+            return False
+
+    def apply_migrations(self):
+        """Apply the pending schema migrations to the application database."""
+        connection = None
+        try:
+            db = MySQLConnection()
+            connection = db.get_admin_connection()
+            if connection is None:
+                logger.error("❌ Could not connect to apply migrations")
+                return False
+            
+            runner = MigrationRunner(connection, self.db_backend)
+            pending = runner.pending()
+            if not pending:
+                logger.info(f"✅ Schema is up to date (version {runner.current_version()})")
+                return True
+            
+            version = runner.migrate()
+            SchemaVerifier().reset()
+            logger.info(f"✅ Applied {len(pending)} migration(s), schema version {version}")
+            return True
+            
+        except Exception as e:
+            logger.error(f"❌ Migration failed: {str(e)}")
+            return False
+        finally:
+            if connection is not None:
+                connection.close()
+
+    def maintain_partitions(self):
+        """Add upcoming monthly partitions and archive months past the retention period."""
+        summary = PartitionManager().run_maintenance()
+        for table, result in summary.items():
+            if "error" in result:
+                logger.error(f"❌ {table}: {result['error']}")
+            else:
+                logger.info(f"✅ {table}: {len(result['added'])} partition(s) added, "
+                            f"{len(result['archived'])} month(s) archived")
+        return all("error" not in result for result in summary.values())
+
+    def run_rollups(self, rebuild=False):
+        """Fold new interactions and review sessions into the daily rollup tables."""
+        pipeline = RollupPipeline()
+        folded = pipeline.rebuild() if rebuild else pipeline.run()
+        for name, count in folded.items():
+            if count < 0:
+                logger.error(f"❌ Rollup of {name} failed")
+            else:
+                logger.info(f"✅ {name}: {count} row(s) folded")
+        return bool(folded) and all(count >= 0 for count in folded.values())
+
+    def check_query_plans(self):
+        """
+        EXPLAIN every registered read statement against the seeded database.
+        
+        Returns:
+            list: Statements that scan a whole table, or None if the check could not run
+        """
+        connection = None
+        try:
+            load_statement_modules()
+            db = MySQLConnection()
+            connection = db.get_admin_connection()
+            if connection is None:
+                logger.error("❌ Could not connect to check query plans")
+                return None
+            
+            violations = MigrationRunner(connection, self.db_backend).check_query_plans()
+            for violation in violations:
+                logger.error(f"❌ {violation['statement']} scans {violation['table']}: {violation['detail']}")
+            if not violations:
+                logger.info("✅ No registered query scans a whole table")
+            return violations
+            
+        except Exception as e:
+            logger.error(f"❌ Query plan check failed: {str(e)}")
+            return None
+        finally:
+            if connection is not None:
+                connection.close()
+
     def main(self):
         """Main function with user interaction."""
         print("🚀 Java Peer Review Training System - Automated Database Setup")
@@ -477,6 +607,28 @@ class DatabaseSetup:
         return success
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Set up the Java Peer Review Training System database")
+    parser.add_argument("--migrate", action="store_true", help="only apply pending schema migrations")
+    parser.add_argument("--check-plans", action="store_true",
+                        help="fail if a registered query scans a whole table")
+    parser.add_argument("--maintain-partitions", action="store_true",
+                        help="add upcoming monthly partitions and archive expired months")
+    parser.add_argument("--rollup", action="store_true", help="fold new rows into the daily rollup tables")
+    parser.add_argument("--rebuild-rollups", action="store_true",
+                        help="recompute the daily rollup tables from the raw rows still kept")
+    args = parser.parse_args()
+    
     dbs = DatabaseSetup()
-    success = dbs.main()
+    if args.migrate or args.check_plans or args.maintain_partitions or args.rollup or args.rebuild_rollups:
+        success = True
+        if args.migrate:
+            success = dbs.apply_migrations()
+        if success and (args.rollup or args.rebuild_rollups):
+            success = dbs.run_rollups(rebuild=args.rebuild_rollups)
+        if success and args.maintain_partitions:
+            success = dbs.maintain_partitions()
+        if success and args.check_plans:
+            success = dbs.check_query_plans() == []
+    else:
+        success = dbs.main()
     sys.exit(0 if success else 1)
@@ -50,6 +50,7 @@ class WorkflowState(BaseModel):
         default_factory=list,
         description="Specifically selected errors (when using specific mode)"
     )
+    error_selection_seed: Optional[int] = Field(None, description="Seed for reproducible random error selection")
 
     # Code Generation State
     code_snippet: Optional[CodeSnippet] = Field(None, description="Generated code snippet data")
@@ -0,0 +1,11 @@
+"""
+Shared pytest setup for the Java Peer Review Training System tests.
+"""
+
+import os
+import sys
+
+# Make the application packages (data, utils, ...) importable when pytest is run from anywhere
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
@@ -0,0 +1,103 @@
+"""
+Tests for running the async workflow path from synchronous code (utils/async_utils.py).
+"""
+
+import os
+import json
+import threading
+import contextvars
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+# The scheduled model counts tokens through the database layer; keep it off any server
+os.environ.setdefault("DB_BACKEND", "sqlite")
+os.environ.setdefault("DB_SQLITE_PATH", ":memory:")
+
+from langchain_core.messages import HumanMessage
+
+from utils.async_utils import run_coroutine, run_in_thread, get_event_loop
+from utils.llm_scheduler import ScheduledChatGroq
+
+COMPLETION = {
+    "id": "chatcmpl-test",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "stub-model",
+    "choices": [{"index": 0, "message": {"role": "assistant", "content": "ok"}, "finish_reason": "stop"}],
+    "usage": {"prompt_tokens": 5, "completion_tokens": 1, "total_tokens": 6},
+}
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    # Keep-alive, so the client reuses its pooled connection between calls
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.server.requests += 1
+        body = json.dumps(COMPLETION).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    server.requests = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_run_coroutine_reuses_the_model_client(stub_server):
+    llm = ScheduledChatGroq(
+        api_key="test",
+        base_url=f"http://127.0.0.1:{stub_server.server_address[1]}",
+        model_name="stub-model",
+        max_retries=0,
+    )
+
+    first = run_coroutine(llm.ainvoke([HumanMessage(content="first")]))
+    second = run_coroutine(llm.ainvoke([HumanMessage(content="second")]))
+
+    assert first.content == second.content == "ok"
+    # A call that failed on a closed loop would have been retried by the scheduler
+    assert stub_server.requests == 2
+
+
+def test_run_coroutine_uses_one_loop():
+    async def current_loop():
+        import asyncio
+        return asyncio.get_running_loop()
+
+    assert run_coroutine(current_loop()) is run_coroutine(current_loop()) is get_event_loop()
+
+
+def test_run_coroutine_keeps_context_variables():
+    variable = contextvars.ContextVar("variable", default=None)
+
+    async def read_in_coroutine_and_thread():
+        return variable.get(), await run_in_thread(variable.get)
+
+    token = variable.set("caller")
+    try:
+        assert run_coroutine(read_in_coroutine_and_thread()) == ("caller", "caller")
+    finally:
+        variable.reset(token)
+
+
+def test_run_coroutine_raises_the_coroutine_error():
+    async def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError, match="boom"):
+        run_coroutine(fail())
@@ -0,0 +1,53 @@
+"""
+Tests for the badge rules in analytics/badge_manager.py, on the embedded SQLite backend.
+"""
+
+import os
+import uuid
+
+import pytest
+
+os.environ.setdefault("DB_BACKEND", "sqlite")
+os.environ.setdefault("DB_SQLITE_PATH", ":memory:")
+
+from analytics.badge_manager import BadgeManager
+
+
+@pytest.fixture
+def badge_manager():
+    return BadgeManager()
+
+
+def _create_user(badge_manager, perfect_reviews: int) -> str:
+    user_id = uuid.uuid4().hex
+    badge_manager.db.execute_query(
+        "INSERT INTO users (uid, email, password, perfect_reviews_count) VALUES (%s, %s, %s, %s)",
+        (user_id, f"{user_id}@example.com", "secret", perfect_reviews)
+    )
+    return user_id
+
+
+def _has_badge(badge_manager, user_id: str, badge_id: str) -> bool:
+    return bool(badge_manager.db.execute_query(
+        "SELECT 1 AS awarded FROM user_badges WHERE user_id = %s AND badge_id = %s",
+        (user_id, badge_id), fetch_one=True
+    ))
+
+
+def test_bug_hunter_is_awarded_on_the_fifth_perfect_review(badge_manager):
+    # Four perfect reviews recorded; the current one is not counted yet
+    user_id = _create_user(badge_manager, perfect_reviews=4)
+    badge_manager.check_review_completion_badges(user_id, reviews_completed=5, all_errors_found=True)
+    assert _has_badge(badge_manager, user_id, "bug-hunter")
+
+
+def test_bug_hunter_is_not_awarded_on_the_fourth_perfect_review(badge_manager):
+    user_id = _create_user(badge_manager, perfect_reviews=3)
+    badge_manager.check_review_completion_badges(user_id, reviews_completed=4, all_errors_found=True)
+    assert not _has_badge(badge_manager, user_id, "bug-hunter")
+
+
+def test_bug_hunter_needs_the_current_review_to_be_perfect(badge_manager):
+    user_id = _create_user(badge_manager, perfect_reviews=4)
+    badge_manager.check_review_completion_badges(user_id, reviews_completed=5, all_errors_found=False)
+    assert not _has_badge(badge_manager, user_id, "bug-hunter")
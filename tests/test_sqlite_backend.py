@@ -0,0 +1,200 @@
+"""
+Tests for the MySQL to SQLite dialect translation in data/sqlite_backend.py.
+
+Each translated statement is also run on an in-memory SQLite database with
+the MySQL functions registered, so the tests check the behavior and not
+only the text of the translation.
+"""
+
+import datetime
+import sqlite3
+
+import pytest
+
+from data.sqlite_backend import (
+    _register_functions,
+    translate_create_table,
+    translate_script,
+    translate_sql,
+)
+
+
+@pytest.fixture
+def connection():
+    raw = sqlite3.connect(":memory:", isolation_level=None)
+    _register_functions(raw)
+    yield raw
+    raw.close()
+
+
+# =================================================================
+# translate_sql
+# =================================================================
+
+def test_placeholders_become_question_marks():
+    assert translate_sql("SELECT * FROM users WHERE uid = %s AND score > %s") == \
+        "SELECT * FROM users WHERE uid = ? AND score > ?"
+
+
+def test_backticks_become_double_quotes():
+    assert translate_sql("SELECT `timestamp` FROM user_interactions") == \
+        'SELECT "timestamp" FROM user_interactions'
+
+
+def test_literals_are_not_rewritten():
+    sql = translate_sql("SELECT 'NOW() %s `x` ON DUPLICATE KEY UPDATE' AS text")
+    assert sql == "SELECT 'NOW() %s `x` ON DUPLICATE KEY UPDATE' AS text"
+
+
+def test_backslash_escapes_in_literals_are_unescaped():
+    assert translate_sql(r"SELECT 'it\'s' AS text") == "SELECT 'it''s' AS text"
+
+
+def test_on_duplicate_key_update_becomes_upsert(connection):
+    sql = translate_sql("""
+        INSERT INTO totals (day, user_id, calls) VALUES (%s, %s, %s)
+        ON DUPLICATE KEY UPDATE calls = calls + VALUES(calls)
+    """)
+    assert "ON CONFLICT DO UPDATE SET calls = calls + excluded.calls" in sql
+
+    connection.execute("CREATE TABLE totals (day TEXT, user_id TEXT, calls INT, PRIMARY KEY (day, user_id))")
+    connection.execute(sql, ("2026-01-01", "u1", 2))
+    connection.execute(sql, ("2026-01-01", "u1", 3))
+    connection.execute(sql, ("2026-01-01", "u2", 1))
+    rows = connection.execute("SELECT user_id, calls FROM totals ORDER BY user_id").fetchall()
+    assert rows == [("u1", 5), ("u2", 1)]
+
+
+def test_insert_ignore_skips_duplicates(connection):
+    sql = translate_sql("INSERT IGNORE INTO watermarks (source, last_id) VALUES (%s, 0)")
+    assert sql.startswith("INSERT OR IGNORE INTO")
+
+    connection.execute("CREATE TABLE watermarks (source TEXT PRIMARY KEY, last_id INT)")
+    connection.execute(sql, ("a",))
+    connection.execute("UPDATE watermarks SET last_id = 7")
+    connection.execute(sql, ("a",))
+    assert connection.execute("SELECT last_id FROM watermarks").fetchall() == [(7,)]
+
+
+def test_now_and_curdate(connection):
+    today = datetime.date.today().isoformat()
+    now, curdate, current_date = connection.execute(
+        translate_sql("SELECT NOW(), CURDATE(), CURRENT_DATE")
+    ).fetchone()
+    assert curdate == current_date == today
+    assert now.startswith(today) and len(now) == len("2026-01-01 00:00:00")
+
+
+def test_current_timestamp_becomes_now():
+    assert translate_sql("UPDATE users SET updated_at = CURRENT_TIMESTAMP") == \
+        "UPDATE users SET updated_at = NOW()"
+
+
+@pytest.mark.parametrize("mysql, expected", [
+    ("DATE_SUB('2026-03-31', INTERVAL 1 MONTH)", "2026-02-28"),
+    ("DATE_ADD('2024-02-29', INTERVAL 1 YEAR)", "2025-02-28"),
+    ("DATE_SUB('2026-01-01', INTERVAL 2 WEEK)", "2025-12-18"),
+    ("DATE_ADD('2026-01-01 23:30:00', INTERVAL 45 MINUTE)", "2026-01-02 00:15:00"),
+    ("DATE_SUB('2026-01-01', INTERVAL 1 HOUR)", "2025-12-31 23:00:00"),
+])
+def test_date_arithmetic(connection, mysql, expected):
+    sql = translate_sql(f"SELECT {mysql}")
+    assert "DATE_ADD_INTERVAL(" in sql
+    assert connection.execute(sql).fetchone()[0] == expected
+
+
+def test_date_sub_with_placeholder_and_nested_call(connection):
+    sql = translate_sql("SELECT DATE_SUB(DATE('2026-01-10 08:00:00'), INTERVAL %s DAY)")
+    assert sql == "SELECT DATE_ADD_INTERVAL(DATE('2026-01-10 08:00:00'), -(?), 'DAY')"
+    assert connection.execute(sql, (3,)).fetchone()[0] == "2026-01-07"
+
+
+def test_date_sub_of_now(connection):
+    value = connection.execute(translate_sql("SELECT DATE_SUB(NOW(), INTERVAL 1 DAY)")).fetchone()[0]
+    yesterday = datetime.datetime.now() - datetime.timedelta(days=1)
+    assert abs((datetime.datetime.fromisoformat(value) - yesterday).total_seconds()) < 5
+
+
+def test_locking_clauses_are_dropped():
+    assert translate_sql("SELECT last_id FROM rollup_watermarks WHERE source = %s FOR UPDATE") == \
+        "SELECT last_id FROM rollup_watermarks WHERE source = ?"
+
+
+def test_truncate_becomes_delete():
+    assert translate_sql("TRUNCATE TABLE activity_log") == "DELETE FROM activity_log"
+
+
+def test_mysql_functions_are_renamed(connection):
+    sql = translate_sql("SELECT IF(1 > 0, 'yes', 'no'), JSON_OBJECT('a', 1)")
+    assert connection.execute(sql).fetchone() == ("yes", '{"a":1}')
+
+
+# =================================================================
+# translate_create_table
+# =================================================================
+
+CREATE_TABLE = """
+    CREATE TABLE IF NOT EXISTS `review_items` (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        user_id VARCHAR(36) NOT NULL,
+        kind ENUM('review', 'practice') NOT NULL DEFAULT 'review' COMMENT 'Item kind',
+        details JSON,
+        points INT UNSIGNED DEFAULT 0,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        UNIQUE KEY uk_user_kind (user_id, kind),
+        INDEX idx_created (created_at)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+"""
+
+
+def test_create_table_translation():
+    create, *extra = translate_create_table(CREATE_TABLE)
+    assert create.startswith("CREATE TABLE IF NOT EXISTS review_items (")
+    assert "id INTEGER PRIMARY KEY AUTOINCREMENT" in create
+    assert "kind TEXT NOT NULL DEFAULT 'review'" in create
+    assert "details TEXT" in create
+    assert "UNIQUE (user_id, kind)" in create
+    for mysql_only in ("AUTO_INCREMENT", "ENUM", "ENGINE", "CHARSET", "COLLATE", "COMMENT",
+                       "UNSIGNED", "ON UPDATE", "INDEX", "`"):
+        assert mysql_only not in create
+    assert "CREATE INDEX IF NOT EXISTS review_items_idx_created ON review_items (created_at)" in extra
+    assert any(statement.startswith("CREATE TRIGGER IF NOT EXISTS review_items_updated_at_on_update")
+               for statement in extra)
+
+
+def test_created_table_behaves_like_mysql(connection):
+    for statement in translate_create_table(CREATE_TABLE):
+        connection.execute(statement)
+
+    insert = translate_sql("INSERT INTO review_items (user_id, kind) VALUES (%s, %s)")
+    connection.execute(insert, ("u1", "review"))
+    connection.execute(insert, ("u1", "practice"))
+    with pytest.raises(sqlite3.IntegrityError):
+        connection.execute(insert, ("u1", "review"))
+
+    rows = connection.execute("SELECT id, points, created_at FROM review_items ORDER BY id").fetchall()
+    assert [row[0] for row in rows] == [1, 2]
+    assert all(points == 0 and created_at for _, points, created_at in rows)
+
+    connection.execute("UPDATE review_items SET updated_at = '2000-01-01 00:00:00' WHERE id = 1")
+    connection.execute("UPDATE review_items SET points = 5 WHERE id = 1")
+    updated_at = connection.execute("SELECT updated_at FROM review_items WHERE id = 1").fetchone()[0]
+    assert updated_at > "2000-01-01 00:00:00"
+
+
+def test_translate_script_skips_mysql_only_statements():
+    statements = translate_script("""
+        -- schema
+        DROP TABLE IF EXISTS users;
+        CREATE DATABASE IF NOT EXISTS java_review_db;
+        USE java_review_db;
+        SET NAMES utf8mb4;
+        CREATE TABLE users (uid VARCHAR(36) PRIMARY KEY, name VARCHAR(50)) ENGINE=InnoDB;
+        INSERT IGNORE INTO users VALUES ('u1', 'semi;colon');
+        SELECT * FROM information_schema.tables;
+    """)
+    assert statements == [
+        "CREATE TABLE IF NOT EXISTS users (\n    uid VARCHAR(36) PRIMARY KEY,\n    name VARCHAR(50)\n)",
+        "INSERT OR IGNORE INTO users VALUES ('u1', 'semi;colon')",
+    ]
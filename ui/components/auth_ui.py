@@ -687,7 +687,11 @@ class AuthUI:
                 
             except Exception as e:
                 logger.error(f"Enhanced sidebar error: {str(e)}")
-            
+
+            # Database query statistics for admins
+            from ui.components.query_stats_panel import render_query_stats_panel
+            render_query_stats_panel(user_info)
+
             # App info and logout section
             self._render_sidebar_footer()
 
@@ -879,7 +883,11 @@ class AuthUI:
                 logger.error(f"Failed to import sidebar components: {str(ie)}")
             except Exception as e:
                 logger.error(f"Enhanced sidebar error: {str(e)}")
-            
+
+            # Database query statistics for admins
+            from ui.components.query_stats_panel import render_query_stats_panel
+            render_query_stats_panel(user_info)
+
             # App info and logout section
             self._render_sidebar_footer()
 
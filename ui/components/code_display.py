@@ -12,6 +12,8 @@ from typing import List, Dict, Any, Optional, Callable
 
 from utils.code_utils import add_line_numbers, _log_user_interaction_code_display
 from utils.language_utils import t, get_current_language
+from utils.llm_streaming import stream_to, TARGETED_GUIDANCE, COMPARISON_REPORT
+from ui.components.stream_renderer import TextStreamRenderer
 
 
 # Configure logging
@@ -633,7 +635,10 @@ def _process_student_review(workflow, student_review: str) -> bool:
             except Exception as log_error:
                 logger.warning(f"Could not log review start: {str(log_error)}")
 
-        updated_state = workflow.submit_review(st.session_state.workflow_state, student_review)
+        # Guidance and the final report are generated side by side; show both as they are written
+        with stream_to(TARGETED_GUIDANCE, TextStreamRenderer("💡 Writing your guidance...")), \
+                stream_to(COMPARISON_REPORT, TextStreamRenderer("📋 Writing your report...", language="json")):
+            updated_state = workflow.submit_review(st.session_state.workflow_state, student_review)
         
         # Simple error check
         if hasattr(updated_state, 'error') and updated_state.error:
@@ -14,6 +14,8 @@ from utils.language_utils import get_current_language, t
 from state_schema import WorkflowState
 from utils.code_utils import _get_category_icon, _log_user_interaction_code_generator
 from utils.workflow_state_manager import WorkflowStateManager
+from utils.llm_streaming import stream_to, CODE_GENERATION
+from ui.components.stream_renderer import CodeStreamRenderer
 
 # Configure logging 
 logging.basicConfig(level=logging.INFO) 
@@ -840,8 +842,9 @@ class CodeGeneratorUI:
                             "user_level": st.session_state.get("user_level", "medium")
                         }
                     )
-                # Execute code generation through the workflow system
-                updated_state = self._execute_code_generation_workflow(workflow_state)
+                # Execute code generation through the workflow system, showing the code as it is written
+                with stream_to(CODE_GENERATION, CodeStreamRenderer()):
+                    updated_state = self._execute_code_generation_workflow(workflow_state)
                 
                 code_snippet = self._safe_get_state_value(updated_state, 'code_snippet')
                 
@@ -17,6 +17,8 @@ from auth.mysql_auth import MySQLAuthManager
 from utils.language_utils import t, get_current_language
 from ui.components.animation import level_up_animation
 from ui.components.comparison_report_renderer import ComparisonReportRenderer
+from ui.components.stream_renderer import TextStreamRenderer
+from utils.llm_streaming import stream_to, COMPARISON_REPORT
 from utils.code_utils import _log_user_interaction_feedback_system
 
 import plotly.express as px
@@ -301,11 +303,12 @@ class FeedbackSystem:
                 
                 if evaluator:
                     # Generate a comparison report using the evaluator's method
-                    state.comparison_report = evaluator.generate_comparison_report(
-                        found_errors,
-                        latest_review.analysis,
-                        review_history
-                    )
+                    with stream_to(COMPARISON_REPORT, TextStreamRenderer("📋 Writing your report...", language="json")):
+                        state.comparison_report = evaluator.generate_comparison_report(
+                            found_errors,
+                            latest_review.analysis,
+                            review_history
+                        )
                     logger.debug(t("generated_comparison_report"))
                 else:
                     logger.error("Evaluator not available for generating comparison report")
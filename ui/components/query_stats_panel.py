@@ -0,0 +1,98 @@
+# ui/components/query_stats_panel.py
+"""
+Admin view of the database query statistics collected by QueryStats.
+
+Shown in the sidebar to users whose email is listed in ADMIN_EMAILS
+(comma-separated). Lists the heaviest query fingerprints with their latency
+percentiles and call sites, the recent slow queries, and offers the full
+statistics as a JSON download.
+"""
+
+import os
+import logging
+import datetime
+from typing import Any, Dict
+
+import streamlit as st
+
+from data.query_stats import QueryStats
+
+logger = logging.getLogger(__name__)
+
+_SORT_FIELDS = {
+    "Total time": "total_ms",
+    "Calls": "count",
+    "p95 latency": "p95_ms",
+    "Rows": "rows",
+    "Connection wait": "wait_ms"
+}
+
+
+def is_query_stats_admin(user_info: Dict[str, Any]) -> bool:
+    """Check whether the user may see the query statistics."""
+    admins = {email.strip().lower() for email in os.getenv("ADMIN_EMAILS", "").split(",") if email.strip()}
+    email = (user_info or {}).get("email") or ""
+    return email.lower() in admins
+
+
+def render_query_stats_panel(user_info: Dict[str, Any]) -> None:
+    """Render the query statistics panel for admins."""
+    if not is_query_stats_admin(user_info):
+        return
+
+    stats = QueryStats()
+    try:
+        with st.expander("🛢️ Query statistics", expanded=False):
+            if not stats.enabled:
+                st.info("Query statistics are disabled (DB_QUERY_STATS=false).")
+                return
+
+            summary = stats.get_summary()
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Queries", summary["queries"])
+            col2.metric("DB time", f"{summary['total_ms'] / 1000:.1f}s")
+            col3.metric(f"Slow (≥{summary['slow_query_ms']:.0f}ms)", summary["slow_queries"])
+
+            sort_label = st.selectbox("Sort by", list(_SORT_FIELDS), key="query_stats_sort")
+            report = stats.get_report(sort_by=_SORT_FIELDS[sort_label], limit=25)
+            if report:
+                st.dataframe([{
+                    "query": entry["name"] or entry["fingerprint"],
+                    "calls": entry["count"],
+                    "total ms": entry["total_ms"],
+                    "avg ms": entry["avg_ms"],
+                    "p95 ms": entry["p95_ms"],
+                    "avg rows": entry["avg_rows"],
+                    "wait ms": entry["wait_ms"],
+                    "retries": entry["retries"],
+                    "errors": entry["errors"],
+                    "top call site": next(iter(entry["call_sites"]), "")
+                } for entry in report], use_container_width=True, hide_index=True)
+            else:
+                st.caption("No queries recorded yet.")
+
+            slow_queries = stats.get_slow_queries()[:10]
+            if slow_queries:
+                st.markdown("**Recent slow queries**")
+                for entry in slow_queries:
+                    at = datetime.datetime.fromtimestamp(entry["at"]).strftime("%H:%M:%S")
+                    st.markdown(f"`{at}` **{entry['elapsed_ms']:.0f}ms** from `{entry['call_site']}`")
+                    st.code(entry["name"] or entry["fingerprint"], language="sql")
+                    if entry.get("explain"):
+                        st.json(entry["explain"], expanded=False)
+
+            col1, col2 = st.columns(2)
+            with col1:
+                st.download_button(
+                    "⬇️ JSON",
+                    data=stats.to_json(),
+                    file_name=f"query_stats_{datetime.datetime.now():%Y%m%d_%H%M%S}.json",
+                    mime="application/json",
+                    key="query_stats_download"
+                )
+            with col2:
+                if st.button("🔄 Reset", key="query_stats_reset"):
+                    stats.reset()
+                    st.rerun()
+    except Exception as e:
+        logger.error(f"Error rendering query statistics: {str(e)}")
@@ -0,0 +1,120 @@
+# ui/components/stream_renderer.py
+"""
+Streaming renderers for Java Peer Review Training System.
+
+StreamListeners (see utils/llm_streaming.py) that draw an LLM completion into
+Streamlit placeholders while it is being generated. Updates are throttled so
+a fast stream does not flood the browser with deltas; whatever is on screen
+is replaced by the normal rendering once the final result is in the state.
+"""
+
+import time
+import logging
+from typing import Optional
+
+import streamlit as st
+
+from utils.llm_streaming import StreamListener, JavaFenceExtractor
+
+logger = logging.getLogger(__name__)
+
+# Seconds between placeholder updates while tokens arrive
+RENDER_INTERVAL = 0.1
+
+
+class CodeStreamRenderer(StreamListener):
+    """
+    Shows the progress of a code generation and the clean code as it is written.
+
+    The annotated version marks where the errors are, so only its length is
+    shown. The clean version is streamed into a code block and shown in full
+    as soon as its fence closes.
+    """
+
+    def __init__(self):
+        self.status = st.empty()
+        self.code = st.empty()
+        self.extractor = JavaFenceExtractor()
+        self._last_render = 0.0
+        self._started_at: Optional[float] = None
+
+    def start(self) -> None:
+        self.extractor = JavaFenceExtractor()
+        self._started_at = time.monotonic()
+        self.status.caption("✍️ Writing your code challenge...")
+
+    def token(self, text: str) -> None:
+        closed = self.extractor.feed(text)
+        if any(label == "java-clean" for label, _ in closed):
+            self.status.caption("✅ Code written, checking the errors...")
+            self.code.code(self.extractor.clean_code, language="java")
+            return
+        if self.extractor.clean_code is not None:
+            return
+
+        now = time.monotonic()
+        if now - self._last_render < RENDER_INTERVAL:
+            return
+        self._last_render = now
+
+        open_block = self.extractor.open_block
+        if open_block and open_block[0] == "java-clean":
+            self.status.caption("✍️ Writing the code...")
+            self.code.code(open_block[1], language="java")
+        elif open_block:
+            lines = open_block[1].count("\n")
+            self.status.caption(f"✍️ Planting the errors... ({lines} lines)")
+
+    def finish(self, text: str) -> None:
+        if self._started_at is not None:
+            logger.debug(f"Code generation streamed in {time.monotonic() - self._started_at:.1f}s")
+        if self.extractor.clean_code is None:
+            self.status.empty()
+            self.code.empty()
+
+    def fail(self, error: Exception) -> None:
+        self.status.empty()
+        self.code.empty()
+
+
+class TextStreamRenderer(StreamListener):
+    """Shows a completion as it is written, as markdown or as a code block."""
+
+    def __init__(self, title: str, language: Optional[str] = None):
+        """
+        Args:
+            title: Caption shown above the text
+            language: Show the text as a code block in this language instead of markdown
+        """
+        self.title = title
+        self.language = language
+        self.status = st.empty()
+        self.body = st.empty()
+        self.text = ""
+        self._last_render = 0.0
+
+    def start(self) -> None:
+        self.text = ""
+        self.status.caption(self.title)
+
+    def token(self, text: str) -> None:
+        self.text += text
+        now = time.monotonic()
+        if now - self._last_render < RENDER_INTERVAL:
+            return
+        self._last_render = now
+        self._render(self.text + ("" if self.language else " ▌"))
+
+    def finish(self, text: str) -> None:
+        self.status.empty()
+        self.body.empty()
+
+    def fail(self, error: Exception) -> None:
+        self.status.empty()
+        self.body.empty()
+
+    def _render(self, text: str) -> None:
+        if self.language:
+            self.body.code(text, language=self.language)
+        else:
+            self.body.markdown(text)
@@ -6,16 +6,26 @@ import json
 from typing import Dict, List, Any, Optional
 from data.database_error_repository import DatabaseErrorRepository
 from data.mysql_connection import MySQLConnection
+from data.error_catalogue import ErrorCatalogue
+from data.statement_registry import register_statement, READ
 from utils.language_utils import t
 
 
 logger = logging.getLogger(__name__)
 
+_ERROR_CODE_BY_NAME = register_statement("practice.error_code_by_name", """
+    SELECT je.error_code 
+    FROM java_errors je 
+    WHERE je.error_name_en = %s OR je.error_name_zh = %s
+    LIMIT 1
+""", READ)
+
 class UserPracticeTracker:
     """Class to track user practice progress on individual errors."""
     
     def __init__(self):
         self.db = MySQLConnection()
+        self.catalogue = ErrorCatalogue()
     
     def get_user_practice_data(self, user_id: str) -> Dict[str, Any]:
         """Get comprehensive practice data for a user with improved error matching."""
@@ -66,28 +76,25 @@ class UserPracticeTracker:
                         'last_practiced': error.get('last_practiced')
                     })
             
-            # Get all available errors
-            all_errors_query = """
-            SELECT 
-                je.error_code,
-                je.error_name_en,
-                je.error_name_zh,
-                je.description_en,
-                je.description_zh,
-                je.implementation_guide_en,
-                je.implementation_guide_zh,
-                je.difficulty_level,
-                ec.name_en as category_name_en,
-                ec.name_zh as category_name_zh
-            FROM java_errors je
-            JOIN error_categories ec ON je.category_id = ec.id
-            ORDER BY ec.sort_order, je.error_name_en
-            """
-            all_errors = self.db.execute_query(all_errors_query) or []
-            
-            # Separate practiced and unpracticed
+            # Unpracticed errors come from the in-memory catalogue instead of a java_errors scan
             practiced_codes = {error['error_code'] for error in practiced_errors if error.get('error_code')}
-            unpracticed_errors = [error for error in all_errors if error.get('error_code') not in practiced_codes]
+            catalogue = self.catalogue.snapshot()
+            unpracticed_errors = [
+                {
+                    'error_code': error.error_code,
+                    'error_name_en': error.name['en'],
+                    'error_name_zh': error.name['zh'],
+                    'description_en': error.description['en'],
+                    'description_zh': error.description['zh'],
+                    'implementation_guide_en': error.implementation_guide['en'],
+                    'implementation_guide_zh': error.implementation_guide['zh'],
+                    'difficulty_level': error.difficulty_level,
+                    'category_name_en': error.category.name['en'],
+                    'category_name_zh': error.category.name['zh']
+                }
+                for error in (catalogue.errors if catalogue else [])
+                if error.error_code not in practiced_codes
+            ]
             
             # Get overall practice statistics
             stats_query = """
@@ -130,13 +137,7 @@ class UserPracticeTracker:
             
             # If no error_code, try to get it from database by name
             if not error_code and error_name_en:
-                lookup_query = """
-                SELECT je.error_code 
-                FROM java_errors je 
-                WHERE je.error_name_en = %s OR je.error_name_zh = %s
-                LIMIT 1
-                """
-                lookup_result = self.db.execute_query(lookup_query, (error_name_en, error_name_en), fetch_one=True)
+                lookup_result = self.db.execute_query(_ERROR_CODE_BY_NAME, (error_name_en, error_name_en), fetch_one=True)
                 if lookup_result:
                     error_code = lookup_result['error_code']
             
@@ -0,0 +1,131 @@
+"""
+Async helpers for Java Peer Review Training System.
+
+This module bridges the synchronous Streamlit script thread and the async
+workflow path: running a coroutine to completion from sync code, moving
+blocking work to a worker thread without losing the Streamlit session
+context or the caller's context variables, and bounding awaitables with a
+timeout.
+
+Coroutines run on one long-lived event loop in a background thread. The
+LLM clients are shared by the whole process and keep pooled connections
+bound to the loop that opened them, so a new loop per call (asyncio.run)
+would find those connections unusable.
+"""
+
+import os
+import asyncio
+import logging
+import threading
+import contextvars
+from typing import Any, Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Script context of the session that submitted the coroutine running on the shared loop
+_script_context: contextvars.ContextVar[Any] = contextvars.ContextVar("script_context", default=None)
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_thread: Optional[threading.Thread] = None
+_loop_lock = threading.Lock()
+
+try:
+    from streamlit.runtime.scriptrunner import get_script_run_ctx, add_script_run_ctx
+except ImportError:  # Streamlit internals moved; threads just run without session context
+    get_script_run_ctx = None
+    add_script_run_ctx = None
+
+
+def get_llm_call_timeout() -> Optional[float]:
+    """Get the per-call LLM timeout in seconds from LLM_CALL_TIMEOUT (0 disables it)."""
+    try:
+        timeout = float(os.getenv("LLM_CALL_TIMEOUT", "60"))
+    except (ValueError, TypeError):
+        logger.warning("Invalid LLM_CALL_TIMEOUT, using 60 seconds")
+        timeout = 60.0
+    return timeout if timeout > 0 else None
+
+
+def _attach_script_context(ctx: Any) -> None:
+    """Attach a captured Streamlit script context to the current thread."""
+    if ctx is not None and add_script_run_ctx is not None:
+        add_script_run_ctx(threading.current_thread(), ctx)
+
+
+def _capture_script_context() -> Any:
+    """Capture the Streamlit script context of the current thread, or of the session a coroutine runs for."""
+    ctx = get_script_run_ctx(suppress_warning=True) if get_script_run_ctx is not None else None
+    return ctx if ctx is not None else _script_context.get()
+
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """Get the shared background event loop, starting its thread on first use."""
+    global _loop, _loop_thread
+    with _loop_lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            _loop_thread = threading.Thread(target=_loop.run_forever, name="async-loop", daemon=True)
+            _loop_thread.start()
+        return _loop
+
+
+def _submit(coro: Awaitable[Any], loop: asyncio.AbstractEventLoop, ctx: Any):
+    # Runs in a copy of the caller's context, which the task created on the loop inherits
+    _script_context.set(ctx)
+    return asyncio.run_coroutine_threadsafe(coro, loop)
+
+
+def run_coroutine(coro: Awaitable[Any]) -> Any:
+    """
+    Run a coroutine to completion on the shared event loop from synchronous code.
+
+    The coroutine keeps the caller's context variables, and run_in_thread()
+    work it starts gets the caller's Streamlit session context. Code on the
+    loop itself cannot read st.session_state, so pin what it needs (user,
+    language) in context variables before calling.
+
+    Raises:
+        RuntimeError: If called from a coroutine on the shared loop; await it instead
+    """
+    loop = get_event_loop()
+    if threading.current_thread() is _loop_thread:
+        raise RuntimeError("run_coroutine() called on the shared event loop, await the coroutine instead")
+
+    future = contextvars.copy_context().run(_submit, coro, loop, _capture_script_context())
+    try:
+        return future.result()
+    except BaseException:
+        # E.g. Streamlit stopping the script: do not leave the coroutine running
+        future.cancel()
+        raise
+
+
+async def run_in_thread(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """
+    Run blocking work in the default executor.
+
+    The Streamlit script context and the caller's context variables are
+    carried over, so the work can still read st.session_state.
+    """
+    ctx = _capture_script_context()
+    context = contextvars.copy_context()
+
+    def call():
+        _attach_script_context(ctx)
+        return context.run(func, *args, **kwargs)
+
+    return await asyncio.get_running_loop().run_in_executor(None, call)
+
+
+async def with_timeout(awaitable: Awaitable[Any], timeout: Optional[float], label: str) -> Any:
+    """
+    Await with a timeout, cancelling the awaitable when it expires.
+
+    Raises:
+        TimeoutError: With the label of the call that timed out
+    """
+    try:
+        return await asyncio.wait_for(awaitable, timeout)
+    except asyncio.TimeoutError:
+        logger.warning(f"{label} timed out after {timeout}s")
+        raise TimeoutError(f"{label} timed out after {timeout}s")
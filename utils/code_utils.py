@@ -16,6 +16,7 @@ from dataclasses import dataclass
 from utils.language_utils import t, get_llm_prompt_instructions, get_current_language
 from analytics.behavior_tracker import behavior_tracker
 from prompts import get_prompt_template, format_prompt_safely
+from utils.token_budget import fit_prompt, prompt_budget
 import time
 import uuid
 
@@ -93,6 +94,23 @@ class PromptBuilder:
             logger.error(f"Error building prompt '{template_name}': {str(e)}")
             return ""
     
+    def build_prompt_within_budget(self, template_name: str, role: str,
+                                   shrinkable: List[str], **kwargs) -> str:
+        """
+        Build a prompt whose inputs are compacted to fit the role's prompt token budget.
+        
+        Args:
+            template_name: Name of the prompt template
+            role: Model role the prompt is sent to, e.g. 'REVIEW'
+            shrinkable: Template variables that may be compacted, least important first
+            **kwargs: Additional template variables
+            
+        Returns:
+            Formatted prompt string
+        """
+        return fit_prompt(lambda values: self.build_prompt(template_name, **values), kwargs,
+                          shrinkable, prompt_budget(role), template_name)
+    
     def _get_base_variables(self) -> Dict[str, Any]:
         """Get base variables from context."""
         return {
@@ -636,7 +654,9 @@ def create_review_analysis_prompt(code: str, known_problems: List[str],
             "accuracy_score_threshold": 0.7
         }
         
-        return builder.build_prompt("review_analysis_template", **prompt_vars)
+        # The known problems are kept whole; the code goes first, then the review
+        return builder.build_prompt_within_budget("review_analysis_template", "REVIEW",
+                                                  ["code", "student_review"], **prompt_vars)
         
     except Exception as e:
         logger.error(f"Error creating review analysis prompt: {str(e)}")
@@ -676,7 +696,8 @@ def create_feedback_prompt(code: str, known_problems: List[str],
             "missed_text": _extract_problems_text(review_analysis, t("missed_problems"))
         }
         
-        return builder.build_prompt("feedback_template", **prompt_vars)
+        return builder.build_prompt_within_budget("feedback_template", "REVIEW",
+                                                  ["identified_text", "missed_text"], **prompt_vars)
         
     except Exception as e:
         logger.error(f"Error creating feedback prompt: {str(e)}")
@@ -712,7 +733,8 @@ def create_comparison_report_prompt(evaluation_errors: List[str],
             "progress_info": _format_progress_info(review_history)
         }
         
-        return builder.build_prompt("comparison_report_template", **prompt_vars)
+        return builder.build_prompt_within_budget("comparison_report_template", "REVIEW",
+                                                  ["identified_text", "missed_text"], **prompt_vars)
         
     except Exception as e:
         logger.error(f"Error creating comparison report prompt: {str(e)}")
@@ -9,6 +9,8 @@ import streamlit as st
 import os
 import logging
 import sys
+import contextvars
+from contextlib import contextmanager
 from typing import Dict, Any, Optional
 
 # Add the parent directory to the path to allow absolute imports
@@ -38,6 +40,24 @@ def _ensure_i18n_initialized():
 DEFAULT_LANGUAGE = "en"
 SUPPORTED_LANGUAGES = ["en", "zh"]
 
+# Language set by use_language(), for work that runs outside a Streamlit session
+_language: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("language", default=None)
+
+@contextmanager
+def use_language(lang: str):
+    """
+    Run the block in a given language, regardless of the session's language.
+
+    Translations inside the block read the locale directly instead of
+    switching the process-wide i18n locale, so background threads can use
+    it without affecting the sessions.
+    """
+    token = _language.set(lang if lang in SUPPORTED_LANGUAGES else DEFAULT_LANGUAGE)
+    try:
+        yield
+    finally:
+        _language.reset(token)
+
 def init_language():
     """Initialize language selection in session state."""
     _ensure_i18n_initialized()
@@ -73,6 +93,10 @@ def get_current_language() -> str:
         Current language code
     """
     _ensure_i18n_initialized()
+
+    language = _language.get()
+    if language:
+        return language
     
     # Sync session state with i18n if needed
     if hasattr(st, 'session_state') and 'language' in st.session_state:
@@ -96,6 +120,10 @@ def t(key: str, **kwargs) -> str:
         Translated text
     """
     _ensure_i18n_initialized()
+
+    language = _language.get()
+    if language:
+        return get_i18n().translate(key, locale=language, **kwargs)
     
     # Ensure locale is synced
     current_lang = get_current_language()
@@ -137,6 +165,9 @@ def get_llm_prompt_instructions(language: str = None) -> Dict[str, Any]:
     _ensure_i18n_initialized()
     
     target_lang = language or get_current_language()
+
+    if _language.get():
+        return get_i18n().get_llm_instructions(locale=target_lang)
     
     # Temporarily set locale if different
     original_locale = i18n_get_locale()
@@ -0,0 +1,253 @@
+"""
+LLM Response Cache for Java Peer Review Training System.
+
+This module provides a two-tier response cache for the chat models created
+by LLMManager. Responses are kept in an in-memory LRU and in an on-disk
+SQLite database, so identical prompts (tutorial practice on the same error,
+evaluation retries, re-renders) are answered without another Groq call, also
+after a restart.
+
+The cache plugs into LangChain's own cache hook (``BaseCache``), so every
+``llm.invoke(prompt)`` call site is cached without changes. LangChain keys
+lookups on the prompt and a string of the model's invocation parameters
+(model name, temperature, max tokens, ...); both are hashed into the key.
+A role can pass a validator, so responses its callers cannot use (e.g. code
+generations without extractable code) are never cached.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from collections import OrderedDict
+from typing import Dict, Any, Callable, Optional, Sequence, Tuple
+
+from langchain_core.caches import BaseCache, RETURN_VAL_TYPE
+from langchain_core.load import dumps, loads
+from langchain_core.outputs import Generation
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCacheStore:
+    """
+    Process-wide storage shared by every role's cache.
+
+    The memory tier is an LRU of deserialized responses bounded by
+    ``LLM_CACHE_MEMORY_SIZE`` entries. The disk tier is a SQLite database at
+    ``LLM_CACHE_PATH``; set it to an empty string to keep the cache in memory
+    only. Entries expire after the TTL of the role that wrote them.
+    """
+
+    _instance = None
+
+    def __new__(cls):
+        """Ensure singleton instance."""
+        if cls._instance is None:
+            cls._instance = super(ResponseCacheStore, cls).__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        """Initialize the memory tier and open the disk tier."""
+        if self._initialized:
+            return
+
+        self.memory_size = max(0, int(os.getenv("LLM_CACHE_MEMORY_SIZE", "512")))
+        self.path = os.getenv("LLM_CACHE_PATH", "llm_cache/responses.sqlite")
+
+        self._memory: "OrderedDict[str, Tuple[float, Sequence[Generation]]]" = OrderedDict()
+        self._memory_lock = threading.Lock()
+        self._disk: Optional[sqlite3.Connection] = None
+        self._disk_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+        if self.path:
+            self._open_disk()
+        self._initialized = True
+
+    def _open_disk(self) -> None:
+        """Open the SQLite tier and drop expired entries."""
+        try:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.path, check_same_thread=False, timeout=5.0)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS llm_responses (
+                    cache_key TEXT PRIMARY KEY,
+                    role TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            """)
+            connection.execute("DELETE FROM llm_responses WHERE expires_at <= ?", (time.time(),))
+            connection.commit()
+            self._disk = connection
+            logger.debug(f"Opened LLM response cache at {self.path}")
+        except Exception as e:
+            logger.warning(f"LLM response cache disk tier unavailable, using memory only: {str(e)}")
+            self._disk = None
+
+    def _count(self, role: str, key: str) -> None:
+        with self._stats_lock:
+            stats = self._stats.setdefault(role, {
+                "memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0, "rejected": 0, "errors": 0
+            })
+            stats[key] += 1
+
+    def get(self, role: str, cache_key: str) -> Optional[Sequence[Generation]]:
+        """Look a response up in memory, then on disk."""
+        now = time.time()
+
+        with self._memory_lock:
+            entry = self._memory.get(cache_key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._memory.move_to_end(cache_key)
+                    self._count(role, "memory_hits")
+                    return entry[1]
+                del self._memory[cache_key]
+
+        if self._disk is not None:
+            try:
+                with self._disk_lock:
+                    row = self._disk.execute(
+                        "SELECT response, expires_at FROM llm_responses WHERE cache_key = ? AND expires_at > ?",
+                        (cache_key, now)
+                    ).fetchone()
+                if row is not None:
+                    generations = [loads(item) for item in json.loads(row[0])]
+                    self._remember(cache_key, row[1], generations)
+                    self._count(role, "disk_hits")
+                    return generations
+            except Exception as e:
+                self._count(role, "errors")
+                logger.warning(f"LLM response cache read failed: {str(e)}")
+
+        self._count(role, "misses")
+        return None
+
+    def put(self, role: str, cache_key: str, generations: Sequence[Generation], ttl_seconds: float) -> None:
+        """Store a response in both tiers."""
+        now = time.time()
+        expires_at = now + ttl_seconds
+        self._remember(cache_key, expires_at, generations)
+
+        if self._disk is not None:
+            try:
+                payload = json.dumps([dumps(generation) for generation in generations])
+                with self._disk_lock:
+                    self._disk.execute(
+                        "REPLACE INTO llm_responses (cache_key, role, response, created_at, expires_at) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (cache_key, role, payload, now, expires_at)
+                    )
+                    self._disk.commit()
+            except Exception as e:
+                self._count(role, "errors")
+                logger.warning(f"LLM response cache write failed: {str(e)}")
+
+        self._count(role, "writes")
+
+    def _remember(self, cache_key: str, expires_at: float, generations: Sequence[Generation]) -> None:
+        """Put an entry into the memory tier, evicting the least recently used."""
+        if self.memory_size == 0:
+            return
+        with self._memory_lock:
+            self._memory[cache_key] = (expires_at, generations)
+            self._memory.move_to_end(cache_key)
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
+
+    def clear(self, role: Optional[str] = None) -> None:
+        """Remove cached responses, for one role or for all of them."""
+        with self._memory_lock:
+            # Memory entries do not record their role, so clear them all
+            self._memory.clear()
+        if self._disk is not None:
+            with self._disk_lock:
+                if role is None:
+                    self._disk.execute("DELETE FROM llm_responses")
+                else:
+                    self._disk.execute("DELETE FROM llm_responses WHERE role = ?", (role,))
+                self._disk.commit()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get hit/miss counters per role and overall."""
+        with self._stats_lock:
+            roles = {role: dict(stats) for role, stats in self._stats.items()}
+
+        total = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0, "rejected": 0, "errors": 0}
+        for stats in roles.values():
+            for key in total:
+                total[key] += stats[key]
+            lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+            stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+
+        lookups = total["memory_hits"] + total["disk_hits"] + total["misses"]
+        total["hit_rate"] = (total["memory_hits"] + total["disk_hits"]) / lookups if lookups else 0.0
+        with self._memory_lock:
+            total["memory_entries"] = len(self._memory)
+        total["disk_enabled"] = self._disk is not None
+        return {"total": total, "roles": roles}
+
+
+class LLMResponseCache(BaseCache):
+    """
+    LangChain cache for one model role with its own TTL.
+
+    All roles share the same ResponseCacheStore; the role only decides the
+    TTL of new entries, which responses are worth caching and which counters
+    a lookup is recorded under.
+    """
+
+    def __init__(self, role: str, ttl_seconds: float, store: Optional[ResponseCacheStore] = None,
+                 validator: Optional[Callable[[str], bool]] = None):
+        """
+        Args:
+            role: Model role
+            ttl_seconds: Lifetime of new entries
+            store: Shared storage (default: the process-wide ResponseCacheStore)
+            validator: Returns False for response texts that must not be cached
+        """
+        self.role = role
+        self.ttl_seconds = ttl_seconds
+        self.store = store or ResponseCacheStore()
+        self.validator = validator
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        """Hash the model parameters and prompt into a cache key."""
+        digest = hashlib.sha256()
+        digest.update(llm_string.encode("utf-8"))
+        digest.update(b"\x00")
+        digest.update(prompt.encode("utf-8"))
+        return digest.hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        """Look up a cached response."""
+        return self.store.get(self.role, self._key(prompt, llm_string))
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        """Cache a fresh response, unless the role's validator rejects it."""
+        if self.validator is not None:
+            try:
+                usable = all(self.validator(generation.text) for generation in return_val)
+            except Exception as e:
+                logger.debug(f"Response cache validator failed: {str(e)}")
+                usable = False
+            if not usable:
+                self.store._count(self.role, "rejected")
+                logger.debug(f"Not caching unusable {self.role} response")
+                return
+        self.store.put(self.role, self._key(prompt, llm_string), return_val, self.ttl_seconds)
+
+    def clear(self, **kwargs: Any) -> None:
+        """Remove this role's cached responses."""
+        self.store.clear(self.role)
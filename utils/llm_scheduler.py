@@ -0,0 +1,533 @@
+"""
+LLM Request Scheduler for Java Peer Review Training System.
+
+Every Groq call made by the models LLMManager creates goes through one
+process-wide scheduler, so a whole class pressing Generate at once queues up
+instead of running into Groq's per-model rate limits.
+
+Each model has a token bucket for requests per minute and one for tokens per
+minute. A call reserves its prompt estimate plus the completion size its role
+usually produces (a running average of the reported usage, not max_tokens),
+and the difference to the reported usage is settled after the call. Requests wait in a priority queue per model: interactive work (review
+analysis, guidance, the report) is admitted before code generation, and code
+generation before background work (challenge pool refills). Queues are
+bounded and every request has a deadline for getting admitted. A 429 pauses
+the model's queue and the request is retried after a jittered backoff
+(honouring Retry-After), instead of the client retrying blindly.
+
+Response cache hits are answered before a model call is made, so they never
+queue. The tokens of every call that is made are counted per user, role and
+day by the TokenUsageTracker (analytics/token_usage.py).
+"""
+
+import os
+import time
+import heapq
+import random
+import asyncio
+import logging
+import itertools
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+import groq
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatResult, ChatGenerationChunk
+from langchain_groq import ChatGroq
+
+from utils.token_budget import count_tokens, count_message_tokens
+from analytics.token_usage import TokenUsageTracker
+
+logger = logging.getLogger(__name__)
+
+# Priority classes, highest first
+INTERACTIVE = 0
+GENERATION = 1
+BACKGROUND = 2
+PRIORITY_NAMES = {INTERACTIVE: "interactive", GENERATION: "generation", BACKGROUND: "background"}
+
+# Priority of a model role's calls unless the caller sets one with llm_priority()
+ROLE_PRIORITIES = {"REVIEW": INTERACTIVE, "GENERATIVE": GENERATION, "SUMMARY": GENERATION}
+
+# Errors retried with backoff; only a 429 pauses the model's queue
+RETRYABLE_ERRORS = (groq.RateLimitError, groq.InternalServerError, groq.APIConnectionError)
+
+_priority: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar("llm_priority", default=None)
+
+
+class SchedulerRejected(RuntimeError):
+    """A request was not admitted: its queue was full or its deadline passed."""
+
+
+@contextmanager
+def llm_priority(priority: int):
+    """Run the LLM calls made inside the block at a priority class."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> Optional[int]:
+    """Get the priority class set by the enclosing llm_priority(), if any."""
+    return _priority.get()
+
+
+def _env_key(model: str) -> str:
+    """Environment variable suffix for a model, e.g. llama3-8b-8192 -> LLAMA3_8B_8192."""
+    return "".join(char if char.isalnum() else "_" for char in model).upper()
+
+
+class TokenBucket:
+    """A budget per minute that refills continuously; not thread-safe on its own."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = max(1.0, float(per_minute))
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until ``amount`` is available (requests larger than the bucket wait for a full one)."""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount: float, now: float) -> None:
+        self._refill(now)
+        self.level -= min(amount, self.capacity)
+
+    def adjust(self, amount: float) -> None:
+        """Charge (positive) or refund (negative) the difference to an earlier take()."""
+        self.level = min(self.capacity, self.level - amount)
+
+
+class ModelLane:
+    """Rate limits and priority queue of one model."""
+
+    # Weight of the newest call in the running completion size average
+    COMPLETION_AVERAGE_WEIGHT = 0.2
+
+    def __init__(self, model: str, requests_per_minute: float, tokens_per_minute: float):
+        self.model = model
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.paused_until = 0.0
+        self._completion_average: Dict[str, float] = {}
+
+        self._lock = threading.Condition()
+        self._queue: List[tuple] = []
+        self._sequence = itertools.count()
+        self._depth = {priority: 0 for priority in PRIORITY_NAMES}
+        self._stats = {
+            "admitted": {name: 0 for name in PRIORITY_NAMES.values()},
+            "wait_seconds": {name: 0.0 for name in PRIORITY_NAMES.values()},
+            "max_wait_seconds": {name: 0.0 for name in PRIORITY_NAMES.values()},
+            "max_queue_depth": 0, "queue_full": 0, "deadline_expired": 0,
+            "rate_limited": 0, "retries": 0, "tokens_estimated": 0, "tokens_used": 0
+        }
+
+    # =================================================================
+    # Admission
+    # =================================================================
+
+    def _enqueue(self, priority: int, max_depth: int) -> tuple:
+        if self._depth[priority] >= max_depth:
+            self._stats["queue_full"] += 1
+            raise SchedulerRejected(f"{PRIORITY_NAMES[priority]} queue for {self.model} is full")
+        entry = (priority, next(self._sequence))
+        heapq.heappush(self._queue, entry)
+        self._depth[priority] += 1
+        self._stats["max_queue_depth"] = max(self._stats["max_queue_depth"], len(self._queue))
+        return entry
+
+    def _dequeue(self, entry: tuple) -> None:
+        if entry in self._queue:
+            self._queue.remove(entry)
+            heapq.heapify(self._queue)
+            self._depth[entry[0]] -= 1
+        self._lock.notify_all()
+
+    def _try_admit(self, entry: tuple, tokens: int, enqueued_at: float, deadline: float) -> Optional[float]:
+        """
+        Admit the request if it is first in line and the budgets allow.
+
+        Returns:
+            None once admitted, otherwise the seconds to wait before trying again
+        """
+        now = time.monotonic()
+        if self._queue[0] == entry:
+            wait = max(self.paused_until - now,
+                       self.requests.wait_time(1, now),
+                       self.tokens.wait_time(tokens, now))
+            if wait <= 0:
+                self.requests.take(1, now)
+                self.tokens.take(tokens, now)
+                self._record_admission(entry[0], now - enqueued_at, tokens)
+                return None
+        else:
+            wait = 0.1
+        if now >= deadline:
+            self._stats["deadline_expired"] += 1
+            raise SchedulerRejected(
+                f"{PRIORITY_NAMES[entry[0]]} request for {self.model} not admitted "
+                f"within {deadline - enqueued_at:.1f}s"
+            )
+        return min(wait, deadline - now)
+
+    def _record_admission(self, priority: int, waited: float, tokens: int) -> None:
+        name = PRIORITY_NAMES[priority]
+        self._stats["admitted"][name] += 1
+        self._stats["wait_seconds"][name] += waited
+        self._stats["max_wait_seconds"][name] = max(self._stats["max_wait_seconds"][name], waited)
+        self._stats["tokens_estimated"] += tokens
+        if waited > 1:
+            logger.debug(f"{name} request for {self.model} waited {waited:.1f}s for admission")
+
+    def acquire(self, tokens: int, priority: int, deadline: float, max_depth: int) -> None:
+        """Block until the request is admitted; raises SchedulerRejected."""
+        with self._lock:
+            entry = self._enqueue(priority, max_depth)
+            enqueued_at = time.monotonic()
+            try:
+                while True:
+                    wait = self._try_admit(entry, tokens, enqueued_at, deadline)
+                    if wait is None:
+                        return
+                    self._lock.wait(wait)
+            finally:
+                self._dequeue(entry)
+
+    async def aacquire(self, tokens: int, priority: int, deadline: float, max_depth: int) -> None:
+        """Async version of acquire; waits without blocking the event loop."""
+        with self._lock:
+            entry = self._enqueue(priority, max_depth)
+        enqueued_at = time.monotonic()
+        try:
+            while True:
+                with self._lock:
+                    wait = self._try_admit(entry, tokens, enqueued_at, deadline)
+                if wait is None:
+                    return
+                await asyncio.sleep(min(wait, 0.1))
+        finally:
+            with self._lock:
+                self._dequeue(entry)
+
+    # =================================================================
+    # Feedback from the API
+    # =================================================================
+
+    def expected_completion(self, role: str, default: int) -> int:
+        """Completion tokens to reserve for a call of a role: its running average, or the default before any."""
+        with self._lock:
+            average = self._completion_average.get(role)
+        return default if average is None else int(average) + 1
+
+    def record_usage(self, role: str, estimated: int, usage: Optional[Tuple[int, int]]) -> None:
+        """Settle the reservation with the (prompt, completion) tokens a call actually used."""
+        if usage is None:
+            return
+        used = sum(usage)
+        with self._lock:
+            self.tokens.adjust(used - min(estimated, self.tokens.capacity))
+            self._stats["tokens_used"] += used
+            average = self._completion_average.get(role)
+            self._completion_average[role] = usage[1] if average is None else (
+                average + self.COMPLETION_AVERAGE_WEIGHT * (usage[1] - average)
+            )
+
+    def pause(self, seconds: float) -> None:
+        """Hold the whole queue after a 429, not just the request that got it."""
+        with self._lock:
+            self._stats["rate_limited"] += 1
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def count_retry(self) -> None:
+        with self._lock:
+            self._stats["retries"] += 1
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = {key: dict(value) if isinstance(value, dict) else value for key, value in self._stats.items()}
+            stats["queue_depth"] = {PRIORITY_NAMES[priority]: depth for priority, depth in self._depth.items()}
+            stats["paused_for_seconds"] = max(0.0, self.paused_until - time.monotonic())
+            stats["average_completion_tokens"] = dict(self._completion_average)
+        stats["average_wait_seconds"] = {
+            name: stats["wait_seconds"][name] / count if count else 0.0
+            for name, count in stats["admitted"].items()
+        }
+        return stats
+
+
+class LLMScheduler:
+    """
+    Process-wide admission control for LLM calls.
+
+    Limits default to ``LLM_RPM_LIMIT`` requests and ``LLM_TPM_LIMIT`` tokens
+    per minute for each model and can be set per model, e.g.
+    ``LLM_RPM_LIMIT_LLAMA3_70B_8192``. At most ``LLM_QUEUE_MAX_DEPTH`` requests
+    of a priority class wait per model; a request that is not admitted within
+    ``LLM_QUEUE_DEADLINE_<CLASS>`` seconds fails. Failed calls are retried up
+    to ``LLM_MAX_RETRIES`` times.
+    """
+
+    _instance = None
+
+    def __new__(cls):
+        """Ensure singleton instance."""
+        if cls._instance is None:
+            cls._instance = super(LLMScheduler, cls).__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        """Initialize the scheduler settings."""
+        if self._initialized:
+            return
+
+        self.enabled = os.getenv("LLM_SCHEDULER_ENABLED", "true").lower() in ("1", "true", "yes")
+        self.default_rpm = float(os.getenv("LLM_RPM_LIMIT", "30"))
+        self.default_tpm = float(os.getenv("LLM_TPM_LIMIT", "6000"))
+        self.max_depth = max(1, int(os.getenv("LLM_QUEUE_MAX_DEPTH", "50")))
+        self.deadlines = {
+            INTERACTIVE: float(os.getenv("LLM_QUEUE_DEADLINE_INTERACTIVE", "30")),
+            GENERATION: float(os.getenv("LLM_QUEUE_DEADLINE_GENERATION", "90")),
+            BACKGROUND: float(os.getenv("LLM_QUEUE_DEADLINE_BACKGROUND", "600")),
+        }
+        self.max_retries = max(0, int(os.getenv("LLM_MAX_RETRIES", "3")))
+        self.retry_base_delay = float(os.getenv("LLM_RETRY_BASE_DELAY", "1.0"))
+        self.retry_max_delay = float(os.getenv("LLM_RETRY_MAX_DELAY", "30"))
+        # Completion tokens reserved for a role's calls until its usage has been seen
+        self.completion_estimate = int(os.getenv("LLM_COMPLETION_TOKEN_ESTIMATE", "512"))
+
+        self._lanes: Dict[str, ModelLane] = {}
+        self._lanes_lock = threading.Lock()
+        self._initialized = True
+
+    def lane(self, model: str) -> ModelLane:
+        """Get the queue and budgets of a model."""
+        with self._lanes_lock:
+            if model not in self._lanes:
+                key = _env_key(model)
+                rpm = float(os.getenv(f"LLM_RPM_LIMIT_{key}", self.default_rpm))
+                tpm = float(os.getenv(f"LLM_TPM_LIMIT_{key}", self.default_tpm))
+                self._lanes[model] = ModelLane(model, rpm, tpm)
+            return self._lanes[model]
+
+    def deadline(self, priority: int) -> float:
+        """Monotonic time by which a request of this class, queued now, must be admitted."""
+        return time.monotonic() + self.deadlines[priority]
+
+    def acquire(self, model: str, tokens: int, priority: int, deadline: float) -> None:
+        if self.enabled:
+            self.lane(model).acquire(tokens, priority, deadline, self.max_depth)
+
+    async def aacquire(self, model: str, tokens: int, priority: int, deadline: float) -> None:
+        if self.enabled:
+            await self.lane(model).aacquire(tokens, priority, deadline, self.max_depth)
+
+    def retry_delay(self, model: str, error: Exception, attempt: int) -> Optional[float]:
+        """
+        Decide whether a failed call is retried.
+
+        Returns:
+            Seconds to wait before the retry, or None to give up
+        """
+        lane = self.lane(model)
+        retry_after = _retry_after(error)
+        # Full jitter keeps a burst of rejected requests from retrying in lockstep
+        delay = random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * (2 ** attempt)))
+        if retry_after is not None:
+            delay += retry_after
+        if isinstance(error, groq.RateLimitError):
+            lane.pause(delay)
+
+        if attempt >= self.max_retries:
+            logger.warning(f"Giving up on {model} after {attempt + 1} attempt(s): {str(error)}")
+            return None
+        lane.count_retry()
+        logger.info(f"{type(error).__name__} from {model}, retrying in {delay:.1f}s")
+        return delay
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get queue depth, wait time, rate limit and retry counters per model."""
+        with self._lanes_lock:
+            lanes = dict(self._lanes)
+        return {model: lane.get_metrics() for model, lane in lanes.items()}
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Seconds from the Retry-After header of an API error, if there is one."""
+    response = getattr(error, "response", None)
+    try:
+        value = response.headers.get("retry-after") if response is not None else None
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _usage(result: ChatResult) -> Optional[Tuple[int, int]]:
+    """(prompt, completion) tokens reported for a call, if any."""
+    token_usage = (result.llm_output or {}).get("token_usage") or {}
+    if "prompt_tokens" not in token_usage:
+        return None
+    return token_usage["prompt_tokens"], token_usage.get("completion_tokens", 0)
+
+
+def _text(result: ChatResult) -> str:
+    return result.generations[0].text if result.generations else ""
+
+
+def _chunk_usage(chunk: ChatGenerationChunk) -> Optional[Tuple[int, int]]:
+    """(prompt, completion) tokens reported with a streamed chunk; Groq sends them with the last one."""
+    usage = getattr(chunk.message, "usage_metadata", None)
+    return (usage["input_tokens"], usage["output_tokens"]) if usage else None
+
+
+class ScheduledChatGroq(ChatGroq):
+    """ChatGroq whose API calls are admitted by the LLMScheduler."""
+
+    role: Optional[str] = None
+
+    def _priority(self) -> int:
+        priority = current_priority()
+        if priority is not None:
+            return priority
+        return ROLE_PRIORITIES.get((self.role or "").upper(), GENERATION)
+
+    def _estimate_tokens(self, messages: List[BaseMessage]) -> int:
+        """
+        Token cost of a call before it is made: the prompt estimate plus the expected completion.
+
+        Reserving the full max_tokens would let one call take most of a
+        model's per-minute budget and serialize its calls.
+        """
+        scheduler = LLMScheduler()
+        completion = scheduler.lane(self.model_name).expected_completion(
+            (self.role or "").upper(), scheduler.completion_estimate
+        )
+        if self.max_tokens:
+            completion = min(completion, self.max_tokens)
+        return count_message_tokens(messages) + completion
+
+    def _account(self, messages: List[BaseMessage], estimate: int,
+                 usage: Optional[Tuple[int, int]], completion: str) -> None:
+        """Settle the rate limit reservation and count the call's tokens, estimating them without reported usage."""
+        estimated = usage is None
+        if estimated:
+            usage = (count_message_tokens(messages), count_tokens(completion))
+        LLMScheduler().lane(self.model_name).record_usage((self.role or "").upper(), estimate, usage)
+        try:
+            TokenUsageTracker().record(self.role, *usage, estimated=estimated)
+        except Exception as e:
+            logger.warning(f"Could not count the tokens of a {self.model_name} call: {str(e)}")
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        if self.streaming:
+            # Admitted in _stream
+            return super()._generate(messages, stop, run_manager, **kwargs)
+
+        scheduler = LLMScheduler()
+        priority = self._priority()
+        estimate = self._estimate_tokens(messages)
+        attempt = 0
+        while True:
+            scheduler.acquire(self.model_name, estimate, priority, scheduler.deadline(priority))
+            try:
+                result = super()._generate(messages, stop, run_manager, **kwargs)
+            except RETRYABLE_ERRORS as e:
+                delay = scheduler.retry_delay(self.model_name, e, attempt)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                attempt += 1
+                continue
+            self._account(messages, estimate, _usage(result), _text(result))
+            return result
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        if self.streaming:
+            return await super()._agenerate(messages, stop, run_manager, **kwargs)
+
+        scheduler = LLMScheduler()
+        priority = self._priority()
+        estimate = self._estimate_tokens(messages)
+        attempt = 0
+        while True:
+            await scheduler.aacquire(self.model_name, estimate, priority, scheduler.deadline(priority))
+            try:
+                result = await super()._agenerate(messages, stop, run_manager, **kwargs)
+            except RETRYABLE_ERRORS as e:
+                delay = scheduler.retry_delay(self.model_name, e, attempt)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            self._account(messages, estimate, _usage(result), _text(result))
+            return result
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Any = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        scheduler = LLMScheduler()
+        priority = self._priority()
+        estimate = self._estimate_tokens(messages)
+        attempt = 0
+        while True:
+            scheduler.acquire(self.model_name, estimate, priority, scheduler.deadline(priority))
+            used = None
+            started = False
+            completion = []
+            try:
+                for chunk in super()._stream(messages, stop, run_manager, **kwargs):
+                    started = True
+                    used = _chunk_usage(chunk) or used
+                    completion.append(chunk.text)
+                    yield chunk
+            except RETRYABLE_ERRORS as e:
+                # Tokens already shown cannot be taken back, so only retry before the first one
+                delay = None if started else scheduler.retry_delay(self.model_name, e, attempt)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                attempt += 1
+                continue
+            self._account(messages, estimate, used, "".join(completion))
+            return
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Any = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        scheduler = LLMScheduler()
+        priority = self._priority()
+        estimate = self._estimate_tokens(messages)
+        attempt = 0
+        while True:
+            await scheduler.aacquire(self.model_name, estimate, priority, scheduler.deadline(priority))
+            used = None
+            started = False
+            completion = []
+            try:
+                async for chunk in super()._astream(messages, stop, run_manager, **kwargs):
+                    started = True
+                    used = _chunk_usage(chunk) or used
+                    completion.append(chunk.text)
+                    yield chunk
+            except RETRYABLE_ERRORS as e:
+                delay = None if started else scheduler.retry_delay(self.model_name, e, attempt)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            self._account(messages, estimate, used, "".join(completion))
+            return
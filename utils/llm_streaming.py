@@ -0,0 +1,272 @@
+"""
+LLM Streaming helpers for Java Peer Review Training System.
+
+Long completions (code generation, targeted guidance, the comparison report)
+can be streamed token by token to whatever the UI registered for them, so the
+student sees output as soon as the first token arrives instead of a blank
+spinner. The UI registers a StreamListener for a channel with ``stream_to``;
+the LLM call sites use ``stream_llm`` / ``astream_llm``, which stream when a
+listener is registered for their channel and fall back to a plain
+``invoke`` otherwise. Either way the caller receives one complete message,
+so parsing the result is unchanged.
+
+Listeners live in a context variable: they follow the calling code into
+LangGraph nodes and asyncio tasks, but not into unrelated background work
+such as challenge pool refills.
+"""
+
+import os
+import re
+import logging
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps
+from langchain_core.messages import BaseMessage, message_chunk_to_message
+from langchain_core.outputs import ChatGeneration
+
+from utils.async_utils import with_timeout
+from utils.code_utils import _clean_extracted_code
+
+logger = logging.getLogger(__name__)
+
+# Streaming channels
+CODE_GENERATION = "code_generation"
+TARGETED_GUIDANCE = "targeted_guidance"
+COMPARISON_REPORT = "comparison_report"
+
+
+class StreamListener:
+    """Receives the tokens of one streamed completion; override what you need."""
+
+    def start(self) -> None:
+        """Called before the first token."""
+
+    def token(self, text: str) -> None:
+        """Called with each new piece of text."""
+
+    def finish(self, text: str) -> None:
+        """Called with the complete text once the stream ends."""
+
+    def fail(self, error: Exception) -> None:
+        """Called if the stream fails."""
+
+
+_listeners: contextvars.ContextVar[Dict[str, StreamListener]] = contextvars.ContextVar(
+    "llm_stream_listeners", default={}
+)
+
+
+def streaming_enabled() -> bool:
+    """Check the LLM_STREAMING switch."""
+    return os.getenv("LLM_STREAMING", "true").lower() in ("1", "true", "yes")
+
+
+@contextmanager
+def stream_to(channel: str, listener: StreamListener):
+    """Send the completions of a channel made inside the block to a listener."""
+    token = _listeners.set({**_listeners.get(), channel: listener})
+    try:
+        yield listener
+    finally:
+        _listeners.reset(token)
+
+
+def get_stream_listener(channel: str) -> Optional[StreamListener]:
+    """Get the listener registered for a channel, if streaming is on."""
+    if not streaming_enabled():
+        return None
+    return _listeners.get().get(channel)
+
+
+def _notify(listener: StreamListener, method: str, *args: Any) -> None:
+    """Call a listener method; a broken renderer must not break the LLM call."""
+    try:
+        getattr(listener, method)(*args)
+    except Exception as e:
+        logger.debug(f"Stream listener {method} failed: {str(e)}")
+
+
+# =================================================================
+# Response cache
+# =================================================================
+# BaseChatModel.stream() bypasses the model's cache, so streamed calls look
+# responses up and store them the same way invoke() does.
+
+def _cache_entry(llm: Any, prompt: Any) -> Optional[Tuple[BaseCache, str, str]]:
+    """Get the model's cache with the prompt and model keys invoke() would use."""
+    cache = getattr(llm, "cache", None)
+    if not isinstance(cache, BaseCache):
+        return None
+    try:
+        messages = llm._convert_input(prompt).to_messages()
+        return cache, dumps(messages), llm._get_llm_string()
+    except Exception as e:
+        logger.debug(f"Streamed call not cacheable: {str(e)}")
+        return None
+
+
+def _cache_lookup(entry: Optional[Tuple[BaseCache, str, str]]) -> Optional[BaseMessage]:
+    if entry is None:
+        return None
+    cache, prompt_key, llm_string = entry
+    generations = cache.lookup(prompt_key, llm_string)
+    if generations and isinstance(generations[0], ChatGeneration):
+        return generations[0].message
+    return None
+
+
+def _cache_update(entry: Optional[Tuple[BaseCache, str, str]], message: BaseMessage) -> None:
+    if entry is None:
+        return
+    cache, prompt_key, llm_string = entry
+    try:
+        cache.update(prompt_key, llm_string, [ChatGeneration(message=message)])
+    except Exception as e:
+        logger.debug(f"Could not cache streamed response: {str(e)}")
+
+
+# =================================================================
+# Streaming calls
+# =================================================================
+
+def stream_llm(llm: Any, prompt: Any, channel: str) -> Any:
+    """
+    Invoke an LLM, streaming the completion to the channel's listener if there is one.
+
+    Returns:
+        The complete response message, as ``llm.invoke(prompt)`` would
+    """
+    listener = get_stream_listener(channel)
+    if listener is None or not hasattr(llm, "stream"):
+        return llm.invoke(prompt)
+
+    entry = _cache_entry(llm, prompt)
+    _notify(listener, "start")
+    cached = _cache_lookup(entry)
+    if cached is not None:
+        _notify(listener, "token", cached.content)
+        _notify(listener, "finish", cached.content)
+        return cached
+
+    response = None
+    try:
+        for chunk in llm.stream(prompt):
+            response = chunk if response is None else response + chunk
+            if chunk.content:
+                _notify(listener, "token", chunk.content)
+    except Exception as e:
+        _notify(listener, "fail", e)
+        raise
+    return _finish_stream(listener, entry, response)
+
+
+async def astream_llm(llm: Any, prompt: Any, channel: str, timeout: Optional[float], label: str) -> Any:
+    """
+    Async version of stream_llm, cancelling the call after the timeout.
+
+    Returns:
+        The complete response message, as ``llm.ainvoke(prompt)`` would
+    """
+    listener = get_stream_listener(channel)
+    if listener is None or not hasattr(llm, "astream"):
+        return await with_timeout(llm.ainvoke(prompt), timeout, label)
+
+    entry = _cache_entry(llm, prompt)
+    _notify(listener, "start")
+    cached = _cache_lookup(entry)
+    if cached is not None:
+        _notify(listener, "token", cached.content)
+        _notify(listener, "finish", cached.content)
+        return cached
+
+    async def consume():
+        response = None
+        async for chunk in llm.astream(prompt):
+            response = chunk if response is None else response + chunk
+            if chunk.content:
+                _notify(listener, "token", chunk.content)
+        return response
+
+    try:
+        response = await with_timeout(consume(), timeout, label)
+    except Exception as e:
+        _notify(listener, "fail", e)
+        raise
+    return _finish_stream(listener, entry, response)
+
+
+def _finish_stream(listener: StreamListener, entry: Optional[Tuple[BaseCache, str, str]], response: Any) -> Any:
+    """Turn the merged chunks into a complete message, cache it and tell the listener."""
+    if response is None:
+        raise ValueError("LLM stream ended without any output")
+    message = message_chunk_to_message(response)
+    _cache_update(entry, message)
+    _notify(listener, "finish", message.content)
+    return message
+
+
+# =================================================================
+# Incremental code block extraction
+# =================================================================
+
+_ANNOTATED = "java-annotated"
+_CLEAN = "java-clean"
+_FENCE_OPEN = re.compile(r"```(java-annotated|java-clean)[ \t]*\n?", re.IGNORECASE)
+
+
+class JavaFenceExtractor:
+    """
+    Finds the ```java-annotated and ```java-clean blocks of a streamed response.
+
+    ``feed`` returns each block as soon as its closing fence arrives, cleaned
+    the same way extract_both_code_versions cleans it. The final result should
+    still come from extract_both_code_versions on the complete response, which
+    also handles responses without labelled blocks.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.blocks: Dict[str, str] = {}
+        self._position = 0
+
+    def feed(self, chunk: str) -> List[Tuple[str, str]]:
+        """
+        Add streamed text.
+
+        Returns:
+            (label, code) for every block closed by this chunk
+        """
+        self.text += chunk
+        closed = []
+        while True:
+            opening = _FENCE_OPEN.search(self.text, self._position)
+            if opening is None:
+                break
+            end = self.text.find("```", opening.end())
+            if end < 0:
+                break
+            label = opening.group(1).lower()
+            code = _clean_extracted_code(self.text[opening.end():end])
+            self.blocks[label] = code
+            closed.append((label, code))
+            self._position = end + 3
+        return closed
+
+    @property
+    def open_block(self) -> Optional[Tuple[str, str]]:
+        """(label, partial code) of the block still being streamed, if any."""
+        opening = _FENCE_OPEN.search(self.text, self._position)
+        if opening is None:
+            return None
+        return opening.group(1).lower(), self.text[opening.end():]
+
+    @property
+    def annotated_code(self) -> Optional[str]:
+        return self.blocks.get(_ANNOTATED)
+
+    @property
+    def clean_code(self) -> Optional[str]:
+        return self.blocks.get(_CLEAN)
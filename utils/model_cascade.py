@@ -0,0 +1,142 @@
+"""
+Model Cascade for Java Peer Review Training System.
+
+Most code evaluations and review analyses are simple enough for a small, fast
+model. A ModelCascade asks its models in order, smallest first, and only
+escalates to the next one when the answer does not hold up: it is not
+schema-valid JSON, the call failed, or the caller's confidence check rejects
+it (for example an analysis that does not account for every known problem,
+or scores right at the threshold). The last model's answer is always used.
+
+Every routing decision is logged, and counted per prompt so the escalation
+rate can be watched when tuning the latency/cost trade-off; see
+LLMManager.get_routing_metrics().
+"""
+
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+
+from pydantic import BaseModel
+
+from utils.structured_output import invoke_structured, ainvoke_structured
+
+logger = logging.getLogger(__name__)
+
+# Confidence check: None to accept a parsed answer, otherwise the reason to escalate
+ConfidenceCheck = Callable[[BaseModel], Optional[str]]
+
+
+class ModelCascade:
+    """Models of one role, tried smallest first for structured prompts."""
+
+    def __init__(self, role: str, models: List[Tuple[str, Any]]):
+        """
+        Args:
+            role: Model role, e.g. 'REVIEW'
+            models: (model name, chat model) pairs, smallest first
+        """
+        self.role = role
+        self.models = models
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, Any]] = {}
+
+    @property
+    def model_names(self) -> List[str]:
+        return [name for name, _ in self.models]
+
+    def _record(self, prompt_name: str, model_name: str, seconds: float,
+                escalation: Optional[str] = None, answered_at_tier: Optional[int] = None) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(prompt_name, {
+                "calls": 0, "escalated_calls": 0, "answered_by": {}, "escalations": {},
+                "attempts": {}, "seconds": {}
+            })
+            stats["attempts"][model_name] = stats["attempts"].get(model_name, 0) + 1
+            stats["seconds"][model_name] = stats["seconds"].get(model_name, 0.0) + seconds
+            if escalation is not None:
+                stats["escalations"][escalation] = stats["escalations"].get(escalation, 0) + 1
+            if answered_at_tier is not None:
+                stats["calls"] += 1
+                stats["answered_by"][model_name] = stats["answered_by"].get(model_name, 0) + 1
+                if answered_at_tier > 0:
+                    stats["escalated_calls"] += 1
+
+    def _decide(self, prompt_name: str, tier: int, model_name: str, started: float,
+                parsed: Optional[BaseModel], check: Optional[ConfidenceCheck]) -> bool:
+        """Log and count one model's answer; True to use it, False to escalate."""
+        seconds = time.monotonic() - started
+        last = tier == len(self.models) - 1
+        if parsed is None:
+            reason = "invalid"
+        else:
+            reason = check(parsed) if check else None
+
+        if reason is None or last:
+            self._record(prompt_name, model_name, seconds, answered_at_tier=tier)
+            logger.info(f"Routing {prompt_name}: answered by {model_name} (tier {tier + 1}/{len(self.models)}) "
+                        f"in {seconds:.1f}s" + (f" despite {reason}" if reason else ""))
+            return True
+
+        self._record(prompt_name, model_name, seconds, escalation=reason)
+        logger.info(f"Routing {prompt_name}: escalating from {model_name} after {seconds:.1f}s ({reason})")
+        return False
+
+    def invoke_structured(self, prompt: Any, schema: Type[BaseModel], name: str,
+                          check: Optional[ConfidenceCheck] = None) -> Tuple[Optional[BaseModel], Any]:
+        """
+        invoke_structured over the cascade.
+
+        Returns:
+            (parsed object or None, response message) of the model whose answer was used
+        """
+        for tier, (model_name, llm) in enumerate(self.models):
+            started = time.monotonic()
+            try:
+                parsed, response = invoke_structured(llm, prompt, schema, name)
+            except Exception as e:
+                if tier == len(self.models) - 1:
+                    raise
+                self._record(name, model_name, time.monotonic() - started, escalation="error")
+                logger.info(f"Routing {name}: escalating from {model_name} after error: {str(e)}")
+                continue
+            if self._decide(name, tier, model_name, started, parsed, check):
+                return parsed, response
+
+    async def ainvoke_structured(self, prompt: Any, schema: Type[BaseModel], name: str,
+                                 timeout: Optional[float], label: str,
+                                 check: Optional[ConfidenceCheck] = None) -> Tuple[Optional[BaseModel], Any]:
+        """Async version of invoke_structured, with the per-call timeout for each model."""
+        for tier, (model_name, llm) in enumerate(self.models):
+            started = time.monotonic()
+            try:
+                parsed, response = await ainvoke_structured(llm, prompt, schema, name, timeout, label)
+            except Exception as e:
+                if tier == len(self.models) - 1:
+                    raise
+                self._record(name, model_name, time.monotonic() - started, escalation="error")
+                logger.info(f"Routing {name}: escalating from {model_name} after error: {str(e)}")
+                continue
+            if self._decide(name, tier, model_name, started, parsed, check):
+                return parsed, response
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Get routing counters per prompt.
+
+        Returns:
+            Dict with the role, its models, and per prompt: calls, answers per
+            model, escalations per reason, escalation_rate (share of calls not
+            answered by the first model) and average seconds per model call
+        """
+        with self._lock:
+            metrics = {
+                name: {key: dict(value) if isinstance(value, dict) else value for key, value in stats.items()}
+                for name, stats in self._stats.items()
+            }
+        for stats in metrics.values():
+            stats["escalation_rate"] = stats["escalated_calls"] / stats["calls"] if stats["calls"] else 0.0
+            seconds = stats.pop("seconds")
+            stats["average_seconds"] = {model: seconds[model] / count for model, count in stats["attempts"].items()}
+        return {"role": self.role, "models": self.model_names, "prompts": metrics}
@@ -0,0 +1,181 @@
+"""
+Structured LLM Output for Java Peer Review Training System.
+
+The evaluation, review analysis and comparison report prompts ask for a JSON
+object. These helpers call the model in JSON mode (``with_structured_output``
+with ``method="json_mode"``), so Groq only returns syntactically valid JSON,
+and validate it against a Pydantic schema (see core/output_schemas.py).
+
+The callers keep their regex extraction as a fallback for when this fails:
+the provider rejected the request in JSON mode (a 400, e.g. a model without
+``response_format`` support or output that failed Groq's JSON validation),
+or the JSON does not match the schema. Any other error, such as a timeout,
+rate limit or server error, is raised as it would be in plain text. Every
+fallback is counted per prompt, see get_structured_output_metrics().
+A streamed comparison report is not sent in JSON mode; its text is validated
+against the schema once the stream ends.
+"""
+
+import os
+import re
+import logging
+import threading
+from typing import Any, Dict, Optional, Tuple, Type
+
+from groq import BadRequestError
+from pydantic import BaseModel, ValidationError
+
+from utils.async_utils import with_timeout
+from utils.llm_streaming import get_stream_listener, stream_llm, astream_llm
+
+logger = logging.getLogger(__name__)
+
+_FENCED_JSON = re.compile(r"^```(?:json)?\s*(.*?)\s*```$", re.DOTALL | re.IGNORECASE)
+
+_stats_lock = threading.Lock()
+_stats: Dict[str, Dict[str, int]] = {}
+
+
+def structured_output_enabled() -> bool:
+    """Check the LLM_STRUCTURED_OUTPUT switch."""
+    return os.getenv("LLM_STRUCTURED_OUTPUT", "true").lower() in ("1", "true", "yes")
+
+
+def _count(name: str, outcome: str) -> None:
+    with _stats_lock:
+        stats = _stats.setdefault(name, {"structured": 0, "invalid": 0, "rejected": 0, "disabled": 0})
+        stats[outcome] += 1
+
+
+def get_structured_output_metrics() -> Dict[str, Dict[str, Any]]:
+    """
+    Get how often each prompt's structured output was used or fell back to regex extraction.
+
+    Returns:
+        Dict of prompt name -> counters: ``structured`` (schema-valid JSON),
+        ``invalid`` (JSON did not match the schema), ``rejected`` (the
+        provider refused the request in JSON mode), ``disabled`` (switched off or not supported by
+        the model), plus ``fallbacks`` and ``fallback_rate``
+    """
+    with _stats_lock:
+        metrics = {name: dict(stats) for name, stats in _stats.items()}
+    for stats in metrics.values():
+        stats["fallbacks"] = stats["invalid"] + stats["rejected"] + stats["disabled"]
+        calls = stats["structured"] + stats["fallbacks"]
+        stats["fallback_rate"] = stats["fallbacks"] / calls if calls else 0.0
+    return metrics
+
+
+def _structured_llm(llm: Any, schema: Type[BaseModel]) -> Optional[Any]:
+    """The model bound to JSON mode and the schema, or None if it cannot be."""
+    if not structured_output_enabled() or not hasattr(llm, "with_structured_output"):
+        return None
+    try:
+        return llm.with_structured_output(schema, method="json_mode", include_raw=True)
+    except Exception as e:
+        logger.debug(f"Structured output not supported by this model: {str(e)}")
+        return None
+
+
+def _unpack(result: Dict[str, Any], name: str) -> Tuple[Optional[BaseModel], Any]:
+    """Split the include_raw result of a structured call."""
+    if result.get("parsed") is not None:
+        _count(name, "structured")
+        return result["parsed"], result["raw"]
+    _count(name, "invalid")
+    logger.warning(f"{name} response did not match its schema, falling back to text extraction: "
+                   f"{result.get('parsing_error')}")
+    return None, result.get("raw")
+
+
+def invoke_structured(llm: Any, prompt: Any, schema: Type[BaseModel], name: str) -> Tuple[Optional[BaseModel], Any]:
+    """
+    Invoke an LLM in JSON mode and validate its answer against a schema.
+
+    Args:
+        llm: Chat model
+        prompt: Prompt that asks for a JSON object
+        schema: Pydantic schema of that object
+        name: Prompt name the outcome is counted under
+
+    Returns:
+        (parsed object or None, response message); with None the caller
+        extracts the result from the response text
+    """
+    structured = _structured_llm(llm, schema)
+    if structured is None:
+        _count(name, "disabled")
+        return None, llm.invoke(prompt)
+
+    try:
+        return _unpack(structured.invoke(prompt), name)
+    except BadRequestError as e:
+        _count(name, "rejected")
+        logger.warning(f"{name} was refused in JSON mode, retrying as plain text: {str(e)}")
+        return None, llm.invoke(prompt)
+
+
+async def ainvoke_structured(llm: Any, prompt: Any, schema: Type[BaseModel], name: str,
+                             timeout: Optional[float], label: str) -> Tuple[Optional[BaseModel], Any]:
+    """Async version of invoke_structured, cancelling each call after the timeout."""
+    structured = _structured_llm(llm, schema)
+    if structured is None:
+        _count(name, "disabled")
+        return None, await with_timeout(llm.ainvoke(prompt), timeout, label)
+
+    try:
+        return _unpack(await with_timeout(structured.ainvoke(prompt), timeout, label), name)
+    except BadRequestError as e:
+        _count(name, "rejected")
+        logger.warning(f"{name} was refused in JSON mode, retrying as plain text: {str(e)}")
+        return None, await with_timeout(llm.ainvoke(prompt), timeout, label)
+
+
+def parse_structured(response: Any, schema: Type[BaseModel], name: str) -> Optional[BaseModel]:
+    """
+    Validate a plain-text response against a schema.
+
+    Returns:
+        The parsed object, or None if the text is not a JSON object matching the schema
+    """
+    text = getattr(response, "content", response)
+    if not isinstance(text, str):
+        _count(name, "invalid")
+        return None
+
+    text = text.strip()
+    fenced = _FENCED_JSON.match(text)
+    if fenced:
+        text = fenced.group(1)
+    try:
+        parsed = schema.model_validate_json(text)
+    except ValidationError as e:
+        _count(name, "invalid")
+        logger.warning(f"{name} response did not match its schema, falling back to text extraction: "
+                       f"{e.error_count()} error(s)")
+        return None
+    _count(name, "structured")
+    return parsed
+
+
+def stream_structured(llm: Any, prompt: Any, schema: Type[BaseModel], name: str,
+                      channel: str) -> Tuple[Optional[BaseModel], Any]:
+    """
+    Stream a JSON answer to the channel's listener if there is one, else invoke in JSON mode.
+
+    Returns:
+        (parsed object or None, response message), as invoke_structured
+    """
+    if get_stream_listener(channel) is None:
+        return invoke_structured(llm, prompt, schema, name)
+    response = stream_llm(llm, prompt, channel)
+    return parse_structured(response, schema, name), response
+
+
+async def astream_structured(llm: Any, prompt: Any, schema: Type[BaseModel], name: str, channel: str,
+                             timeout: Optional[float], label: str) -> Tuple[Optional[BaseModel], Any]:
+    """Async version of stream_structured, cancelling each call after the timeout."""
+    if get_stream_listener(channel) is None:
+        return await ainvoke_structured(llm, prompt, schema, name, timeout, label)
+    response = await astream_llm(llm, prompt, channel, timeout, label)
+    return parse_structured(response, schema, name), response
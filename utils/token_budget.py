@@ -0,0 +1,212 @@
+"""
+Token Budgets for Java Peer Review Training System.
+
+Latency grows with the number of tokens sent and generated, so each model
+role has a prompt budget and a completion budget:
+
+- ``LLM_PROMPT_TOKEN_BUDGET_<ROLE>`` caps the prompts built for the role.
+  The builders of the big prompts (review analysis, feedback, comparison
+  report) fit their inputs into it with fit_prompt(): first by dropping
+  blank lines and trailing whitespace, then by cutting the middle out of
+  the least important inputs.
+- ``LLM_COMPLETION_TOKEN_BUDGET_<ROLE>`` is passed to the model as
+  ``max_tokens``.
+
+Groq reports the tokens each call used; count_tokens() is the local
+estimate used before a call and when a response carries no usage.
+"""
+
+import os
+import re
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Defaults per model role; the generative role writes two versions of the code
+DEFAULT_PROMPT_BUDGETS = {"GENERATIVE": 3000, "REVIEW": 4000, "SUMMARY": 3000}
+DEFAULT_COMPLETION_BUDGETS = {"GENERATIVE": 4096, "REVIEW": 2048, "SUMMARY": 1024}
+DEFAULT_PROMPT_BUDGET = 3000
+DEFAULT_COMPLETION_BUDGET = 1024
+
+# Tokens added per chat message for the role and separators
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# Inputs are never cut below this many tokens
+MIN_INPUT_TOKENS = 64
+
+# CJK characters, letter runs, digit groups (Llama 3 splits numbers into up
+# to three digits), punctuation runs and line breaks
+_TOKEN_PATTERN = re.compile(
+    r"(?P<cjk>[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff\uff00-\uffef])"
+    r"|(?P<word>[^\W\d_]+)"
+    r"|(?P<number>\d{1,3})"
+    r"|(?P<newline>\n\s*)"
+    r"|(?P<punct>[^\w\s]+|_+)"
+)
+_NUMBERED_BLANK_LINE = re.compile(r"^\s*\d+ \|\s*$")
+
+_stats_lock = threading.Lock()
+_stats: Dict[str, Dict[str, int]] = {}
+
+
+def count_tokens(text: Any) -> int:
+    """
+    Estimate the tokens of a text locally.
+
+    Words cost about one token per five letters, CJK characters one token
+    each and punctuation one token per two characters. Close enough to the
+    Llama 3 tokenizer to enforce budgets; real usage comes from the API.
+    """
+    if not text:
+        return 0
+    if not isinstance(text, str):
+        text = str(text)
+    tokens = 0
+    for match in _TOKEN_PATTERN.finditer(text):
+        kind = match.lastgroup
+        if kind == "word":
+            tokens += (len(match.group()) + 4) // 5
+        elif kind == "punct":
+            tokens += (len(match.group()) + 1) // 2
+        else:
+            tokens += 1
+    return tokens
+
+
+def count_message_tokens(messages: Iterable[Any]) -> int:
+    """Estimate the prompt tokens of a list of chat messages."""
+    return sum(count_tokens(getattr(message, "content", message)) + MESSAGE_OVERHEAD_TOKENS
+               for message in messages)
+
+
+def _budget(variable: str, role: Optional[str], defaults: Dict[str, int], default: int) -> int:
+    role = (role or "").upper()
+    value = os.getenv(f"{variable}_{role}") if role else None
+    if value is None:
+        value = os.getenv(variable)
+    try:
+        return int(value) if value is not None else defaults.get(role, default)
+    except ValueError:
+        logger.warning(f"Invalid {variable} value {value!r}, using the default")
+        return defaults.get(role, default)
+
+
+def prompt_budget(role: Optional[str]) -> int:
+    """Prompt token budget of a model role; 0 or less means unlimited."""
+    return _budget("LLM_PROMPT_TOKEN_BUDGET", role, DEFAULT_PROMPT_BUDGETS, DEFAULT_PROMPT_BUDGET)
+
+
+def completion_budget(role: Optional[str]) -> int:
+    """Completion token budget (max_tokens) of a model role."""
+    return _budget("LLM_COMPLETION_TOKEN_BUDGET", role, DEFAULT_COMPLETION_BUDGETS, DEFAULT_COMPLETION_BUDGET)
+
+
+def compact_text(text: str) -> str:
+    """Drop blank lines, also numbered ones from add_line_numbers, and trailing whitespace."""
+    return "\n".join(line.rstrip() for line in text.splitlines()
+                     if line.strip() and not _NUMBERED_BLANK_LINE.match(line))
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """
+    Cut a text down to about max_tokens by removing its middle.
+
+    Multi-line text loses whole lines and says how many; the beginning keeps
+    two thirds of the budget, the end the rest.
+    """
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    lines = text.splitlines()
+    if len(lines) < 3:
+        keep = max(1, len(text) * max_tokens // max(1, count_tokens(text)))
+        return text[:keep].rstrip() + " ..."
+
+    head, tail = [], []
+    max_tokens -= count_tokens(f"... [{len(lines)} lines omitted] ...")
+    head_budget = max_tokens * 2 // 3
+    used = 0
+    for line in lines:
+        cost = count_tokens(line) + 1
+        if used + cost > head_budget:
+            break
+        head.append(line)
+        used += cost
+    for line in reversed(lines[len(head):]):
+        cost = count_tokens(line) + 1
+        if used + cost > max_tokens:
+            break
+        tail.insert(0, line)
+        used += cost
+    omitted = len(lines) - len(head) - len(tail)
+    return "\n".join(head + [f"... [{omitted} lines omitted] ..."] + tail)
+
+
+def fit_prompt(render: Callable[[Dict[str, Any]], str], values: Dict[str, Any],
+               shrinkable: Sequence[str], budget: int, name: str) -> str:
+    """
+    Render a prompt whose inputs are compacted until it fits a token budget.
+
+    Args:
+        render: Builds the prompt from the input values
+        values: Input values
+        shrinkable: Text inputs that may be compacted, least important first
+        budget: Prompt token budget; 0 or less renders the prompt unchanged
+        name: Prompt name the compactions are counted under
+
+    Returns:
+        The prompt; it can still exceed the budget when the fixed parts do
+    """
+    prompt = render(values)
+    if budget <= 0 or not prompt:
+        return prompt
+    original = count_tokens(prompt)
+    if original <= budget:
+        return prompt
+
+    values = dict(values)
+    for key in shrinkable:
+        if isinstance(values.get(key), str):
+            values[key] = compact_text(values[key])
+    prompt = render(values)
+    tokens = count_tokens(prompt)
+
+    truncated = False
+    for key in shrinkable:
+        if tokens <= budget:
+            break
+        if not isinstance(values.get(key), str):
+            continue
+        input_tokens = count_tokens(values[key])
+        target = max(MIN_INPUT_TOKENS, input_tokens - (tokens - budget))
+        if target >= input_tokens:
+            continue
+        values[key] = truncate_tokens(values[key], target)
+        truncated = True
+        prompt = render(values)
+        tokens = count_tokens(prompt)
+
+    with _stats_lock:
+        stats = _stats.setdefault(name, {"compacted": 0, "truncated": 0, "over_budget": 0, "tokens_saved": 0})
+        stats["compacted"] += 1
+        stats["truncated"] += int(truncated)
+        stats["over_budget"] += int(tokens > budget)
+        stats["tokens_saved"] += original - tokens
+    logger.info(f"Compacted {name} prompt from ~{original} to ~{tokens} tokens (budget {budget})"
+                + (", inputs truncated" if truncated else ""))
+    return prompt
+
+
+def get_prompt_budget_metrics() -> Dict[str, Dict[str, int]]:
+    """
+    Get how often each prompt had to be fitted into its budget.
+
+    Returns:
+        Dict of prompt name -> ``compacted`` (prompts over budget),
+        ``truncated`` (inputs had to be cut), ``over_budget`` (still over
+        after compaction) and ``tokens_saved``
+    """
+    with _stats_lock:
+        return {name: dict(stats) for name, stats in _stats.items()}
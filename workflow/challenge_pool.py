@@ -0,0 +1,397 @@
+# workflow/challenge_pool.py
+"""
+Challenge Pool module for Java Peer Review Training System.
+
+This module keeps a pool of pre-generated, already-evaluated code challenges
+so a "Generate" click can be answered without running the generate ->
+evaluate -> regenerate loop while the student waits. Challenges are pooled
+per request (code length, difficulty, error count range, selected categories
+or specific errors, domain and language), stored in SQLite so they survive a
+restart, and topped up to a target depth by background refill workers.
+Refills run without a Streamlit session, in the language of the request
+that triggered them.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, Callable
+
+from state_schema import WorkflowState, CodeSnippet
+from utils.language_utils import t, get_current_language, use_language
+from utils.llm_scheduler import llm_priority, BACKGROUND
+from analytics.token_usage import llm_user, SYSTEM_USER
+
+logger = logging.getLogger(__name__)
+
+
+class ChallengePool:
+    """
+    Process-wide pool of validated code challenges.
+
+    Only challenges whose evaluation found every requested error are pooled.
+    A challenge is evicted once it has been served ``CHALLENGE_POOL_MAX_SERVES``
+    times or is older than ``CHALLENGE_POOL_MAX_AGE`` seconds. Every request
+    for a key, hit or miss, schedules a refill of that key up to
+    ``CHALLENGE_POOL_DEPTH`` challenges on ``CHALLENGE_POOL_WORKERS`` threads.
+    Requests with an explicit error selection seed are never pooled, since
+    they ask for one reproducible selection. The keys requested by earlier
+    runs are only topped up at startup if ``CHALLENGE_POOL_REFILL_ON_START``
+    is set, since that spends tokens before anyone asks for a challenge.
+    """
+
+    _instance = None
+
+    def __new__(cls):
+        """Ensure singleton instance."""
+        if cls._instance is None:
+            cls._instance = super(ChallengePool, cls).__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        """Initialize the pool settings and open the store."""
+        if self._initialized:
+            return
+
+        self.enabled = os.getenv("CHALLENGE_POOL_ENABLED", "true").lower() in ("1", "true", "yes")
+        self.depth = max(0, int(os.getenv("CHALLENGE_POOL_DEPTH", "2")))
+        self.max_age = float(os.getenv("CHALLENGE_POOL_MAX_AGE", "604800"))
+        self.max_serves = max(1, int(os.getenv("CHALLENGE_POOL_MAX_SERVES", "1")))
+        self.worker_count = max(1, int(os.getenv("CHALLENGE_POOL_WORKERS", "2")))
+        self.path = os.getenv("CHALLENGE_POOL_PATH", "llm_cache/challenge_pool.sqlite")
+        self.refill_on_start = os.getenv("CHALLENGE_POOL_REFILL_ON_START", "false").lower() in ("1", "true", "yes")
+
+        self._generator: Optional[Callable[[WorkflowState], WorkflowState]] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, int] = {}
+        self._stats = {"hits": 0, "misses": 0, "generated": 0, "rejected": 0, "failed": 0}
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+
+        if self.enabled:
+            self._open_store()
+        self._initialized = True
+
+    def _open_store(self) -> None:
+        """Open the SQLite store, falling back to an in-memory database."""
+        try:
+            if self.path:
+                Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+                connection = sqlite3.connect(self.path, check_same_thread=False, timeout=5.0)
+                connection.execute("PRAGMA journal_mode=WAL")
+            else:
+                connection = sqlite3.connect(":memory:", check_same_thread=False)
+        except Exception as e:
+            logger.warning(f"Challenge pool store unavailable, keeping challenges in memory: {str(e)}")
+            connection = sqlite3.connect(":memory:", check_same_thread=False)
+
+        try:
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS challenges (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    pool_key TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    served_count INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            connection.execute("CREATE INDEX IF NOT EXISTS idx_challenges_key ON challenges (pool_key, served_count, created_at)")
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS pool_requests (
+                    pool_key TEXT PRIMARY KEY,
+                    params TEXT NOT NULL,
+                    language TEXT NOT NULL DEFAULT '',
+                    last_requested_at REAL NOT NULL
+                )
+            """)
+            columns = [row[1] for row in connection.execute("PRAGMA table_info(pool_requests)")]
+            if "language" not in columns:
+                connection.execute("ALTER TABLE pool_requests ADD COLUMN language TEXT NOT NULL DEFAULT ''")
+            connection.commit()
+            self._db = connection
+            self._evict_expired()
+        except Exception as e:
+            logger.error(f"Could not initialize challenge pool store: {str(e)}")
+            self.enabled = False
+
+    # =================================================================
+    # Keys
+    # =================================================================
+
+    @staticmethod
+    def _request_params(state: WorkflowState) -> Optional[Dict[str, Any]]:
+        """Get the parameters that decide which challenges fit a request."""
+        if getattr(state, "error_selection_seed", None) is not None:
+            return None
+
+        specific_errors = getattr(state, "selected_specific_errors", None) or []
+        categories = (getattr(state, "selected_error_categories", None) or {}).get("java_errors", [])
+        if not specific_errors and not categories:
+            return None
+
+        params = {
+            "code_length": getattr(state, "code_length", "medium"),
+            "difficulty_level": getattr(state, "difficulty_level", "medium"),
+            "domain": getattr(state, "domain", None) or None,
+            "max_evaluation_attempts": int(getattr(state, "max_evaluation_attempts", 3)),
+        }
+        if specific_errors:
+            params["selected_specific_errors"] = sorted(
+                specific_errors, key=lambda error: json.dumps(error, sort_keys=True, default=str)
+            )
+        else:
+            params["selected_error_categories"] = {"java_errors": sorted(categories)}
+            params["error_count_start"] = int(getattr(state, "error_count_start", 1))
+            params["error_count_end"] = int(getattr(state, "error_count_end", 2))
+        return params
+
+    @staticmethod
+    def _key(params: Dict[str, Any], language: str) -> str:
+        """Hash the request parameters and language into a pool key."""
+        raw = json.dumps({"params": params, "language": language}, sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    # =================================================================
+    # Serving
+    # =================================================================
+
+    def attach(self, generator: Callable[[WorkflowState], WorkflowState]) -> None:
+        """
+        Set the function that runs live code generation for refills.
+
+        With ``CHALLENGE_POOL_REFILL_ON_START``, the first attach also tops up
+        the keys persisted by earlier runs.
+
+        Args:
+            generator: Takes a fresh WorkflowState and returns the generated state
+        """
+        first_attach = self._generator is None
+        self._generator = generator
+        if first_attach and self.refill_on_start:
+            self.refill_known()
+
+    def take(self, state: WorkflowState) -> Optional[Dict[str, Any]]:
+        """
+        Take a pooled challenge that fits the request in the state.
+
+        Schedules a refill of the request's key either way.
+
+        Returns:
+            Challenge payload for apply(), or None on a miss
+        """
+        if not self.enabled or self._db is None:
+            return None
+
+        params = self._request_params(state)
+        if params is None:
+            return None
+
+        language = get_current_language()
+        key = self._key(params, language)
+        payload = None
+        try:
+            with self._db_lock:
+                now = time.time()
+                self._db.execute(
+                    "REPLACE INTO pool_requests (pool_key, params, language, last_requested_at) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(params, default=str), language, now)
+                )
+                row = self._db.execute(
+                    "SELECT id, payload FROM challenges WHERE pool_key = ? AND created_at > ? "
+                    "ORDER BY served_count, created_at LIMIT 1",
+                    (key, now - self.max_age)
+                ).fetchone()
+                if row is not None:
+                    self._db.execute("UPDATE challenges SET served_count = served_count + 1 WHERE id = ?", (row[0],))
+                    self._db.execute("DELETE FROM challenges WHERE id = ? AND served_count >= ?",
+                                     (row[0], self.max_serves))
+                    payload = json.loads(row[1])
+                self._db.commit()
+        except Exception as e:
+            logger.warning(f"Challenge pool lookup failed: {str(e)}")
+
+        with self._lock:
+            self._stats["hits" if payload is not None else "misses"] += 1
+
+        self.schedule_refill(key, params, language)
+        return payload
+
+    @staticmethod
+    def apply(state: WorkflowState, payload: Dict[str, Any]) -> WorkflowState:
+        """Copy a pooled challenge into the state, as live generation would leave it."""
+        state.code_snippet = CodeSnippet(**payload["code_snippet"])
+        state.evaluation_result = payload.get("evaluation_result")
+        state.original_error_count = payload.get("original_error_count", 0)
+        state.evaluation_attempts = payload.get("evaluation_attempts", 1)
+        state.code_generation_feedback = None
+        state.domain = payload.get("domain") or state.domain
+        state.current_step = payload.get("current_step", "evaluate")
+        return state
+
+    # =================================================================
+    # Refilling
+    # =================================================================
+
+    def _available(self, key: str) -> int:
+        """Count the fresh challenges pooled for a key."""
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT COUNT(*) FROM challenges WHERE pool_key = ? AND created_at > ?",
+                (key, time.time() - self.max_age)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def schedule_refill(self, key: str, params: Dict[str, Any], language: str) -> int:
+        """
+        Queue background generations until the key is at the target depth.
+
+        Args:
+            key: Pool key of the request
+            params: Request parameters the key was made from
+            language: Language the challenges are generated in
+
+        Returns:
+            Number of generations queued
+        """
+        if not self.enabled or self._db is None or self._generator is None or self.depth == 0:
+            return 0
+
+        try:
+            available = self._available(key)
+        except Exception as e:
+            logger.warning(f"Challenge pool count failed: {str(e)}")
+            return 0
+
+        with self._lock:
+            needed = self.depth - available - self._in_flight.get(key, 0)
+            if needed <= 0:
+                return 0
+            self._in_flight[key] = self._in_flight.get(key, 0) + needed
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.worker_count, thread_name_prefix="challenge-refill"
+                )
+            executor = self._executor
+
+        for _ in range(needed):
+            executor.submit(self._refill_one, key, params, language)
+        logger.debug(f"Scheduled {needed} challenge refill(s) for pool key {key[:12]}")
+        return needed
+
+    def refill_known(self) -> int:
+        """Top up every key requested within the maximum age, e.g. after a restart."""
+        if not self.enabled or self._db is None:
+            return 0
+        try:
+            with self._db_lock:
+                # Requests recorded before the language was stored cannot be refilled
+                rows = self._db.execute(
+                    "SELECT pool_key, params, language FROM pool_requests "
+                    "WHERE last_requested_at > ? AND language != ''",
+                    (time.time() - self.max_age,)
+                ).fetchall()
+        except Exception as e:
+            logger.warning(f"Could not read pooled requests: {str(e)}")
+            return 0
+        return sum(self.schedule_refill(key, json.loads(params), language) for key, params, language in rows)
+
+    def _refill_one(self, key: str, params: Dict[str, Any], language: str) -> None:
+        """Generate one challenge for a key on a refill worker."""
+        try:
+            state = WorkflowState(**params)
+            # Refills only get the rate limit budget that live requests leave over,
+            # and their tokens are not charged to the user who triggered them
+            with use_language(language), llm_priority(BACKGROUND), llm_user(SYSTEM_USER):
+                result = self._generator(state)
+                valid = self._is_valid(result)
+
+            if not valid:
+                with self._lock:
+                    self._stats["rejected"] += 1
+                logger.debug(f"Discarded unvalidated challenge for pool key {key[:12]}")
+                return
+
+            payload = {
+                "code_snippet": result.code_snippet.dict(),
+                "evaluation_result": result.evaluation_result,
+                "original_error_count": result.original_error_count,
+                "evaluation_attempts": result.evaluation_attempts,
+                "domain": result.domain,
+                "current_step": result.current_step,
+            }
+            with self._db_lock:
+                self._db.execute(
+                    "INSERT INTO challenges (pool_key, payload, created_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(payload, default=str), time.time())
+                )
+                self._db.commit()
+            with self._lock:
+                self._stats["generated"] += 1
+        except Exception as e:
+            with self._lock:
+                self._stats["failed"] += 1
+            logger.error(f"Challenge refill failed: {str(e)}")
+        finally:
+            with self._lock:
+                remaining = self._in_flight.get(key, 1) - 1
+                if remaining > 0:
+                    self._in_flight[key] = remaining
+                else:
+                    self._in_flight.pop(key, None)
+
+    @staticmethod
+    def _is_valid(state: WorkflowState) -> bool:
+        """Check that a generation finished cleanly with every requested error found."""
+        if getattr(state, "error", None) or getattr(state, "code_snippet", None) is None:
+            return False
+        evaluation_result = getattr(state, "evaluation_result", None)
+        if not evaluation_result:
+            return False
+        return bool(evaluation_result.get(t("valid"), False)) and not evaluation_result.get(t("missing_errors"))
+
+    # =================================================================
+    # Maintenance
+    # =================================================================
+
+    def _evict_expired(self) -> int:
+        """Drop challenges and request records older than the maximum age."""
+        cutoff = time.time() - self.max_age
+        with self._db_lock:
+            deleted = self._db.execute("DELETE FROM challenges WHERE created_at <= ?", (cutoff,)).rowcount
+            self._db.execute("DELETE FROM pool_requests WHERE last_requested_at <= ?", (cutoff,))
+            self._db.commit()
+        if deleted:
+            logger.debug(f"Evicted {deleted} expired challenge(s)")
+        return deleted
+
+    def clear(self) -> None:
+        """Remove every pooled challenge."""
+        if self._db is None:
+            return
+        with self._db_lock:
+            self._db.execute("DELETE FROM challenges")
+            self._db.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss and refill counters and the pool size."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = sum(self._in_flight.values())
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["enabled"] = self.enabled
+        if self._db is not None:
+            try:
+                with self._db_lock:
+                    stats["pooled"] = self._db.execute("SELECT COUNT(*) FROM challenges").fetchone()[0]
+            except Exception as e:
+                logger.warning(f"Could not count pooled challenges: {str(e)}")
+        return stats
@@ -20,9 +20,13 @@ from core.code_evaluation import CodeEvaluationAgent
 from workflow.node import WorkflowNodes
 from workflow.conditions import WorkflowConditions
 from workflow.builder import GraphBuilder
+from workflow.challenge_pool import ChallengePool
 
 from utils.llm_logger import LLMInteractionLogger
-from utils.language_utils import t
+from utils.language_utils import t, get_current_language, use_language
+from utils.async_utils import run_coroutine
+from utils.llm_scheduler import llm_priority, GENERATION, INTERACTIVE
+from analytics.token_usage import llm_user, current_user
 import streamlit as st
 
 # Configure logging
@@ -45,8 +49,9 @@ class WorkflowManager:
         self.llm_manager = llm_manager
         self.llm_logger = LLMInteractionLogger()
         
-        # Initialize repositories
+        # Initialize repositories; the schema check runs once per process
         self.error_repository = DatabaseErrorRepository()
+        self.error_repository.verify_database_setup()
         
         # Initialize domain objects
         self._initialize_domain_objects()
@@ -63,6 +68,10 @@ class WorkflowManager:
         # Compiled workflows
         self._compiled_code_workflow = None
         self._compiled_review_workflow = None
+
+        # Pre-generated challenges, refilled in the background with live generation
+        self.challenge_pool = ChallengePool()
+        self.challenge_pool.attach(self._run_code_generation_graph)
         
         logger.debug("WorkflowManager initialized with separate workflows")
     
@@ -75,10 +84,13 @@ class WorkflowManager:
         review_model = self._initialize_model_for_role("REVIEW")
         summary_model = self._initialize_model_for_role("SUMMARY")
         
+        # Code and review evaluation try a small model first and escalate to the review model
+        review_cascade = self.llm_manager.initialize_cascade_from_env("REVIEW", review_model)
+        
         # Initialize domain objects with models
         self.code_generator = CodeGenerator(generative_model, self.llm_logger)
-        self.code_evaluation = CodeEvaluationAgent(review_model, self.llm_logger)
-        self.evaluator = StudentResponseEvaluator(review_model, llm_logger=self.llm_logger)
+        self.code_evaluation = CodeEvaluationAgent(review_model, self.llm_logger, cascade=review_cascade)
+        self.evaluator = StudentResponseEvaluator(review_model, llm_logger=self.llm_logger, cascade=review_cascade)
         
         # Store feedback models for generating final feedback
         self.summary_model = summary_model
@@ -151,22 +163,15 @@ class WorkflowManager:
                 workflow_state.error = error_msg
                 return workflow_state
             
-            # Get the compiled code generation workflow
-            compiled_workflow = self.get_compiled_code_workflow()
-            
-            # Execute the workflow with appropriate configuration
-            config = {"recursion_limit": 20}  # Lower limit for code generation only
-            
-            logger.debug("Invoking LangGraph code generation workflow")
-            raw_result = compiled_workflow.invoke(workflow_state, config)
-            
-            # Convert result (LangGraph returns AddableValuesDict, not WorkflowState)
-            if isinstance(raw_result, WorkflowState):
-                result = raw_result
-                logger.debug("LangGraph returned WorkflowState directly")
-            else:
-                logger.debug(f"LangGraph returned {type(raw_result)}, converting to WorkflowState")
-                result = self._convert_state_to_workflow_state(raw_result)
+            # Serve a pre-generated challenge when the pool has one for this request
+            pooled = self.challenge_pool.take(workflow_state)
+            if pooled is not None:
+                logger.debug("Serving code challenge from the challenge pool")
+                return self.challenge_pool.apply(workflow_state, pooled)
+
+            # The evaluation calls of a generation queue with it, behind review analysis
+            with llm_priority(GENERATION), llm_user(current_user()):
+                result = self._run_code_generation_graph(workflow_state)
             
             # Validate the result
             if hasattr(result, 'error') and result.error:
@@ -181,6 +186,23 @@ class WorkflowManager:
             workflow_state.error = f"Code generation workflow failed: {str(e)}"
             return workflow_state
 
+    def _run_code_generation_graph(self, workflow_state: WorkflowState) -> WorkflowState:
+        """Run live code generation through the compiled code generation graph."""
+        compiled_workflow = self.get_compiled_code_workflow()
+        
+        # Execute the workflow with appropriate configuration
+        config = {"recursion_limit": 20}  # Lower limit for code generation only
+        
+        logger.debug("Invoking LangGraph code generation workflow")
+        raw_result = compiled_workflow.invoke(workflow_state, config)
+        
+        # Convert result (LangGraph returns AddableValuesDict, not WorkflowState)
+        if isinstance(raw_result, WorkflowState):
+            logger.debug("LangGraph returned WorkflowState directly")
+            return raw_result
+        logger.debug(f"LangGraph returned {type(raw_result)}, converting to WorkflowState")
+        return self._convert_state_to_workflow_state(raw_result)
+
     def execute_review_workflow(self, workflow_state: WorkflowState, student_review: str) -> WorkflowState:
         """
         FIXED: Execute review analysis workflow using dedicated review processing graph.
@@ -212,8 +234,11 @@ class WorkflowManager:
             compiled_workflow = self.get_compiled_review_workflow()
             config = {"recursion_limit": 10}  # Lower limit for review processing only
             
+            # The review nodes are async so independent LLM calls run concurrently
             logger.debug("Invoking LangGraph review processing workflow")
-            raw_result = compiled_workflow.invoke(workflow_state, config)
+            # The user and language are pinned here, the review nodes run on the shared event loop
+            with llm_priority(INTERACTIVE), llm_user(current_user()), use_language(get_current_language()):
+                raw_result = run_coroutine(compiled_workflow.ainvoke(workflow_state, config))
             
             # Convert result
             if isinstance(raw_result, WorkflowState):
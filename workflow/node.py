@@ -6,6 +6,7 @@ code generation and review phases, and clear review_sufficient logic.
 FIXED: No code regeneration during review phase, only review analysis.
 """
 
+import asyncio
 import logging
 import re
 from typing import Dict, Any, List, Tuple, Optional
@@ -13,6 +14,9 @@ from typing import Dict, Any, List, Tuple, Optional
 from state_schema import WorkflowState, CodeSnippet, ReviewAttempt
 from utils.code_utils import extract_both_code_versions, create_regeneration_prompt, get_error_count_from_state
 from utils.language_utils import t
+from utils.async_utils import run_in_thread
+from utils.llm_streaming import stream_llm, CODE_GENERATION
+from analytics.token_usage import current_user, SYSTEM_USER
 import random
 
 # Configure logging
@@ -89,7 +93,8 @@ class WorkflowNodes:
                 selected_errors, _ = self.error_repository.get_errors_for_llm(
                     selected_categories=selected_error_categories,
                     count=required_error_count,
-                    difficulty=difficulty_level
+                    difficulty=difficulty_level,
+                    seed=getattr(state, "error_selection_seed", None)
                 )
 
                 original_error_count = len(selected_errors)
@@ -263,7 +268,7 @@ class WorkflowNodes:
             if hasattr(self.code_generator, 'llm') and self.code_generator.llm:
                 try:
                     # Generate improved code
-                    response = self.code_generator.llm.invoke(feedback_prompt)
+                    response = stream_llm(self.code_generator.llm, feedback_prompt, CODE_GENERATION)
                     
                     # Log the regeneration
                     metadata = {
@@ -361,9 +366,12 @@ class WorkflowNodes:
             state.error = f"Error processing review: {str(e)}"
             return state
     
-    def analyze_review_node(self, state: WorkflowState) -> WorkflowState:
+    async def analyze_review_node(self, state: WorkflowState) -> WorkflowState:
         """
         FIXED: Analyze student review with proper review_sufficient evaluation.
+        
+        Guidance and, when it will be needed, the comparison report only
+        depend on the analysis, so they are requested concurrently.
         """
         try:
             logger.debug("PHASE 2: Starting review analysis")
@@ -398,7 +406,7 @@ class WorkflowNodes:
             
             # Perform the analysis
             try:
-                analysis = evaluator.evaluate_review(
+                analysis = await evaluator.aevaluate_review(
                     code_snippet=state.code_snippet.code,
                     known_problems=known_problems,
                     student_review=student_review
@@ -455,22 +463,48 @@ class WorkflowNodes:
                 state.current_iteration = current_iteration + 1
                 logger.debug(f"analyze_review_node: Incremented to iteration {state.current_iteration}")
             
+            tasks = {}
+            
             # Generate guidance if needed (only if review not sufficient and more iterations allowed)
             if not state.review_sufficient and state.current_iteration <= max_iterations:
-                try:
-                    guidance = evaluator.generate_targeted_guidance(
-                        code_snippet=state.code_snippet.code,
-                        known_problems=known_problems,
-                        student_review=student_review,
-                        review_analysis=analysis,
-                        iteration_count=current_iteration,
-                        max_iterations=max_iterations
-                    )
+                tasks["guidance"] = asyncio.ensure_future(evaluator.agenerate_targeted_guidance(
+                    code_snippet=state.code_snippet.code,
+                    known_problems=known_problems,
+                    student_review=student_review,
+                    review_analysis=analysis,
+                    iteration_count=current_iteration,
+                    max_iterations=max_iterations
+                ))
+            
+            # Start the comparison report speculatively when it will be requested next:
+            # the review is complete, or this was the last allowed attempt
+            report_inputs = self._get_comparison_report_inputs(state)
+            if report_inputs and self._comparison_report_expected(state, current_iteration, max_iterations):
+                tasks["report"] = asyncio.ensure_future(evaluator.agenerate_comparison_report(*report_inputs))
+            
+            try:
+                results = dict(zip(tasks, await asyncio.gather(*tasks.values(), return_exceptions=True)))
+            finally:
+                for task in tasks.values():
+                    if not task.done():
+                        task.cancel()
+            
+            if "guidance" in results:
+                guidance = results["guidance"]
+                if isinstance(guidance, BaseException):
+                    logger.error(f"Failed to generate guidance: {str(guidance)}")
+                    latest_review.targeted_guidance = None
+                else:
                     latest_review.targeted_guidance = guidance
                     logger.debug("analyze_review_node: Generated targeted guidance")
-                except Exception as guidance_error:
-                    logger.error(f"Failed to generate guidance: {str(guidance_error)}")
-                    latest_review.targeted_guidance = None
+            
+            if "report" in results:
+                report = results["report"]
+                if isinstance(report, BaseException):
+                    logger.error(f"Failed to precompute comparison report: {str(report)}")
+                else:
+                    state.comparison_report = report
+                    logger.debug("analyze_review_node: Precomputed comparison report")
             
             logger.debug(f"PHASE 2: Analysis completed successfully. Sufficient: {state.review_sufficient}")
             return state
@@ -484,8 +518,13 @@ class WorkflowNodes:
     # PHASE 3: FINAL REPORT GENERATION (UNCHANGED)
     # =================================================================
 
-    def generate_comparison_report_node(self, state: WorkflowState) -> WorkflowState:
-        """Enhanced comparison report node with badge processing."""
+    async def generate_comparison_report_node(self, state: WorkflowState) -> WorkflowState:
+        """
+        Enhanced comparison report node with badge processing.
+        
+        The report LLM call and the badge database work are independent and
+        run concurrently.
+        """
         try:
             logger.debug("PHASE 3: Generating comparison report with badge processing")
             
@@ -495,48 +534,25 @@ class WorkflowNodes:
                 state.comparison_report = None
                 state.current_step = "complete"
                 return state
-                    
-            # Get latest review
-            latest_review = state.review_history[-1]
             
-            # Generate comparison report if not already generated
+            # Generate comparison report if not already generated (e.g. precomputed during analysis)
+            report_task = None
             if not hasattr(state, 'comparison_report') or not state.comparison_report:
-                if hasattr(state, 'evaluation_result') and state.evaluation_result:
-                    found_errors = state.evaluation_result.get(t('found_errors'), [])
-                    
-                    converted_history = []
-                    for review in state.review_history:
-                        converted_history.append({
-                            "iteration_number": review.iteration_number,
-                            "student_comment": review.student_review,
-                            "review_analysis": review.analysis,
-                            "targeted_guidance": getattr(review, 'targeted_guidance', None)
-                        })
-                            
-                    if hasattr(self, "evaluator") and self.evaluator:
-                        try:
-                            state.comparison_report = self.evaluator.generate_comparison_report(
-                                found_errors,
-                                latest_review.analysis,
-                                converted_history
-                            )
-                            logger.debug("PHASE 3: Generated comparison report successfully")
-                        except Exception as report_error:
-                            logger.error(f"Failed to generate comparison report: {str(report_error)}")
-                            state.comparison_report = None
-            
-            # === NEW: BADGE PROCESSING ===
+                report_inputs = self._get_comparison_report_inputs(state)
+                if report_inputs and hasattr(self, "evaluator") and self.evaluator:
+                    report_task = asyncio.ensure_future(self.evaluator.agenerate_comparison_report(*report_inputs))
+            
             try:
-                import streamlit as st
-                if hasattr(st, 'session_state') and 'auth' in st.session_state:
-                    user_id = st.session_state.auth.get('user_id')
-                    
-                    if user_id and user_id != 'demo_user':
+                # === NEW: BADGE PROCESSING ===
+                try:
+                    # The node runs on the shared event loop, which has no session; the caller pinned the user
+                    user_id = current_user()
+                    if user_id not in (SYSTEM_USER, 'demo_user'):
                         from workflow.badge_integration import WorkflowBadgeIntegrator
                         
                         badge_integrator = WorkflowBadgeIntegrator()
-                        badge_result = badge_integrator.process_review_completion_with_badges(
-                            state, user_id
+                        badge_result = await run_in_thread(
+                            badge_integrator.process_review_completion_with_badges, state, user_id
                         )
                         
                         if badge_result.get('success'):
@@ -546,9 +562,20 @@ class WorkflowNodes:
                                 'total_badges_awarded': badge_result.get('total_badges_awarded', 0)
                             }
                             logger.info(f"Badge processing completed: {badge_result.get('total_badges_awarded', 0)} badges awarded")
-            except Exception as badge_error:
-                logger.error(f"Error in badge processing: {str(badge_error)}")
-            # === END BADGE PROCESSING ===
+                except Exception as badge_error:
+                    logger.error(f"Error in badge processing: {str(badge_error)}")
+                # === END BADGE PROCESSING ===
+                
+                if report_task is not None:
+                    try:
+                        state.comparison_report = await report_task
+                        logger.debug("PHASE 3: Generated comparison report successfully")
+                    except Exception as report_error:
+                        logger.error(f"Failed to generate comparison report: {str(report_error)}")
+                        state.comparison_report = None
+            finally:
+                if report_task is not None and not report_task.done():
+                    report_task.cancel()
             
             # Update state to complete
             state.current_step = "complete"
@@ -565,6 +592,32 @@ class WorkflowNodes:
     # HELPER METHODS (UNCHANGED)
     # =================================================================
 
+    def _get_comparison_report_inputs(self, state: WorkflowState) -> Optional[Tuple[List[Any], Dict[str, Any], List[Dict[str, Any]]]]:
+        """Collect the arguments for generate_comparison_report, or None if evaluation results are missing."""
+        if not getattr(state, 'evaluation_result', None) or not getattr(state, 'review_history', None):
+            return None
+        
+        found_errors = state.evaluation_result.get(t('found_errors'), [])
+        converted_history = []
+        for review in state.review_history:
+            converted_history.append({
+                "iteration_number": review.iteration_number,
+                "student_comment": review.student_review,
+                "review_analysis": review.analysis,
+                "targeted_guidance": getattr(review, 'targeted_guidance', None)
+            })
+        return found_errors, state.review_history[-1].analysis, converted_history
+    
+    @staticmethod
+    def _comparison_report_expected(state: WorkflowState, current_iteration: int, max_iterations: int) -> bool:
+        """Check whether the comparison report will be requested right after this analysis."""
+        if getattr(state, 'comparison_report', None):
+            return False
+        if current_iteration >= max_iterations:
+            return True
+        from workflow.conditions import WorkflowConditions
+        return WorkflowConditions.should_continue_review_or_complete(state) == "generate_comparison_report"
+    
     def _extract_known_problems_for_analysis(self, state: WorkflowState) -> List[str]:
         """Helper to extract known problems from state."""
         known_problems = []